@@ -1,3 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from .cache import invalidate_documents
+from .models import Conversation
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ("conversation_id", "created_at", "updated_at")
+    search_fields = ("conversation_id",)
+    readonly_fields = ("created_at", "updated_at")
+    actions = ["invalidate_cached_documents"]
+
+    @admin.action(description="Invalidate cached documents of the selected conversations' document types")
+    def invalidate_cached_documents(self, request, queryset):
+        document_types = {snapshot.get("document_type") for snapshot in queryset.values_list("snapshot", flat=True)}
+        count = sum(invalidate_documents(document_type) for document_type in document_types if document_type)
+        self.message_user(request, f"Dropped {count} cached documents", messages.SUCCESS)
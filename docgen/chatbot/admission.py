@@ -0,0 +1,194 @@
+"""
+Admission control for LLM agent calls.
+
+Every RealLLM call takes a slot from the process-wide AdmissionScheduler first. The
+scheduler bounds concurrent calls globally and per user, admits waiting interactive
+calls (questions, field mapping) before document generation, keeps some global slots
+for interactive calls only, and tells queued callers their position so the socket
+can show "you're in queue, position N".
+
+Who is calling and at which priority is carried by a context variable set by the
+consumer, so it reaches every call made while handling a message, including tasks
+started from it.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .metrics import QUEUE_WAIT
+
+# Concurrent LLM calls in this process, and per user
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "32"))
+LLM_MAX_CONCURRENT_PER_USER = int(os.getenv("LLM_MAX_CONCURRENT_PER_USER", "4"))
+
+# Global slots generation calls may never take, so interactive turns are not starved by long documents
+LLM_INTERACTIVE_RESERVED = int(os.getenv("LLM_INTERACTIVE_RESERVED", "4"))
+
+# Seconds between queue position checks for a waiting call
+QUEUE_POSITION_INTERVAL = 0.5
+
+# Priorities, lower first
+INTERACTIVE = 0
+GENERATION = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", GENERATION: "generation"}
+
+# Called with the queue position while waiting (1 = next), then with 0 once admitted after waiting
+QueueCallback = Callable[[int], Awaitable[None]]
+
+
+@dataclass
+class CallContext:
+    """Who an LLM call is made for."""
+
+    user_id: str = "anonymous"
+    priority: int = INTERACTIVE
+    on_queued: Optional[QueueCallback] = None
+
+
+CALL_CONTEXT: contextvars.ContextVar[CallContext] = contextvars.ContextVar("llm_call_context", default=CallContext())
+
+
+def set_call_context(user_id: str, priority: int = INTERACTIVE, on_queued: Optional[QueueCallback] = None):
+    """Attribute the LLM calls made from the current context (and tasks started from it) to a user."""
+    CALL_CONTEXT.set(CallContext(str(user_id), priority, on_queued))
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    user_id: str = field(compare=False)
+    admitted: asyncio.Future = field(compare=False)
+
+
+class AdmissionScheduler:
+    """Priority admission with global and per-user concurrency limits."""
+
+    def __init__(
+        self,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_per_user: int = LLM_MAX_CONCURRENT_PER_USER,
+        interactive_reserved: int = LLM_INTERACTIVE_RESERVED,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent: Calls running at once in this process
+            max_per_user: Calls running at once for one user
+            interactive_reserved: Global slots only interactive calls may use
+        """
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.interactive_reserved = min(interactive_reserved, max_concurrent - 1)
+        self.active = 0
+        self.active_by_user: Dict[str, int] = {}
+        self.waiting: List[_Waiter] = []
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.peak_waiting = 0
+        self._sequence = itertools.count()
+
+    def _has_room(self, user_id: str, priority: int) -> bool:
+        limit = self.max_concurrent - (self.interactive_reserved if priority != INTERACTIVE else 0)
+        return self.active < limit and self.active_by_user.get(user_id, 0) < self.max_per_user
+
+    def _admit(self, user_id: str, priority: int):
+        self.active += 1
+        self.active_by_user[user_id] = self.active_by_user.get(user_id, 0) + 1
+        self.admitted[PRIORITY_NAMES[priority]] += 1
+
+    def _release(self, user_id: str):
+        self.active -= 1
+        remaining = self.active_by_user[user_id] - 1
+        if remaining:
+            self.active_by_user[user_id] = remaining
+        else:
+            del self.active_by_user[user_id]
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit waiting calls in priority order while they fit; a blocked user does not hold up others."""
+        for waiter in sorted(self.waiting):
+            if not waiter.admitted.done() and self._has_room(waiter.user_id, waiter.priority):
+                self.waiting.remove(waiter)
+                self._admit(waiter.user_id, waiter.priority)
+                waiter.admitted.set_result(True)
+
+    def position(self, waiter: _Waiter) -> int:
+        """Place of a waiting call in the queue, 1 being next."""
+        return sum(1 for other in self.waiting if other < waiter) + 1
+
+    @asynccontextmanager
+    async def slot(self, context: Optional[CallContext] = None) -> AsyncIterator[None]:
+        """
+        Hold a call slot for the duration of the block, waiting in the queue if needed.
+
+        Args:
+            context: Caller attribution; defaults to the current CALL_CONTEXT
+        """
+        context = context or CALL_CONTEXT.get()
+        await self._acquire(context)
+        try:
+            yield
+        finally:
+            self._release(context.user_id)
+
+    async def _acquire(self, context: CallContext):
+        admitted = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(context.priority, next(self._sequence), context.user_id, admitted)
+        self.waiting.append(waiter)
+        self._dispatch()
+        if admitted.done():
+            QUEUE_WAIT[PRIORITY_NAMES[context.priority]].observe(0.0)
+            return
+
+        self.queued[PRIORITY_NAMES[context.priority]] += 1
+        self.peak_waiting = max(self.peak_waiting, len(self.waiting))
+        queued_at = perf_counter()
+        reported = None
+        try:
+            while True:
+                position = self.position(waiter)
+                if context.on_queued is not None and position != reported:
+                    reported = position
+                    await context.on_queued(position)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.admitted), QUEUE_POSITION_INTERVAL)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            QUEUE_WAIT[PRIORITY_NAMES[context.priority]].observe(perf_counter() - queued_at)
+            if context.on_queued is not None:
+                await context.on_queued(0)
+        except BaseException:
+            if waiter.admitted.done():
+                self._release(context.user_id)  # admitted just as the caller gave up
+            else:
+                waiter.admitted.cancel()
+                self.waiting.remove(waiter)
+                self._dispatch()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Get active and waiting calls, and how many calls of each priority were admitted or had to queue."""
+        waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in self.waiting:
+            waiting[PRIORITY_NAMES[waiter.priority]] += 1
+        stats = {"active": self.active, "waiting": len(self.waiting), "peak_waiting": self.peak_waiting}
+        for name in PRIORITY_NAMES.values():
+            stats[f"waiting_{name}"] = waiting[name]
+            stats[f"admitted_{name}"] = self.admitted[name]
+            stats[f"queued_{name}"] = self.queued[name]
+        return stats
+
+
+# Admission for every LLM call made by this process
+LLM_SCHEDULER = AdmissionScheduler()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: per-chunk cost of accumulating a streamed document.
+
+Compares repeated string concatenation held on an object (as a long-lived
+document reference defeats CPython's in-place concat optimisation) with
+DocumentBuffer, at growing document sizes.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_document_buffer
+"""
+
+from time import perf_counter
+
+from ..streaming import DocumentBuffer
+
+CHUNK = "The Tenant shall pay rent monthly. "  # ~ one streamed delta
+CHUNKS_MEASURED = 2000
+DOCUMENT_SIZES = [10_000, 100_000, 500_000, 2_000_000]
+
+
+class StringHolder:
+    """Mimics a document string kept on a long-lived object."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def per_chunk_string(prefill: str) -> float:
+    holder = StringHolder(prefill)
+    start = perf_counter()
+    for _ in range(CHUNKS_MEASURED):
+        holder.text += CHUNK
+        _ = holder.text[-1000:]  # completion check window
+    return (perf_counter() - start) / CHUNKS_MEASURED
+
+
+def per_chunk_buffer(prefill: str) -> float:
+    buffer = DocumentBuffer()
+    buffer.append(prefill)
+    start = perf_counter()
+    for _ in range(CHUNKS_MEASURED):
+        buffer.append(CHUNK)
+        _ = buffer.tail(1000)  # completion check window
+    return (perf_counter() - start) / CHUNKS_MEASURED
+
+
+def main():
+    print(f"{'document size':>14} | {'str += (us/chunk)':>18} | {'DocumentBuffer (us/chunk)':>26}")
+    print("-" * 66)
+    for size in DOCUMENT_SIZES:
+        prefill = "x" * size
+        string_cost = per_chunk_string(prefill) * 1e6
+        buffer_cost = per_chunk_buffer(prefill) * 1e6
+        print(f"{size:>14,} | {string_cost:>18.2f} | {buffer_cost:>26.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: WebSocket frames and CPU per document with and without frame coalescing.
+
+Streams a synthetic ~15k-token document through DocumentAgentConsumer.stream_document
+with a fake socket that JSON-encodes every frame, once per flush policy.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_frame_batching
+"""
+
+import asyncio
+import json
+import logging
+from time import perf_counter, process_time
+from typing import AsyncGenerator
+
+from .. import consumers
+from ..llm import DocumentOrchestrator, RealLLM
+from ..schemas import DocumentContext
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+
+DELTAS = 15000  # roughly one delta per output token
+DELTA = "word "
+POLICIES = [
+    ("per-delta (previous behaviour)", 0, 0),
+    ("coalesced 512 chars / 16 ms", 512, 16),
+    ("coalesced 2048 chars / 50 ms", 2048, 50),
+]
+
+
+class SyntheticStreamLLM(RealLLM):
+    """Streams a fixed number of small deltas, yielding to the loop in small bursts."""
+
+    def __init__(self):
+        super().__init__("test")
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        for i in range(DELTAS):
+            if i % 8 == 0:
+                await asyncio.sleep(0)
+            yield DELTA
+
+    async def verify_doc(self, text: str) -> bool:
+        return True
+
+
+async def run_policy(max_chars: int, max_latency_ms: float):
+    consumers.STREAM_FLUSH_MAX_CHARS = max_chars
+    consumers.STREAM_FLUSH_MAX_LATENCY_MS = max_latency_ms
+
+    consumer = consumers.DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.generation_tasks = {}
+    consumer.remote_generations = set()
+    consumer.conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    frames = {"count": 0, "bytes": 0}
+
+    async def send_json(content, close=False):
+        encoded = json.dumps(content)
+        if content.get("type") == "generate_document":
+            frames["count"] += 1
+            frames["bytes"] += len(encoded)
+
+    consumer.send_json = send_json
+    orchestrator = DocumentOrchestrator(SyntheticStreamLLM())
+    orchestrator.fields = {"party_a": "Alice"}
+    orchestrator.state = "generating"
+    consumer.orchestrators = {"bench": orchestrator}
+
+    wall_start, cpu_start = perf_counter(), process_time()
+    await consumer.stream_document("bench")
+    wall, cpu = perf_counter() - wall_start, process_time() - cpu_start
+    return frames["count"], frames["bytes"], wall, cpu
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    print(f"{'policy':<32} | {'frames':>7} | {'frames/sec':>10} | {'CPU ms/doc':>10} | {'bytes sent':>10}")
+    print("-" * 82)
+    for name, max_chars, max_latency_ms in POLICIES:
+        count, size, wall, cpu = asyncio.run(run_policy(max_chars, max_latency_ms))
+        print(f"{name:<32} | {count:>7} | {count / wall:>10.0f} | {cpu * 1000:>10.1f} | {size:>10,}")
+
+
+if __name__ == "__main__":
+    main()
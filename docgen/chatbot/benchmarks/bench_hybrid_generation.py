@@ -0,0 +1,83 @@
+"""
+Benchmark: output tokens and time to complete for full vs hybrid template + LLM generation.
+
+Both paths run through the real RealLLM/DocumentOrchestrator streaming code for each
+templated document type. The generation and section agents use FunctionModel streams
+with a fixed per-token latency, and every drafted clause is TOKENS_PER_CLAUSE tokens
+long, so a full generation writes the same document the hybrid path assembles.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_hybrid_generation
+"""
+
+import asyncio
+import re
+from time import perf_counter
+from typing import Dict, Tuple
+
+from pydantic_ai.models.function import FunctionModel
+
+from ..constants.fields import DOCUMENT_FIELDS
+from ..hybrid import TEMPLATES, DocumentTemplate
+from ..llm import DocumentOrchestrator, RealLLM
+
+TOKENS_PER_CLAUSE = 150
+TOKEN_LATENCY = 0.002  # seconds per streamed token
+
+
+def drafted_clause(heading: str) -> str:
+    return f"## {heading}\n\n" + " ".join(["clause"] * (TOKENS_PER_CLAUSE - 1)) + "."
+
+
+def full_document(template: DocumentTemplate, fields: Dict[str, str]) -> str:
+    """The document the hybrid path produces, for the generation agent to write token by token."""
+    sections = [
+        drafted_clause(clause.heading) if clause.generated else template.render_clause(index, fields)
+        for index, clause in enumerate(template.clauses)
+    ]
+    return f"# {template.title}\n\n" + "\n\n".join(sections)
+
+
+async def token_stream(text: str):
+    for token in re.findall(r"\S+\s*", text):
+        await asyncio.sleep(TOKEN_LATENCY)
+        yield token
+
+
+async def measure(template: DocumentTemplate, strategy: str) -> Tuple[float, int, int]:
+    fields = {field: f"<{field}>" for field in DOCUMENT_FIELDS[template.document_type]}
+
+    async def single_stream(messages, agent_info):
+        async for token in token_stream(full_document(template, fields)):
+            yield token
+
+    async def section_stream(messages, agent_info):
+        heading = re.search(r'Write section "([^"]+)"', str(messages[-1])).group(1)
+        async for token in token_stream(drafted_clause(heading)):
+            yield token
+
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=single_stream)
+    llm.section_agent.model = FunctionModel(stream_function=section_stream)
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = fields
+    orchestrator.document_type = template.document_type
+    orchestrator.state = "generating"
+    orchestrator.generation_strategy = strategy
+    started = perf_counter()
+    async for _ in orchestrator.generate_document():
+        pass
+    return perf_counter() - started, orchestrator.usage.output_tokens, len(orchestrator.document)
+
+
+def main():
+    print(f"{'document type':>32} | {'strategy':>8} | {'complete (ms)':>13} | {'output tokens':>13} | {'chars':>6}")
+    print("-" * 86)
+    for template in TEMPLATES.values():
+        for strategy in ("single", "hybrid"):
+            total, tokens, chars = asyncio.run(measure(template, strategy))
+            print(f"{template.document_type:>32} | {strategy:>8} | {total * 1000:>13.1f} | {tokens:>13} | {chars:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: keyword document type detection over a large corpus of prompts.
+
+Compares the previous detector (substring `in` checks, first matching type wins) with
+the precompiled word-boundary detector, on a generated corpus of labelled prompts that
+mixes clear requests, inflected keywords, words that contain a keyword ("network",
+"parent") and prompts with no keyword. Reports throughput and accuracy.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_keyword_detection
+"""
+
+import random
+from time import perf_counter
+from typing import Callable, List, Tuple
+
+from ..constants.fields import DOCUMENT_KEYWORDS, detect_document_type_by_keywords
+
+CORPUS_SIZE = 50_000
+GENERAL = "General Contract"
+
+# (prompt template, expected type); {filler} adds keyword-free context around the request
+TEMPLATES = [
+    ("I want to buy a used car from my neighbour {filler}", "Purchase Agreement"),
+    ("We are selling our family home {filler}", "Purchase Agreement"),
+    ("Need a lease for the flat above my shop {filler}", "Rental Agreement"),
+    ("My tenant is moving in next week {filler}", "Rental Agreement"),
+    ("Consulting services for a retail client {filler}", "Service Contract"),
+    ("Freelance design contract work for a bakery {filler}", "Service Contract"),
+    ("Hiring a warehouse employee {filler}", "Employment Contract"),
+    ("Offer letter for a new position on my team {filler}", "Employment Contract"),
+    ("Keep our proprietary recipes confidential with an NDA {filler}", "Non-Disclosure Agreement (NDA)"),
+    ("Two friends forming a joint venture {filler}", "Partnership Agreement"),
+    ("Borrowing money from my sister {filler}", "Loan Agreement"),
+    ("Lending $5,000 to a colleague {filler}", "Loan Agreement"),
+    ("Setting up the office network for a parent company {filler}", GENERAL),
+    ("An agreement about the framework for transparent reporting {filler}", GENERAL),
+    ("Something simple to sign with my neighbour {filler}", GENERAL),
+]
+FILLERS = [
+    "",
+    "in Texas",
+    "starting next month, please keep it short",
+    "for a small business in Ohio with two owners",
+    "as soon as possible, we already agreed on most of the details over email",
+]
+
+
+def substring_detector(user_prompt: str) -> str:
+    """The detector as it was before precompiling: first type with any keyword as a substring."""
+    prompt_lower = user_prompt.lower()
+    for doc_type, keywords in DOCUMENT_KEYWORDS.items():
+        if doc_type == GENERAL:
+            continue
+        if any(keyword in prompt_lower for keyword in keywords):
+            return doc_type
+    return GENERAL
+
+
+def build_corpus() -> List[Tuple[str, str]]:
+    rng = random.Random(19)
+    corpus = []
+    for _ in range(CORPUS_SIZE):
+        template, expected = rng.choice(TEMPLATES)
+        prompt = template.format(filler=rng.choice(FILLERS)).strip()
+        corpus.append((prompt.upper() if rng.random() < 0.1 else prompt, expected))
+    return corpus
+
+
+def measure(detector: Callable[[str], str], corpus: List[Tuple[str, str]]) -> Tuple[float, float]:
+    start = perf_counter()
+    detected = [detector(prompt) for prompt, _ in corpus]
+    elapsed = perf_counter() - start
+    correct = sum(result == expected for result, (_, expected) in zip(detected, corpus))
+    return len(corpus) / elapsed, correct / len(corpus)
+
+
+def main():
+    corpus = build_corpus()
+    print(f"{len(corpus)} prompts")
+    print(f"{'detector':>12} | {'prompts/s':>10} | {'accuracy':>8}")
+    print("-" * 36)
+    for name, detector in (("substring", substring_detector), ("precompiled", detect_document_type_by_keywords)):
+        throughput, accuracy = measure(detector, corpus)
+        print(f"{name:>12} | {throughput:>10,.0f} | {accuracy:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
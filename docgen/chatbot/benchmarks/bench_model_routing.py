@@ -0,0 +1,155 @@
+"""
+Benchmark: collecting-turn latency per model routing profile on recorded conversations.
+
+Replays the conversations in recorded_conversations.json through DocumentOrchestrator
+with every agent running on a simulated model whose latency depends on the model it
+is routed to (time to first token plus time per output token, scaled down 10x). The
+fast model occasionally stalls, which the fallback profile covers by switching to the
+flagship model after a short deadline. Reports p50/p95/max turn latency per profile.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_model_routing
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import random
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from ..admission import LLM_SCHEDULER, set_call_context
+from ..llm import DocumentOrchestrator, RealLLM
+from ..metrics import AGENT_CALLS, LatencyHistogram
+from ..resilience import CIRCUIT_BREAKERS
+from ..model_routing import ModelRoute, resolve_routes
+
+CONVERSATIONS = json.loads((Path(__file__).parent / "recorded_conversations.json").read_text())
+REPLAYS = 4  # times each recorded conversation is replayed, concurrently
+
+FLAGSHIP = "bench:flagship"
+FAST = "bench:fast"
+
+# (seconds to first token, seconds per output token), 10x faster than typical provider numbers
+MODEL_LATENCY = {FLAGSHIP: (0.12, 0.0017), FAST: (0.05, 0.0007)}
+FAST_STALL_RATE = 0.04  # fast-model calls that stall
+STALL_SECONDS = 1.5
+FALLBACK_AFTER = 0.3
+
+PROFILES = {
+    "single": dict(profile="single"),
+    "tiered": dict(profile="tiered"),
+    "tiered+fallback": dict(profile="tiered", fallback_model=FLAGSHIP, fallback_after=FALLBACK_AFTER),
+}
+
+
+def turn_for(messages: List[ModelMessage]) -> Dict:
+    """Find the recorded turn whose user message is in the prompt."""
+    text = " ".join(
+        part.content for message in messages for part in message.parts if isinstance(part, UserPromptPart)
+    )
+    for conversation in CONVERSATIONS:
+        for turn in conversation["turns"]:
+            if turn["user"] in text:
+                return {"conversation": conversation, **turn}
+    raise LookupError("prompt matches no recorded turn")
+
+
+def canned_output(messages: List[ModelMessage], agent_info: AgentInfo):
+    """Recorded model answer for an agent call, chosen by the agent's output schema."""
+    if not agent_info.output_tools:
+        return "True"
+    schema = agent_info.output_tools[0].parameters_json_schema.get("properties", {})
+    if "document_type" in schema:
+        conversation = turn_for(messages)["conversation"]
+        return {"fields": conversation["fields"], "document_type": conversation["document_type"]}
+    if "question" in schema:
+        return {"acknowledgment": "Thanks.", "question": "Could you share the next details?", "fields_requested": []}
+    fills = turn_for(messages)["fills"]
+    return {"response": [{"field_name": k, "field_value": v, "confidence": 0.95} for k, v in fills.items()]}
+
+
+def simulated_model(model: str, rng: random.Random) -> FunctionModel:
+    """Offline model answering with recorded outputs after the model's latency; shared by all agents."""
+    first_token, per_token = MODEL_LATENCY[model]
+
+    async def respond(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        output = canned_output(messages, agent_info)
+        text = output if isinstance(output, str) else json.dumps(output)
+        delay = first_token * rng.lognormvariate(0, 0.3) + per_token * len(text) / 4
+        if model == FAST and rng.random() < FAST_STALL_RATE:
+            delay += STALL_SECONDS
+        await asyncio.sleep(delay)
+        if isinstance(output, str):
+            return ModelResponse(parts=[TextPart(output)])
+        return ModelResponse(parts=[ToolCallPart(agent_info.output_tools[0].name, output)])
+
+    return FunctionModel(respond, model_name=model)
+
+
+def build_llm(name: str, rng: random.Random) -> RealLLM:
+    """RealLLM with the profile's routes, every model replaced by its simulation."""
+    routes = resolve_routes(FLAGSHIP, fast_model=FAST, env={}, **PROFILES[name])
+    # Agents are built on the offline test model, then pointed at the simulated routed models
+    offline = {agent: ModelRoute("test", route.fallback, route.fallback_after) for agent, route in routes.items()}
+    llm = RealLLM("test", routes=offline)
+    models = {model: simulated_model(model, rng) for model in MODEL_LATENCY}
+    for agent, route in routes.items():
+        getattr(llm, agent).model = models[route.model]
+    # Fallback models are normally built from their names on first use
+    llm._fallback_models.update(models)
+    return llm
+
+
+async def replay(llm: RealLLM, user_id: str, conversation: Dict, histogram: LatencyHistogram):
+    # Each replay is its own user, so the per-user admission limit does not serialise them
+    set_call_context(user_id)
+    orchestrator = DocumentOrchestrator(llm)
+    turns = conversation["turns"]
+    started = perf_counter()
+    await orchestrator.start(turns[0]["user"], use_cache=False)
+    await orchestrator.next_question()
+    histogram.observe(perf_counter() - started)
+    for turn in turns[1:]:
+        if orchestrator.state != "collecting":
+            break
+        started = perf_counter()
+        await orchestrator.answer_and_ask(turn["user"])
+        histogram.observe(perf_counter() - started)
+
+
+async def measure(name: str) -> LatencyHistogram:
+    rng = random.Random(11)
+    CIRCUIT_BREAKERS.clear()
+    histogram = LatencyHistogram()
+    llm = build_llm(name, rng)
+    replays = [conversation for conversation in CONVERSATIONS for _ in range(REPLAYS)]
+    await asyncio.gather(*(replay(llm, f"user-{i}", c, histogram) for i, c in enumerate(replays)))
+    return histogram
+
+
+def main():
+    # Only model latency is compared here; admission queueing is covered by its own tests
+    LLM_SCHEDULER.max_concurrent = 1000
+    print(f"{'profile':>16} | {'turns':>6} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'max (ms)':>9} | {'fallbacks':>9}")
+    print("-" * 74)
+    for name in PROFILES:
+        AGENT_CALLS.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            histogram = asyncio.run(measure(name))
+        stats = histogram.stats()
+        worst = histogram.percentile(100)
+        fallbacks = sum(agent["model_fallbacks"] for agent in AGENT_CALLS.stats().values())
+        print(
+            f"{name:>16} | {stats['count']:>6} | {stats['p50'] * 1000:>9.1f} | {stats['p95'] * 1000:>9.1f} | "
+            f"{worst * 1000:>9.1f} | {fallbacks:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
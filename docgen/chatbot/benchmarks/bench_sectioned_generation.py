@@ -0,0 +1,95 @@
+"""
+Benchmark: time to first chunk and time to complete for single-stream vs section-wise generation.
+
+Both paths run through the real RealLLM/DocumentOrchestrator streaming code. The
+generation and section agents use FunctionModel streams with a fixed per-token
+latency and the TOC agent uses TestModel, so the numbers reflect the generation
+strategy rather than any provider.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_sectioned_generation
+"""
+
+import asyncio
+import re
+from time import perf_counter
+from typing import Optional, Tuple
+
+from pydantic_ai.models.function import FunctionModel
+from pydantic_ai.models.test import TestModel
+
+from ..llm import DocumentOrchestrator, RealLLM
+
+SECTIONS = 8
+TOKENS_PER_SECTION = 150
+TOKEN_LATENCY = 0.002  # seconds per streamed token
+TOC_LATENCY = 0.150  # seconds for the TOC agent to plan the document
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+
+HEADINGS = [f"{index + 1}. SECTION {index + 1}" for index in range(SECTIONS)]
+OUTLINE = {"title": "SERVICE AGREEMENT", "sections": [{"heading": heading, "brief": ""} for heading in HEADINGS]}
+
+
+def section_text(heading: str) -> str:
+    words = " ".join(["clause"] * (TOKENS_PER_SECTION - 1))
+    if heading == HEADINGS[-1]:
+        return f"## {heading}\n\nIN WITNESS WHEREOF {words}.\n\nName: A\nDate: ____\n\nName: B\nDate: ____"
+    return f"## {heading}\n\n{words}."
+
+
+async def token_stream(text: str):
+    for token in re.findall(r"\S+\s*", text):
+        await asyncio.sleep(TOKEN_LATENCY)
+        yield token
+
+
+async def single_stream(messages, agent_info):
+    async for token in token_stream("\n\n".join(section_text(heading) for heading in HEADINGS)):
+        yield token
+
+
+async def section_stream(messages, agent_info):
+    heading = re.search(r'Write section "([^"]+)"', str(messages[-1])).group(1)
+    async for token in token_stream(section_text(heading)):
+        yield token
+
+
+class PlanningTestModel(TestModel):
+    """TestModel returning the outline after a fixed planning latency."""
+
+    async def request(self, *args, **kwargs):
+        await asyncio.sleep(TOC_LATENCY)
+        return await super().request(*args, **kwargs)
+
+
+async def measure(strategy: str, concurrency: Optional[int] = None) -> Tuple[float, float, int]:
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=single_stream)
+    llm.section_agent.model = FunctionModel(stream_function=section_stream)
+    llm.toc_agent.model = PlanningTestModel(custom_output_args=OUTLINE)
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"client_name": "A", "provider_name": "B"}
+    orchestrator.document_type = "Service Agreement"
+    orchestrator.state = "generating"
+    orchestrator.generation_strategy = strategy
+    orchestrator.section_concurrency = concurrency or 1
+    started = perf_counter()
+    first_chunk = None
+    async for _ in orchestrator.generate_document():
+        if first_chunk is None:
+            first_chunk = perf_counter() - started
+    return first_chunk, perf_counter() - started, len(orchestrator.document)
+
+
+def main():
+    print(f"{'strategy':>14} | {'first chunk (ms)':>16} | {'complete (ms)':>13} | {'chars':>6}")
+    print("-" * 60)
+    runs = [("single", None)] + [("sections", level) for level in CONCURRENCY_LEVELS]
+    for strategy, concurrency in runs:
+        first_chunk, total, chars = asyncio.run(measure(strategy, concurrency))
+        label = strategy if concurrency is None else f"sections x{concurrency}"
+        print(f"{label:>14} | {first_chunk * 1000:>16.1f} | {total * 1000:>13.1f} | {chars:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: collecting-turn latency with and without pipelined next-question drafting.
+
+Simulates conversations against an LLM stub with jittered model latencies, where some
+replies only answer part of the question (so the draft has to be regenerated), and
+reports p50/p95 turn latency for the sequential and pipelined modes.
+
+Run from the docgen directory:
+    python -m chatbot.benchmarks.bench_turn_pipelining
+"""
+
+import asyncio
+import random
+from time import perf_counter
+from typing import Dict, List
+
+from ..llm import DocumentOrchestrator, RealLLM
+from ..metrics import DRAFT_OUTCOMES, LatencyHistogram
+
+CONVERSATIONS = 40
+FIELDS = ["landlord_name", "tenant_name", "rental_period", "lease_terms", "pets_policy", "utilities", "parking"]
+MAPPING_LATENCY = 0.060  # median seconds per field_mapping_agent call
+QUESTION_LATENCY = 0.050  # median seconds per field_request_agent call
+PARTIAL_ANSWER_RATE = 0.2  # replies that only fill one of the two requested fields
+
+
+def jitter(median: float) -> float:
+    return median * random.lognormvariate(0, 0.35)
+
+
+class SimulatedLLM(RealLLM):
+    """LLM stub with realistic-shaped latencies."""
+
+    def __init__(self):
+        super().__init__("test")
+
+    async def map_user_input_to_fields(self, user_input: str, missing_fields: List[str]) -> Dict[str, str]:
+        await asyncio.sleep(jitter(MAPPING_LATENCY))
+        answered = 1 if random.random() < PARTIAL_ANSWER_RATE else 2
+        return {name: user_input for name in missing_fields[:answered]}
+
+    async def ask_for_field(self, missing_fields, fields_to_request, user_last_action="", greet_user=False, user_goal=""):
+        await asyncio.sleep(jitter(QUESTION_LATENCY))
+        return f"Please provide {', '.join(fields_to_request)}"
+
+
+async def run_conversation(llm: SimulatedLLM, pipelined: bool, histogram: LatencyHistogram):
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {name: None for name in FIELDS}
+    orchestrator.state = "collecting"
+    orchestrator.user_greeted = True
+    orchestrator.requested_fields = FIELDS[:2]
+    while orchestrator.state == "collecting":
+        started = perf_counter()
+        await orchestrator.answer_and_ask("some details about the lease", pipelined=pipelined)
+        histogram.observe(perf_counter() - started)
+
+
+async def measure(pipelined: bool) -> LatencyHistogram:
+    random.seed(7)
+    histogram = LatencyHistogram()
+    llm = SimulatedLLM()
+    await asyncio.gather(*(run_conversation(llm, pipelined, histogram) for _ in range(CONVERSATIONS)))
+    return histogram
+
+
+def main():
+    print(f"{'mode':>10} | {'turns':>6} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    print("-" * 44)
+    for pipelined in (False, True):
+        stats = asyncio.run(measure(pipelined)).stats()
+        mode = "pipelined" if pipelined else "sequential"
+        print(f"{mode:>10} | {stats['count']:>6} | {stats['p50'] * 1000:>9.1f} | {stats['p95'] * 1000:>9.1f}")
+    drafts = sum(DRAFT_OUTCOMES.values())
+    print(f"\nDrafts reused: {DRAFT_OUTCOMES['reused']}/{drafts} ({DRAFT_OUTCOMES['discarded']} discarded)")
+
+
+if __name__ == "__main__":
+    main()
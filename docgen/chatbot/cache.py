@@ -0,0 +1,538 @@
+"""
+Response cache for LLM calls whose output depends only on the prompt.
+
+Used in front of RealLLM.extract_requirements_with_type: many conversations open with
+near-identical first messages ("I need a rental agreement", "NDA for an employee"), so
+the prompt is normalised and the extraction result reused for a while instead of
+paying for another extraction_agent round-trip.
+
+DocumentCache does the same, opt-in, for whole generated documents: regenerating with
+identical document type, fields and goal replays the stored document instead of paying
+for another full generation.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Tuple
+
+from .schemas import DocumentContext
+
+# Backend for the extraction cache: "memory", "disk" or "none"
+EXTRACTION_CACHE_BACKEND = os.getenv('EXTRACTION_CACHE_BACKEND', 'memory')
+EXTRACTION_CACHE_TTL = float(os.getenv('EXTRACTION_CACHE_TTL', str(24 * 60 * 60)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', '1024'))
+EXTRACTION_CACHE_DIR = os.getenv('EXTRACTION_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'docgen-extraction-cache'))
+
+# Backend for the generated document cache: "none" (default), "disk" or "memory"
+DOCUMENT_CACHE_BACKEND = os.getenv('DOCUMENT_CACHE_BACKEND', 'none')
+DOCUMENT_CACHE_TTL = float(os.getenv('DOCUMENT_CACHE_TTL', str(7 * 24 * 60 * 60)))
+DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv('DOCUMENT_CACHE_MAX_ENTRIES', '1000'))
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv('DOCUMENT_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+DOCUMENT_CACHE_DIR = os.getenv('DOCUMENT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'docgen-document-cache'))
+# Pace of a cached document replayed to the client: characters per chunk and seconds between chunks
+DOCUMENT_CACHE_REPLAY_CHARS = int(os.getenv('DOCUMENT_CACHE_REPLAY_CHARS', '512'))
+DOCUMENT_CACHE_REPLAY_INTERVAL = float(os.getenv('DOCUMENT_CACHE_REPLAY_INTERVAL', '0.016'))
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalise a prompt so trivially different phrasings share a cache entry.
+
+    Lower-cases, drops punctuation and collapses whitespace:
+    "  I need a Rental Agreement!! " -> "i need a rental agreement".
+    """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", prompt.lower())).strip()
+
+
+class CacheBackend:
+    """Base class for response cache storage with TTL and LRU eviction."""
+
+    # Whether calls do blocking I/O, and so must not run on the event loop
+    blocking = False
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a JSON-serialisable value for `ttl` seconds, evicting the least recently used entries if full."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop every entry."""
+        raise NotImplementedError
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop the entries whose value matches `predicate`, returning how many were dropped."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local LRU cache."""
+
+    def __init__(self, max_entries: int = EXTRACTION_CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the backend.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            clock: Time source (injectable for tests)
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Cache stored as one JSON file per entry, shared by every process on the host.
+
+    Recency is tracked through file modification times, which are bumped on every hit.
+    An in-memory index of each file's recency and size keeps eviction from listing and
+    stat-ing the whole directory on every write; it is rebuilt from the directory every
+    `rescan_interval` seconds to pick up entries written by other processes. Every call
+    does file I/O, so async code goes through ResponseCache.aget/aset and
+    DocumentCache.aget/aset, which run it in a thread.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        directory: str = EXTRACTION_CACHE_DIR,
+        max_entries: int = EXTRACTION_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+        max_bytes: Optional[int] = None,
+        rescan_interval: float = 60.0,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            directory: Directory holding the cache files (created if missing)
+            max_entries: Maximum number of files before the least recently used are removed
+            clock: Wall-clock time source (injectable for tests)
+            max_bytes: Maximum total size of the files before the least recently used are removed (default: unbounded)
+            rescan_interval: Seconds between rebuilds of the index from the directory
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.rescan_interval = rescan_interval
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # path -> [last use, size in bytes]
+        self._index: Dict[str, list] = {}
+        self._total = 0
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._rescan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        now = self.clock()
+        if entry["expires_at"] <= now:
+            self._remove(path)
+            return None
+        if self._touch(path, now):
+            with self._lock:
+                if path in self._index:
+                    self._index[path][0] = now
+        return entry["value"]
+
+    def set(self, key: str, value: Any, ttl: float):
+        path = self._path(key)
+        # Write to a temporary file and rename, so readers in other processes never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": self.clock() + ttl, "value": value}, f)
+            size = f.tell()
+        os.replace(tmp_path, path)
+        now = self.clock()
+        if not self._touch(path, now):
+            return  # already evicted by another process
+        with self._lock:
+            previous = self._index.get(path)
+            self._total += size - (previous[1] if previous else 0)
+            self._index[path] = [now, size]
+        self._evict()
+
+    def clear(self):
+        for path in self._files():
+            self._remove(path)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        deleted = 0
+        for path in self._files():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    value = json.load(f)["value"]
+            except (OSError, ValueError, KeyError):
+                continue
+            if predicate(value):
+                self._remove(path)
+                deleted += 1
+        return deleted
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def size(self) -> int:
+        """Total size of the cache files in bytes."""
+        return self._total
+
+    def _files(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def _rescan(self):
+        """Rebuild the index from the files present, including those other processes wrote."""
+        index = {}
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            index[path] = [stat.st_mtime, stat.st_size]
+        with self._lock:
+            self._index = index
+            self._total = sum(size for _, size in index.values())
+            self._scanned_at = self.clock()
+
+    def _over_limit(self) -> bool:
+        return len(self._index) > self.max_entries or (self.max_bytes is not None and self._total > self.max_bytes)
+
+    def _evict(self):
+        if self.clock() - self._scanned_at >= self.rescan_interval:
+            self._rescan()
+        with self._lock:
+            if not self._over_limit():
+                return
+            oldest_first = sorted(self._index.items(), key=lambda item: item[1][0])
+        for path, _ in oldest_first:
+            with self._lock:
+                if not self._over_limit():
+                    break
+            self._remove(path)
+            self.evictions += 1
+
+    @staticmethod
+    def _touch(path: str, now: float) -> bool:
+        """Mark a file as just used; False if it was removed meanwhile."""
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            return False
+        return True
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with self._lock:
+            entry = self._index.pop(path, None)
+            if entry is not None:
+                self._total -= entry[1]
+
+
+async def _backend_call(backend: CacheBackend, method: Callable, *args) -> Any:
+    """Call a backend method, in a worker thread if the backend blocks on I/O."""
+    if backend.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+class ResponseCache:
+    """Prompt-keyed cache of LLM responses with hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, ttl: float = EXTRACTION_CACHE_TTL, namespace: str = ""):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Storage backend
+            ttl: Seconds an entry stays valid
+            namespace: Prefix separating entries of different models or prompt versions
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, prompt: str) -> str:
+        """Get the cache key for a prompt."""
+        return f"{self.namespace}:{normalize_prompt(prompt)}"
+
+    def get(self, prompt: str) -> Optional[Any]:
+        """Look up a prompt, counting the hit or miss."""
+        return self._count(self.backend.get(self.key(prompt)))
+
+    def set(self, prompt: str, value: Any):
+        """Cache the response for a prompt."""
+        self.backend.set(self.key(prompt), value, self.ttl)
+
+    async def aget(self, prompt: str) -> Optional[Any]:
+        """Look up a prompt without blocking the event loop."""
+        return self._count(await _backend_call(self.backend, self.backend.get, self.key(prompt)))
+
+    async def aset(self, prompt: str, value: Any):
+        """Cache the response for a prompt without blocking the event loop."""
+        await _backend_call(self.backend, self.backend.set, self.key(prompt), value, self.ttl)
+
+    def _count(self, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend),
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+
+
+class DocumentCache:
+    """
+    Content-addressed cache of finished documents.
+
+    The key hashes everything the generation request depends on: the namespace (models
+    and prompt version), the document type, the fields sorted by name and the
+    user goal. Cached documents are replayed in small timed chunks, so they stream to the
+    client like a generation does.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = DOCUMENT_CACHE_TTL,
+        namespace: str = "",
+        replay_chars: int = DOCUMENT_CACHE_REPLAY_CHARS,
+        replay_interval: float = DOCUMENT_CACHE_REPLAY_INTERVAL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Storage backend
+            ttl: Seconds an entry stays valid
+            namespace: Part of every key, separating documents of different models or prompt versions
+            replay_chars: Characters per replayed chunk
+            replay_interval: Seconds between replayed chunks
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self.replay_chars = replay_chars
+        self.replay_interval = replay_interval
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, context: DocumentContext) -> str:
+        """Get the canonical hash of a generation request."""
+        request = {
+            "namespace": self.namespace,
+            "document_type": context.document_type,
+            "fields": sorted(context.fields.items()),
+            "user_goal": context.user_goal,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def get(self, context: DocumentContext) -> Optional[str]:
+        """Look up the document generated for a request, counting the hit or miss."""
+        return self._count(self.backend.get(self.key(context)))
+
+    def set(self, context: DocumentContext, document: str):
+        """Cache a finished document."""
+        self.backend.set(self.key(context), self._entry(context, document), self.ttl)
+
+    async def aget(self, context: DocumentContext) -> Optional[str]:
+        """Look up the document generated for a request without blocking the event loop."""
+        return self._count(await _backend_call(self.backend, self.backend.get, self.key(context)))
+
+    async def aset(self, context: DocumentContext, document: str):
+        """Cache a finished document without blocking the event loop."""
+        entry = self._entry(context, document)
+        await _backend_call(self.backend, self.backend.set, self.key(context), entry, self.ttl)
+
+    @staticmethod
+    def _entry(context: DocumentContext, document: str) -> Dict[str, str]:
+        return {"document_type": context.document_type, "document": document}
+
+    def _count(self, entry: Optional[Dict[str, str]]) -> Optional[str]:
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["document"]
+
+    def invalidate(self, document_type: Optional[str] = None) -> int:
+        """
+        Drop cached documents.
+
+        Args:
+            document_type: Only drop documents of this type (default: all)
+
+        Returns:
+            Number of documents dropped
+        """
+        if document_type is None:
+            count = len(self.backend)
+            self.backend.clear()
+            return count
+        return self.backend.delete_where(lambda entry: entry.get("document_type") == document_type)
+
+    async def replay(self, document: str) -> AsyncGenerator[str, None]:
+        """Stream a cached document at the configured pace."""
+        for start in range(0, len(document), self.replay_chars):
+            if start:
+                await asyncio.sleep(self.replay_interval)
+            yield document[start : start + self.replay_chars]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend),
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+        if isinstance(self.backend, DiskCacheBackend):
+            stats["bytes"] = self.backend.size()
+        return stats
+
+
+_document_backend: Optional[CacheBackend] = None
+_document_backend_lock = threading.Lock()
+
+
+def get_document_backend() -> Optional[CacheBackend]:
+    """
+    The process's document cache storage, configured by DOCUMENT_CACHE_BACKEND.
+
+    Shared by every namespace so invalidation reaches all of them. None when the cache is disabled.
+    """
+    global _document_backend
+    with _document_backend_lock:
+        if _document_backend is None:
+            if DOCUMENT_CACHE_BACKEND == "disk":
+                _document_backend = DiskCacheBackend(
+                    DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_ENTRIES, max_bytes=DOCUMENT_CACHE_MAX_BYTES
+                )
+            elif DOCUMENT_CACHE_BACKEND == "memory":
+                _document_backend = InMemoryCacheBackend(DOCUMENT_CACHE_MAX_ENTRIES)
+        return _document_backend
+
+
+def build_document_cache(namespace: str) -> Optional[DocumentCache]:
+    """
+    Build the document cache configured by DOCUMENT_CACHE_BACKEND.
+
+    Args:
+        namespace: Cache namespace, normally the generation models and prompt version
+
+    Returns:
+        DocumentCache, or None when caching is disabled (the default)
+    """
+    backend = get_document_backend()
+    return DocumentCache(backend, namespace=namespace) if backend is not None else None
+
+
+def invalidate_documents(document_type: Optional[str] = None) -> int:
+    """
+    Drop cached documents of every namespace.
+
+    Args:
+        document_type: Only drop documents of this type (default: all)
+
+    Returns:
+        Number of documents dropped (0 when the cache is disabled)
+    """
+    backend = get_document_backend()
+    return DocumentCache(backend).invalidate(document_type) if backend is not None else 0
+
+
+def build_extraction_cache(namespace: str) -> Optional[ResponseCache]:
+    """
+    Build the extraction cache configured by EXTRACTION_CACHE_BACKEND.
+
+    Args:
+        namespace: Cache namespace, normally the model name
+
+    Returns:
+        ResponseCache, or None when caching is disabled
+    """
+    if EXTRACTION_CACHE_BACKEND == "none":
+        return None
+    if EXTRACTION_CACHE_BACKEND == "disk":
+        backend: CacheBackend = DiskCacheBackend()
+    else:
+        backend = InMemoryCacheBackend()
+    return ResponseCache(backend, namespace=namespace)
@@ -0,0 +1,306 @@
+"""
+Local CPU-only classifier tier for document type and field extraction.
+
+A TF-IDF weighted multinomial Naive Bayes model over word unigrams and bigrams, trained
+on DOCUMENT_KEYWORDS, DOCUMENT_FIELDS and the prompts of past conversations. It answers
+in microseconds, so RealLLM.extract_requirements_with_type can use it:
+- "fallback": once the extraction_agent has failed, ahead of keyword matching when confident
+- "first_pass": before the extraction_agent, skipping the model when confident
+- "hedge": racing the extraction_agent, answering when the model is slow and the classifier confident
+- "off": never
+
+Train and evaluate with `python manage.py train_classifier` and `python manage.py evaluate_classifier`.
+"""
+
+import json
+import math
+import os
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import normalize_prompt
+from .constants.fields import DOCUMENT_FIELDS, DOCUMENT_KEYWORDS, get_fields_for_document_type
+
+LOCAL_CLASSIFIER_MODES = ("off", "fallback", "first_pass", "hedge")
+
+LOCAL_CLASSIFIER_MODE = os.getenv("LOCAL_CLASSIFIER_MODE", "fallback")
+# Confidence needed to answer without the extraction_agent (first_pass and hedge modes)
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+# Seconds the extraction_agent gets before a confident local answer is used (hedge mode)
+LOCAL_CLASSIFIER_HEDGE_AFTER = float(os.getenv("LOCAL_CLASSIFIER_HEDGE_AFTER", "1.5"))
+# Trained model written by `manage.py train_classifier`; without it the classifier is trained on the constants
+LOCAL_CLASSIFIER_PATH = os.getenv(
+    "LOCAL_CLASSIFIER_PATH", os.path.join(os.path.dirname(__file__), "local_classifier.json")
+)
+
+MODEL_VERSION = 1
+
+# Words every kind of request uses ("I need a contract for ..."); they carry no evidence of the type
+STOP_WORDS = frozenset(
+    "a an the i im me my we our us you your he she they their it its this that is are be to of for and or in on "
+    "at by with from as need needs want wants would like please help some new draft create make write generate "
+    "prepare get set up agreement contract document".split()
+)
+
+_SUFFIXES = ("ings", "ing", "ers", "er", "ments", "ment", "ions", "ion", "ed", "es", "s")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping so "hiring", "hires" and "hire" share a feature."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def features(text: str) -> Counter:
+    """Stemmed word unigrams and bigrams of a prompt or field name, without stop words, with counts."""
+    words = [stem(word) for word in normalize_prompt(text.replace("_", " ")).split() if word not in STOP_WORDS]
+    grams = Counter(words)
+    grams.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return grams
+
+
+@dataclass
+class Example:
+    """A labelled prompt for training or evaluation."""
+
+    prompt: str
+    document_type: str
+    fields: Optional[List[str]] = None
+
+
+@dataclass
+class Classification:
+    """A local answer to the extraction_agent's question."""
+
+    document_type: str
+    fields: List[str]
+    confidence: float
+
+
+class DocumentTypeClassifier:
+    """TF-IDF weighted multinomial Naive Bayes over prompt n-grams."""
+
+    def __init__(
+        self,
+        priors: Dict[str, float],
+        idf: Dict[str, float],
+        log_probs: Dict[str, Dict[str, float]],
+        unseen: Dict[str, float],
+        fields: Dict[str, List[str]],
+    ):
+        """
+        Initialize a trained classifier; use train() or load() to build one.
+
+        Args:
+            priors: Log prior per document type
+            idf: Inverse document frequency per feature in the vocabulary
+            log_probs: Per feature, the log probability of the feature in each document type that has it
+            unseen: Per document type, the log probability of a vocabulary feature it never had
+            fields: Field list per document type
+        """
+        self.priors = priors
+        self.idf = idf
+        self.log_probs = log_probs
+        self.unseen = unseen
+        self.fields = fields
+
+    @classmethod
+    def train(cls, examples: Iterable[Example], alpha: float = 0.1) -> "DocumentTypeClassifier":
+        """
+        Train on labelled examples.
+
+        Args:
+            examples: Labelled prompts; examples with fields also set the field list of their type
+            alpha: Additive smoothing
+
+        Returns:
+            The trained classifier
+        """
+        examples = list(examples)
+        grams = [features(example.prompt) for example in examples]
+        document_frequency: Counter = Counter()
+        for gram in grams:
+            document_frequency.update(gram.keys())
+        total = len(examples)
+        idf = {feature: math.log((1 + total) / (1 + count)) + 1 for feature, count in document_frequency.items()}
+
+        class_counts: Counter = Counter()
+        weights: Dict[str, Counter] = {}
+        field_lists: Dict[str, Counter] = {}
+        for example, gram in zip(examples, grams):
+            class_counts[example.document_type] += 1
+            vector = cls._vector(gram, idf)
+            weights.setdefault(example.document_type, Counter()).update(vector)
+            if example.fields:
+                field_lists.setdefault(example.document_type, Counter())[tuple(example.fields)] += 1
+
+        vocabulary = len(idf)
+        priors, unseen, log_probs = {}, {}, {}
+        for document_type, count in class_counts.items():
+            priors[document_type] = math.log(count / total)
+            denominator = sum(weights[document_type].values()) + alpha * vocabulary
+            unseen[document_type] = math.log(alpha / denominator)
+            for feature, weight in weights[document_type].items():
+                log_probs.setdefault(feature, {})[document_type] = math.log((weight + alpha) / denominator)
+
+        fields = {}
+        for document_type in class_counts:
+            if document_type in field_lists:
+                fields[document_type] = list(field_lists[document_type].most_common(1)[0][0])
+            else:
+                fields[document_type] = get_fields_for_document_type(document_type)
+        return cls(priors, idf, log_probs, unseen, fields)
+
+    @staticmethod
+    def _vector(gram: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+        """L2-normalised TF-IDF weights of the known features."""
+        vector = {feature: (1 + math.log(count)) * idf[feature] for feature, count in gram.items() if feature in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+    def predict(self, prompt: str) -> Optional[Classification]:
+        """
+        Classify a prompt.
+
+        Args:
+            prompt: The user's request
+
+        Returns:
+            The most likely document type with its fields and posterior probability, or None
+            if the prompt has no word the classifier was trained on
+        """
+        vector = self._vector(features(prompt), self.idf)
+        if not vector:
+            return None
+        scores = dict(self.priors)
+        for feature, weight in vector.items():
+            known = self.log_probs[feature]
+            for document_type in scores:
+                scores[document_type] += weight * known.get(document_type, self.unseen[document_type])
+        best = max(scores, key=scores.__getitem__)
+        top = scores[best]
+        confidence = 1 / sum(math.exp(score - top) for score in scores.values())
+        return Classification(document_type=best, fields=list(self.fields[best]), confidence=confidence)
+
+    def to_dict(self) -> Dict:
+        """JSON-compatible form of the model."""
+        return {
+            "version": MODEL_VERSION,
+            "priors": self.priors,
+            "idf": self.idf,
+            "log_probs": self.log_probs,
+            "unseen": self.unseen,
+            "fields": self.fields,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DocumentTypeClassifier":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported classifier model version: {data.get('version')}")
+        return cls(data["priors"], data["idf"], data["log_probs"], data["unseen"], data["fields"])
+
+    def save(self, path: str):
+        """Write the model as JSON, replacing any previous file atomically."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentTypeClassifier":
+        with open(path, encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+
+def seed_examples() -> List[Example]:
+    """
+    Examples built from the constants: every keyword and field name, labelled with its type.
+
+    Type names are left out: their shared words ("agreement", "contract") only add noise.
+    """
+    examples = []
+    for document_type, fields in DOCUMENT_FIELDS.items():
+        texts = [*DOCUMENT_KEYWORDS.get(document_type, []), *fields]
+        examples.extend(Example(text, document_type, fields) for text in texts)
+    return examples
+
+
+def history_examples(limit: Optional[int] = None) -> List[Example]:
+    """
+    Examples from persisted conversations: the opening request and the type and fields it got.
+
+    Only conversations past extraction count, and only those the database store keeps.
+    """
+    from .models import Conversation
+
+    examples = []
+    for snapshot in Conversation.objects.order_by("-updated_at").values_list("snapshot", flat=True)[:limit]:
+        prompt, document_type = snapshot.get("user_goal"), snapshot.get("document_type")
+        if prompt and document_type and snapshot.get("state") != "initial":
+            examples.append(Example(prompt, document_type, list(snapshot.get("fields") or {}) or None))
+    return examples
+
+
+def read_examples(path: str) -> List[Example]:
+    """Read labelled examples from a JSON lines file of {"prompt", "document_type", "fields"?} objects."""
+    with open(path, encoding="utf-8") as handle:
+        return [Example(**json.loads(line)) for line in handle if line.strip()]
+
+
+def split_examples(examples: List[Example], holdout: float, seed: int = 0) -> Tuple[List[Example], List[Example]]:
+    """Shuffle examples into (train, test) with `holdout` of them in test."""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = len(shuffled) - int(len(shuffled) * holdout)
+    return shuffled[:cut], shuffled[cut:]
+
+
+class LocalClassifierStats:
+    """Process-wide counters of extractions answered by the local classifier."""
+
+    OUTCOMES = ("predictions", "first_pass", "hedge_wins", "fallbacks")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def record(self, outcome: str):
+        """Count one of OUTCOMES: a prediction, or a prediction used instead of the extraction_agent."""
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {outcome: self._counts[outcome] for outcome in self.OUTCOMES}
+
+
+LOCAL_CLASSIFIER_STATS = LocalClassifierStats()
+
+_classifier: Optional[DocumentTypeClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier() -> DocumentTypeClassifier:
+    """The process's classifier: the trained model at LOCAL_CLASSIFIER_PATH, or one trained on the constants."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            if os.path.exists(LOCAL_CLASSIFIER_PATH):
+                _classifier = DocumentTypeClassifier.load(LOCAL_CLASSIFIER_PATH)
+            else:
+                _classifier = DocumentTypeClassifier.train(seed_examples())
+        return _classifier
+
+
+def set_local_classifier(classifier: Optional[DocumentTypeClassifier]):
+    """Replace the process's classifier; None reloads it on next use."""
+    global _classifier
+    with _classifier_lock:
+        _classifier = classifier
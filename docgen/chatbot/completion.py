@@ -0,0 +1,141 @@
+"""
+Local completion detection for streamed legal documents.
+
+CompletionDetector classifies lines as they stream in and, once the stream closes,
+tells whether the document reached its end (execution clause with signature
+blocks, or an END OF ... marker), was certainly cut off (an open code fence or a
+section heading with nothing after it), or cannot be judged locally, in which case
+the LLM completeness check (RealLLM.verify_doc) is still the arbiter. A sentence
+without closing punctuation is only a hint: legal documents often end on a bare name.
+"""
+
+import copy
+import re
+from typing import Any, Dict, List
+
+from .streaming import LineAssembler
+
+COMPLETE = "complete"
+INCOMPLETE = "incomplete"
+UNCERTAIN = "uncertain"
+
+WITNESS_PATTERN = re.compile(r"\bIN\s+WITNESS\s+WHEREOF\b", re.IGNORECASE)
+# Upper-case only, so "at the end of the agreement term" in a clause does not count
+END_MARKER_PATTERN = re.compile(
+    r"\bEND\s+OF\s+(?:THE\s+)?[A-Z0-9 &()'-]*?(?:AGREEMENT|CONTRACT|DOCUMENT|LEASE|NDA)\b|^\W*END\W*$"
+)
+SIGNATURE_PATTERN = re.compile(
+    r"^\W*(?:_{3,}|(?:signature|signed|by|name|printed name|title|date|witness)\W*\s*[:：]"
+    r"|signed(?:,?\s+sealed)?(?:,?\s+and\s+delivered)?\s+(?:by|for|on\s+behalf\s+of)\b)",
+    re.IGNORECASE,
+)
+# A party's signature label: "LANDLORD:", "**Tenant**", "Landlord: ____", "Lender: Alice Smith"
+PARTY_LABEL_PATTERN = re.compile(
+    r"^\W*(?:the\s+)?(?:lessor|lessee|landlord|tenant|employer|employee|lender|borrower|buyer|seller|"
+    r"disclosing\s+party|receiving\s+party|service\s+provider|client|party\s+\w+)"
+    r"\W*\s*(?:[:：][^.!?]{0,60})?[\W_]*$",
+    re.IGNORECASE,
+)
+# A printed name under a party label ("**Tenant**" then "Jane Doe")
+PRINTED_NAME_PATTERN = re.compile(r"^\W*[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*){0,4}\W*$")
+# Horizontal rules and page break markers carry no content, so they never decide the verdict
+RULE_PATTERN = re.compile(r"^(?:[-*=]\s*){3,}$|^-+PAGE_BREAK-+$")
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:#{1,6}\s+\S.*|(?:article|section)\s+[\dIVXLC]+\b[^.!?]*"
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z][A-Z &,'/-]{2,}|\*\*[^*]+\*\*)\s*$",
+    re.IGNORECASE,
+)
+# Characters a finished line may end with (sentence punctuation, closing quotes/brackets, blanks to fill in)
+TERMINAL_CHARACTERS = ".!?:;)]\"'”’_*|"
+
+# Signature lines after the execution clause needed to call the document complete
+MIN_SIGNATURE_LINES = 2
+
+
+class CompletionDetector:
+    """Incremental completion detector fed with streamed chunks."""
+
+    def __init__(self):
+        self._lines = LineAssembler()
+        self.witness_seen = False
+        self.end_marker_seen = False
+        self.signature_lines = 0  # signature lines since the last execution clause
+        self.open_code_fences = 0
+        self.outline: List[str] = []  # section headings in order
+        self._last_line = ""
+        self._last_kind = ""
+
+    def feed(self, chunk: str):
+        """Scan a streamed chunk; only complete lines are classified, the rest is carried over."""
+        for line in self._lines.feed(chunk):
+            self._classify(line)
+
+    def _classify(self, line: str):
+        stripped = line.strip()
+        if not stripped:
+            return
+        if stripped.startswith("```"):
+            self.open_code_fences ^= 1
+        elif RULE_PATTERN.match(stripped):
+            return
+        if WITNESS_PATTERN.search(stripped):
+            self.witness_seen = True
+            self.signature_lines = 0
+            kind = "witness"
+        elif END_MARKER_PATTERN.search(stripped):
+            self.end_marker_seen = True
+            kind = "end"
+        elif SIGNATURE_PATTERN.match(stripped):
+            self.signature_lines += 1
+            kind = "signature"
+        elif PARTY_LABEL_PATTERN.match(stripped):
+            self.signature_lines += 1
+            kind = "party"
+        elif self._last_kind == "party" and PRINTED_NAME_PATTERN.match(stripped):
+            self.signature_lines += 1
+            kind = "signature"
+        elif HEADING_PATTERN.match(stripped):
+            self.outline.append(stripped)
+            kind = "heading"
+        else:
+            kind = "text"
+        self._last_line, self._last_kind = stripped, kind
+
+    def verdict(self) -> str:
+        """
+        Judge the text fed so far as if the stream had closed here.
+
+        Does not consume the trailing partial line, so more chunks can still be fed.
+
+        Returns:
+            INCOMPLETE only for structural signs of a cut-off (open code fence, trailing heading),
+            COMPLETE, or UNCERTAIN when only the LLM check can tell
+        """
+        state = self._with_partial_line()
+        if state.open_code_fences or state._last_kind == "heading":
+            return INCOMPLETE  # unterminated section
+        if state._last_kind == "text" and not state._last_line.endswith(tuple(TERMINAL_CHARACTERS)):
+            return UNCERTAIN  # maybe cut off mid-sentence, maybe a name or note the document ends on
+        if state.end_marker_seen or (state.witness_seen and state.signature_lines >= MIN_SIGNATURE_LINES):
+            return COMPLETE
+        return UNCERTAIN
+
+    def stats(self) -> Dict[str, Any]:
+        """Get what the detector has seen, for logging."""
+        state = self._with_partial_line()
+        return {
+            "witness_seen": state.witness_seen,
+            "end_marker_seen": state.end_marker_seen,
+            "signature_lines": state.signature_lines,
+            "last_line_kind": state._last_kind,
+        }
+
+    def _with_partial_line(self) -> "CompletionDetector":
+        """Get the detector state with the trailing partial line classified as a last line."""
+        partial_line = self._lines.partial_line
+        if not partial_line.strip():
+            return self
+        state = copy.copy(self)
+        state.outline = list(self.outline)
+        state._classify(partial_line)
+        return state
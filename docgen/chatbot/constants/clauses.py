@@ -0,0 +1,430 @@
+"""
+Versioned clause skeletons for hybrid template + LLM generation (see chatbot.hybrid).
+
+Each document type has a title and clauses in reading order. A clause with "text" is
+boilerplate rendered locally, with {field_name} placeholders filled from the collected
+fields. A clause with "brief" is bespoke: the section agent writes it from the brief,
+which may also reference fields. Bump a template's "version" whenever its wording
+changes, so cached documents and logs can tell the revisions apart.
+
+The extraction model names document types freely, so TEMPLATE_ALIASES maps other
+names for the same instrument (lowercased) onto its CLAUSE_TEMPLATES key. Only add
+names of that exact instrument: a near relative (a promissory note, a mutual NDA,
+an equipment lease) must be generated in full rather than from the wrong skeleton.
+"""
+
+CLAUSE_TEMPLATES = {
+    "Rental Agreement": {
+        "version": 1,
+        "title": "RESIDENTIAL RENTAL AGREEMENT",
+        "clauses": [
+            {
+                "heading": "1. Parties",
+                "text": (
+                    "This Residential Rental Agreement (the \"Agreement\") is made between {landlord_name} "
+                    "(the \"Landlord\") and {tenant_name} (the \"Tenant\"), together the \"Parties\"."
+                ),
+            },
+            {
+                "heading": "2. Property",
+                "text": (
+                    "2.1 The Landlord lets to the Tenant the residential property located at {property_address} "
+                    "(the \"Property\"), including any fixtures and fittings listed in an inventory signed by both "
+                    "Parties.\n\n"
+                    "2.2 The Tenant shall use the Property as a private residence only."
+                ),
+            },
+            {
+                "heading": "3. Term",
+                "text": (
+                    "3.1 The tenancy runs for {rental_period} (the \"Term\"), starting on the date of this "
+                    "Agreement.\n\n"
+                    "3.2 Unless a new agreement is signed or either Party gives written notice of at least thirty "
+                    "(30) days before the end of the Term, the tenancy continues from month to month on the same terms."
+                ),
+            },
+            {
+                "heading": "4. Rent",
+                "text": (
+                    "4.1 The Tenant shall pay rent of {monthly_rent} per month, in advance, on the first day of each "
+                    "month.\n\n"
+                    "4.2 Rent remaining unpaid five (5) days after its due date is in arrears, and the Landlord may "
+                    "recover it together with any reasonable costs of collection."
+                ),
+            },
+            {
+                "heading": "5. Security Deposit",
+                "text": (
+                    "5.1 On signing this Agreement the Tenant shall pay a security deposit of {security_deposit}.\n\n"
+                    "5.2 The Landlord shall return the deposit within thirty (30) days after the end of the tenancy, "
+                    "less any amounts needed to cover unpaid rent or damage beyond normal wear and tear, with a "
+                    "written statement of any deductions."
+                ),
+            },
+            {
+                "heading": "6. Lease Terms and Special Conditions",
+                "brief": (
+                    "Turn the parties' agreed lease terms ({lease_terms}) into clear, numbered clauses; "
+                    "do not repeat rent, deposit or term provisions"
+                ),
+            },
+            {
+                "heading": "7. Maintenance and Repairs",
+                "text": (
+                    "7.1 The Landlord shall keep the structure, exterior and installations for water, gas, "
+                    "electricity and heating in good repair.\n\n"
+                    "7.2 The Tenant shall keep the Property clean, report needed repairs promptly and pay for damage "
+                    "caused by the Tenant or the Tenant's guests."
+                ),
+            },
+            {
+                "heading": "8. Termination",
+                "text": (
+                    "8.1 Either Party may terminate this Agreement for a material breach by the other Party that is "
+                    "not remedied within fourteen (14) days of written notice.\n\n"
+                    "8.2 At the end of the tenancy the Tenant shall return all keys and leave the Property in the "
+                    "condition it was received, normal wear and tear excepted."
+                ),
+            },
+            {
+                "heading": "9. General Provisions",
+                "text": (
+                    "9.1 This Agreement is the entire agreement between the Parties about the tenancy and may only "
+                    "be amended in writing signed by both Parties.\n\n"
+                    "9.2 If any provision is held invalid, the remaining provisions continue in full force."
+                ),
+            },
+            {
+                "heading": "10. Signatures",
+                "text": (
+                    "IN WITNESS WHEREOF, the Parties have signed this Agreement on the dates below.\n\n"
+                    "Landlord: {landlord_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "Tenant: {tenant_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "END OF RENTAL AGREEMENT"
+                ),
+            },
+        ],
+    },
+    "Loan Agreement": {
+        "version": 1,
+        "title": "LOAN AGREEMENT",
+        "clauses": [
+            {
+                "heading": "1. Parties",
+                "text": (
+                    "This Loan Agreement (the \"Agreement\") is made between {lender_name} (the \"Lender\") and "
+                    "{borrower_name} (the \"Borrower\"), together the \"Parties\"."
+                ),
+            },
+            {
+                "heading": "2. Loan",
+                "text": (
+                    "2.1 The Lender agrees to lend the Borrower the principal sum of {loan_amount} (the \"Loan\").\n\n"
+                    "2.2 The Lender shall make the Loan available on the signing of this Agreement."
+                ),
+            },
+            {
+                "heading": "3. Interest",
+                "text": (
+                    "3.1 Interest accrues on the outstanding principal at a rate of {interest_rate} per year, "
+                    "calculated on the basis of a 365-day year.\n\n"
+                    "3.2 Overdue amounts bear interest at the same rate until paid in full."
+                ),
+            },
+            {
+                "heading": "4. Repayment",
+                "brief": (
+                    "Set out the repayment schedule from the agreed repayment terms ({repayment_terms}), with the "
+                    "final payment due on {due_date}, and the Borrower's right to prepay without penalty"
+                ),
+            },
+            {
+                "heading": "5. Security",
+                "brief": (
+                    "Describe the collateral securing the Loan ({collateral}), the Borrower's duties to maintain it "
+                    "and the Lender's rights over it on default; if there is no collateral, state the Loan is unsecured"
+                ),
+            },
+            {
+                "heading": "6. Events of Default",
+                "text": (
+                    "6.1 Each of the following is an event of default: (a) the Borrower fails to pay any amount "
+                    "within ten (10) days of its due date; (b) the Borrower becomes insolvent or bankrupt; "
+                    "(c) any statement made by the Borrower in connection with this Agreement proves materially "
+                    "untrue.\n\n"
+                    "6.2 On an event of default the Lender may, by written notice, declare the whole outstanding Loan "
+                    "with accrued interest immediately due and payable."
+                ),
+            },
+            {
+                "heading": "7. General Provisions",
+                "text": (
+                    "7.1 This Agreement is the entire agreement between the Parties about the Loan and may only be "
+                    "amended in writing signed by both Parties.\n\n"
+                    "7.2 The Borrower may not assign its obligations without the Lender's prior written consent.\n\n"
+                    "7.3 If any provision is held invalid, the remaining provisions continue in full force."
+                ),
+            },
+            {
+                "heading": "8. Signatures",
+                "text": (
+                    "IN WITNESS WHEREOF, the Parties have signed this Agreement on the dates below.\n\n"
+                    "Lender: {lender_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "Borrower: {borrower_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "END OF LOAN AGREEMENT"
+                ),
+            },
+        ],
+    },
+    "Non-Disclosure Agreement (NDA)": {
+        "version": 1,
+        "title": "NON-DISCLOSURE AGREEMENT",
+        "clauses": [
+            {
+                "heading": "1. Parties",
+                "text": (
+                    "This Non-Disclosure Agreement (the \"Agreement\") is made on {effective_date} between "
+                    "{disclosing_party} (the \"Disclosing Party\") and {receiving_party} (the \"Receiving Party\")."
+                ),
+            },
+            {
+                "heading": "2. Purpose",
+                "text": (
+                    "The Disclosing Party will share Confidential Information with the Receiving Party solely for "
+                    "the following purpose: {purpose} (the \"Purpose\")."
+                ),
+            },
+            {
+                "heading": "3. Confidential Information",
+                "brief": (
+                    "Define the Confidential Information, covering the categories the parties named "
+                    "({confidential_information}) and information marked or reasonably understood as confidential"
+                ),
+            },
+            {
+                "heading": "4. Exclusions",
+                "text": (
+                    "Confidential Information does not include information that: (a) is or becomes public other than "
+                    "through a breach of this Agreement; (b) the Receiving Party lawfully knew before disclosure; "
+                    "(c) the Receiving Party lawfully receives from a third party without a duty of confidence; or "
+                    "(d) the Receiving Party develops independently without use of the Confidential Information."
+                ),
+            },
+            {
+                "heading": "5. Obligations of the Receiving Party",
+                "text": (
+                    "5.1 The Receiving Party shall keep the Confidential Information secret, use it only for the "
+                    "Purpose and protect it with at least the care it uses for its own confidential information.\n\n"
+                    "5.2 The Receiving Party may disclose Confidential Information only to its employees and advisers "
+                    "who need to know it for the Purpose and are bound by duties of confidence at least as strict as "
+                    "this Agreement, or where required by law, after notifying the Disclosing Party where permitted."
+                ),
+            },
+            {
+                "heading": "6. Term",
+                "text": (
+                    "The obligations in this Agreement last for {duration} from the date of this Agreement and "
+                    "survive the end of any discussions between the Parties."
+                ),
+            },
+            {
+                "heading": "7. Return of Information",
+                "text": (
+                    "On the Disclosing Party's written request, the Receiving Party shall promptly return or destroy "
+                    "all Confidential Information and confirm in writing that it has done so."
+                ),
+            },
+            {
+                "heading": "8. Remedies and General Provisions",
+                "text": (
+                    "8.1 The Receiving Party acknowledges that a breach may cause irreparable harm, and that the "
+                    "Disclosing Party may seek injunctive relief in addition to any other remedy.\n\n"
+                    "8.2 This Agreement is the entire agreement between the Parties about its subject and may only be "
+                    "amended in writing signed by both Parties."
+                ),
+            },
+            {
+                "heading": "9. Signatures",
+                "text": (
+                    "IN WITNESS WHEREOF, the Parties have signed this Agreement on the dates below.\n\n"
+                    "Disclosing Party: {disclosing_party}\n\nSignature: ______________________\n\n"
+                    "Date: ______________________\n\n"
+                    "Receiving Party: {receiving_party}\n\nSignature: ______________________\n\n"
+                    "Date: ______________________\n\n"
+                    "END OF NON-DISCLOSURE AGREEMENT"
+                ),
+            },
+        ],
+    },
+    "Employment Contract": {
+        "version": 1,
+        "title": "EMPLOYMENT CONTRACT",
+        "clauses": [
+            {
+                "heading": "1. Parties",
+                "text": (
+                    "This Employment Contract (the \"Contract\") is made between {employer_name} (the \"Employer\") "
+                    "and {employee_name} (the \"Employee\")."
+                ),
+            },
+            {
+                "heading": "2. Position and Start Date",
+                "text": (
+                    "2.1 The Employer employs the Employee as {position} on a {employment_type} basis.\n\n"
+                    "2.2 Employment starts on {start_date}."
+                ),
+            },
+            {
+                "heading": "3. Duties",
+                "brief": (
+                    "List the main duties and responsibilities of a {position}, and the Employee's duty to follow "
+                    "the Employer's reasonable instructions and policies"
+                ),
+            },
+            {
+                "heading": "4. Place of Work",
+                "text": (
+                    "The Employee's normal place of work is {work_location}. The Employer may reasonably require the "
+                    "Employee to travel for business purposes."
+                ),
+            },
+            {
+                "heading": "5. Salary",
+                "text": (
+                    "5.1 The Employer shall pay the Employee a salary of {salary}, less any deductions required by "
+                    "law, in regular instalments in arrears.\n\n"
+                    "5.2 The Employer shall reimburse reasonable expenses properly incurred in performing the "
+                    "Employee's duties, on presentation of receipts."
+                ),
+            },
+            {
+                "heading": "6. Benefits",
+                "brief": "Describe the Employee's benefits ({benefits}) and any conditions attached to them",
+            },
+            {
+                "heading": "7. Confidentiality",
+                "text": (
+                    "During and after employment the Employee shall not disclose or misuse any confidential "
+                    "information of the Employer, except as required by the Employee's duties or by law."
+                ),
+            },
+            {
+                "heading": "8. Termination",
+                "text": (
+                    "8.1 Either Party may end this Contract by giving the other the written notice required by law, "
+                    "or by the Employer's policies if longer.\n\n"
+                    "8.2 The Employer may end this Contract without notice for gross misconduct.\n\n"
+                    "8.3 On termination the Employee shall return all property and documents of the Employer."
+                ),
+            },
+            {
+                "heading": "9. General Provisions",
+                "text": (
+                    "9.1 This Contract is the entire agreement between the Parties about the employment and may only "
+                    "be amended in writing signed by both Parties.\n\n"
+                    "9.2 If any provision is held invalid, the remaining provisions continue in full force."
+                ),
+            },
+            {
+                "heading": "10. Signatures",
+                "text": (
+                    "IN WITNESS WHEREOF, the Parties have signed this Contract on the dates below.\n\n"
+                    "Employer: {employer_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "Employee: {employee_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "END OF EMPLOYMENT CONTRACT"
+                ),
+            },
+        ],
+    },
+    "Service Contract": {
+        "version": 1,
+        "title": "SERVICE CONTRACT",
+        "clauses": [
+            {
+                "heading": "1. Parties",
+                "text": (
+                    "This Service Contract (the \"Contract\") is made between {service_provider} (the \"Provider\") "
+                    "and {client_name} (the \"Client\")."
+                ),
+            },
+            {
+                "heading": "2. Services and Deliverables",
+                "brief": (
+                    "Describe the services ({service_description}) and the deliverables ({deliverables}) with "
+                    "acceptance criteria the Client can check"
+                ),
+            },
+            {
+                "heading": "3. Term",
+                "text": (
+                    "This Contract starts on {start_date} and ends on {end_date}, unless terminated earlier under "
+                    "Section 7."
+                ),
+            },
+            {
+                "heading": "4. Payment",
+                "text": (
+                    "4.1 The Client shall pay the Provider on the following terms: {payment_terms}.\n\n"
+                    "4.2 Invoices are payable within thirty (30) days of receipt. Late payments bear interest at the "
+                    "statutory rate."
+                ),
+            },
+            {
+                "heading": "5. Standard of Work",
+                "text": (
+                    "The Provider shall perform the services with reasonable skill and care, in line with good "
+                    "industry practice and all applicable laws."
+                ),
+            },
+            {
+                "heading": "6. Intellectual Property and Confidentiality",
+                "text": (
+                    "6.1 On full payment, ownership of the deliverables passes to the Client; the Provider keeps its "
+                    "pre-existing materials and know-how.\n\n"
+                    "6.2 Each Party shall keep confidential the other Party's confidential information received under "
+                    "this Contract."
+                ),
+            },
+            {
+                "heading": "7. Termination",
+                "text": (
+                    "7.1 Either Party may terminate this Contract for a material breach by the other Party that is not "
+                    "remedied within fourteen (14) days of written notice.\n\n"
+                    "7.2 On termination the Client shall pay for services performed up to the termination date."
+                ),
+            },
+            {
+                "heading": "8. General Provisions",
+                "text": (
+                    "8.1 The Provider is an independent contractor and not an employee of the Client.\n\n"
+                    "8.2 This Contract is the entire agreement between the Parties about the services and may only be "
+                    "amended in writing signed by both Parties."
+                ),
+            },
+            {
+                "heading": "9. Signatures",
+                "text": (
+                    "IN WITNESS WHEREOF, the Parties have signed this Contract on the dates below.\n\n"
+                    "Provider: {service_provider}\n\nSignature: ______________________\n\n"
+                    "Date: ______________________\n\n"
+                    "Client: {client_name}\n\nSignature: ______________________\n\nDate: ______________________\n\n"
+                    "END OF SERVICE CONTRACT"
+                ),
+            },
+        ],
+    },
+}
+
+TEMPLATE_ALIASES = {
+    "tenancy agreement": "Rental Agreement",
+    "residential tenancy agreement": "Rental Agreement",
+    "residential lease agreement": "Rental Agreement",
+    "loan contract": "Loan Agreement",
+    "nda": "Non-Disclosure Agreement (NDA)",
+    "non-disclosure agreement": "Non-Disclosure Agreement (NDA)",
+    "confidentiality agreement": "Non-Disclosure Agreement (NDA)",
+    "employment agreement": "Employment Contract",
+    "contract of employment": "Employment Contract",
+    "service agreement": "Service Contract",
+    "services agreement": "Service Contract",
+}
@@ -3,7 +3,8 @@ Field definitions for different document types.
 Contains all field configurations used in document generation.
 """
 
-from typing import Dict, List
+import re
+from typing import Dict, List, Tuple
 
 # Document type field mappings
 DOCUMENT_FIELDS = {
@@ -84,6 +85,9 @@ DOCUMENT_KEYWORDS = {
     "General Contract": [],  # Fallback for unclear requests
 }
 
+# Endings a keyword may take and still match ("borrow" matches "borrowing", "hire" matches "hiring")
+INFLECTION_SUFFIXES = ("s", "es", "ed", "ing", "er", "ers", "ion", "ment", "ments")
+
 # Fallback field mappings for when LLM fails
 FALLBACK_FIELDS = {
     "purchase": {
@@ -135,14 +139,95 @@ def get_keywords_for_document_type(document_type: str) -> List[str]:
     return DOCUMENT_KEYWORDS.get(document_type, [])
 
 
-def detect_document_type_by_keywords(user_prompt: str) -> str:
-    """Detect document type based on keywords in user prompt."""
-    prompt_lower = user_prompt.lower()
+def _keyword_forms(keyword: str) -> List[str]:
+    """All forms of a keyword that count as a match, allowing inflected endings on its last word."""
+    *head, last = keyword.split()
+    if last.endswith("e"):
+        # hire -> hiring, hired, hires; lease -> leasing
+        forms = [last] + [last[:-1] + suffix for suffix in INFLECTION_SUFFIXES]
+    elif last.endswith("y"):
+        # property -> properties
+        forms = [last, last[:-1] + "ies"]
+    else:
+        forms = [last] + [last + suffix for suffix in INFLECTION_SUFFIXES]
+    return [" ".join([*head, form]) for form in forms]
+
+
+class KeywordDetector:
+    """
+    Document type detector over DOCUMENT_KEYWORDS, compiled once into a lookup table.
+
+    The text is split into words and keywords are looked up as whole words or phrases
+    (so "work" does not match "network"), with inflected endings allowed. Every match
+    scores its type by the number of words in the keyword, so specific phrases like
+    "joint venture" outweigh single words.
+    """
+
+    WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        """
+        Compile the detector.
+
+        Args:
+            keywords: Keywords per document type; the order of the types breaks ties
+        """
+        self.order = {doc_type: position for position, doc_type in enumerate(keywords)}
+        # Keyword form ("joint ventures") -> (document type, words in the keyword)
+        self.forms: Dict[str, Tuple[str, int]] = {}
+        # First word of each phrase -> phrase lengths to try, longest first
+        self.phrase_starts: Dict[str, List[int]] = {}
+        for doc_type, words in keywords.items():
+            for keyword in words:
+                length = len(keyword.split())
+                for form in _keyword_forms(keyword.lower()):
+                    self.forms.setdefault(form, (doc_type, length))
+                if length > 1:
+                    lengths = self.phrase_starts.setdefault(keyword.split()[0].lower(), [])
+                    lengths.append(length)
+                    lengths.sort(reverse=True)
 
-    for doc_type, keywords in DOCUMENT_KEYWORDS.items():
-        if doc_type == "General Contract":
-            continue  # Skip general contract, use as fallback
-        if any(keyword in prompt_lower for keyword in keywords):
-            return doc_type
+    def scores(self, text: str) -> Dict[str, int]:
+        """Get the score of every document type with at least one keyword in the text."""
+        scores: Dict[str, int] = {}
+        words = self.WORD.findall(text.lower())
+        if self.phrase_starts.keys().isdisjoint(words):
+            # No phrase can match, so every word is looked up on its own
+            for doc_type, length in filter(None, map(self.forms.get, words)):
+                scores[doc_type] = scores.get(doc_type, 0) + length
+            return scores
+        position = 0
+        while position < len(words):
+            word = words[position]
+            # Phrases first, so "contract work" is not also counted as "work"
+            for length in self.phrase_starts.get(word, ()):
+                match = self.forms.get(" ".join(words[position : position + length]))
+                if match and match[1] == length:
+                    break
+            else:
+                match = self.forms.get(word)
+            if match:
+                doc_type, length = match
+                scores[doc_type] = scores.get(doc_type, 0) + length
+                position += length
+            else:
+                position += 1
+        return scores
 
-    return "General Contract"  # Fallback
+    def rank(self, text: str) -> List[Tuple[str, int]]:
+        """Get matching document types with their scores, best first; ties keep the DOCUMENT_KEYWORDS order."""
+        return sorted(self.scores(text).items(), key=lambda item: (-item[1], self.order[item[0]]))
+
+
+KEYWORD_DETECTOR = KeywordDetector(DOCUMENT_KEYWORDS)
+
+
+def rank_document_types_by_keywords(user_prompt: str) -> List[Tuple[str, int]]:
+    """Rank document types by keyword score for a user prompt, best first."""
+    return KEYWORD_DETECTOR.rank(user_prompt)
+
+
+def detect_document_type_by_keywords(user_prompt: str) -> str:
+    """Detect document type based on keywords in user prompt."""
+    ranking = KEYWORD_DETECTOR.rank(user_prompt)
+    return ranking[0][0] if ranking else "General Contract"  # Fallback
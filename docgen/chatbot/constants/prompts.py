@@ -3,6 +3,9 @@ Prompt templates and instructions for LLM agents.
 Contains all prompts used throughout the document generation pipeline.
 """
 
+# Agent instructions are static so providers can cache them as the prompt prefix; everything that changes per
+# call goes in the request after them.
+
 # Agent instructions for requirement extraction
 
 REQUIREMENT_EXTRACTION_PROMPT = """
@@ -72,6 +75,27 @@ Your job is to ask the user for any missing information needed to complete their
 For the document type identified, ensure you collect all necessary information by asking clear, specific questions. If some information was already provided, acknowledge it and only ask for what's missing.
 
 Be professional but approachable in your communication style.
+
+## HOW TO WRITE EACH MESSAGE
+Each request lists the user's goal, the missing fields, the fields to request now, the user's recent actions,
+and the flags GREET_USER and NEARLY_DONE.
+
+1. ALWAYS: If the user's recent actions show they just saved some information, briefly acknowledge or thank them
+   before asking your next questions.
+2. If GREET_USER is True: you are a legal practitioner and the user is seeking your assistance to generate a legal
+   document. Greet the user warmly. Start with a short sentence that begins like this or similar phrases: 'I am glad
+   to be of assistance in helping you craft your <user goal> (summarize the user goal, do not return verbatim). To
+   proceed I will be needing the following information:' IMPORTANT: ALWAYS return ALL the missing fields to the user
+   as a numbered list.
+3. Generate a polite sentence requesting the fields to request now, in plain language.
+4. Maintain a friendly, professional, and helpful legal tone — warm but clear.
+5. IMPORTANT: be very brief, concise, and to the point.
+6. If GREET_USER is True: ALWAYS end this section of the message with something like: You can proceed to provide all
+   the fields at once, or go at your own pace. (or something similar, be creative - the goal is to suggest to the
+   user to give all the info at once if they feel like it)
+7. If GREET_USER is False and NEARLY_DONE is True: ALWAYS end the conversation with phrases like finally, to wrap up,
+   last but not least, in conclusion, etc., to indicate that the user is nearing completion of the information
+   gathering process.
 """
 
 # Agent instructions for field mapping
@@ -83,6 +107,9 @@ Extract the relevant information from the conversation and map it to the appropr
 If any information is unclear or ambiguous, note it in your response so the user can be asked for clarification.
 In some cases, users might not separate multiple inputs clearly with comma or other punctuation, break it down and map the field appropriately where there is a confident match.
 If input contains unrelated information, ignore that and focus only on mapping relevant details present in that input.
+
+Each request lists the missing fields, then the user input. Extract information from the user input and map it to
+the appropriate missing fields. Only map fields you are confident about.
 """
 
 # Agent instructions for document generation
@@ -188,6 +215,31 @@ Then, proceed to generate the document iteratively.
 """
 
 
+# Rules for generation requests, appended to DOCUMENT_GENERATION_PROMPT so the whole static part of every
+# generation prompt sits in the agent instructions, ahead of the per-document request
+DOCUMENT_REQUEST_RULES = """
+### **THE REQUEST**
+
+Each request gives the document type, the user's goal and the field values. Create a complete, professional legal
+document with:
+1. Proper header and title
+2. All necessary clauses and sections
+3. Clear terms and conditions
+4. Signature lines
+5. Date and location information
+
+ALWAYS: Ensure all the subheadings, sections, fit within 10
+Make it legally sound and professionally formatted.
+
+### **CONTINUATION REQUESTS**
+
+When the request says the output was cut off, it lists the sections already written and quotes how the document so
+far ends. Continue the document from exactly the last character quoted. Do NOT repeat any text that is already
+written, do NOT restart or renumber sections, and do NOT add any preamble. Write the remaining sections and finish
+with the signature blocks and execution clauses.
+"""
+
+
 # System prompts for different phases
 SYSTEM_PROMPTS = {
     "goal_identification": "Analyze the user's request and output a JSON object with two keys: 1. 'document_title': a standard legal title for the contract. 2. 'required_fields': a list containing ONLY the unique details that cannot be generated by the LLM, including party-specific information AND essential, non-generic financial amounts or core subject matter that is central to the agreement. Do NOT include fields for standard clauses, dates, or obligations that the LLM can generate on its own. Examples: For a lease agreement, required_fields should be ['Landlord_Full_Name', 'Tenant_Full_Name', 'Property_Address', 'Monthly_Rent_Amount'] but NOT include dates or security deposit amounts unless specified. For a freelancer contract, required_fields should be ['Client_Company_Name', 'Freelancer_Full_Name', 'Project_Name', 'Total_Contract_Value'] but NOT include payment schedule or scope of work details. For an NDA, required_fields should be only ['Company_Name', 'Employee_Full_Name'] with no financial fields. Your response must be a valid JSON object with no additional text.",
@@ -301,6 +353,36 @@ Response: False
 Response (ONLY "True" or "False"):
 """
 
+TOC_PROMPT = """
+You are a professional legal document planner. Produce the table of contents for the requested legal document.
+
+Return:
+- title: the document title in upper case (e.g. "RESIDENTIAL LEASE AGREEMENT")
+- sections: between 6 and 10 sections in reading order, each with a numbered heading
+  (e.g. "1. PARTIES AND RECITALS") and a one-sentence brief of what that section must cover
+
+RULES:
+- The first section identifies the parties and recitals
+- The last section is the execution section with IN WITNESS WHEREOF and signature blocks for every party
+- Sections must not overlap; each clause belongs to exactly one section
+- Do NOT write any section content
+"""
+
+SECTION_GENERATION_PROMPT = """
+You are a professional legal document writer drafting ONE section of a larger legal document that other writers
+are drafting in parallel from the same table of contents.
+
+RULES:
+- Write ONLY the section you are assigned, in Markdown, starting with its heading as a level-2 heading (## ...)
+- Use numbered subsections (e.g. 3.1, 3.2) that continue the section's own number
+- Stay within the brief for your section; do not restate clauses that belong to other sections
+- Use the provided field values exactly; never invent party names or amounts
+- DO NOT add the document title, a preamble, planning notes, or closing remarks
+- If your section is the execution section, end with IN WITNESS WHEREOF and signature blocks for every party
+- If the request quotes how your section so far ends because it was cut off, continue from exactly the last
+  character quoted and do NOT repeat any text that is already written
+"""
+
 
 def get_system_prompt(phase: str) -> str:
     """Get the system prompt for a specific processing phase."""
@@ -1,10 +1,19 @@
 import asyncio
 import os
 import logging
+import uuid
+from contextlib import aclosing
+from time import perf_counter
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.exceptions import StopConsumer
 from py import log
-from .llm import DocumentOrchestrator
+from .admission import GENERATION, INTERACTIVE, set_call_context
+from .completion import INCOMPLETE
+from .llm import LLM_REGISTRY, DocumentOrchestrator
+from .metrics import COMPLETION_CHECKS, TURN_LATENCY
+from .sharding import GENERATION_MODE, GENERATION_WORKER_TIMEOUT, RemoteGeneration, generation_channel_for
+from .store import conversation_owner, get_conversation_writer
+from .streaming import FrameCoalescer, coalesce_frames
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +24,17 @@ logger = logging.getLogger(__name__)
 
 MODEL = os.getenv('LLM_MODEL_NAME', 'anthropic:claude-sonnet-4-5')
 
+# Document frame flush policy: send once this many characters are buffered or the oldest
+# buffered delta is this old. Set both to 0 to send every delta as its own frame.
+STREAM_FLUSH_MAX_CHARS = int(os.getenv('STREAM_FLUSH_MAX_CHARS', '512'))
+STREAM_FLUSH_MAX_LATENCY_MS = float(os.getenv('STREAM_FLUSH_MAX_LATENCY_MS', '16'))
+
+# Draft the next question while the user's reply is being mapped to fields
+PIPELINED_TURNS = os.getenv('PIPELINED_TURNS', 'true').lower() == 'true'
+
+# Snapshot a conversation during generation each time this many new characters have streamed
+PERSIST_EVERY_CHARS = 16000
+
 
 class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
     """
@@ -22,13 +42,24 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
     for document generation via the DocumentOrchestrator.
     """
 
+    # Set on connect; LLM calls are admitted and queued per user
+    user_id = "anonymous"
+    # Set on connect; conversations are stored per owner so a guessed conversation_id loads nothing
+    owner = "anonymous"
+
     async def connect(self):
         user = self.scope.get("user")
         self.user_id = user.id if user and user.is_authenticated else self.channel_name
+        # Without a login or session cookie the conversation lives as long as this socket
+        self.owner = conversation_owner(user, self.scope.get("session")) or f"socket:{self.channel_name}"
 
         # Store multiple orchestrators per conversation
         self.orchestrators = {}  # conversation_id -> DocumentOrchestrator
+        self.generation_tasks = {}  # conversation_id -> asyncio.Task running stream_document
+        self.remote_generations = {}  # conversation_id -> RemoteGeneration owned by a generation worker
         self.current_conversation_id = None
+        # Orchestrator state is persisted write-behind and rehydrated lazily per conversation
+        self.conversation_writer = get_conversation_writer()
         await self.accept()
 
         # No connection message - frontend will show connection status in UI
@@ -37,12 +68,22 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
         """Handle WebSocket disconnection and cleanup resources."""
         logger.info(f"WebSocket disconnected with code {close_code} for user {self.user_id}")
 
-        # Cleanup orchestrators and any ongoing operations
+        # Cancel ongoing generations so their LLM streams are closed, then cleanup orchestrators
         if hasattr(self, 'orchestrators'):
-            for conversation_id, orchestrator in self.orchestrators.items():
-                if orchestrator.state == "generating":
-                    logger.info(f"Stopping generation for conversation {conversation_id}")
-                    orchestrator.state = "idle"  # Reset state
+            for conversation_id in list(self.generation_tasks):
+                logger.info(f"Stopping generation for conversation {conversation_id}")
+                await self.cancel_generation(conversation_id)
+                # Keep the partial document so the user can resume after reconnecting
+                self.orchestrators[conversation_id].state = "interrupted"
+            for conversation_id in list(self.remote_generations):
+                # The worker marks the conversation interrupted and persists it
+                await self.cancel_remote_generation(conversation_id, reason="disconnect")
+                self.release_remote_generation(conversation_id)
+
+            # Persist everything before dropping it so a reconnect can pick up where the user left off
+            for conversation_id in self.orchestrators:
+                self.persist(conversation_id)
+            await self.conversation_writer.flush()
 
             # Clear orchestrators
             self.orchestrators.clear()
@@ -62,15 +103,21 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
         user_message = content.get("content", "").strip()
         conversation_id = content.get("conversation_id", "default")
 
+        # LLM calls made for this message are interactive turns of this user
+        set_call_context(self.user_id, INTERACTIVE, self.queue_notifier(conversation_id))
+
         # Switch to the specified conversation
         if conversation_id != self.current_conversation_id:
             self.current_conversation_id = conversation_id
             if conversation_id not in self.orchestrators:
-                # Create new orchestrator for this conversation
-                self.orchestrators[conversation_id] = DocumentOrchestrator(model_name=MODEL)
+                # Rehydrate or create the orchestrator for this conversation (the LLM itself is shared process-wide)
+                self.orchestrators[conversation_id] = await self.load_orchestrator(conversation_id)
+                logger.debug(f"Loaded orchestrator for {conversation_id}, LLM registry: {LLM_REGISTRY.stats()}")
 
         if msg_type == "user_message":
-            await self.handle_user_message(user_message)
+            # "use_cache": false forces a fresh extraction for this message
+            await self.handle_user_message(user_message, use_cache=content.get("use_cache", True))
+            self.persist(conversation_id)
         elif msg_type == "switch_conversation":
             # Handle conversation switching
             await self.send_json({"type": "conversation_switched", "conversation_id": conversation_id})
@@ -81,18 +128,185 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
 
     def get_current_orchestrator(self):
         """Get the orchestrator for the current conversation."""
-        if self.current_conversation_id not in self.orchestrators:
-            self.orchestrators[self.current_conversation_id] = DocumentOrchestrator(model_name=MODEL)
-        return self.orchestrators[self.current_conversation_id]
+        return self.get_orchestrator(self.current_conversation_id)
+
+    def get_orchestrator(self, conversation_id):
+        """Get the orchestrator for a conversation, creating it if needed."""
+        if conversation_id not in self.orchestrators:
+            self.orchestrators[conversation_id] = DocumentOrchestrator(model_name=MODEL)
+        return self.orchestrators[conversation_id]
+
+    async def load_orchestrator(self, conversation_id):
+        """Rehydrate a conversation's orchestrator from the store, or create a fresh one."""
+        snapshot = await self.conversation_writer.load(self.owner, conversation_id)
+        if snapshot is None:
+            return DocumentOrchestrator(model_name=MODEL)
+        logger.info(f"Rehydrated conversation {conversation_id} in state {snapshot.get('state')}")
+        return DocumentOrchestrator.from_snapshot(snapshot, model_name=MODEL)
+
+    def persist(self, conversation_id):
+        """Queue a snapshot of a conversation for the next batched write."""
+        if conversation_id in self.remote_generations:
+            return  # the generation worker owns this conversation's state until it is done
+        orchestrator = self.orchestrators.get(conversation_id)
+        if orchestrator is not None:
+            self.conversation_writer.schedule(self.owner, conversation_id, orchestrator.to_snapshot())
+
+    async def start_generation(self, recovery: bool = False):
+        """Start generating the current conversation's document, inline or on its generation worker."""
+        conversation_id = self.current_conversation_id
+        if GENERATION_MODE != "worker":
+            self.start_local_generation(conversation_id, recovery=recovery)
+            return
+
+        # The worker loads the conversation from the store, so write it out first
+        self.persist(conversation_id)
+        await self.conversation_writer.flush()
+        generation = RemoteGeneration(token=uuid.uuid4().hex, last_seen=perf_counter())
+        self.remote_generations[conversation_id] = generation
+        generation.watchdog = asyncio.create_task(self.watch_remote_generation(conversation_id, generation))
+        await self.channel_layer.send(
+            generation_channel_for(conversation_id),
+            {
+                "type": "generation.start",
+                "conversation_id": conversation_id,
+                "reply_channel": self.channel_name,
+                "user_id": str(self.user_id),
+                "owner": self.owner,
+                "token": generation.token,
+                "recovery": recovery,
+            },
+        )
+
+    def start_local_generation(self, conversation_id, recovery: bool = False):
+        """Start streaming a conversation's document in a tracked task on this process."""
+        task = asyncio.create_task(self.stream_document(conversation_id, recovery=recovery))
+        self.generation_tasks[conversation_id] = task
+
+        def _forget(finished_task):
+            if self.generation_tasks.get(conversation_id) is finished_task:
+                del self.generation_tasks[conversation_id]
+
+        task.add_done_callback(_forget)
+
+    async def cancel_generation(self, conversation_id) -> int:
+        """
+        Cancel a conversation's running generation and wait for its LLM stream to close.
 
-    async def handle_user_message(self, message: str):
+        Returns:
+            Estimated output tokens saved by stopping early (0 if nothing was running)
+        """
+        task = self.generation_tasks.pop(conversation_id, None)
+        if task is None or task.done():
+            return 0
+
+        task.cancel()
+        await asyncio.wait([task])
+
+        orchestrator = self.orchestrators.get(conversation_id)
+        tokens_saved = orchestrator.estimated_tokens_saved() if orchestrator else 0
+        logger.info(f"Cancelled generation for conversation {conversation_id}, ~{tokens_saved} tokens saved")
+        return tokens_saved
+
+    async def cancel_remote_generation(self, conversation_id, reason: str = "stop"):
+        """Ask the owning generation worker to cancel a conversation's generation."""
+        generation = self.remote_generations.get(conversation_id)
+        await self.channel_layer.send(
+            generation_channel_for(conversation_id),
+            {
+                "type": "generation.cancel",
+                "conversation_id": conversation_id,
+                "token": generation.token if generation else None,
+                "reason": reason,
+            },
+        )
+
+    def release_remote_generation(self, conversation_id):
+        """Stop tracking a conversation's worker generation; frames the worker still sends are dropped."""
+        generation = self.remote_generations.pop(conversation_id, None)
+        if generation is not None and generation.watchdog is not None:
+            generation.watchdog.cancel()
+
+    def remote_generation_for(self, event):
+        """The worker generation an event belongs to, refreshed as alive; None if it was released."""
+        generation = self.remote_generations.get(event["conversation_id"])
+        if generation is None or generation.token != event.get("token"):
+            return None
+        generation.last_seen = perf_counter()
+        return generation
+
+    async def watch_remote_generation(self, conversation_id, generation: RemoteGeneration):
+        """Take a conversation back from its worker once the worker has been silent for too long."""
+        while (idle := perf_counter() - generation.last_seen) < GENERATION_WORKER_TIMEOUT:
+            await asyncio.sleep(GENERATION_WORKER_TIMEOUT - idle)
+        if self.remote_generations.get(conversation_id) is not generation:
+            return
+
+        logger.warning(f"No word from the generation worker of conversation {conversation_id} for {idle:.1f}s")
+        # A worker that is only slow stops, and leaves the conversation to this socket
+        await self.cancel_remote_generation(conversation_id, reason="timeout")
+        del self.remote_generations[conversation_id]
+        # Keep whatever partial document the worker persisted, so the user can resume it
+        orchestrator = await self.load_orchestrator(conversation_id)
+        orchestrator.state = "interrupted"
+        self.orchestrators[conversation_id] = orchestrator
+        self.persist(conversation_id)
+        try:
+            await self.send_json(
+                {
+                    "type": "system_message",
+                    "content": 'Document generation stopped responding. Type "continue" to resume it.',
+                }
+            )
+        except Exception as e:
+            logger.debug(f"Could not report the stalled generation of conversation {conversation_id}: {e}")
+
+    async def generation_relay(self, event):
+        """Forward a frame produced by a generation worker to the socket."""
+        if self.remote_generation_for(event) is not None:
+            await self.send_json(event["frame"])
+
+    async def generation_heartbeat(self, event):
+        """A generation worker is still working on a conversation."""
+        self.remote_generation_for(event)
+
+    async def generation_done(self, event):
+        """A generation worker finished with a conversation: reload the state it persisted."""
+        conversation_id = event["conversation_id"]
+        if self.remote_generation_for(event) is None:
+            logger.info(f"Ignoring a released generation worker finishing conversation {conversation_id}")
+            return
+        self.release_remote_generation(conversation_id)
+        if conversation_id in self.orchestrators:
+            self.orchestrators[conversation_id] = await self.load_orchestrator(conversation_id)
+
+    def queue_notifier(self, conversation_id):
+        """Build the callback telling the client where its LLM call waits in the admission queue."""
+
+        async def notify(position: int):
+            content = f"You're in queue, position {position}" if position else ""
+            try:
+                await self.send_json(
+                    {
+                        "type": "queue_position",
+                        "conversation_id": conversation_id,
+                        "position": position,
+                        "content": content,
+                    }
+                )
+            except Exception as e:
+                logger.debug(f"Could not send queue position for conversation {conversation_id}: {e}")
+
+        return notify
+
+    async def handle_user_message(self, message: str, use_cache: bool = True):
         """Handle user message with proper error handling for disconnections."""
         try:
             orchestrator = self.get_current_orchestrator()
 
             # === If no active state yet, start with goal + extraction ===
             if orchestrator.state == "idle":
-                await orchestrator.start(message)
+                await orchestrator.start(message, use_cache=use_cache)
 
                 next_q = await orchestrator.next_question()
                 await self.send_json({"type": "assistant_message", "content": next_q})
@@ -100,9 +314,9 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
 
             # === If collecting fields ===
             elif orchestrator.state == "collecting":
-                await orchestrator.record_user_input(message)
-
-                next_q = await orchestrator.next_question()
+                turn_started = perf_counter()
+                next_q = await orchestrator.answer_and_ask(message, pipelined=PIPELINED_TURNS)
+                TURN_LATENCY["pipelined" if PIPELINED_TURNS else "sequential"].observe(perf_counter() - turn_started)
                 if next_q:
                     try:
                         await self.send_json({"type": "assistant_message", "content": next_q})
@@ -118,7 +332,7 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                         )
                     except Exception:
                         return
-                    asyncio.create_task(self.stream_document())  # start async streaming
+                    await self.start_generation()  # start async streaming
                 return
 
             # === Ignore messages during generation ===
@@ -140,7 +354,16 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                         "content": "Continuing document generation...",
                     }
                 )
-                asyncio.create_task(self.stream_document(recovery=True))  # start async streaming
+                await self.start_generation(recovery=True)  # start async streaming
+
+            # === A generation was cut off by a disconnect or restart ===
+            elif orchestrator.state == "interrupted":
+                await self.send_json(
+                    {
+                        "type": "assistant_message",
+                        "content": 'Your document generation was interrupted. Type "continue" to resume it.',
+                    }
+                )
 
         except Exception as e:
             # Log the error and handle client disconnections gracefully
@@ -161,46 +384,52 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                     # If we can't send the error message, client is likely disconnected
                     raise StopConsumer()
 
-    async def stream_document(self, recovery: bool = False):
-        """Streams generated document chunks to the frontend in real-time with pagination markers."""
+    async def stream_document(self, conversation_id, recovery: bool = False):
+        """Streams generated document chunks to the frontend in real-time, with page breaks as they are found."""
+        # Runs in its own task, so this only lowers the priority of the generation's LLM calls
+        set_call_context(self.user_id, GENERATION, self.queue_notifier(conversation_id))
         try:
-            orchestrator = self.get_current_orchestrator()
-            full_document = ""
+            orchestrator = self.get_orchestrator(conversation_id)
             chunk_count = 0
+            persisted_chars = 0
+            # Coalesce token deltas into fewer frames; chunk_index counts frames sent
+            coalescer = FrameCoalescer(STREAM_FLUSH_MAX_CHARS, STREAM_FLUSH_MAX_LATENCY_MS / 1000)
+
+            # aclosing closes the LLM stream as soon as we stop iterating, not when the generator is collected;
+            # coalesce_frames also flushes buffered text when the stream stalls for longer than the latency limit
+            async with (
+                aclosing(orchestrator.generate_document(recovery=recovery)) as chunks,
+                aclosing(coalesce_frames(chunks, coalescer)) as frames,
+            ):
+                async for frame in frames:
+                    # Check if WebSocket is still connected before sending
+                    if self.channel_layer is None:
+                        logger.info("WebSocket connection lost, stopping document streaming")
+                        return
 
-            async for chunk in orchestrator.generate_document():
-                # Check if WebSocket is still connected before sending
-                if self.channel_layer is None:
-                    logger.info("WebSocket connection lost, stopping document streaming")
-                    return
+                    chunk_count += 1
+                    if not await self.send_document_frame(frame, chunk_count):
+                        return  # Exit gracefully without error
+                    if not await self.send_page_breaks(orchestrator):
+                        return
 
-                full_document += chunk
-                chunk_count += 1
+                    if len(orchestrator.document) - persisted_chars >= PERSIST_EVERY_CHARS:
+                        persisted_chars = len(orchestrator.document)
+                        self.persist(conversation_id)
 
-                # Send smaller chunks for better typewriter effect
-                try:
-                    await self.send_json({"type": "generate_document", "chunk": chunk, "chunk_index": chunk_count})
-                    logger.debug(f"Sent chunk {chunk_count} with length {len(chunk)} with content: {chunk}")
-                except Exception as e:
-                    if (
-                        "ClientDisconnected" in str(e)
-                        or "ConnectionClosedError" in str(e)
-                        or "websocket.send" in str(e)
-                    ):
-                        logger.info(f"Client disconnected during document streaming at chunk {chunk_count}")
-                        return  # Exit gracefully without error
-                    else:
-                        raise  # Re-raise other exceptions
+            orchestrator.pagination.finish()
+            if not await self.send_page_breaks(orchestrator):
+                return
 
-            # Check if document seems incomplete and try to continue
-            if not await self.is_document_incomplete(full_document[-1000:]):  # Check excluding last chunk
-                logger.info("Document appears incomplete, attempting to continue generation")
-                # Check connection before continuing
-                # implement recovery method
+            # The orchestrator judged completeness as the text arrived (asking the LLM checker when unsure)
+            # and already continued cut-off documents
+            verdict = orchestrator.completion.verdict()
+            COMPLETION_CHECKS[verdict] += 1
+            logger.info(f"Local completeness check: {verdict} {orchestrator.completion.stats()}")
+            if verdict == INCOMPLETE:
+                logger.warning("Document still appears incomplete after continuing generation")
 
             logger.info("Document generation complete")
-            # Post-process the complete document to add pagination
-            paginated_document = self.add_pagination_markers(full_document)
 
             # Final connection check before sending completion message
             if self.channel_layer is None:
@@ -212,7 +441,10 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                     {
                         "type": "generation_complete",
                         "content": "✅ Document generation completed successfully!",
-                        "full_document": paginated_document,
+                        # The client already has the text from the streamed frames
+                        "pages": orchestrator.pagination.metadata(),
+                        "document_length": len(orchestrator.document),
+                        "usage": orchestrator.usage.to_dict(),
                     }
                 )
 
@@ -231,7 +463,14 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                     raise
 
             orchestrator.state = "idle"
-
+            self.persist(conversation_id)
+
+        except asyncio.CancelledError:
+            logger.info(f"Document streaming cancelled for conversation {conversation_id}")
+            if conversation_id in self.orchestrators:
+                self.orchestrators[conversation_id].state = "idle"
+                self.persist(conversation_id)
+            raise
         except Exception as e:
             if "ClientDisconnected" in str(e) or "ConnectionClosedError" in str(e) or "websocket.send" in str(e):
                 logger.info(f"Client disconnected during document streaming: {e}")
@@ -248,126 +487,75 @@ class DocumentAgentConsumer(AsyncJsonWebsocketConsumer):
                         # If we can't send error message, client is disconnected
                         logger.info("Could not send error message - client likely disconnected")
 
-    async def is_document_incomplete(self, chunk: str) -> bool:
-        #  check the last chunk for common signs of incompleteness
-        orchestrator = self.get_current_orchestrator()
-        completed = await orchestrator.llm.verify_doc(chunk)
-        logger.info(f"Document completeness check: {'complete' if completed else 'incomplete'}")
-        return completed
-
-    async def continue_document_generation(self, partial_document: str) -> str:
-        """Continue generating the document from where it left off."""
-        orchestrator = self.get_current_orchestrator()
+    async def send_document_frame(self, frame: str, chunk_index: int) -> bool:
+        """
+        Send one coalesced document frame.
 
+        Returns:
+            False if the client has disconnected, True otherwise
+        """
         try:
-            continuation_prompt = f"""
-            The following legal document was partially generated but appears incomplete:
-
-            {partial_document[-1000:]}  # Last 1000 characters for context
-
-            Please continue and complete this document. Focus on:
-            1. Completing any incomplete sentences or sections
-            2. Adding any missing standard legal clauses
-            3. Including proper signature blocks and execution provisions
-            4. Ensuring the document meets professional legal standards
-            5. Adding final sections like governing law, dispute resolution, etc.
-
-            Continue exactly where the document left off, maintaining the same style and format.
-            """
-
-            # Create a simple continuation context
-            from .models import DocumentContext
-
-            continuation_context = DocumentContext(
-                fields={k: v for k, v in orchestrator.fields.items() if v is not None},
-                document_type=orchestrator.document_type,
-                user_goal=f"Continue and complete the following document: {orchestrator.user_goal}",
-            )
+            await self.send_json({"type": "generate_document", "chunk": frame, "chunk_index": chunk_index})
+            logger.debug("Sent chunk %d with length %d", chunk_index, len(frame))
+            return True
+        except Exception as e:
+            if "ClientDisconnected" in str(e) or "ConnectionClosedError" in str(e) or "websocket.send" in str(e):
+                logger.info(f"Client disconnected during document streaming at chunk {chunk_index}")
+                return False
+            raise  # Re-raise other exceptions
 
-            # Use the LLM's generate_document method with continuation context
-            continuation_chunks = []
-            async for chunk in orchestrator.llm.generate_document(continuation_context):
-                # Check connection before sending chunks
-                if self.channel_layer is None:
-                    logger.info("WebSocket connection lost during continuation, stopping")
-                    break
+    async def send_page_breaks(self, orchestrator) -> bool:
+        """
+        Send the page breaks found since the last call.
 
-                continuation_chunks.append(chunk)
-                # Also stream the continuation
-                try:
-                    await self.send_json(
-                        {
-                            "type": "generate_document",
-                            "chunk": chunk,
-                            "chunk_index": 999999,  # High number to indicate continuation
-                        }
-                    )
-                    await asyncio.sleep(0.05)
-                except Exception as e:
-                    if (
-                        "ClientDisconnected" in str(e)
-                        or "ConnectionClosedError" in str(e)
-                        or "websocket.send" in str(e)
-                    ):
-                        logger.info("Client disconnected during continuation streaming")
-                        break
-                    else:
-                        raise
-
-            return ''.join(continuation_chunks)
-        except Exception as e:
-            logger.error(f"Error in continuation: {e}")
-            return ""
-
-    def add_pagination_markers(self, document: str) -> str:
-        """Add intelligent page break markers to the document for better pagination."""
-        lines = document.split('\n')
-        paginated_lines = []
-        line_count = 0
-        lines_per_page = 30  # Slightly fewer lines per page for better readability
-
-        for i, line in enumerate(lines):
-            # Smart page breaks based on content structure
-            should_break = False
-
-            # Force page break for major sections (H1, H2 headers) after some content
-            if line.startswith('# ') and line_count > 15:
-                should_break = True
-            elif line.startswith('## ') and line_count > 20:
-                should_break = True
-            # Regular page breaks based on line count
-            elif line_count >= lines_per_page:
-                should_break = True
-            # Break before signature sections
-            elif 'signature' in line.lower() and line_count > 10:
-                should_break = True
-
-            if should_break and line_count > 0:
-                paginated_lines.append('\n---PAGE_BREAK---\n')
-                line_count = 0
-
-            paginated_lines.append(line)
-
-            # Count substantial lines (not just empty lines)
-            if line.strip() and not line.startswith('---PAGE_BREAK---'):
-                line_count += 1
-
-        return '\n'.join(paginated_lines)
+        Returns:
+            False if the client has disconnected, True otherwise
+        """
+        for page_break in orchestrator.pagination.take_breaks():
+            try:
+                await self.send_json({"type": "page_break", "page": page_break.page, "offset": page_break.offset})
+            except Exception as e:
+                if "ClientDisconnected" in str(e) or "ConnectionClosedError" in str(e) or "websocket.send" in str(e):
+                    logger.info(f"Client disconnected during document streaming at page {page_break.page}")
+                    return False
+                raise
+        return True
 
     async def handle_stop_generation(self):
         """Handle stop generation request from frontend."""
         orchestrator = self.get_current_orchestrator()
 
-        # Reset orchestrator state
+        if self.current_conversation_id in self.remote_generations:
+            # The worker cancels the stream and sends the confirmation with the tokens saved
+            await self.cancel_remote_generation(self.current_conversation_id)
+            return
+
+        # Cancel the running stream so the provider stops producing tokens, then reset orchestrator state
+        tokens_saved = await self.cancel_generation(self.current_conversation_id)
         orchestrator.state = "idle"
+        self.persist(self.current_conversation_id)
 
         # Send confirmation to frontend
-        await self.send_json({"type": "system_message", "content": "🛑 Document generation stopped by user."})
+        await self.send_json(
+            {
+                "type": "system_message",
+                "content": "🛑 Document generation stopped by user.",
+                "tokens_saved": tokens_saved,
+            }
+        )
 
     async def handle_reset_all_sessions(self):
         """Handle reset all sessions request from frontend - clears all orchestrator objects."""
         try:
-            # Clear ALL orchestrator objects
+            # Stop any running generations, then clear ALL orchestrator objects and their stored state
+            for conversation_id in list(self.generation_tasks):
+                await self.cancel_generation(conversation_id)
+            for conversation_id in list(self.remote_generations):
+                # The worker drops the conversation instead of persisting it again
+                await self.cancel_remote_generation(conversation_id, reason="reset")
+                self.release_remote_generation(conversation_id)
+            # Only this owner's stored conversations can be discarded
+            await self.conversation_writer.discard(self.owner, list(self.orchestrators))
             self.orchestrators.clear()
             self.current_conversation_id = None
 
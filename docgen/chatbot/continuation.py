@@ -0,0 +1,125 @@
+"""
+Checkpoint-and-resume support for document generation.
+
+When a generation run is cut off (output token limit, stream error, or the
+completion detector finds a truncated ending) the orchestrator asks the model for
+the continuation only, from a DocumentCheckpoint, and splices it onto the text the
+user already has with OverlapTrimmer so repeated text is not streamed twice.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Characters of the document end sent back to the model as context for a continuation
+CHECKPOINT_TAIL_CHARS = 1500
+
+# Characters at the start of a continuation checked against the document end for repeated text
+OVERLAP_WINDOW = 400
+
+# Shortest repeat treated as overlap rather than coincidence
+MIN_OVERLAP = 12
+
+# Finish reasons that mean the model stopped before the document was done
+TRUNCATED_FINISH_REASONS = ("length", "error")
+
+
+@dataclass
+class DocumentCheckpoint:
+    """Last good position of a partially generated document."""
+
+    offset: int
+    outline: List[str] = field(default_factory=list)
+    tail: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentCheckpoint":
+        return cls(offset=data.get("offset", 0), outline=list(data.get("outline", [])), tail=data.get("tail", ""))
+
+
+@dataclass
+class GenerationRun:
+    """Outcome of one model streaming run, filled in by RealLLM.generate_document."""
+
+    finish_reason: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def truncated(self) -> bool:
+        return self.finish_reason in TRUNCATED_FINISH_REASONS
+
+
+@dataclass
+class DocumentUsage:
+    """Token usage across every run that produced one document."""
+
+    runs: int = 0
+    continuations: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def add(self, run: GenerationRun, continuation: bool = False):
+        self.runs += 1
+        self.continuations += int(continuation)
+        self.input_tokens += run.input_tokens
+        self.output_tokens += run.output_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentUsage":
+        return cls(**{key: int(data.get(key, 0)) for key in ("runs", "continuations", "input_tokens", "output_tokens")})
+
+
+class OverlapTrimmer:
+    """
+    Drops text at the start of a streamed continuation that repeats the end of the document.
+
+    Models resuming a cut-off document often restart the last sentence or paragraph.
+    The first OVERLAP_WINDOW characters are held back until the longest repeat of the
+    document end can be measured; everything after that passes straight through.
+    """
+
+    def __init__(self, document_tail: str, window: int = OVERLAP_WINDOW, min_overlap: int = MIN_OVERLAP):
+        """
+        Initialize the trimmer.
+
+        Args:
+            document_tail: End of the document the continuation is appended to
+            window: Characters of the continuation held back to look for the repeat
+            min_overlap: Shortest repeat that is trimmed
+        """
+        self.tail = document_tail[-window:]
+        self.window = window
+        self.min_overlap = min_overlap
+        self.trimmed = 0
+        self._pending: Optional[str] = ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a continuation chunk; returns the text that can be streamed now (possibly empty)."""
+        if self._pending is None:
+            return chunk
+        self._pending += chunk
+        if len(self._pending) < self.window:
+            return ""
+        return self.flush()
+
+    def flush(self) -> str:
+        """Release held-back text once the continuation ends (or the window is full)."""
+        if self._pending is None:
+            return ""
+        pending, self._pending = self._pending, None
+        overlap = self._overlap(pending)
+        self.trimmed = overlap
+        return pending[overlap:]
+
+    def _overlap(self, text: str) -> int:
+        """Length of the longest prefix of text that the document tail ends with."""
+        for size in range(min(len(self.tail), len(text)), self.min_overlap - 1, -1):
+            if self.tail.endswith(text[:size]):
+                return size
+        return 0
@@ -0,0 +1,244 @@
+"""
+Server-side export of generated documents to Markdown, HTML, Word and PDF.
+
+Rendering runs in a bounded process pool so long documents do not block the event loop:
+Markdown is converted with markdown2 and PDFs are laid out by WeasyPrint. Outputs are
+cached by a hash of their input, which doubles as the HTTP ETag, and concurrent requests
+for the same output share one render.
+"""
+
+import asyncio
+import hashlib
+import html
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, Optional
+
+from .metrics import EXPORT_RENDER
+from .streaming import StreamingPaginator
+
+# Processes rendering exports at once; further requests wait for a free one
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT_MAX_WORKERS", "2"))
+# Total size of rendered outputs kept in memory
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Bump when the templates below change, so cached outputs and ETags are not reused
+EXPORT_VERSION = 1
+
+# Export format -> (content type, file extension)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "md": ("text/markdown; charset=utf-8", "md"),
+    "html": ("text/html; charset=utf-8", "html"),
+    "doc": ("application/msword", "doc"),
+    "pdf": ("application/pdf", "pdf"),
+}
+
+MARKDOWN_EXTRAS = ["tables", "fenced-code-blocks", "cuddled-lists"]
+
+PAGE_BREAK = '<div class="page-break" style="page-break-before: always"></div>'
+
+STYLESHEET = """
+@page { size: A4; margin: 25mm 20mm; @bottom-center { content: counter(page) " / " counter(pages); } }
+body { font-family: "Times New Roman", Times, serif; font-size: 12pt; line-height: 1.5; color: #111; }
+h1 { font-size: 20pt; text-align: center; margin: 0 0 1em; }
+h2 { font-size: 15pt; margin: 1.5em 0 0.5em; }
+h3 { font-size: 13pt; margin: 1.2em 0 0.4em; }
+p, li { text-align: justify; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #999; padding: 4pt 6pt; }
+"""
+
+_FILENAME_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+
+class ExportUnavailable(Exception):
+    """Raised when a format cannot be rendered here, e.g. WeasyPrint's system libraries are missing."""
+
+
+@dataclass
+class RenderedExport:
+    """A rendered document, ready to send."""
+
+    body: bytes
+    content_type: str
+    etag: str
+    filename: str
+
+
+def export_etag(export_format: str, document: str, title: str) -> str:
+    """Quoted HTTP entity tag of an export: the hash of everything its bytes depend on."""
+    digest = hashlib.sha256(f"{EXPORT_VERSION}\0{export_format}\0{title}\0{document}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def export_filename(title: str, export_format: str) -> str:
+    """Download file name for an export, e.g. "loan_agreement.pdf"."""
+    stem = _FILENAME_UNSAFE.sub("_", title).strip("_").lower() or "document"
+    return f"{stem}.{EXPORT_FORMATS[export_format][1]}"
+
+
+def render_html(document: str, title: str) -> str:
+    """
+    Render a Markdown document as a standalone HTML page, with CSS page breaks between its pages.
+
+    Raw HTML in the document is escaped; pages are split where StreamingPaginator breaks them.
+    """
+    import markdown2
+
+    paginator = StreamingPaginator()
+    paginator.feed(document)
+    paginator.finish()
+    offsets = [0, *(page_break.offset for page_break in paginator.breaks), len(document)]
+    pages = [
+        markdown2.markdown(document[start:end], safe_mode="escape", extras=MARKDOWN_EXTRAS)
+        for start, end in zip(offsets, offsets[1:])
+    ]
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{html.escape(title)}</title>\n<style>{STYLESHEET}</style>\n</head>\n<body>\n"
+        + f"\n{PAGE_BREAK}\n".join(pages)
+        + "\n</body>\n</html>\n"
+    )
+
+
+def render_pdf(document: str, title: str) -> bytes:
+    """Lay out the HTML rendering of a document as a PDF with WeasyPrint."""
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError) as e:
+        # WeasyPrint needs Pango at import time, which slim images often lack
+        raise ExportUnavailable(f"PDF export is unavailable: {e}") from None
+    return HTML(string=render_html(document, title)).write_pdf()
+
+
+def render_export(export_format: str, document: str, title: str) -> bytes:
+    """Render a document in one of EXPORT_FORMATS; runs in a worker process."""
+    if export_format == "md":
+        return document.encode()
+    if export_format in ("html", "doc"):
+        # Word opens HTML saved as .doc, keeping headings, tables and page breaks
+        return render_html(document, title).encode()
+    if export_format == "pdf":
+        return render_pdf(document, title)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+class ExportCache:
+    """Process-local LRU cache of rendered exports, bounded by their total size."""
+
+    def __init__(self, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, RenderedExport]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[RenderedExport]:
+        with self._lock:
+            rendered = self._entries.get(etag)
+            if rendered is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return rendered
+
+    def set(self, rendered: RenderedExport):
+        """Store an export, evicting the least recently used ones to stay within max_bytes."""
+        if len(rendered.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(rendered.etag, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[rendered.etag] = rendered
+            self.size += len(rendered.body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class DocumentExporter:
+    """Renders exports on an executor, caching them and sharing renders already in progress."""
+
+    def __init__(self, executor: Optional[Executor] = None, cache: Optional[ExportCache] = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            executor: Where renders run (default: a process pool of EXPORT_MAX_WORKERS, started on first use)
+            cache: Rendered outputs (default: an ExportCache of EXPORT_CACHE_MAX_BYTES)
+        """
+        self._executor = executor
+        self.cache = cache if cache is not None else ExportCache()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            # Spawned workers start clean instead of inheriting the server's threads and event loop
+            self._executor = ProcessPoolExecutor(EXPORT_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def export(self, export_format: str, document: str, title: str) -> RenderedExport:
+        """
+        Get a document rendered in `export_format`, from the cache when possible.
+
+        Raises:
+            ValueError: If the format is unknown
+            ExportUnavailable: If the format cannot be rendered on this server
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        etag = export_etag(export_format, document, title)
+        rendered = self.cache.get(etag)
+        if rendered is not None:
+            return rendered
+
+        in_flight = self._in_flight.get(etag)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(self._render(export_format, document, title, etag))
+            self._in_flight[etag] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(etag, None))
+        # Shielded so one client going away does not cancel the render others wait for
+        return await asyncio.shield(in_flight)
+
+    async def _render(self, export_format: str, document: str, title: str, etag: str) -> RenderedExport:
+        started = perf_counter()
+        if export_format == "md":
+            body = render_export(export_format, document, title)  # Already Markdown; not worth a process hop
+        else:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self.executor, render_export, export_format, document, title
+            )
+        EXPORT_RENDER[export_format].observe(perf_counter() - started)
+        rendered = RenderedExport(
+            body=body,
+            content_type=EXPORT_FORMATS[export_format][0],
+            etag=etag,
+            filename=export_filename(title, export_format),
+        )
+        self.cache.set(rendered)
+        return rendered
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.cache.stats(), "in_flight": len(self._in_flight)}
+
+
+EXPORTER = DocumentExporter()
+
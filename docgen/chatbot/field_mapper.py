@@ -0,0 +1,215 @@
+"""
+Deterministic pre-mapping of user replies to document fields.
+
+Resolves the obvious cases locally so DocumentOrchestrator.record_user_input only
+sends the residual to the field_mapping_agent:
+- "key: value" lines naming a missing field ("Tenant name: Jane Doe")
+- dates, amounts and addresses for fields whose name marks their kind (`*_date`,
+  `*_amount`, `*_address`, ...), when exactly one such field was asked for
+- a bare value answering a single requested field ("John Smith" after asking for tenant_name):
+  a few words without clause punctuation, verbs or field names. Sentences ("The tenant is Jane
+  Doe"), replies carrying more than one value and non-answers ("not sure", "skip") go to the model
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+
+DATE_PATTERN = re.compile(
+    r"\b(?:"
+    r"\d{4}-\d{1,2}-\d{1,2}"  # 2025-01-31
+    r"|\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}"  # 31/01/2025
+    rf"|{_MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}"  # January 31st, 2025
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}\s*,?\s+\d{{4}}"  # 31st of January 2025
+    r")\b",
+    re.IGNORECASE,
+)
+
+AMOUNT_PATTERN = re.compile(
+    r"(?:[$€£]\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:k|m|thousand|million)\b)?"  # $1,500.00, £2k
+    r"|\b\d[\d,]*(?:\.\d+)?\s?(?:k\s)?(?:usd|eur|gbp|ngn|dollars?|euros?|pounds?|naira)\b)",  # 1500 USD
+    re.IGNORECASE,
+)
+
+ADDRESS_PATTERN = re.compile(
+    r"\b\d+[a-z]?\s+(?:[\w.'-]+\s+){1,4}?"
+    r"(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|court|ct|way|place|pl|crescent|close|terrace)"
+    r"\b\.?"
+    r"(?:,\s*[^,\n]+){0,3}",  # city, state / postcode, country
+    re.IGNORECASE,
+)
+
+# Field-name suffix (or whole name) -> pattern for the values such fields take
+SUFFIX_PATTERNS: Dict[str, Pattern[str]] = {
+    "_date": DATE_PATTERN,
+    "_amount": AMOUNT_PATTERN,
+    "_rent": AMOUNT_PATTERN,
+    "_deposit": AMOUNT_PATTERN,
+    "_price": AMOUNT_PATTERN,
+    "_salary": AMOUNT_PATTERN,
+    "_address": ADDRESS_PATTERN,
+}
+
+KEY_VALUE_PATTERN = re.compile(r"^\s*[-*•]?\s*([A-Za-z][\w \-]{0,40}?)\s*[:=]\s*(\S.*?)\s*$")
+
+# Longest reply still treated as a bare value for a single requested field
+MAX_BARE_VALUE_WORDS = 6
+MAX_BARE_VALUE_CHARS = 80
+
+# Punctuation that separates clauses: , ; : ! ? (but not "1,500") and a sentence-ending "." (but not "J. Smith")
+CLAUSE_PUNCTUATION_PATTERN = re.compile(r"[;:!?]|,(?!\d)|(?<!\b[A-Za-z])\.\s+\S")
+
+# Words that make a reply a sentence about a value rather than the value itself
+SENTENCE_WORDS = frozenset(
+    "is are was were be been am it's its i i'm i'd i'll we my our you your he she they this that there "
+    "change changed update updated correct fix make set use put mean meant want think should would will "
+    "can could have has had actually also instead and but first".split()
+)
+
+# Whole replies that decline or defer the question instead of answering it
+NON_ANSWER_PATTERN = re.compile(
+    r"^(?:(?:um+|uh+|hmm+|well|honestly|sorry|ok(?:ay)?)\W+)*"
+    r"(?:i\W*m\s+|i\s+am\s+|i\s+(?:really\s+|just\s+)?(?:have\s+)?)?"
+    r"(?:not\s+(?:sure|certain|yet|now)|unsure|no\s+(?:idea|clue)|(?:do\s*n\W?t|dont)\s+know|dunno|idk"
+    r"|n/?a|none|nothing|unknown|tbd|tbc|pass|later|skip(?:\s+(?:it|this|that))?"
+    r"|(?:can|could|may)\s+(?:i|we)\s+skip(?:\s+(?:it|this|that))?"
+    r"|(?:i\W*ll\s+)?(?:tell|answer|get\s+back\s+to)\s+(?:you\s+)?(?:(?:it|that|this|on\s+that)\s+)?later"
+    r"|(?:i\W*d\s+)?(?:rather|prefer)\s+not(?:\s+to)?(?:\s+say)?|let\s+me\s+think(?:\s+about\s+it)?)"
+    r"(?:\W+(?:for\s+now|yet|right\s+now|at\s+the\s+moment|sorry|thanks?))*\W*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class PremapResult:
+    """Fields resolved locally, and whether the model is still needed for the rest."""
+
+    fields: Dict[str, str] = field(default_factory=dict)
+    needs_model: bool = True
+
+
+def _field_kind(field_name: str) -> Optional[str]:
+    """Get the SUFFIX_PATTERNS key for a field, e.g. "start_date" -> "_date", "price" -> "_price"."""
+    for suffix in SUFFIX_PATTERNS:
+        if field_name.endswith(suffix) or field_name == suffix[1:]:
+            return suffix
+    return None
+
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[\s\-]+", "_", key.strip().lower())
+
+
+def _match_key(key: str, missing_fields: List[str]) -> Optional[str]:
+    """Resolve a "key: value" key to a missing field: exact name, or the only field ending with it."""
+    key = _normalize_key(key)
+    if key in missing_fields:
+        return key
+    candidates = [name for name in missing_fields if name.endswith(f"_{key}") or name.startswith(f"{key}_")]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def _is_bare_value(text: str, missing_fields: List[str]) -> bool:
+    """Whether a reply is only a value ("Jane Doe", "$1,500"), with nothing the model should read."""
+    words = re.findall(r"[\w']+", text.lower().replace("’", "'"))
+    field_words = {word for name in missing_fields for word in name.split("_") if len(word) > 2 and word.isalpha()}
+    return (
+        "\n" not in text
+        and len(text) <= MAX_BARE_VALUE_CHARS
+        and 0 < len(words) <= MAX_BARE_VALUE_WORDS
+        and not CLAUSE_PUNCTUATION_PATTERN.search(text)
+        and not NON_ANSWER_PATTERN.match(text)
+        and not any(word in SENTENCE_WORDS or word in field_words for word in words)
+    )
+
+
+def premap_fields(
+    user_input: str, missing_fields: List[str], requested_fields: Optional[List[str]] = None
+) -> PremapResult:
+    """
+    Map the unambiguous parts of a user reply to fields without calling the LLM.
+
+    Args:
+        user_input: The user's reply
+        missing_fields: Fields that still need values
+        requested_fields: Fields the last question asked for; without them (e.g. on the opening
+            message) only "key: value" lines are resolved
+
+    Returns:
+        PremapResult with the resolved fields; needs_model is False when nothing is left
+        for the field_mapping_agent to do
+    """
+    text = user_input.strip()
+    requested = [name for name in (requested_fields or []) if name in missing_fields]
+    result = PremapResult()
+    if not text or not missing_fields:
+        result.needs_model = False
+        return result
+
+    # "key: value" lines
+    lines = [line for line in text.splitlines() if line.strip()]
+    unmatched_lines = []
+    for line in lines:
+        match = KEY_VALUE_PATTERN.match(line)
+        name = _match_key(match.group(1), missing_fields) if match else None
+        if name and name not in result.fields:
+            result.fields[name] = match.group(2)
+        else:
+            unmatched_lines.append(line)
+    if not unmatched_lines:
+        result.needs_model = False
+        return result
+    residual = "\n".join(unmatched_lines)
+
+    # Dates, amounts and addresses for the one requested field of that kind
+    pending = [name for name in requested if name not in result.fields]
+    for suffix, pattern in SUFFIX_PATTERNS.items():
+        fields_of_kind = [name for name in pending if _field_kind(name) == suffix]
+        if len(fields_of_kind) != 1:
+            continue
+        matches = pattern.findall(residual)
+        if len(matches) == 1:
+            result.fields[fields_of_kind[0]] = matches[0].strip().rstrip(".,")
+    pending = [name for name in requested if name not in result.fields]
+
+    # A bare value answering the only requested field
+    if len(requested) == 1 and pending and not result.fields and _is_bare_value(text, missing_fields):
+        result.fields[pending[0]] = text
+        pending = []
+
+    # With no question asked, any leftover text may hold values only the model can place
+    result.needs_model = bool(pending) or not requested
+    return result
+
+
+class PremapStats:
+    """Process-wide counters of how often a turn was mapped without the model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.model_skipped = 0
+        self.fields_premapped = 0
+
+    def record(self, result: PremapResult):
+        """Count one user turn."""
+        with self._lock:
+            self.turns += 1
+            self.fields_premapped += len(result.fields)
+            if not result.needs_model:
+                self.model_skipped += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Get counters, including the fraction of turns that skipped field_mapping_agent."""
+        return {
+            "turns": self.turns,
+            "model_skipped": self.model_skipped,
+            "skip_rate": self.model_skipped / self.turns if self.turns else 0.0,
+            "fields_premapped": self.fields_premapped,
+        }
+
+
+PREMAP_STATS = PremapStats()
@@ -0,0 +1,134 @@
+"""
+Hybrid template + LLM document generation.
+
+Document types with a clause skeleton in CLAUSE_TEMPLATES are assembled from it:
+boilerplate clauses render locally from the collected fields, and only the bespoke
+clauses are drafted by the section agent. SectionedGeneration runs both kinds as
+sections, so the drafted clauses are generated concurrently and everything streams
+in reading order. Types without a skeleton are generated as usual.
+
+The extraction model names types and fields freely ("Tenancy Agreement",
+"Landlord_Full_Name"), so get_template also resolves aliases, and
+DocumentTemplate.resolve_fields maps collected field names onto the placeholders.
+"""
+
+import re
+from dataclasses import dataclass
+from string import Formatter
+from typing import AsyncGenerator, Dict, FrozenSet, List, Optional, Tuple
+
+from .constants.clauses import CLAUSE_TEMPLATES, TEMPLATE_ALIASES
+from .schemas import DocumentOutline, SectionOutline
+
+
+class FieldValues(dict):
+    """Field values for str.format_map; a field that was not collected renders as a blank to fill in."""
+
+    def __missing__(self, key: str) -> str:
+        return f"[{key.replace('_', ' ')}]"
+
+
+def field_tokens(name: str) -> FrozenSet[str]:
+    """The words of a field name, whatever its case or separators ("Landlord_Full_Name" -> landlord, full, name)."""
+    words = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", name)
+    return frozenset(re.findall(r"[a-z0-9]+", words.lower()))
+
+
+@dataclass(frozen=True)
+class Clause:
+    """One section of a template: boilerplate `text`, or a `brief` for the section agent."""
+
+    heading: str
+    text: str = ""
+    brief: str = ""
+
+    @property
+    def generated(self) -> bool:
+        return not self.text
+
+
+@dataclass(frozen=True)
+class DocumentTemplate:
+    """A versioned clause skeleton for one document type."""
+
+    document_type: str
+    version: int
+    title: str
+    clauses: Tuple[Clause, ...]
+
+    @classmethod
+    def from_dict(cls, document_type: str, data: Dict) -> "DocumentTemplate":
+        clauses = tuple(Clause(**clause) for clause in data["clauses"])
+        return cls(document_type=document_type, version=data["version"], title=data["title"], clauses=clauses)
+
+    @property
+    def generated_clauses(self) -> List[int]:
+        """Positions of the clauses the section agent writes."""
+        return [index for index, clause in enumerate(self.clauses) if clause.generated]
+
+    def outline(self, fields: Dict[str, str]) -> DocumentOutline:
+        """Table of contents for the section agent, with the briefs of the bespoke clauses filled in."""
+        sections = [
+            SectionOutline(
+                heading=clause.heading,
+                brief=clause.brief.format_map(FieldValues(fields)) if clause.generated else "Standard clause",
+            )
+            for clause in self.clauses
+        ]
+        return DocumentOutline(title=self.title, sections=sections)
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Field names the clause texts and briefs reference, in order of first use."""
+        names: Dict[str, None] = {}
+        for clause in self.clauses:
+            names.update((name, None) for _, name, _, _ in Formatter().parse(clause.text or clause.brief) if name)
+        return list(names)
+
+    def resolve_fields(self, fields: Dict[str, Optional[str]]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Map collected fields onto the template's placeholders.
+
+        A placeholder takes the field with the same words ("landlord_name" <- "Landlord Name"),
+        else the one whose name contains its words with the fewest extras ("landlord_name" <-
+        "Landlord_Full_Name"). A field collected without a value still resolves its placeholder,
+        which renders as a blank to fill in.
+
+        Returns:
+            The values by placeholder, and the placeholders no collected field matches
+        """
+        tokens = {name: field_tokens(name) for name in fields}
+        values: Dict[str, str] = {}
+        unresolved: List[str] = []
+        for placeholder in self.placeholders:
+            wanted = field_tokens(placeholder)
+            candidates = sorted((len(words - wanted), name) for name, words in tokens.items() if wanted <= words)
+            if not candidates or (len(candidates) > 1 and candidates[0][0] == candidates[1][0]):
+                unresolved.append(placeholder)
+                continue
+            value = fields[candidates[0][1]]
+            if value is not None:
+                values[placeholder] = value
+        return values, unresolved
+
+    def render_clause(self, index: int, fields: Dict[str, str]) -> str:
+        """Render a boilerplate clause as a level-2 section, like the section agent writes them."""
+        clause = self.clauses[index]
+        return f"## {clause.heading}\n\n{clause.text.format_map(FieldValues(fields))}"
+
+    async def stream_clause(self, index: int, fields: Dict[str, str]) -> AsyncGenerator[str, None]:
+        """Stream a boilerplate clause as a single chunk."""
+        yield self.render_clause(index, fields)
+
+    def label(self) -> str:
+        return f"{self.document_type} template v{self.version}"
+
+
+TEMPLATES: Dict[str, DocumentTemplate] = {
+    document_type: DocumentTemplate.from_dict(document_type, data) for document_type, data in CLAUSE_TEMPLATES.items()
+}
+
+
+def get_template(document_type: str) -> Optional[DocumentTemplate]:
+    """The clause skeleton for a document type or one of its TEMPLATE_ALIASES, or None if it is generated in full."""
+    return TEMPLATES.get(document_type) or TEMPLATES.get(TEMPLATE_ALIASES.get(document_type.strip().lower(), ""))
@@ -4,14 +4,47 @@ Replaces the mock orchestrator with actual LLM functionality.
 """
 
 import asyncio
+import hashlib
+import json
 import os
+import threading
+from collections import deque
+from contextlib import aclosing
 from time import perf_counter
-from typing import Dict, List, Optional, AsyncGenerator, Set, Union, cast
+from typing import Any, Deque, Dict, List, Optional, AsyncGenerator, Union, cast
 
 from pydantic_ai import Agent, RunContext, ModelRetry
-from retry import retry
-from .models import FieldExtractionResult, FieldRequest, FieldMapping, DocumentContext
+from pydantic_ai.models import Model, infer_model
+from pydantic_ai.settings import ModelSettings
+from .admission import LLM_SCHEDULER
+from .cache import build_document_cache, build_extraction_cache
+from .classifier import (
+    LOCAL_CLASSIFIER_HEDGE_AFTER,
+    LOCAL_CLASSIFIER_MODE,
+    LOCAL_CLASSIFIER_MODES,
+    LOCAL_CLASSIFIER_STATS,
+    LOCAL_CLASSIFIER_THRESHOLD,
+    get_local_classifier,
+)
+from .completion import COMPLETE, INCOMPLETE, UNCERTAIN, CompletionDetector
+from .continuation import CHECKPOINT_TAIL_CHARS, DocumentCheckpoint, DocumentUsage, GenerationRun, OverlapTrimmer
+from .field_mapper import PREMAP_STATS, premap_fields
+from .hybrid import DocumentTemplate, get_template
+from .metrics import AGENT_CALLS, COMPLETION_CHECKS, DRAFT_OUTCOMES
+from .resilience import (
+    CIRCUIT_BREAKERS,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_retry,
+    stream_with_retry,
+)
+from .model_routing import ModelRoute, resolve_routes
+from .schemas import FieldExtractionResult, FieldRequest, FieldMapping, DocumentContext, DocumentOutline
+from .sections import GENERATION_STRATEGY, SECTION_CONCURRENCY, SectionGenerationError, SectionedGeneration
+from .streaming import DocumentBuffer, StreamingPaginator
 from dotenv import load_dotenv
+from .constants.clauses import CLAUSE_TEMPLATES
 from .constants.fields import (
     get_fields_for_document_type,
     detect_document_type_by_keywords,
@@ -22,67 +55,168 @@ from .constants.prompts import (
     FIELD_INFORMATION_PROMPT,
     FIELD_MAPPING_PROMPT,
     DOCUMENT_GENERATION_PROMPT,
+    DOCUMENT_REQUEST_RULES,
+    SECTION_GENERATION_PROMPT,
+    TOC_PROMPT,
     format_field_request_prompt,
 )
 
 # Load environment variables from .env file
 load_dotenv()
 
-# User input tracking for acknowledgments (similar to mock)
-USER_INPUT_HISTORY: Set[str] = set()
+# Maximum number of recent user actions kept per conversation for acknowledgments
+MAX_RECENT_ACTIONS = 10
+
+# Version of the orchestrator snapshot format used for persistence
+SNAPSHOT_VERSION = 1
+
+# Output token budget for a single document generation run
+GENERATION_MAX_TOKENS = 15000
+
+# Output token budgets for the TOC agent and for each section in section-wise generation
+TOC_MAX_TOKENS = 4000
+SECTION_MAX_TOKENS = 8000
+
+# Continuation runs allowed after the first pass when a document is cut off
+MAX_CONTINUATIONS = 2
+
+# Rough characters-per-token ratio used for token estimates on streamed text
+CHARS_PER_TOKEN = 4
+
+# Ask providers to cache the static agent instructions and output tool definitions (the prompt prefix)
+LLM_PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "true").lower() == "true"
+
+
+def estimate_tokens(char_count: int) -> int:
+    """Estimate the number of tokens in a text of the given length."""
+    return (char_count + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def agent_settings(**settings) -> ModelSettings:
+    """
+    Model settings for an agent, with prompt-cache hints when LLM_PROMPT_CACHE is on.
+
+    Only the prefix is cached: requests are one-off, so writing them to the cache would
+    cost more than it saves. Providers without prompt caching ignore the hint.
+    """
+    if LLM_PROMPT_CACHE:
+        settings["cache"] = {"messages": False}
+    return cast(ModelSettings, settings)
 
 
 class RealLLM:
     """Real LLM implementation using Pydantic AI for document generation."""
 
-    def __init__(self, model_name: str = "openai:gpt-4.1"):
+    def __init__(self, model_name: str = "openai:gpt-4.1", routes: Optional[Dict[str, ModelRoute]] = None):
         """
         Initialize the real LLM with specified model.
 
         Args:
             model_name: Model identifier (default: openai:gpt-4.1)
+            routes: Model route per agent name (default: resolved from the environment by chatbot.model_routing)
 
         Raises:
             ValueError: If API key is not available for the specified model
         """
         self.model_name = model_name
+        self.routes = routes or resolve_routes(model_name)
+        # Fallback models are only built when first needed
+        self._fallback_models: Dict[str, Model] = {}
 
         # Agent for extracting required fields
         self.extraction_agent = Agent(
-            model_name,
+            self.routes["extraction_agent"].model,
+            name="extraction_agent",
             output_type=FieldExtractionResult,
             instructions=REQUIREMENT_EXTRACTION_PROMPT,
+            model_settings=agent_settings(),
         )
 
         # Agent for asking for missing fields
         self.field_request_agent = Agent(
-            model_name,
+            self.routes["field_request_agent"].model,
+            name="field_request_agent",
             output_type=FieldRequest,
             instructions=FIELD_INFORMATION_PROMPT,
+            model_settings=agent_settings(),
         )
 
         # Agent for mapping user input to fields
         self.field_mapping_agent = Agent(
-            model_name,
+            self.routes["field_mapping_agent"].model,
+            name="field_mapping_agent",
             output_type=List[FieldMapping],
             instructions=FIELD_MAPPING_PROMPT,
+            model_settings=agent_settings(),
         )
 
-        # Agent for document generation, set system prompt and parameters later
+        # Agent for document generation; the request rules follow the writing rules so both are in the cached prefix
         self.generation_agent = Agent(
-            model_name,
+            self.routes["generation_agent"].model,
+            name="generation_agent",
+            output_type=str,
+            instructions=DOCUMENT_GENERATION_PROMPT + DOCUMENT_REQUEST_RULES,
+            model_settings=agent_settings(max_tokens=GENERATION_MAX_TOKENS, temperature=0.7),
+        )
+
+        # Agents for section-wise generation: the TOC agent plans, section agents draft in parallel
+        self.toc_agent = Agent(
+            self.routes["toc_agent"].model,
+            name="toc_agent",
+            output_type=DocumentOutline,
+            instructions=TOC_PROMPT,
+            model_settings=agent_settings(max_tokens=TOC_MAX_TOKENS),
+        )
+        self.section_agent = Agent(
+            self.routes["section_agent"].model,
+            name="section_agent",
+            output_type=str,
+            instructions=SECTION_GENERATION_PROMPT,
+            model_settings=agent_settings(max_tokens=SECTION_MAX_TOKENS, temperature=0.7),
+        )
+
+        self.completion_check_agent = Agent(
+            self.routes["completion_check_agent"].model,
+            name="completion_check_agent",
             output_type=str,
-            instructions=DOCUMENT_GENERATION_PROMPT,
-            model_settings={"max_tokens": 15000, "temperature": 0.7},
+            instructions=COMPLETION_DONE_PROMPT,
+            model_settings=agent_settings(),
+        )
+
+        # Extraction results keyed on the normalised prompt; the namespace changes with the model and prompt
+        prompt_version = hashlib.sha1(REQUIREMENT_EXTRACTION_PROMPT.encode()).hexdigest()[:8]
+        self.extraction_cache = build_extraction_cache(f"{self.routes['extraction_agent'].model}:{prompt_version}")
+
+        # Whole documents keyed on their request (opt-in); the namespace changes with the generation models and prompts
+        generation_prompts = (DOCUMENT_GENERATION_PROMPT, DOCUMENT_REQUEST_RULES, TOC_PROMPT, SECTION_GENERATION_PROMPT)
+        templates = json.dumps(CLAUSE_TEMPLATES, sort_keys=True)
+        generation_version = hashlib.sha1("".join((*generation_prompts, templates)).encode()).hexdigest()[:8]
+        self.document_cache = build_document_cache(
+            f"{self.routes['generation_agent'].model}:{self.routes['section_agent'].model}:{generation_version}"
         )
 
-        self.completion_check_agent = Agent(model_name, output_type=str, instructions=COMPLETION_DONE_PROMPT)
+        # Local classifier tier for extraction: when it may answer instead of the extraction_agent
+        if LOCAL_CLASSIFIER_MODE not in LOCAL_CLASSIFIER_MODES:
+            raise ValueError(f"Unknown LOCAL_CLASSIFIER_MODE: {LOCAL_CLASSIFIER_MODE}")
+        self.local_classifier_mode = LOCAL_CLASSIFIER_MODE
+        self.local_classifier_threshold = LOCAL_CLASSIFIER_THRESHOLD
+        self.local_classifier_hedge_after = LOCAL_CLASSIFIER_HEDGE_AFTER
+
+        # Attempts, backoff and deadlines for every agent call; breakers are shared per model
+        self.retry_policy = RetryPolicy()
 
-    @retry(tries=3, delay=1, backoff=2, max_delay=30, logger=None)
     async def run_completion(self, agent, prompt: str, stream: bool = False, **kwargs):
         """
         Generic method to run agent completion with retry logic.
 
+        The call first waits for a slot from the admission scheduler (see chatbot.admission).
+        Failed attempts are retried with jittered exponential backoff within the process
+        retry budget; each attempt has a deadline. While the model's circuit breaker is
+        open the call fails at once with CircuitOpenError, so callers fall back instantly.
+        If the agent's route names a fallback model, a primary that has not answered
+        within the route's fallback_after seconds (or whose breaker is open) is replaced
+        by the fallback model.
+
         Args:
             agent: The Pydantic AI agent to use
             prompt: The prompt to send to the agent
@@ -94,20 +228,179 @@ class RealLLM:
             For stream=True: AsyncGenerator of text chunks from the streaming response
         """
         if stream:
-            return self._run_completion_streaming_impl(agent, prompt, **kwargs)
+            return self._stream_completion(agent, prompt, **kwargs)
         else:
-            return await self._run_completion_complete_impl(agent, prompt, **kwargs)
+            # An open breaker fails (or falls back) before the call queues behind healthy traffic
+            fallback = self._route_around_open_breaker(agent)
+            async with LLM_SCHEDULER.slot():
+                route = self.routes.get(agent.name)
+                if fallback is not None:
+                    return await self._complete(agent, prompt, model=fallback, **kwargs)
+                if route is None or route.fallback is None:
+                    return await self._complete(agent, prompt, **kwargs)
+                try:
+                    async with asyncio.timeout(route.fallback_after):
+                        return await self._complete(agent, prompt, **kwargs)
+                except (TimeoutError, CircuitOpenError) as e:
+                    model = self._switch_to_fallback(agent, route, e)
+                return await self._complete(agent, prompt, model=model, **kwargs)
+
+    def _complete(self, agent, prompt: str, model: Optional[Model] = None, **kwargs):
+        """Non-streaming completion with retries, on the agent's own model or the given one."""
+        return call_with_retry(
+            lambda: self._run_completion_complete_impl(agent, prompt, model=model, **kwargs),
+            self.retry_policy,
+            self._breaker(agent, model),
+            on_retry=self._on_retry(agent),
+        )
 
-    async def _run_completion_streaming_impl(self, agent, prompt: str, **kwargs) -> AsyncGenerator[str, None]:
-        """Implementation for streaming completion."""
-        async with agent.run_stream(prompt, **kwargs) as result:
-            async for text_chunk in result.stream_text(delta=True):
-                yield text_chunk
+    async def _stream_completion(self, agent, prompt: str, **kwargs) -> AsyncGenerator[str, None]:
+        """Streaming completion holding an admission slot, retried until the first chunk arrives."""
+        fallback = self._route_around_open_breaker(agent)
+        async with LLM_SCHEDULER.slot():
+            route = self.routes.get(agent.name)
+            stream = self._open_stream(agent, prompt, model=fallback, **kwargs)
+            first: List[str] = []
+            if fallback is None and route is not None and route.fallback is not None:
+                try:
+                    async with asyncio.timeout(route.fallback_after):
+                        first.append(await anext(stream))
+                except StopAsyncIteration:
+                    return
+                except (TimeoutError, CircuitOpenError) as e:
+                    await stream.aclose()
+                    model = self._switch_to_fallback(agent, route, e)
+                    stream = self._open_stream(agent, prompt, model=model, **kwargs)
+            async with aclosing(stream):
+                for chunk in first:
+                    yield chunk
+                async for chunk in stream:
+                    yield chunk
+
+    def _open_stream(self, agent, prompt: str, model: Optional[Model] = None, **kwargs) -> AsyncGenerator[str, None]:
+        return stream_with_retry(
+            lambda: self._run_completion_streaming_impl(agent, prompt, model=model, **kwargs),
+            self.retry_policy,
+            self._breaker(agent, model),
+            on_retry=self._on_retry(agent),
+        )
+
+    def _route_around_open_breaker(self, agent) -> Optional[Model]:
+        """
+        Check the agent's circuit breaker before the call takes an admission slot.
+
+        Returns:
+            The fallback model if the primary's breaker is open, else None (use the primary)
+
+        Raises:
+            CircuitOpenError: If the breaker is open and there is no fallback, or the fallback's is open too
+        """
+        try:
+            self._breaker(agent).check()
+            return None
+        except CircuitOpenError as e:
+            route = self.routes.get(agent.name)
+            if route is None or route.fallback is None:
+                raise
+            model = self._switch_to_fallback(agent, route, e)
+        self._breaker(agent, model).check()
+        return model
+
+    def _switch_to_fallback(self, agent, route: ModelRoute, error: BaseException) -> Model:
+        """Record that an agent's primary model was given up on, and get its fallback model."""
+        if not isinstance(error, CircuitOpenError):
+            # A primary that keeps timing out opens its breaker, so later calls fall back at once
+            self._breaker(agent).record_failure()
+        print(f"{agent.name} gave up on {self._model_label(agent)} ({type(error).__name__}), using {route.fallback}")
+        AGENT_CALLS.record_model_fallback(agent.name)
+        model = self._fallback_models.get(route.fallback)
+        if model is None:
+            model = self._fallback_models[route.fallback] = infer_model(route.fallback)
+        return model
+
+    def _model_label(self, agent, model: Optional[Model] = None) -> str:
+        """Name of the model a call runs on: the given model, or else the agent's own."""
+        model = model or agent.model
+        name = model if isinstance(model, str) else getattr(model, "model_name", None)
+        return name or self.model_name
+
+    def _breaker(self, agent, model: Optional[Model] = None) -> CircuitBreaker:
+        return CIRCUIT_BREAKERS.get(self._model_label(agent, model))
+
+    def _on_retry(self, agent):
+        def record(error: BaseException):
+            print(f"{agent.name} call failed ({type(error).__name__}: {error}), retrying...")
+            AGENT_CALLS.record_retry(agent.name)
+
+        return record
+
+    async def _run_completion_streaming_impl(
+        self, agent, prompt: str, run: Optional[GenerationRun] = None, model: Optional[Model] = None, **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Implementation for streaming completion; fills `run` with token usage and finish reason."""
+        started = perf_counter()
+        first_token: Optional[float] = None
+        usage = None
+        error: Optional[BaseException] = None
+        try:
+            async with agent.run_stream(prompt, model=model, **kwargs) as result:
+                # No debouncing: FrameCoalescer batches frames, and held-back text would be lost if the stream broke
+                async for text_chunk in result.stream_text(delta=True, debounce_by=None):
+                    if first_token is None:
+                        first_token = perf_counter() - started
+                    yield text_chunk
+                usage = self._usage(result)
+                if run is not None:
+                    run.input_tokens += usage.input_tokens or 0
+                    run.output_tokens += usage.output_tokens or 0
+                    run.finish_reason = result.response.finish_reason
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_call(agent, perf_counter() - started, usage, first_token, error, model)
 
-    async def _run_completion_complete_impl(self, agent, prompt: str, **kwargs) -> str:
+    async def _run_completion_complete_impl(self, agent, prompt: str, model: Optional[Model] = None, **kwargs) -> str:
         """Implementation for non-streaming completion."""
-        result = await agent.run(prompt, **kwargs)
-        return result.output
+        started = perf_counter()
+        usage = None
+        error: Optional[BaseException] = None
+        try:
+            result = await agent.run(prompt, model=model, **kwargs)
+            usage = self._usage(result)
+            return result.output
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_call(agent, perf_counter() - started, usage, None, error, model)
+
+    @staticmethod
+    def _usage(result):
+        """Get token usage of an agent run; `usage` is a method before pydantic-ai 2 and a property after."""
+        return result.usage() if callable(result.usage) else result.usage
+
+    def _record_call(
+        self,
+        agent,
+        seconds: float,
+        usage,
+        first_token: Optional[float],
+        error: Optional[BaseException],
+        model: Optional[Model] = None,
+    ):
+        """Record one agent call in AGENT_CALLS."""
+        AGENT_CALLS.record_call(
+            agent.name or "agent",
+            self._model_label(agent, model),
+            seconds,
+            input_tokens=(usage.input_tokens or 0) if usage is not None else 0,
+            output_tokens=(usage.output_tokens or 0) if usage is not None else 0,
+            cache_read_tokens=(usage.cache_read_tokens or 0) if usage is not None else 0,
+            cache_write_tokens=(usage.cache_write_tokens or 0) if usage is not None else 0,
+            first_token=first_token,
+            error=error,
+        )
 
     async def verify_doc(self, text: str) -> bool:
         result = await self.run_completion(
@@ -128,7 +421,7 @@ class RealLLM:
             List of required field names
         """
         try:
-            print(f"Extracting requirements with retry logic (max 3 attempts)...")
+            print(f"Extracting requirements with retry logic (max {self.retry_policy.attempts} attempts)...")
             result = await self.run_completion(
                 self.extraction_agent, f"Analyze this request and determine required fields: {user_prompt}"
             )
@@ -138,27 +431,56 @@ class RealLLM:
         except Exception as e:
             print(f"All LLM extraction attempts failed: {str(e)}")
             print("Using fallback constants-based extraction...")
+            AGENT_CALLS.record_fallback(self.extraction_agent.name)
+            local = self.classify_locally(user_prompt)
+            if local is not None:
+                LOCAL_CLASSIFIER_STATS.record("fallbacks")
+                return local.fields
             # Fallback using constants if all LLM attempts fail
             document_type = detect_document_type_by_keywords(user_prompt)
             return get_fields_for_document_type(document_type)
 
-    async def extract_requirements_with_type(self, user_prompt: str) -> FieldExtractionResult:
+    async def extract_requirements_with_type(self, user_prompt: str, use_cache: bool = True) -> FieldExtractionResult:
         """
         Extract required fields and document type from user prompt using LLM with retry logic.
 
+        Results are served from the extraction cache when the normalised prompt was seen recently.
+        A confident answer from the local classifier (see chatbot.classifier) replaces the
+        extraction_agent in "first_pass" mode, when the agent is slow in "hedge" mode, and when
+        the agent failed in every mode but "off".
+
         Args:
             user_prompt: The user's initial request
+            use_cache: Set to False to bypass the cache for this request (the fresh result is still cached)
 
         Returns:
             FieldExtractionResult containing fields and document type
         """
+        cache = self.extraction_cache
+        if cache is not None and use_cache:
+            cached = await cache.aget(user_prompt)
+            if cached is not None:
+                print(f"Extraction cache hit for '{user_prompt}'")
+                return FieldExtractionResult.model_validate(cached)
+
+        local = self.classify_locally(user_prompt)
+        if local is not None and self.local_classifier_mode == "first_pass":
+            print(f"Local classifier answered for '{user_prompt}': {local.document_type}")
+            LOCAL_CLASSIFIER_STATS.record("first_pass")
+            return local
+
         try:
-            print(f"Extracting requirements with type using retry logic (max 3 attempts)...")
-            result = await self.run_completion(self.extraction_agent, f"Here is the user input: '{user_prompt}'")
-            # Type cast for clarity - we know extraction_agent returns FieldExtractionResult
-            return cast(FieldExtractionResult, result)
+            print(f"Extracting requirements with type using retry logic (max {self.retry_policy.attempts} attempts)...")
+            if local is not None and self.local_classifier_mode == "hedge":
+                return await self._hedged_extraction(user_prompt, local)
+            return await self._extract_with_type(user_prompt)
         except Exception as e:
             print(f"All LLM extraction attempts failed: {str(e)}")
+            AGENT_CALLS.record_fallback(self.extraction_agent.name)
+            if local is not None:
+                print("Using the local classifier's answer...")
+                LOCAL_CLASSIFIER_STATS.record("fallbacks")
+                return local
             print("Using fallback constants-based extraction...")
             # Fallback using constants if all LLM attempts fail
             document_type = detect_document_type_by_keywords(user_prompt)
@@ -169,6 +491,45 @@ class RealLLM:
                 document_type=document_type,
             )
 
+    async def _extract_with_type(self, user_prompt: str) -> FieldExtractionResult:
+        result = await self.run_completion(self.extraction_agent, f"Here is the user input: '{user_prompt}'")
+        # Type cast for clarity - we know extraction_agent returns FieldExtractionResult
+        result = cast(FieldExtractionResult, result)
+        # Only model answers are cached, never the local or keyword fallbacks
+        if self.extraction_cache is not None:
+            await self.extraction_cache.aset(user_prompt, result.model_dump())
+        return result
+
+    async def _hedged_extraction(self, user_prompt: str, local: FieldExtractionResult) -> FieldExtractionResult:
+        """Give the extraction_agent local_classifier_hedge_after seconds, then answer with the local result."""
+        task = asyncio.ensure_future(self._extract_with_type(user_prompt))
+        try:
+            done, _ = await asyncio.wait({task}, timeout=self.local_classifier_hedge_after)
+            if done:
+                return task.result()
+            print(f"Extraction slower than {self.local_classifier_hedge_after}s, using the local classifier's answer")
+            LOCAL_CLASSIFIER_STATS.record("hedge_wins")
+            return local
+        finally:
+            # The abandoned call would only hold an admission slot
+            if not task.done():
+                task.cancel()
+
+    def classify_locally(self, user_prompt: str) -> Optional[FieldExtractionResult]:
+        """
+        Ask the local classifier for the document type and fields.
+
+        Returns:
+            The local answer, or None if the tier is off or the classifier is not confident enough
+        """
+        if self.local_classifier_mode == "off":
+            return None
+        prediction = get_local_classifier().predict(user_prompt)
+        LOCAL_CLASSIFIER_STATS.record("predictions")
+        if prediction is None or prediction.confidence < self.local_classifier_threshold:
+            return None
+        return FieldExtractionResult(fields=prediction.fields, document_type=prediction.document_type)
+
     async def ask_for_field(
         self,
         missing_fields: List[str],
@@ -187,64 +548,27 @@ class RealLLM:
         Returns:
             Question string asking for the missing fields
         """
-        # Take only 1-2 fields at a time to avoid overwhelming the user
-        greet_instr = (
-            f"You are a legal practitioner, and the user is seeking your assistance to generate a legal document. to acheive this goal {user_goal} Greet the user warmly and reassure them that you are here to help! "
-            if greet_user
-            else ""
-        )
+        # The task rules live in the agent instructions (the cacheable prefix); only this request varies
         prompt = f"""
-        The user is generating a document and we need more information.
-        
+        User goal: {user_goal}
         Missing fields needed: {missing_fields}
         Fields to request in this interaction: {fields_to_request}
         User's recent actions: {user_last_action}
-        
-        Generate a polite question asking for the specific fields: {', '.join(fields_to_request)}
-        If the user provided recent input, acknowledge it first.
-        """
-        greet_instr = (
-            f"You are a legal practitioner, and the user is seeking your assistance to generate a legal document. "
-            f"To achieve this goal — {user_goal}. Greet the user warmly in the response. "
-            f"Start with a short sentence that begins like this or similar phrases: 'I am glad to be of assistance in helping you craft your {user_goal} (summarize the user goal, do not return verbatim). "
-            f"To proceed I will be needing the following information:' "
-            f"IMPORTANT: ALWAYS return the following to the user as a numbered list `{', '.join(missing_fields)}.` "
-            if greet_user
-            else ""
-        )
-
-        system_message = f"""
-        {greet_instr}
-
-        The user is generating a document and we need more information.
 
-        Missing fields needed: {missing_fields}
-        Fields to request in this interaction: {fields_to_request}
-        User's recent actions: {user_last_action}
-        
         GREET_USER: {greet_user}
-        
-        Your task:
-        1. ALWAYS: If the user just recently saved some information saving actions as listed in the User's recent actions, briefly acknowledge or thank them before asking your next questions.
-        2. After the list, generate a polite sentence requesting those fields in plain language.
-        3. Maintain a friendly, professional, and helpful legal tone — warm but clear.
-        4. IMPORTANT: be very brief, concise, and to the point.
-        """
-        end = ""
-        if greet_user:
-            end = "5. ALWAYS: End this section of the message with something like:  You can proceed to provide all the fields at once, or go at your own pace. (or something similar, be creative - the goal is to suggest to the user to give all the info at once if they feel like it)"
-        elif not greet_user and len(missing_fields) <= 2:
-            end = "5. ALWAYS: end the conversation with phrases like finally, to wrap up, last but not least, in conclusion, etc., to indicate that the user is nearing completion of the information gathering process."
+        NEARLY_DONE: {len(missing_fields) <= 2}
+        """
 
         try:
-            print(f"Requesting fields with retry logic (max 3 attempts)...")
-            result = await self.run_completion(self.field_request_agent, system_message + end)
+            print(f"Requesting fields with retry logic (max {self.retry_policy.attempts} attempts)...")
+            result = await self.run_completion(self.field_request_agent, prompt)
             # Type cast for clarity - we know field_request_agent returns FieldRequest
             field_request = cast(FieldRequest, result)
             return field_request.question
         except Exception as e:
             print(f"All LLM field request attempts failed: {str(e)}")
             print("Using fallback field request prompt...")
+            AGENT_CALLS.record_fallback(self.field_request_agent.name)
             # Fallback using format_field_request_prompt
             return format_field_request_prompt("document", fields_to_request)
 
@@ -260,15 +584,12 @@ class RealLLM:
             Dictionary mapping field names to values
         """
         prompt = f"""
-        User input: "{user_input}"
         Missing fields: {missing_fields}
-        
-        Extract information from the user input and map it to the appropriate fields.
-        Only map fields you are confident about.
+        User input: "{user_input}"
         """
 
         try:
-            print(f"Mapping user input with retry logic (max 3 attempts)...")
+            print(f"Mapping user input with retry logic (max {self.retry_policy.attempts} attempts)...")
             result = await self.run_completion(self.field_mapping_agent, prompt)
             # Type cast for clarity - we know field_mapping_agent returns List[FieldMapping]
             mappings = cast(List[FieldMapping], result)
@@ -282,6 +603,7 @@ class RealLLM:
         except Exception as e:
             print(f"All LLM mapping attempts failed: {str(e)}")
             print("Using fallback simple mapping...")
+            AGENT_CALLS.record_fallback(self.field_mapping_agent.name)
             # Fallback: simple mapping to first missing fields
             return {missing_fields[0]: user_input} if missing_fields else {}
 
@@ -289,6 +611,9 @@ class RealLLM:
         """
         Generate a thank you message for user input.
 
+        The acknowledgment history lives on the orchestrator, since this
+        instance is shared across conversations.
+
         Args:
             field_name: Name of the field that was filled
             value: Value that was provided
@@ -296,54 +621,42 @@ class RealLLM:
         Returns:
             Thank you message
         """
-        # Add to history for future acknowledgments
-        USER_INPUT_HISTORY.add(f"User saved {field_name} as '{value}'")
         return f"Thanks! I've recorded {field_name} as '{value}'."
 
-    async def generate_document(self, context: DocumentContext, recovery: bool = False) -> AsyncGenerator[str, None]:
+    async def generate_document(
+        self,
+        context: DocumentContext,
+        recovery: bool = False,
+        checkpoint: Optional[DocumentCheckpoint] = None,
+        run: Optional[GenerationRun] = None,
+    ) -> AsyncGenerator[str, None]:
         """
         Generate document content in streaming chunks.
 
         Args:
             context: Document context containing all required fields
+            recovery: Whether this run recovers an interrupted generation
+            checkpoint: Where a cut-off document stopped; only the continuation is generated
+            run: Filled with token usage and finish reason ("error" if the stream broke mid-way)
 
         Yields:
             Document content chunks
         """
-        prompt = f"""
-        Generate a {context.document_type} document with the following information:
-        
-        Document type: {context.document_type}
-        User goal: {context.user_goal}
-        
-        Fields:
-        """
-
-        for field, value in context.fields.items():
-            prompt += f"- {field}: {value}\n"
-
-        prompt += """
-        
-        Create a complete, professional legal document with:
-        1. Proper header and title
-        2. All necessary clauses and sections
-        3. Clear terms and conditions
-        4. Signature lines
-        5. Date and location information
-        
-        ALWAYS: Ensure all the subheadings, sections, fit within 10
-        Make it legally sound and professionally formatted.
-        """
+        if checkpoint is not None:
+            prompt = self._continuation_prompt(context, checkpoint)
+        else:
+            prompt = self._generation_prompt(context)
 
+        chunk_count = 0
         try:
-            print(f"Starting document generation...")
+            print(f"Starting document generation{' (continuation)' if checkpoint else ''}...")
             start_time = perf_counter()
 
-            # Stream each chunk as it's generated
-            chunk_count = 0
-            async for chunk in self._run_completion_streaming_impl(self.generation_agent, prompt):
-                chunk_count += 1
-                yield chunk
+            # Stream each chunk as it's generated; aclosing ends the provider stream if we are closed early
+            async with aclosing(self._stream_completion(self.generation_agent, prompt, run=run)) as stream:
+                async for chunk in stream:
+                    chunk_count += 1
+                    yield chunk
 
             end_time = perf_counter()
             generation_time = end_time - start_time
@@ -352,10 +665,123 @@ class RealLLM:
 
         except Exception as e:
             print(f"LLM document generation failed: {str(e)}")
+            if chunk_count or checkpoint is not None:
+                # Part of the document is already out; let the caller resume from its checkpoint
+                if run is not None:
+                    run.finish_reason = "error"
+                return
             print(f"Using fallback document generation...")
+            AGENT_CALLS.record_fallback(self.generation_agent.name)
+            if run is not None:
+                run.finish_reason = "fallback"
+            async for chunk in self._fallback_document(context):
+                yield chunk
+
+    def _generation_prompt(self, context: DocumentContext) -> str:
+        """Build the request for generating a whole document; the rules are in the agent instructions."""
+        fields = "".join(f"- {field}: {value}\n" for field, value in context.fields.items())
+        return f"""
+        Generate a {context.document_type} document with the following information:
+
+        Document type: {context.document_type}
+        User goal: {context.user_goal}
+
+        Fields:
+        {fields}"""
+
+    def _continuation_prompt(self, context: DocumentContext, checkpoint: DocumentCheckpoint) -> str:
+        """Build the request asking only for the rest of a cut-off document, sharing the first request's opening."""
+        outline = "\n".join(f"- {heading}" for heading in checkpoint.outline) or "- (no headings yet)"
+        return self._generation_prompt(context) + f"""
+        The output was cut off. Sections already written, in order:
+        {outline}
+
+        The document so far ends with:
+        <<<
+        {checkpoint.tail}
+        >>>
+        """
+
+    async def generate_outline(self, context: DocumentContext) -> DocumentOutline:
+        """
+        Plan the document's table of contents with the TOC agent.
+
+        Args:
+            context: Document context containing all required fields
+
+        Returns:
+            Document title and sections in reading order
+        """
+        fields = "".join(f"- {field}: {value}\n" for field, value in context.fields.items())
+        prompt = f"""
+        Plan a {context.document_type} document.
 
-            # Fallback to simple document generation
-            doc_text = f"""
+        User goal: {context.user_goal}
+
+        Fields:
+        {fields}
+        """
+        return await self.run_completion(self.toc_agent, prompt)
+
+    async def generate_section(
+        self,
+        context: DocumentContext,
+        outline: DocumentOutline,
+        index: int,
+        partial: str = "",
+        run: Optional[GenerationRun] = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Generate one section of an outlined document in streaming chunks.
+
+        Errors are not handled here: SectionedGeneration retries the section.
+
+        Args:
+            context: Document context containing all required fields
+            outline: Table of contents the section belongs to
+            index: Position of the section in the outline
+            partial: Text of the section produced by an earlier, cut-off attempt
+            run: Filled with token usage and finish reason
+
+        Yields:
+            Section content chunks
+        """
+        prompt = self._section_prompt(context, outline, index, partial)
+        async with aclosing(self._stream_completion(self.section_agent, prompt, run=run)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    def _section_prompt(self, context: DocumentContext, outline: DocumentOutline, index: int, partial: str) -> str:
+        """Build the prompt for one section, continuing from `partial` when a previous attempt was cut off."""
+        section = outline.sections[index]
+        fields = "".join(f"- {field}: {value}\n" for field, value in context.fields.items())
+        contents = "".join(
+            f"- {other.heading}{'   <- YOUR SECTION' if position == index else ''}\n"
+            for position, other in enumerate(outline.sections)
+        )
+        prompt = f"""
+        Document: {outline.title} ({context.document_type})
+        User goal: {context.user_goal}
+
+        Fields:
+        {fields}
+        Table of contents:
+        {contents}
+        Write section "{section.heading}": {section.brief}
+        """
+        if partial:
+            prompt += f"""
+        Your section was cut off. It so far ends with:
+        <<<
+        {partial[-CHECKPOINT_TAIL_CHARS:]}
+        >>>
+        """
+        return prompt
+
+    async def _fallback_document(self, context: DocumentContext) -> AsyncGenerator[str, None]:
+        """Stream a minimal document built from the fields when the LLM is unavailable."""
+        # Fallback to simple document generation
+        doc_text = f"""
             {context.document_type.upper()}
             
             This document is generated for {context.fields.get('party_a', 'Party A')} 
@@ -364,29 +790,96 @@ class RealLLM:
             Details:
             """
 
-            for field, value in context.fields.items():
-                doc_text += f"{field.replace('_', ' ').title()}: {value}\n"
+        for field, value in context.fields.items():
+            doc_text += f"{field.replace('_', ' ').title()}: {value}\n"
 
-            doc_text += """
-            
-            This document constitutes a binding agreement between the parties.
-            
-            Signatures:
-            _______________________  _______________________
-            Party A                   Party B
-            
-            Date: ______________
-            """
+        doc_text += """
+        
+        This document constitutes a binding agreement between the parties.
+        
+        Signatures:
+        _______________________  _______________________
+        Party A                   Party B
+        
+        Date: ______________
+        """
 
-            # Simulate streaming by yielding chunks
-            words = doc_text.split()
-            print(f"📄 Streaming {len(words)//3 + 1} fallback chunks to frontend...")
-            for i in range(0, len(words), 3):  # Yield 3 words at a time
-                chunk = " ".join(words[i : i + 3]) + " "
-                yield chunk
-                await asyncio.sleep(0.1)  # Simulate processing delay
+        # Simulate streaming by yielding chunks
+        words = doc_text.split()
+        print(f"📄 Streaming {len(words)//3 + 1} fallback chunks to frontend...")
+        for i in range(0, len(words), 3):  # Yield 3 words at a time
+            chunk = " ".join(words[i : i + 3]) + " "
+            yield chunk
+            await asyncio.sleep(0.1)  # Simulate processing delay
+
+        print(f"All fallback chunks sent successfully")
+
+
+class LLMRegistry:
+    """
+    Process-wide registry of RealLLM instances keyed by model name.
+
+    RealLLM holds no per-conversation state, so one instance (with its agents and
+    their provider HTTP clients) is shared by every orchestrator using that model.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, RealLLM] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str) -> RealLLM:
+        """
+        Return the shared RealLLM for a model, creating it on first use.
+
+        Args:
+            model_name: Model identifier
+
+        Returns:
+            Shared RealLLM instance
+        """
+        # Construction is synchronous, so holding a thread lock is safe for async callers too
+        with self._lock:
+            llm = self._instances.get(model_name)
+            if llm is None:
+                self.misses += 1
+                llm = RealLLM(model_name)
+                self._instances[model_name] = llm
+            else:
+                self.hits += 1
+            return llm
+
+    def register(self, llm: RealLLM) -> RealLLM:
+        """Register a pre-built RealLLM (e.g. one wired to test models) under its model name."""
+        with self._lock:
+            self._instances[llm.model_name] = llm
+        return llm
+
+    def clear(self):
+        """Drop all shared instances and reset counters."""
+        with self._lock:
+            self._instances.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def instances(self) -> List[RealLLM]:
+        """Get the shared instances, e.g. to collect their cache stats."""
+        with self._lock:
+            return list(self._instances.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Get registry counters for monitoring reuse."""
+        with self._lock:
+            return {"instances": len(self._instances), "hits": self.hits, "misses": self.misses}
 
-            print(f"All fallback chunks sent successfully")
+
+LLM_REGISTRY = LLMRegistry()
+
+
+def get_llm(model_name: str = "openai:gpt-4.1") -> RealLLM:
+    """Get the process-wide shared RealLLM for a model."""
+    return LLM_REGISTRY.get(model_name)
 
 
 class DocumentOrchestrator:
@@ -401,21 +894,37 @@ class DocumentOrchestrator:
 
         Args:
             llm: Custom LLM instance (optional)
-            model_name: Model name if creating default LLM
+            model_name: Model name used to look up the shared LLM
         """
-        self.llm = llm or RealLLM(model_name)
+        self.llm = llm or get_llm(model_name)
         self.fields: Dict[str, Optional[str]] = {}
         self.state = "idle"
         self.document_type = ""
         self.user_goal = ""
         self.user_greeted = False
-
-    async def start(self, user_prompt: str) -> Dict[str, Optional[str]]:
+        # Recent saving actions for this conversation only, oldest first
+        self.recent_actions: Deque[str] = deque(maxlen=MAX_RECENT_ACTIONS)
+        # Fields the last question asked for, used to resolve short answers without the LLM
+        self.requested_fields: List[str] = []
+        # Text streamed in the current generation run, shared with pagination and completion checks
+        self.document = DocumentBuffer()
+        # Completeness of self.document, judged as it streams
+        self.completion = CompletionDetector()
+        # Page breaks of self.document, found as it streams
+        self.pagination = StreamingPaginator()
+        # Token usage of every run (first pass and continuations) behind self.document
+        self.usage = DocumentUsage()
+        # "single" or "sections", and the sections drafted at once; see chatbot.sections
+        self.generation_strategy = GENERATION_STRATEGY
+        self.section_concurrency = SECTION_CONCURRENCY
+
+    async def start(self, user_prompt: str, use_cache: bool = True) -> Dict[str, Optional[str]]:
         """
         Start the document generation flow by extracting requirements.
 
         Args:
             user_prompt: The user's initial request
+            use_cache: Whether a cached extraction for a similar prompt may be reused
 
         Returns:
             Dictionary of required fields initialized to None
@@ -428,7 +937,7 @@ class DocumentOrchestrator:
         print(f"Extracting requirements for: '{user_prompt}'")
 
         # Extract required fields and document type using LLM
-        extraction_result = await self.llm.extract_requirements_with_type(user_prompt)
+        extraction_result = await self.llm.extract_requirements_with_type(user_prompt, use_cache=use_cache)
         field_list = extraction_result.fields
         self.document_type = extraction_result.document_type
         self.fields = {field: None for field in field_list}
@@ -454,10 +963,11 @@ class DocumentOrchestrator:
             self.state = "generating"
             return None
 
-        # Get user action history for acknowledgment
-        user_last_action = ", ".join(list(USER_INPUT_HISTORY))
-        USER_INPUT_HISTORY.clear()
+        # Get this conversation's action history for acknowledgment
+        user_last_action = ", ".join(self.recent_actions)
+        self.recent_actions.clear()
         fields_to_request = missing[:2]
+        self.requested_fields = fields_to_request
         if self.user_greeted:
             should_greet = False
         else:
@@ -480,21 +990,100 @@ class DocumentOrchestrator:
         if not missing:
             return
 
-        # Use LLM to map user input to fields
-        field_mappings = await self.llm.map_user_input_to_fields(user_response, missing)
+        # Resolve obvious answers locally and only send the residual fields to the LLM
+        premapped = premap_fields(user_response, missing, self.requested_fields)
+        PREMAP_STATS.record(premapped)
+        field_mappings = dict(premapped.fields)
+        if premapped.needs_model:
+            residual = [name for name in missing if name not in field_mappings]
+            llm_mappings = await self.llm.map_user_input_to_fields(user_response, residual)
+            field_mappings.update({name: value for name, value in llm_mappings.items() if name in residual})
+        else:
+            print(f"Mapped {list(field_mappings)} without the LLM")
 
         # Update fields and generate thank you messages
         for field_name, field_value in field_mappings.items():
             if field_name in self.fields and not self.fields[field_name]:
                 self.fields[field_name] = field_value
                 await self.llm.thank_user(field_name, field_value)
+                self._record_action(f"User saved {field_name} as '{field_value}'")
         if not self._missing_fields():
             self.state = "generating"
 
+    async def answer_and_ask(self, user_response: str, pipelined: bool = True) -> Optional[str]:
+        """
+        Record a user reply and produce the next question in one turn.
+
+        In pipelined mode the next question is drafted while the reply is being mapped,
+        assuming the reply fills the fields that were just asked for. The draft is used
+        when mapping leaves exactly those fields to request next, discarded when mapping
+        leaves nothing to ask, and regenerated otherwise.
+
+        Args:
+            user_response: The user's reply to the last question
+            pipelined: Draft the next question concurrently with field mapping
+
+        Returns:
+            Next question, or None once all fields are filled
+        """
+        expected_missing = [name for name in self._missing_fields() if name not in self.requested_fields]
+        if not pipelined or not expected_missing:
+            await self.record_user_input(user_response)
+            return await self.next_question()
+
+        draft_fields = expected_missing[:2]
+        draft = asyncio.create_task(
+            self.llm.ask_for_field(
+                expected_missing,
+                draft_fields,
+                f"User replied '{user_response}'",
+                greet_user=not self.user_greeted,
+                user_goal=self.user_goal,
+            )
+        )
+        try:
+            await self.record_user_input(user_response)
+        except BaseException:
+            draft.cancel()
+            raise
+
+        missing = self._missing_fields()
+        if not missing:
+            # The reply filled everything, so there is nothing left to ask; free the draft's admission slot now
+            DRAFT_OUTCOMES["discarded"] += 1
+            draft.cancel()
+            return await self.next_question()
+
+        # The question wording also depends on whether collection is nearly done
+        if missing[:2] == draft_fields and (len(missing) <= 2) == (len(expected_missing) <= 2):
+            DRAFT_OUTCOMES["reused"] += 1
+            self.requested_fields = draft_fields
+            self.recent_actions.clear()  # the draft acknowledged the reply itself
+            self.user_greeted = True
+            return await draft
+
+        DRAFT_OUTCOMES["regenerated"] += 1
+        draft.cancel()
+        return await self.next_question()
+
+    def _record_action(self, action: str):
+        """Remember a user action for the next acknowledgment, skipping duplicates."""
+        if action not in self.recent_actions:
+            self.recent_actions.append(action)
+
     async def generate_document(self, recovery: bool = False) -> AsyncGenerator[str, None]:
         """
         Generate the final document in streaming chunks.
 
+        A run that is cut off (output token limit, stream error, or an unclosed code fence or
+        trailing heading spotted by the completion detector) is resumed from a checkpoint, asking
+        the model only for the continuation. Endings the detector is unsure about are put to the LLM
+        completeness checker, and continued only if it judges them incomplete. In recovery mode a
+        partially generated document is resumed the same way instead of being regenerated. In the
+        "hybrid" strategy, types with a clause template only have their bespoke clauses drafted,
+        unless a placeholder matches no collected field. With the document cache enabled, a request
+        identical to one already generated replays the cached document.
+
         Yields:
             Document content chunks
         """
@@ -509,12 +1098,244 @@ class DocumentOrchestrator:
             user_goal=self.user_goal,
         )
 
-        if recovery:
-            print("Generating document in recovery mode...")
-            # add extra context needed so llm can continue from failure maybe ToC and last good chunk
-        # Stream document generation
-        async for chunk in self.llm.generate_document(context):
-            yield chunk
+        resuming = recovery and bool(self.document)
+        if resuming:
+            print(f"Resuming document generation from offset {len(self.document)}...")
+        else:
+            self.document.clear()
+            self.completion = CompletionDetector()
+            self.pagination = StreamingPaginator()
+            self.usage = DocumentUsage()
+
+        cache = self.llm.document_cache
+        cached = await cache.aget(context) if cache is not None and not resuming else None
+        if cached is not None:
+            print(f"Replaying cached {self.document_type} ({len(cached)} chars)...")
+            async with aclosing(cache.replay(cached)) as stream:
+                async for chunk in stream:
+                    self._append(chunk)
+                    yield chunk
+            return
+
+        # Only documents the model finished are cached: not fallbacks, nor ones still cut off after continuing
+        cacheable = not resuming
+        template = get_template(self.document_type) if self.generation_strategy == "hybrid" else None
+        if template is not None:
+            # Placeholders no collected field matches would ship as blanks; the model writes those documents instead
+            template_fields, unresolved = template.resolve_fields(self.fields)
+            if unresolved:
+                print(f"No fields for {', '.join(unresolved)} in the {template.label()}, generating in full...")
+                template = None
+        for attempt in range(MAX_CONTINUATIONS + 1):
+            checkpoint = self.checkpoint() if resuming else None
+            trimmer = OverlapTrimmer(self.document.tail(CHECKPOINT_TAIL_CHARS)) if resuming else None
+            run = GenerationRun()
+            first_pass = attempt == 0 and not resuming
+            if first_pass and template is not None:
+                generation = self._generate_from_template(context, template, template_fields, run)
+            elif first_pass and self.generation_strategy == "sections":
+                generation = self._generate_sections(context, run)
+            else:
+                generation = self.llm.generate_document(context, checkpoint=checkpoint, run=run)
+            async with aclosing(generation) as stream:
+                async for chunk in stream:
+                    if trimmer is not None:
+                        chunk = trimmer.feed(chunk)
+                    if chunk:
+                        self._append(chunk)
+                        yield chunk
+            if trimmer is not None:
+                rest = trimmer.flush()
+                if rest:
+                    self._append(rest)
+                    yield rest
+            self.usage.add(run, continuation=resuming)
+            cacheable = cacheable and run.finish_reason != "fallback"
+
+            # Only a certain cut-off is continued; appending to a finished document would corrupt it
+            verdict = self.completion.verdict()
+            if not run.truncated and verdict == UNCERTAIN:
+                verdict = await self._verify_completion()
+            if not run.truncated and verdict != INCOMPLETE:
+                if cache is not None and cacheable:
+                    await cache.aset(context, self.document.getvalue())
+                break
+            if attempt < MAX_CONTINUATIONS:
+                reason = run.finish_reason if run.truncated else "unterminated section"
+                if verdict == INCOMPLETE and self.completion.verdict() == UNCERTAIN:
+                    reason = "judged incomplete by the LLM checker"
+                print(f"Document cut off ({reason}) at offset {len(self.document)}, continuing...")
+                AGENT_CALLS.record_retry(self.llm.generation_agent.name)
+            resuming = True
+
+        print(f"Document token usage: {self.usage.to_dict()}")
+
+    async def _verify_completion(self) -> str:
+        """
+        Ask the LLM checker about an ending the completion detector is unsure of.
+
+        Returns:
+            COMPLETE or INCOMPLETE; UNCERTAIN if the check failed, so the document is kept as is
+        """
+        COMPLETION_CHECKS["llm_checks"] += 1
+        try:
+            completed = await self.llm.verify_doc(self.document.tail(1000))
+        except Exception as e:
+            print(f"LLM completeness check failed: {str(e)}")
+            return UNCERTAIN
+        print(f"LLM completeness check: {'complete' if completed else 'incomplete'}")
+        return COMPLETE if completed else INCOMPLETE
+
+    async def _generate_sections(self, context: DocumentContext, run: GenerationRun) -> AsyncGenerator[str, None]:
+        """
+        First generation pass drafting the outlined sections concurrently.
+
+        Falls back to the single-stream path when no outline can be planned. A section
+        that fails after its retries ends the pass with finish reason "error", so the
+        caller continues the document from its checkpoint.
+        """
+        try:
+            outline = await self.llm.generate_outline(context)
+        except Exception as e:
+            print(f"Outline generation failed: {str(e)}")
+            AGENT_CALLS.record_fallback(self.llm.toc_agent.name)
+            outline = None
+        if outline is None or not outline.sections:
+            async with aclosing(self.llm.generate_document(context, run=run)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
+
+        print(f"Generating {len(outline.sections)} sections, {self.section_concurrency} at a time...")
+        generation = SectionedGeneration(
+            len(outline.sections),
+            lambda index, text, section_run: self.llm.generate_section(context, outline, index, text, section_run),
+            concurrency=self.section_concurrency,
+        )
+        async with aclosing(self._stream_sections(outline.title, generation, run)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    async def _generate_from_template(
+        self, context: DocumentContext, template: DocumentTemplate, fields: Dict[str, str], run: GenerationRun
+    ) -> AsyncGenerator[str, None]:
+        """
+        First generation pass for a document type with a clause template.
+
+        Boilerplate clauses are rendered without the model from `fields`, the collected values
+        keyed by the template's placeholders; only the bespoke clauses are drafted by the
+        section agent, concurrently, and stitched in.
+        """
+        outline = template.outline(fields)
+
+        def stream_clause(index: int, text: str, section_run: GenerationRun) -> AsyncGenerator[str, None]:
+            if template.clauses[index].generated:
+                return self.llm.generate_section(context, outline, index, text, section_run)
+            return template.stream_clause(index, fields)
+
+        drafted = len(template.generated_clauses)
+        print(f"Generating {drafted} of {len(template.clauses)} clauses of the {template.label()}...")
+        generation = SectionedGeneration(len(template.clauses), stream_clause, concurrency=self.section_concurrency)
+        async with aclosing(self._stream_sections(template.title, generation, run)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    async def _stream_sections(
+        self, title: str, generation: SectionedGeneration, run: GenerationRun
+    ) -> AsyncGenerator[str, None]:
+        """Stream a titled SectionedGeneration, adding its sections' usage to `run`."""
+        try:
+            yield f"# {title}\n\n"
+            async with aclosing(generation.stream()) as stream:
+                async for chunk in stream:
+                    yield chunk
+            run.finish_reason = "stop"
+        except SectionGenerationError as e:
+            print(f"Section-wise generation stopped: {str(e)}")
+            run.finish_reason = "error"
+        finally:
+            run.input_tokens += sum(section_run.input_tokens for section_run in generation.runs)
+            run.output_tokens += sum(section_run.output_tokens for section_run in generation.runs)
+            retries = sum(max(0, attempts - 1) for attempts in generation.attempts)
+            if retries:
+                AGENT_CALLS.record_retry(self.llm.section_agent.name, retries)
+
+    def _append(self, chunk: str):
+        """Add generated text to the document, the completion detector and the paginator."""
+        self.document.append(chunk)
+        self.completion.feed(chunk)
+        self.pagination.feed(chunk)
+
+    def checkpoint(self) -> DocumentCheckpoint:
+        """Get the last good position of the document: its length, section outline and tail."""
+        return DocumentCheckpoint(
+            offset=len(self.document),
+            outline=list(self.completion.outline),
+            tail=self.document.tail(CHECKPOINT_TAIL_CHARS),
+        )
+
+    def estimated_tokens_saved(self) -> int:
+        """Estimate the output tokens not spent because generation stopped early."""
+        return max(0, GENERATION_MAX_TOKENS - estimate_tokens(len(self.document)))
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Serialise the per-conversation state for persistence.
+
+        Returns:
+            JSON-compatible snapshot of this orchestrator
+        """
+        return {
+            "version": SNAPSHOT_VERSION,
+            "model_name": self.llm.model_name,
+            "fields": dict(self.fields),
+            "state": self.state,
+            "document_type": self.document_type,
+            "user_goal": self.user_goal,
+            "user_greeted": self.user_greeted,
+            "recent_actions": list(self.recent_actions),
+            "requested_fields": list(self.requested_fields),
+            "document": self.document.getvalue(),
+            "checkpoint": self.checkpoint().to_dict() if self.document else None,
+            "usage": self.usage.to_dict(),
+        }
+
+    @classmethod
+    def from_snapshot(
+        cls, snapshot: Dict[str, Any], llm: Optional[RealLLM] = None, model_name: str = "openai:gpt-4.1"
+    ) -> "DocumentOrchestrator":
+        """
+        Rebuild an orchestrator from a persisted snapshot.
+
+        A generation that was running when the snapshot was taken cannot be resumed
+        mid-stream, so it is restored in the "interrupted" state.
+
+        Args:
+            snapshot: Snapshot produced by to_snapshot
+            llm: Custom LLM instance (optional)
+            model_name: Model name used when the snapshot does not record one
+
+        Returns:
+            Rehydrated orchestrator
+        """
+        orchestrator = cls(llm, model_name=snapshot.get("model_name") or model_name)
+        orchestrator.fields = dict(snapshot.get("fields", {}))
+        orchestrator.state = snapshot.get("state", "idle")
+        orchestrator.document_type = snapshot.get("document_type", "")
+        orchestrator.user_goal = snapshot.get("user_goal", "")
+        orchestrator.user_greeted = snapshot.get("user_greeted", False)
+        orchestrator.recent_actions.extend(snapshot.get("recent_actions", []))
+        orchestrator.requested_fields = list(snapshot.get("requested_fields", []))
+        orchestrator.document.append(snapshot.get("document", ""))
+        # The detector is cheap to rebuild and gives back the section outline for resuming
+        orchestrator.completion.feed(snapshot.get("document", ""))
+        # Same for the paginator; the client gets every break in the final frame, so none are resent now
+        orchestrator.pagination.feed(snapshot.get("document", ""))
+        orchestrator.pagination.take_breaks()
+        orchestrator.usage = DocumentUsage.from_dict(snapshot.get("usage", {}))
+        if orchestrator.state == "generating":
+            orchestrator.state = "interrupted"
+        return orchestrator
 
     async def get_user_goal(self, initial_msg: str) -> str:
         """
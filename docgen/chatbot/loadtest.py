@@ -0,0 +1,354 @@
+"""
+Load-testing harness driving DocumentAgentConsumer with simulated users.
+
+Each simulated client opens a socket with channels' WebsocketCommunicator and runs a
+full conversation against the real consumer, orchestrator and streaming code in this
+process: the first message, field answers two at a time, then the document stream.
+Every agent is a FunctionModel answering after a configurable per-token latency and
+conversations are kept in an in-memory store, so a run needs no provider, database or
+Redis. Run it with `python manage.py loadtest`.
+"""
+
+import asyncio
+import ast
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import override_settings
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from . import consumers, store
+from .constants.fields import get_fields_for_document_type
+from .llm import LLM_REGISTRY, RealLLM
+from .routing import websocket_urlpatterns
+from .store import BatchedConversationWriter, InMemoryConversationStore
+
+# Tokens "generated" for a structured reply (extraction, question, field mapping)
+REPLY_TOKENS = 40
+
+# Sections in the outline the simulated TOC agent plans (sections strategy)
+OUTLINE_SECTIONS = 4
+
+# How often the event loop lag is sampled, and how many samples between memory readings
+LAG_SAMPLE_INTERVAL = 0.01
+MEMORY_SAMPLE_EVERY = 10
+
+_TOKEN = re.compile(r"\S+\s*")
+_KEY_VALUE = re.compile(r"^\s*(\w+)\s*:\s*(.+?)\s*$", re.MULTILINE)
+
+
+@dataclass
+class LoadTestConfig:
+    """Shape of a load test run."""
+
+    clients: int = 10
+    # Seconds over which client starts are spread evenly
+    ramp_up: float = 0.0
+    # Seconds per simulated output token
+    token_latency: float = 0.005
+    # Approximate length of each generated document in tokens
+    document_tokens: int = 2000
+    document_type: str = "Loan Agreement"
+    # Seconds a client waits for any expected frame before giving up
+    timeout: float = 120.0
+
+
+@dataclass
+class SessionResult:
+    """What one simulated client saw."""
+
+    turn_latencies: List[float] = field(default_factory=list)
+    first_frame: Optional[float] = None  # seconds from the last answer to the first document frame
+    generation: Optional[float] = None  # seconds from the last answer to generation_complete
+    frames: int = 0
+    document_frames: int = 0
+    document_chars: int = 0
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (the peak where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _request_text(messages: List[ModelMessage]) -> str:
+    return "".join(part.content for part in messages[-1].parts if isinstance(part, UserPromptPart))
+
+
+def _list_after(text: str, label: str) -> List[str]:
+    """Parse the Python list literal following `label` in a prompt."""
+    match = re.search(re.escape(label) + r"\s*(\[.*?\])", text)
+    return ast.literal_eval(match.group(1)) if match else []
+
+
+def _output(agent_info: AgentInfo, args: Dict[str, Any]) -> ModelResponse:
+    return ModelResponse(parts=[ToolCallPart(agent_info.output_tools[0].name, args)])
+
+
+def simulated_document(document_type: str, tokens: int) -> str:
+    """A Markdown document of about `tokens` words that the completion detector judges complete."""
+    words_per_section = max(1, tokens // OUTLINE_SECTIONS)
+    sections = [
+        f"## {index}. Section {index}\n\n" + " ".join(["clause"] * words_per_section) + "."
+        for index in range(1, OUTLINE_SECTIONS + 1)
+    ]
+    ending = "IN WITNESS WHEREOF the Parties sign below.\n\nSignature: ____\nDate: ____\n\nEND OF AGREEMENT"
+    return f"# {document_type.upper()}\n\n" + "\n\n".join(sections) + f"\n\n{ending}\n"
+
+
+def build_simulated_llm(model_name: str, config: LoadTestConfig) -> RealLLM:
+    """
+    A RealLLM whose agents are FunctionModels with `config.token_latency` per output token.
+
+    Args:
+        model_name: Name to register the LLM under, so consumers pick it up
+        config: Document type, latency and document length to simulate
+
+    Returns:
+        The simulated LLM
+    """
+    fields = get_fields_for_document_type(config.document_type)
+    document = simulated_document(config.document_type, config.document_tokens)
+
+    async def think(tokens: int):
+        await asyncio.sleep(config.token_latency * tokens)
+
+    async def stream_tokens(text: str):
+        for token in _TOKEN.findall(text):
+            await asyncio.sleep(config.token_latency)
+            yield token
+
+    async def extraction(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        await think(REPLY_TOKENS)
+        return _output(agent_info, {"fields": fields, "document_type": config.document_type})
+
+    async def field_request(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        requested = _list_after(_request_text(messages), "Fields to request in this interaction:")
+        await think(REPLY_TOKENS)
+        question = f"Please provide: {', '.join(requested)}"
+        return _output(agent_info, {"acknowledgment": None, "question": question, "fields_requested": requested})
+
+    async def field_mapping(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        prompt = _request_text(messages)
+        missing = _list_after(prompt, "Missing fields:")
+        values = dict(_KEY_VALUE.findall(prompt.split("User input:", 1)[-1]))
+        await think(REPLY_TOKENS)
+        mappings = [
+            {"field_name": name, "field_value": values[name], "confidence": 1.0} for name in missing if name in values
+        ]
+        return _output(agent_info, {"response": mappings})
+
+    async def completion_check(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        await think(1)
+        return ModelResponse(parts=[TextPart("True")])
+
+    async def outline(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        await think(REPLY_TOKENS)
+        sections = [{"heading": f"{index}. Section {index}", "brief": ""} for index in range(1, OUTLINE_SECTIONS + 1)]
+        return _output(agent_info, {"title": config.document_type.upper(), "sections": sections})
+
+    async def generation(messages: List[ModelMessage], agent_info: AgentInfo):
+        async for token in stream_tokens(document):
+            yield token
+
+    async def section(messages: List[ModelMessage], agent_info: AgentInfo):
+        heading = re.search(r'Write section "([^"]+)"', _request_text(messages)).group(1)
+        text = f"## {heading}\n\n" + " ".join(["clause"] * max(1, config.document_tokens // OUTLINE_SECTIONS)) + "."
+        if heading.startswith(f"{OUTLINE_SECTIONS}. "):
+            text += "\n\nIN WITNESS WHEREOF the Parties sign below.\n\nSignature: ____\nDate: ____\n"
+        async for token in stream_tokens(text):
+            yield token
+
+    llm = RealLLM("test")
+    llm.model_name = model_name
+    llm.extraction_agent.model = FunctionModel(extraction, model_name="simulated")
+    llm.field_request_agent.model = FunctionModel(field_request, model_name="simulated")
+    llm.field_mapping_agent.model = FunctionModel(field_mapping, model_name="simulated")
+    llm.completion_check_agent.model = FunctionModel(completion_check, model_name="simulated")
+    llm.toc_agent.model = FunctionModel(outline, model_name="simulated")
+    llm.generation_agent.model = FunctionModel(stream_function=generation, model_name="simulated")
+    llm.section_agent.model = FunctionModel(stream_function=section, model_name="simulated")
+    return llm
+
+
+@contextmanager
+def simulated_environment(llm: RealLLM):
+    """Serve `llm` to consumers, with in-memory conversations and channel layer, for the duration."""
+    previous_writer = store._conversation_writer
+    store._conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    LLM_REGISTRY.register(llm)
+    try:
+        with override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}):
+            yield
+    finally:
+        LLM_REGISTRY.clear()
+        store._conversation_writer = previous_writer
+
+
+class LoopMonitor:
+    """Samples event loop lag (how late a timed wake-up runs) and process memory."""
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.baseline_rss = current_rss()
+        self.peak_rss = self.baseline_rss
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+            if len(self.lags) % MEMORY_SAMPLE_EVERY == 0:
+                self.peak_rss = max(self.peak_rss, current_rss())
+
+
+class SimulatedClient:
+    """One user running a whole conversation over a WebsocketCommunicator."""
+
+    def __init__(self, application, index: int, config: LoadTestConfig):
+        self.application = application
+        self.index = index
+        self.config = config
+        self.conversation_id = f"loadtest-{index}"
+        self.result = SessionResult()
+
+    async def run(self) -> SessionResult:
+        communicator = WebsocketCommunicator(self.application, "/ws/assistant/")
+        try:
+            connected, _ = await communicator.connect(timeout=self.config.timeout)
+            if not connected:
+                raise ConnectionError("connection refused")
+            await self.converse(communicator)
+        except asyncio.TimeoutError:
+            self.result.error = "timeout"
+        except Exception as e:
+            self.result.error = f"{type(e).__name__}: {e}"
+        finally:
+            try:
+                await communicator.disconnect(timeout=self.config.timeout)
+            except Exception:
+                pass
+        return self.result
+
+    async def converse(self, communicator: WebsocketCommunicator):
+        pending = get_fields_for_document_type(self.config.document_type)
+        await self.turn(communicator, f"I need a {self.config.document_type} for client {self.index}")
+        while pending:
+            batch, pending = pending[:2], pending[2:]
+            await self.turn(communicator, "\n".join(f"{name}: client {self.index} {name}" for name in batch))
+
+        started = perf_counter()
+        while True:
+            frame = await self.receive(communicator)
+            if frame["type"] == "generate_document":
+                if self.result.first_frame is None:
+                    self.result.first_frame = perf_counter() - started
+                self.result.document_frames += 1
+                self.result.document_chars += len(frame["chunk"])
+            elif frame["type"] == "generation_complete":
+                self.result.generation = perf_counter() - started
+                return
+
+    async def turn(self, communicator: WebsocketCommunicator, content: str):
+        """Send a message and time it until the assistant's reply."""
+        started = perf_counter()
+        await communicator.send_json_to(
+            {"type": "user_message", "content": content, "conversation_id": self.conversation_id}
+        )
+        while (await self.receive(communicator))["type"] != "assistant_message":
+            pass
+        self.result.turn_latencies.append(perf_counter() - started)
+
+    async def receive(self, communicator: WebsocketCommunicator) -> Dict[str, Any]:
+        frame = await communicator.receive_json_from(timeout=self.config.timeout)
+        self.result.frames += 1
+        if frame.get("type") == "system_message":
+            raise RuntimeError(frame.get("content", "system message"))
+        return frame
+
+
+async def run_load_test(config: LoadTestConfig) -> Dict[str, Any]:
+    """
+    Run `config.clients` simulated conversations at once and summarise them.
+
+    Expects simulated_environment to be active.
+
+    Returns:
+        Report with session counts, latency percentiles (ms), frame rates, loop lag and memory
+    """
+    application = URLRouter(websocket_urlpatterns)
+    monitor = LoopMonitor()
+    monitor_task = asyncio.create_task(monitor.run())
+    active = 0
+    peak_active = 0
+
+    async def session(index: int) -> SessionResult:
+        nonlocal active, peak_active
+        if config.ramp_up:
+            await asyncio.sleep(config.ramp_up * index / config.clients)
+        active += 1
+        peak_active = max(peak_active, active)
+        try:
+            return await SimulatedClient(application, index, config).run()
+        finally:
+            active -= 1
+
+    started = perf_counter()
+    try:
+        results = await asyncio.gather(*(session(index) for index in range(config.clients)))
+    finally:
+        elapsed = perf_counter() - started
+        monitor_task.cancel()
+        await asyncio.gather(monitor_task, return_exceptions=True)
+    monitor.peak_rss = max(monitor.peak_rss, current_rss())
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        return {f"p{q}": percentile(values, q) * 1000 for q in (50, 90, 99)} | {"max": max(values, default=0) * 1000}
+
+    errors: Dict[str, int] = {}
+    for result in results:
+        if result.error:
+            errors[result.error] = errors.get(result.error, 0) + 1
+    frames = sum(result.frames for result in results)
+    document_frames = sum(result.document_frames for result in results)
+    return {
+        "clients": config.clients,
+        "completed": sum(1 for result in results if result.generation is not None),
+        "errors": errors,
+        "elapsed": elapsed,
+        "turn_latency_ms": summary([latency for result in results for latency in result.turn_latencies]),
+        "first_frame_ms": summary([result.first_frame for result in results if result.first_frame is not None]),
+        "generation_ms": summary([result.generation for result in results if result.generation is not None]),
+        "frames": frames,
+        "frames_per_second": frames / elapsed if elapsed else 0.0,
+        "document_frames_per_second": document_frames / elapsed if elapsed else 0.0,
+        "document_chars": sum(result.document_chars for result in results),
+        "loop_lag_ms": summary(monitor.lags),
+        "peak_sessions": peak_active,
+        "baseline_rss_bytes": monitor.baseline_rss,
+        "peak_rss_bytes": monitor.peak_rss,
+        "memory_per_session_bytes": (monitor.peak_rss - monitor.baseline_rss) / peak_active if peak_active else 0.0,
+    }
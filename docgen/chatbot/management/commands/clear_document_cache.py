@@ -0,0 +1,24 @@
+"""
+Invalidate generated documents kept by the document cache (see chatbot.cache.DocumentCache).
+
+    python manage.py clear_document_cache [--document-type "Loan Agreement"]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...cache import DOCUMENT_CACHE_BACKEND, invalidate_documents
+
+
+class Command(BaseCommand):
+    help = "Drop cached documents, all of them or those of one document type."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--document-type", default=None, help="Only drop documents of this type")
+
+    def handle(self, *args, **options):
+        if DOCUMENT_CACHE_BACKEND == "memory":
+            raise CommandError("The memory document cache lives in the server process; use the admin action instead")
+        document_type = options["document_type"]
+        count = invalidate_documents(document_type)
+        scope = f" of type {document_type!r}" if document_type else ""
+        self.stdout.write(f"Dropped {count} cached documents{scope}")
@@ -0,0 +1,87 @@
+"""
+Evaluate the local document type classifier (see chatbot.classifier) on labelled prompts.
+
+    python manage.py evaluate_classifier [--data prompts.jsonl] [--holdout 0.2] [--threshold 0.9]
+"""
+
+import os
+from collections import Counter
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...classifier import (
+    LOCAL_CLASSIFIER_PATH,
+    LOCAL_CLASSIFIER_THRESHOLD,
+    DocumentTypeClassifier,
+    history_examples,
+    read_examples,
+    seed_examples,
+    split_examples,
+)
+from ...constants.fields import detect_document_type_by_keywords
+
+
+class Command(BaseCommand):
+    help = "Report the local classifier's accuracy, coverage at the confidence threshold and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data", action="append", default=[], help="JSON lines labelled prompts (default: past conversations)"
+        )
+        parser.add_argument("--model", default=LOCAL_CLASSIFIER_PATH, help="Trained model to evaluate")
+        parser.add_argument(
+            "--holdout",
+            type=float,
+            default=None,
+            help="Instead of --model, train on the constants and all but this fraction of the examples",
+        )
+        parser.add_argument("--threshold", type=float, default=LOCAL_CLASSIFIER_THRESHOLD)
+
+    def handle(self, *args, **options):
+        examples = []
+        for path in options["data"]:
+            examples += read_examples(path)
+        if not options["data"]:
+            examples = history_examples()
+        if not examples:
+            raise CommandError("No labelled examples: pass --data or persist some conversations first")
+
+        if options["holdout"] is not None:
+            train, examples = split_examples(examples, options["holdout"])
+            classifier = DocumentTypeClassifier.train(seed_examples() + train)
+            self.stdout.write(f"Trained on the constants and {len(train)} examples")
+        elif os.path.exists(options["model"]):
+            classifier = DocumentTypeClassifier.load(options["model"])
+        else:
+            self.stdout.write(f"No model at {options['model']}, using one trained on the constants")
+            classifier = DocumentTypeClassifier.train(seed_examples())
+
+        threshold = options["threshold"]
+        correct = covered = covered_correct = keyword_correct = 0
+        per_type: Counter = Counter()
+        per_type_correct: Counter = Counter()
+        elapsed = 0.0
+        for example in examples:
+            started = perf_counter()
+            prediction = classifier.predict(example.prompt)
+            elapsed += perf_counter() - started
+            hit = prediction is not None and prediction.document_type == example.document_type
+            correct += hit
+            per_type[example.document_type] += 1
+            per_type_correct[example.document_type] += hit
+            if prediction is not None and prediction.confidence >= threshold:
+                covered += 1
+                covered_correct += hit
+            keyword_correct += detect_document_type_by_keywords(example.prompt) == example.document_type
+
+        total = len(examples)
+        self.stdout.write(f"{total} examples")
+        self.stdout.write(f"Accuracy: {correct / total:.1%} (keyword matching: {keyword_correct / total:.1%})")
+        self.stdout.write(
+            f"Confidence >= {threshold}: {covered / total:.1%} of prompts, "
+            f"{covered_correct / covered if covered else 0:.1%} correct"
+        )
+        self.stdout.write(f"Latency: {elapsed / total * 1e6:.1f} µs per prediction")
+        for document_type, count in per_type.most_common():
+            self.stdout.write(f"  {document_type}: {per_type_correct[document_type] / count:.1%} of {count}")
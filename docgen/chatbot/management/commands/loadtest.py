@@ -0,0 +1,99 @@
+"""
+Load-test DocumentAgentConsumer with simulated users (see chatbot.loadtest), entirely offline.
+
+    python manage.py loadtest [--clients 50] [--ramp-up 5] [--token-latency 0.005] [--document-tokens 2000]
+"""
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import redirect_stdout
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...consumers import MODEL
+from ...loadtest import LoadTestConfig, build_simulated_llm, run_load_test, simulated_environment
+from ...sharding import GENERATION_MODE
+
+
+class Command(BaseCommand):
+    help = "Run simulated conversations against the WebSocket consumer and report latency, throughput and memory."
+
+    def add_arguments(self, parser):
+        defaults = LoadTestConfig()
+        parser.add_argument("--clients", type=int, default=defaults.clients, help="Simulated users at once")
+        parser.add_argument(
+            "--ramp-up", type=float, default=defaults.ramp_up, help="Seconds over which clients connect"
+        )
+        parser.add_argument(
+            "--token-latency", type=float, default=defaults.token_latency, help="Seconds per simulated output token"
+        )
+        parser.add_argument(
+            "--document-tokens", type=int, default=defaults.document_tokens, help="Length of each generated document"
+        )
+        parser.add_argument("--document-type", default=defaults.document_type)
+        parser.add_argument(
+            "--timeout", type=float, default=defaults.timeout, help="Seconds a client waits for any expected frame"
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+        parser.add_argument("--verbose", action="store_true", help="Keep the server's own output and logs")
+
+    def handle(self, *args, **options):
+        if GENERATION_MODE == "worker":
+            raise CommandError("Load tests run generation in this process; unset GENERATION_MODE=worker")
+        if options["clients"] < 1:
+            raise CommandError("--clients must be at least 1")
+        config = LoadTestConfig(
+            clients=options["clients"],
+            ramp_up=options["ramp_up"],
+            token_latency=options["token_latency"],
+            document_tokens=options["document_tokens"],
+            document_type=options["document_type"],
+            timeout=options["timeout"],
+        )
+
+        chatbot_logger = logging.getLogger("chatbot")
+        level = chatbot_logger.level
+        with simulated_environment(build_simulated_llm(MODEL, config)), open(os.devnull, "w") as devnull:
+            if options["verbose"]:
+                report = asyncio.run(run_load_test(config))
+            else:
+                # Every LLM call prints progress; thousands of them would drown the report
+                chatbot_logger.setLevel(logging.WARNING)
+                try:
+                    with redirect_stdout(devnull):
+                        report = asyncio.run(run_load_test(config))
+                finally:
+                    chatbot_logger.setLevel(level)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report, config)
+
+    def write_report(self, report, config: LoadTestConfig):
+        def row(label, stats):
+            values = "  ".join(f"{name} {value:8.1f}" for name, value in stats.items())
+            self.stdout.write(f"  {label:<22}{values}")
+
+        self.stdout.write(
+            f"{report['clients']} clients, {config.token_latency * 1000:g} ms/token, "
+            f"~{config.document_tokens}-token {config.document_type}, {report['elapsed']:.1f} s"
+        )
+        self.stdout.write(f"Completed: {report['completed']}/{report['clients']}")
+        for error, count in report["errors"].items():
+            self.stdout.write(self.style.ERROR(f"  {count} x {error}"))
+        self.stdout.write("Latency (ms):")
+        row("turn", report["turn_latency_ms"])
+        row("first document frame", report["first_frame_ms"])
+        row("generation", report["generation_ms"])
+        row("event loop lag", report["loop_lag_ms"])
+        self.stdout.write(
+            f"Frames: {report['frames']} ({report['frames_per_second']:.0f}/s, "
+            f"{report['document_frames_per_second']:.0f} document frames/s, {report['document_chars']} chars)"
+        )
+        self.stdout.write(
+            f"Memory: {report['baseline_rss_bytes'] / 2**20:.1f} MiB -> {report['peak_rss_bytes'] / 2**20:.1f} MiB, "
+            f"{report['memory_per_session_bytes'] / 1024:.0f} KiB per session ({report['peak_sessions']} at once)"
+        )
@@ -0,0 +1,43 @@
+"""
+Train the local document type classifier (see chatbot.classifier).
+
+    python manage.py train_classifier [--data prompts.jsonl] [--no-history] [--output model.json]
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...classifier import LOCAL_CLASSIFIER_PATH, DocumentTypeClassifier, history_examples, read_examples, seed_examples
+
+
+class Command(BaseCommand):
+    help = "Train the local document type classifier on the constants, past conversations and labelled prompts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data", action="append", default=[], help='JSON lines file of {"prompt", "document_type", "fields"?}'
+        )
+        parser.add_argument("--no-history", action="store_true", help="Do not train on persisted conversations")
+        parser.add_argument("--history-limit", type=int, default=None, help="Most recent conversations to use")
+        parser.add_argument("--alpha", type=float, default=0.1, help="Additive smoothing")
+        parser.add_argument("--output", default=LOCAL_CLASSIFIER_PATH, help="Where to write the model")
+
+    def handle(self, *args, **options):
+        examples = seed_examples()
+        self.stdout.write(f"{len(examples)} examples from the constants")
+        if not options["no_history"]:
+            history = history_examples(options["history_limit"])
+            self.stdout.write(f"{len(history)} examples from past conversations")
+            examples += history
+        for path in options["data"]:
+            labelled = read_examples(path)
+            self.stdout.write(f"{len(labelled)} examples from {path}")
+            examples += labelled
+
+        classifier = DocumentTypeClassifier.train(examples, alpha=options["alpha"])
+        classifier.save(options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trained on {len(examples)} examples ({len(classifier.priors)} document types, "
+                f"{len(classifier.idf)} features); saved to {options['output']}"
+            )
+        )
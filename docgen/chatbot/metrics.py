@@ -0,0 +1,301 @@
+"""
+In-process latency metrics and their Prometheus text exposition.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Log one JSON line per LLM agent call
+LLM_CALL_LOG = os.getenv("LLM_CALL_LOG", "false").lower() == "true"
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Most recent observations kept for percentile estimates
+PERCENTILE_WINDOW = 2048
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram with percentiles over a sliding window of recent samples."""
+
+    def __init__(self, buckets: List[float] = DEFAULT_BUCKETS, window: int = PERCENTILE_WINDOW):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted bucket upper bounds in seconds (an implicit +Inf bucket is added)
+            window: Number of recent samples used for percentiles
+        """
+        self.buckets = list(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Record one latency sample."""
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self._recent.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """Get the p-th percentile (0-100) of recent samples, or 0.0 with no samples."""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def stats(self) -> Dict[str, float]:
+        """Get count, mean, p50 and p95 in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+# Collecting-turn latency (user reply -> next question) by turn mode: "sequential" or "pipelined"
+TURN_LATENCY: Dict[str, LatencyHistogram] = {"sequential": LatencyHistogram(), "pipelined": LatencyHistogram()}
+
+# Time LLM calls waited for admission, by priority: "interactive" or "generation"
+QUEUE_WAIT: Dict[str, LatencyHistogram] = {"interactive": LatencyHistogram(), "generation": LatencyHistogram()}
+
+# Time to render a document export, by format (see chatbot.export)
+EXPORT_RENDER: Dict[str, LatencyHistogram] = {
+    export_format: LatencyHistogram() for export_format in ("md", "html", "doc", "pdf")
+}
+
+# How often the speculatively drafted next question could be used as-is, had to be regenerated,
+# or was dropped because the reply left no field to ask for
+DRAFT_OUTCOMES: Dict[str, int] = {"reused": 0, "regenerated": 0, "discarded": 0}
+
+# Local completion detector verdicts, and how many documents still needed the LLM checker
+COMPLETION_CHECKS: Dict[str, int] = {"complete": 0, "incomplete": 0, "uncertain": 0, "llm_checks": 0}
+
+
+# Counters kept per agent by AgentCallMetrics
+AGENT_COUNTERS = (
+    "calls",
+    "errors",
+    "retries",
+    "fallbacks",
+    "model_fallbacks",
+    "input_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+    "uncached_input_tokens",
+    "output_tokens",
+)
+
+
+class AgentCallMetrics:
+    """Per-agent LLM call counters, token usage and latency / time-to-first-token histograms."""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.first_token: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, agent: str) -> Dict[str, int]:
+        counters = self.counters.get(agent)
+        if counters is None:
+            counters = self.counters[agent] = dict.fromkeys(AGENT_COUNTERS, 0)
+            self.latency[agent] = LatencyHistogram()
+            self.first_token[agent] = LatencyHistogram()
+        return counters
+
+    def record_call(
+        self,
+        agent: str,
+        model: str,
+        seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        first_token: Optional[float] = None,
+        error: Optional[BaseException] = None,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ):
+        """
+        Record one finished agent call.
+
+        Args:
+            agent: Agent name
+            model: Model the call ran on
+            seconds: Call latency (for streams, until the stream closed)
+            input_tokens: Input tokens reported by the provider, including cached ones
+            output_tokens: Output tokens reported by the provider
+            first_token: Seconds until the first streamed chunk (streaming calls only)
+            error: Exception the call failed with
+            cache_read_tokens: Input tokens served from the provider's prompt cache
+            cache_write_tokens: Input tokens written to the provider's prompt cache
+        """
+        with self._lock:
+            counters = self._agent(agent)
+            counters["calls"] += 1
+            counters["errors"] += int(error is not None)
+            counters["input_tokens"] += input_tokens
+            counters["cache_read_tokens"] += cache_read_tokens
+            counters["cache_write_tokens"] += cache_write_tokens
+            # Tokens written to the cache are still processed in full, so they count as uncached
+            counters["uncached_input_tokens"] += max(0, input_tokens - cache_read_tokens)
+            counters["output_tokens"] += output_tokens
+            latency, time_to_first_token = self.latency[agent], self.first_token[agent]
+        latency.observe(seconds)
+        if first_token is not None:
+            time_to_first_token.observe(first_token)
+        if LLM_CALL_LOG:
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "llm_call",
+                        "agent": agent,
+                        "model": model,
+                        "seconds": round(seconds, 4),
+                        "first_token_seconds": None if first_token is None else round(first_token, 4),
+                        "input_tokens": input_tokens,
+                        "cache_read_tokens": cache_read_tokens,
+                        "cache_write_tokens": cache_write_tokens,
+                        "output_tokens": output_tokens,
+                        "error": None if error is None else type(error).__name__,
+                    }
+                )
+            )
+
+    def record_retry(self, agent: str, count: int = 1):
+        """Record calls repeated because an earlier one failed or was cut off."""
+        with self._lock:
+            self._agent(agent)["retries"] += count
+
+    def record_fallback(self, agent: str):
+        """Record an agent call replaced by its local fallback."""
+        with self._lock:
+            self._agent(agent)["fallbacks"] += 1
+        if LLM_CALL_LOG:
+            logger.info(json.dumps({"event": "llm_fallback", "agent": agent}))
+
+    def record_model_fallback(self, agent: str):
+        """Record an agent call moved from its primary model to its fallback model."""
+        with self._lock:
+            self._agent(agent)["model_fallbacks"] += 1
+        if LLM_CALL_LOG:
+            logger.info(json.dumps({"event": "llm_model_fallback", "agent": agent}))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get counters, mean/p50/p95 latency and p50 time-to-first-token per agent."""
+        with self._lock:
+            counters = {agent: dict(values) for agent, values in self.counters.items()}
+        return {
+            agent: {
+                **values,
+                "latency": self.latency[agent].stats(),
+                "first_token_p50": self.first_token[agent].percentile(50),
+            }
+            for agent, values in counters.items()
+        }
+
+    def reset(self):
+        """Drop all recorded calls."""
+        with self._lock:
+            self.counters.clear()
+            self.latency.clear()
+            self.first_token.clear()
+
+
+# Every RealLLM agent call in this process, by agent name
+AGENT_CALLS = AgentCallMetrics()
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    """Format a Prometheus label set, escaping backslashes, quotes and newlines in values."""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _histogram_lines(name: str, histogram: LatencyHistogram, labels: Dict[str, str]) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + [float("inf")], histogram.bucket_counts):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labels)} {histogram.total}")
+    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+    return lines
+
+
+def _family(name: str, kind: str, help_text: str, lines: List[str]) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *lines]
+
+
+def render_prometheus(gauges: Iterable[Tuple[str, Dict[str, str], Dict[str, Any]]] = ()) -> str:
+    """
+    Render the metrics of this module in the Prometheus text exposition format.
+
+    Args:
+        gauges: Extra stats to expose as (group, labels, stats) triples; every numeric
+            entry of stats becomes a `docgen_<group>_<key>` gauge
+
+    Returns:
+        Exposition text
+    """
+    out: List[str] = []
+    agents = sorted(AGENT_CALLS.counters)
+    for counter in AGENT_COUNTERS:
+        name = f"docgen_llm_{counter}_total"
+        lines = [f"{name}{_labels({'agent': agent})} {AGENT_CALLS.counters[agent][counter]}" for agent in agents]
+        out += _family(name, "counter", f"LLM agent {counter.replace('_', ' ')}", lines)
+    for name, histograms, help_text in (
+        ("docgen_llm_call_seconds", AGENT_CALLS.latency, "LLM agent call latency"),
+        ("docgen_llm_first_token_seconds", AGENT_CALLS.first_token, "Time to the first streamed chunk"),
+    ):
+        lines = [line for agent in agents for line in _histogram_lines(name, histograms[agent], {"agent": agent})]
+        out += _family(name, "histogram", help_text, lines)
+
+    lines = []
+    for mode, histogram in TURN_LATENCY.items():
+        lines += _histogram_lines("docgen_turn_seconds", histogram, {"mode": mode})
+    out += _family("docgen_turn_seconds", "histogram", "Collecting-turn latency", lines)
+    lines = []
+    for priority, histogram in QUEUE_WAIT.items():
+        lines += _histogram_lines("docgen_llm_queue_wait_seconds", histogram, {"priority": priority})
+    out += _family("docgen_llm_queue_wait_seconds", "histogram", "LLM call wait for admission", lines)
+    lines = []
+    for export_format, histogram in EXPORT_RENDER.items():
+        lines += _histogram_lines("docgen_export_render_seconds", histogram, {"format": export_format})
+    out += _family("docgen_export_render_seconds", "histogram", "Document export render time", lines)
+    for name, label, values, help_text in (
+        ("docgen_draft_outcomes_total", "outcome", DRAFT_OUTCOMES, "Speculative next-question drafts"),
+        ("docgen_completion_checks_total", "verdict", COMPLETION_CHECKS, "Document completion checks"),
+    ):
+        lines = [f"{name}{_labels({label: key})} {value}" for key, value in values.items()]
+        out += _family(name, "counter", help_text, lines)
+
+    families: Dict[str, List[str]] = {}
+    for group, labels, stats in gauges:
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f"docgen_{group}_{key}"
+                families.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+    for name, lines in families.items():
+        out += _family(name, "gauge", name[len("docgen_") :].replace("_", " "), lines)
+    return "\n".join(out) + "\n"
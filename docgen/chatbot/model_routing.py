@@ -0,0 +1,116 @@
+"""
+Per-agent model routing for RealLLM.
+
+Short structured tasks (extraction, field questions and mapping, completion checks)
+do not need the flagship model that writes the document. A routing profile picks the
+model each agent runs on, per-agent environment variables override it, and any agent
+can name a fallback model that takes over when the primary is too slow to answer or
+its circuit breaker is open.
+
+Profiles:
+    single: Every agent uses the main model (the default, and the behaviour before routing)
+    tiered: Small agents use the fast model; generation, TOC and section agents use the main model
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+# Names of the RealLLM agents, as passed to Agent(name=...)
+AGENT_NAMES = (
+    "extraction_agent",
+    "field_request_agent",
+    "field_mapping_agent",
+    "generation_agent",
+    "toc_agent",
+    "section_agent",
+    "completion_check_agent",
+)
+
+# Agents with short structured outputs, sent to the fast model by the "tiered" profile
+SMALL_AGENTS = ("extraction_agent", "field_request_agent", "field_mapping_agent", "completion_check_agent")
+
+ROUTING_PROFILES = ("single", "tiered")
+
+# Routing profile used by RealLLM unless routes are passed in
+LLM_ROUTING_PROFILE = os.getenv("LLM_ROUTING_PROFILE", "single")
+
+# Model for small agents in the "tiered" profile; empty picks the fast model of the main model's provider
+LLM_FAST_MODEL_NAME = os.getenv("LLM_FAST_MODEL_NAME", "")
+
+# Fallback model for every agent (empty for none), and seconds the primary gets before falling back
+# (for streams: until the first chunk)
+LLM_FALLBACK_MODEL_NAME = os.getenv("LLM_FALLBACK_MODEL_NAME", "")
+LLM_FALLBACK_AFTER = float(os.getenv("LLM_FALLBACK_AFTER", "20"))
+
+# Fast model of each provider, used when LLM_FAST_MODEL_NAME is not set
+FAST_MODELS = {
+    "anthropic": "anthropic:claude-haiku-4-5",
+    "openai": "openai:gpt-4.1-mini",
+}
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Model an agent runs on, and the model to fall back to when it is too slow."""
+
+    model: str
+    fallback: Optional[str] = None
+    fallback_after: float = LLM_FALLBACK_AFTER
+
+
+def fast_model_for(model_name: str) -> str:
+    """Get the fast model of the main model's provider, or the main model for unknown providers."""
+    provider = model_name.split(":", 1)[0]
+    return FAST_MODELS.get(provider, model_name)
+
+
+def agent_env_key(agent: str) -> str:
+    """Suffix of an agent's override variables, e.g. COMPLETION_CHECK for completion_check_agent."""
+    return agent.removesuffix("_agent").upper()
+
+
+def resolve_routes(
+    model_name: str,
+    profile: Optional[str] = None,
+    fast_model: Optional[str] = None,
+    fallback_model: Optional[str] = None,
+    fallback_after: Optional[float] = None,
+    env: Optional[Mapping[str, str]] = None,
+) -> Dict[str, ModelRoute]:
+    """
+    Resolve the model route of every agent.
+
+    LLM_MODEL_<AGENT> and LLM_FALLBACK_MODEL_<AGENT> (e.g. LLM_MODEL_FIELD_MAPPING)
+    override the profile for one agent.
+
+    Args:
+        model_name: Main model, used by the generation agents in every profile
+        profile: Routing profile (default: LLM_ROUTING_PROFILE)
+        fast_model: Model for small agents in the "tiered" profile (default: LLM_FAST_MODEL_NAME)
+        fallback_model: Fallback model for every agent (default: LLM_FALLBACK_MODEL_NAME)
+        fallback_after: Seconds before falling back (default: LLM_FALLBACK_AFTER)
+        env: Variables to read overrides from (default: os.environ)
+
+    Returns:
+        Route per agent name
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    profile = profile or LLM_ROUTING_PROFILE
+    if profile not in ROUTING_PROFILES:
+        raise ValueError(f"Unknown routing profile '{profile}', expected one of {', '.join(ROUTING_PROFILES)}")
+    env = os.environ if env is None else env
+    fast_model = fast_model or LLM_FAST_MODEL_NAME or fast_model_for(model_name)
+    fallback_model = LLM_FALLBACK_MODEL_NAME if fallback_model is None else fallback_model
+    fallback_after = LLM_FALLBACK_AFTER if fallback_after is None else fallback_after
+
+    routes = {}
+    for agent in AGENT_NAMES:
+        key = agent_env_key(agent)
+        model = fast_model if profile == "tiered" and agent in SMALL_AGENTS else model_name
+        model = env.get(f"LLM_MODEL_{key}") or model
+        fallback = env.get(f"LLM_FALLBACK_MODEL_{key}") or fallback_model or None
+        routes[agent] = ModelRoute(model, fallback if fallback != model else None, fallback_after)
+    return routes
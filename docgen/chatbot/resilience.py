@@ -0,0 +1,354 @@
+"""
+Retry policy, retry budget and circuit breakers for LLM agent calls.
+
+RealLLM routes every agent call through call_with_retry or stream_with_retry: failed attempts are retried
+with exponential backoff and full jitter, each attempt has a deadline, retries draw
+from a process-wide budget so an outage does not multiply provider traffic, and a
+per-model circuit breaker fails calls immediately (so callers use their local
+fallbacks) while the provider keeps failing.
+"""
+
+import asyncio
+import os
+import random
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from pydantic_ai.exceptions import UserError
+
+T = TypeVar("T")
+
+# Attempts per call, including the first one
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+
+# Backoff before retry n is drawn from [0, min(max_delay, base_delay * 2**n)] seconds
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+
+# Deadline in seconds for one attempt (for streams: until the first chunk)
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+
+# Retries allowed per call across the process, and retries that can be saved up while traffic is healthy
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_CAPACITY = float(os.getenv("LLM_RETRY_BUDGET_CAPACITY", "10"))
+
+# Consecutive failures that open a model's breaker, and seconds before a probe call is let through
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# HTTP statuses worth retrying; other 4xx responses fail the same way every time
+RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+
+class CircuitOpenError(Exception):
+    """The model's circuit breaker is open; the call was not attempted."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for {model}, next probe in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Tell whether another attempt could succeed: timeouts, connection and server errors, rate limits."""
+    if isinstance(error, (UserError, CircuitOpenError)):
+        return False
+    status = getattr(error, "status_code", None)
+    return status is None or status >= 500 or status in RETRYABLE_STATUS_CODES
+
+
+@dataclass
+class RetryPolicy:
+    """Attempts, backoff and per-attempt deadline for one call."""
+
+    attempts: int = LLM_RETRY_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_DELAY
+    max_delay: float = LLM_RETRY_MAX_DELAY
+    timeout: Optional[float] = LLM_CALL_TIMEOUT
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay in seconds before retry number `retry`, counting from 0."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+class RetryBudget:
+    """
+    Process-wide token bucket limiting retries to a fraction of calls.
+
+    Every call deposits `ratio` tokens and every retry withdraws one, so during an
+    outage retries stop once they exceed `ratio` of the traffic instead of
+    multiplying it.
+    """
+
+    def __init__(self, ratio: float = LLM_RETRY_BUDGET_RATIO, capacity: float = LLM_RETRY_BUDGET_CAPACITY):
+        """
+        Initialize the budget.
+
+        Args:
+            ratio: Retries allowed per call
+            capacity: Most retries that can be saved up; the bucket starts full
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Take one retry from the budget; False if it is used up."""
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"tokens": self.tokens, "exhausted": self.exhausted}
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one model: closed, open, then half-open with a single probe."""
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.short_circuits = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_seconds else "open"
+
+    def before_call(self):
+        """
+        Let a call through or reject it.
+
+        Raises:
+            CircuitOpenError: While open, or while the half-open probe is still running
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            error = self._reject()
+        raise error
+
+    def check(self):
+        """
+        Reject a call the breaker would not let through, without claiming the half-open probe.
+
+        Lets callers give up (or pick another model) before queueing for an admission slot;
+        the call itself still goes through before_call.
+
+        Raises:
+            CircuitOpenError: While open, or while the half-open probe is still running
+        """
+        with self._lock:
+            if self.state == "closed" or (self.state == "half_open" and not self._probe_in_flight):
+                return
+            error = self._reject()
+        raise error
+
+    def _reject(self) -> CircuitOpenError:
+        """Count a short-circuited call; called with the lock held."""
+        self.short_circuits += 1
+        return CircuitOpenError(self.model, max(0.0, self.opened_at + self.reset_seconds - self.clock()))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def abandon(self):
+        """Forget a call that was cancelled before it succeeded or failed."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"Circuit breaker opened for {self.model} after {self.failures} failures")
+                self.opened_at = self.clock()
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, float]:
+        return {"open": int(self.state != "closed"), "failures": self.failures, "short_circuits": self.short_circuits}
+
+
+class CircuitBreakerRegistry:
+    """Process-wide circuit breakers keyed by model name."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(model)
+            return breaker
+
+    def clear(self):
+        with self._lock:
+            self._breakers.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {model: breaker.stats() for model, breaker in breakers.items()}
+
+
+RETRY_BUDGET = RetryBudget()
+CIRCUIT_BREAKERS = CircuitBreakerRegistry()
+
+
+def _should_retry(
+    error: BaseException, retry: int, policy: RetryPolicy, breaker: CircuitBreaker, budget: RetryBudget
+) -> bool:
+    """Record a failed attempt on the breaker and tell whether another attempt is allowed and useful."""
+    if not is_retryable(error):
+        # The provider answered; the request itself is at fault
+        breaker.record_success()
+        return False
+    breaker.record_failure()
+    return retry + 1 < policy.attempts and budget.try_withdraw()
+
+
+async def call_with_retry(
+    attempt: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    breaker: CircuitBreaker,
+    budget: RetryBudget = RETRY_BUDGET,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> T:
+    """
+    Run an async call with deadlines, backoff retries, the retry budget and the breaker.
+
+    Args:
+        attempt: Starts one attempt of the call
+        policy: Attempts, backoff and deadline
+        breaker: Circuit breaker of the model being called
+        budget: Retry budget shared by the process
+        on_retry: Called with the failure before each retry
+
+    Returns:
+        Result of the first successful attempt
+
+    Raises:
+        CircuitOpenError: If the breaker is open (checked before every attempt)
+        Exception: The last attempt's error when retries are exhausted, not allowed or not useful
+    """
+    budget.record_call()
+    retry = 0
+    while True:
+        breaker.before_call()
+        try:
+            async with asyncio.timeout(policy.timeout):
+                result = await attempt()
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except Exception as e:
+            if not _should_retry(e, retry, policy, breaker, budget):
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(policy.backoff(retry))
+            retry += 1
+            continue
+        breaker.record_success()
+        return result
+
+
+async def stream_with_retry(
+    open_stream: Callable[[], AsyncGenerator[T, None]],
+    policy: RetryPolicy,
+    breaker: CircuitBreaker,
+    budget: RetryBudget = RETRY_BUDGET,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> AsyncGenerator[T, None]:
+    """
+    Stream with the same protection as call_with_retry, retrying only until the first chunk.
+
+    The deadline applies to the first chunk. Once anything has been yielded, a failure
+    is raised to the caller, which resumes from its checkpoint rather than restarting.
+
+    Args:
+        open_stream: Starts one attempt of the stream
+        policy: Attempts, backoff and first-chunk deadline
+        breaker: Circuit breaker of the model being called
+        budget: Retry budget shared by the process
+        on_retry: Called with the failure before each retry
+
+    Yields:
+        Chunks of the first attempt that produced any
+    """
+    budget.record_call()
+    retry = 0
+    while True:
+        breaker.before_call()
+        stream = open_stream()
+        try:
+            # asyncio.timeout keeps the stream in this task, where the provider client set its context
+            async with asyncio.timeout(policy.timeout):
+                first = await anext(stream)
+        except StopAsyncIteration:
+            breaker.record_success()
+            return
+        except asyncio.CancelledError:
+            breaker.abandon()
+            await stream.aclose()
+            raise
+        except Exception as e:
+            await stream.aclose()
+            if not _should_retry(e, retry, policy, breaker, budget):
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(policy.backoff(retry))
+            retry += 1
+            continue
+        break
+
+    failed = False
+    try:
+        yield first
+        async for chunk in stream:
+            yield chunk
+    except Exception:
+        failed = True
+        breaker.record_failure()
+        raise
+    finally:
+        await stream.aclose()
+        if not failed:
+            # Finished, or closed early by the consumer while the provider was streaming fine
+            breaker.record_success()
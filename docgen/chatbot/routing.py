@@ -4,9 +4,13 @@ from channels.auth import AuthMiddlewareStack
 
 from django.urls import path
 
-from . import consumers
+from . import consumers, workers
+from .sharding import generation_channels
 
 websocket_urlpatterns = [
     re_path("ws/assistant/", consumers.DocumentAgentConsumer.as_asgi()),  # type: ignore[arg-type]
     re_path("ws/document-agent/", consumers.DocumentAgentConsumer.as_asgi()),  # type: ignore[arg-type] (legacy)
 ]
+
+# Background generation workers, served by `python manage.py runworker <channel> ...`
+channel_routes = {channel: workers.DocumentGenerationWorker.as_asgi() for channel in generation_channels()}
@@ -0,0 +1,145 @@
+"""
+Section-wise document generation.
+
+The TOC agent plans the document, then SectionedGeneration drafts the sections
+concurrently (at most SECTION_CONCURRENCY at a time) and streams them back in
+reading order: the earliest unfinished section streams live, later sections are
+buffered until everything before them has been sent. A section whose stream breaks
+or hits its output token limit is retried from the text it already produced.
+"""
+
+import asyncio
+import os
+from contextlib import aclosing
+from typing import AsyncGenerator, Callable, List
+
+from .continuation import GenerationRun, OverlapTrimmer
+
+# "single" streams the whole document from one run; "sections" plans a TOC and drafts sections concurrently;
+# "hybrid" renders the types with a clause template (see chatbot.hybrid) and drafts only their bespoke clauses
+GENERATION_STRATEGY = os.getenv("GENERATION_STRATEGY", "single")
+
+# Sections drafted at the same time for one document
+SECTION_CONCURRENCY = int(os.getenv("SECTION_CONCURRENCY", "4"))
+
+# Extra attempts per section after a failed or cut-off run
+SECTION_RETRIES = int(os.getenv("SECTION_RETRIES", "2"))
+
+# Text streamed between two sections
+SECTION_SEPARATOR = "\n\n"
+
+# Streams one section: (section index, text of the section produced so far, run to fill with usage)
+SectionStream = Callable[[int, str, GenerationRun], AsyncGenerator[str, None]]
+
+# Marks the end of a section in its queue
+_SECTION_END = object()
+
+
+class SectionGenerationError(Exception):
+    """A section could not be generated within its retries."""
+
+    def __init__(self, index: int, cause: object):
+        super().__init__(f"Section {index + 1} failed: {cause}")
+        self.index = index
+        self.cause = cause
+
+
+class SectionedGeneration:
+    """Generates sections concurrently and streams them in order."""
+
+    def __init__(
+        self,
+        section_count: int,
+        stream_section: SectionStream,
+        concurrency: int = SECTION_CONCURRENCY,
+        retries: int = SECTION_RETRIES,
+    ):
+        """
+        Initialize the generation.
+
+        Args:
+            section_count: Number of sections in the outline
+            stream_section: Streams one section; continues from the given text on retries
+            concurrency: Sections generated at the same time
+            retries: Extra attempts per section
+        """
+        self.section_count = section_count
+        self.stream_section = stream_section
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        # Token usage and finish reason of each section, accumulated over its attempts
+        self.runs: List[GenerationRun] = [GenerationRun() for _ in range(section_count)]
+        self.attempts: List[int] = [0] * section_count
+        self.active = 0
+        self.peak_active = 0
+
+    async def stream(self) -> AsyncGenerator[str, None]:
+        """
+        Stream the document section by section, in order.
+
+        Raises:
+            SectionGenerationError: If a section still fails after its retries; every
+                section before it has been streamed in full
+        """
+        queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(self.section_count)]
+        # Sections wait on the semaphore in creation order, so the earliest ones start first
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.create_task(self._produce(index, queue, semaphore)) for index, queue in enumerate(queues)
+        ]
+        try:
+            for index, queue in enumerate(queues):
+                if index:
+                    yield SECTION_SEPARATOR
+                while (item := await queue.get()) is not _SECTION_END:
+                    if isinstance(item, SectionGenerationError):
+                        raise item
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _produce(self, index: int, queue: asyncio.Queue, semaphore: asyncio.Semaphore):
+        """Generate one section into its queue once a concurrency slot is free."""
+        async with semaphore:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            try:
+                await self._generate(index, queue)
+            except SectionGenerationError as e:
+                queue.put_nowait(e)
+                return
+            finally:
+                self.active -= 1
+        queue.put_nowait(_SECTION_END)
+
+    async def _generate(self, index: int, queue: asyncio.Queue):
+        """Run a section's attempts; each retry continues from the text already produced."""
+        run = self.runs[index]
+        text = ""
+        failure: object = None
+        for attempt in range(self.retries + 1):
+            self.attempts[index] += 1
+            run.finish_reason = None
+            trimmer = OverlapTrimmer(text) if text else None
+            try:
+                async with aclosing(self.stream_section(index, text, run)) as stream:
+                    async for chunk in stream:
+                        text += self._emit(queue, trimmer.feed(chunk) if trimmer else chunk)
+                failure = f"finish reason {run.finish_reason}" if run.truncated else None
+            except Exception as e:
+                failure = e
+            if trimmer is not None:
+                text += self._emit(queue, trimmer.flush())
+            if failure is None:
+                return
+            if attempt < self.retries:
+                print(f"Section {index + 1} cut off ({failure}) after {len(text)} characters, retrying...")
+        raise SectionGenerationError(index, failure)
+
+    @staticmethod
+    def _emit(queue: asyncio.Queue, chunk: str) -> str:
+        if chunk:
+            queue.put_nowait(chunk)
+        return chunk
@@ -0,0 +1,61 @@
+"""
+Routing of conversations to generation workers.
+"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+# "inline" streams from the socket consumer's process; "worker" dispatches to generation workers
+GENERATION_MODE = os.getenv('GENERATION_MODE', 'inline')
+GENERATION_WORKER_SHARDS = int(os.getenv('GENERATION_WORKER_SHARDS', '1'))
+GENERATION_CHANNEL_PREFIX = "document-generation"
+# A worker reports a running generation this often, even while no frames are produced
+GENERATION_HEARTBEAT_INTERVAL = float(os.getenv('GENERATION_HEARTBEAT_INTERVAL', '10'))
+# A socket takes a conversation back from a worker it has not heard from for this long
+GENERATION_WORKER_TIMEOUT = float(os.getenv('GENERATION_WORKER_TIMEOUT', '45'))
+
+
+@dataclass
+class RemoteGeneration:
+    """
+    A conversation handed to a generation worker.
+
+    `token` identifies this handoff: the worker tags every event and its cancellation
+    with it, so a socket ignores a worker it already gave up on.
+    """
+
+    token: str
+    last_seen: float
+    watchdog: Optional[asyncio.Task] = None
+
+
+def generation_channels(shards: int = GENERATION_WORKER_SHARDS) -> List[str]:
+    """Get the channel names served by generation workers."""
+    return [f"{GENERATION_CHANNEL_PREFIX}-{shard}" for shard in range(shards)]
+
+
+def generation_channel_for(conversation_id: str, channels: Optional[List[str]] = None) -> str:
+    """
+    Pick the generation worker channel for a conversation.
+
+    Uses rendezvous (highest random weight) hashing, so every process agrees on the
+    owner of a conversation and adding or removing a shard only moves the
+    conversations that belonged to it.
+
+    Args:
+        conversation_id: Conversation to route
+        channels: Candidate worker channels (default: all configured shards)
+
+    Returns:
+        Channel name of the owning worker
+    """
+    channels = channels or generation_channels()
+
+    def weight(channel: str) -> int:
+        digest = hashlib.sha1(f"{channel}:{conversation_id}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    return max(channels, key=weight)
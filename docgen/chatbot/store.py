@@ -0,0 +1,204 @@
+"""
+Durable storage for conversation (orchestrator) state.
+
+Orchestrator snapshots are written behind the request path by a batched writer
+and rehydrated lazily when a conversation_id is first referenced on a socket, so
+collected fields survive dropped connections, browser refreshes and restarts.
+
+Conversation ids come from the client and are easy to guess, so snapshots are
+stored per owner (the signed-in user, else the browser session) and a snapshot
+is only ever handed back to the owner that wrote it.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONVERSATION_STORE = "chatbot.store.DatabaseConversationStore"
+
+
+def conversation_owner(user=None, session=None) -> Optional[str]:
+    """
+    Identify who owns the conversations of a socket or request.
+
+    Args:
+        user: Django user from the scope or request, if any
+        session: Django session from the scope or request, if any
+
+    Returns:
+        "user:<pk>" for a signed-in user, "session:<key>" for an anonymous session,
+        or None when there is neither
+    """
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    session_key = getattr(session, "session_key", None) if session is not None else None
+    if session_key:
+        return f"session:{session_key}"
+    return None
+
+
+def conversation_key(owner: str, conversation_id: str) -> str:
+    """Storage key of one owner's conversation."""
+    return f"{owner}/{conversation_id}"
+
+
+class ConversationStore:
+    """Base class for conversation snapshot backends."""
+
+    async def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation snapshot, or None if it was never saved."""
+        raise NotImplementedError
+
+    async def save_many(self, snapshots: Dict[str, Dict[str, Any]]):
+        """Save several conversation snapshots in one batch."""
+        raise NotImplementedError
+
+    async def delete(self, conversation_ids: Iterable[str]):
+        """Delete conversation snapshots."""
+        raise NotImplementedError
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store, intended for tests and single-process development."""
+
+    def __init__(self):
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+
+    async def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshots.get(conversation_id)
+
+    async def save_many(self, snapshots: Dict[str, Dict[str, Any]]):
+        self.snapshots.update(snapshots)
+
+    async def delete(self, conversation_ids: Iterable[str]):
+        for conversation_id in conversation_ids:
+            self.snapshots.pop(conversation_id, None)
+
+
+class DatabaseConversationStore(ConversationStore):
+    """Store backed by the Conversation model, using whatever DATABASES points at (SQLite or Postgres)."""
+
+    async def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await sync_to_async(self._load)(conversation_id)
+
+    async def save_many(self, snapshots: Dict[str, Dict[str, Any]]):
+        await sync_to_async(self._save_many)(snapshots)
+
+    async def delete(self, conversation_ids: Iterable[str]):
+        await sync_to_async(self._delete)(list(conversation_ids))
+
+    def _load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        from .models import Conversation
+
+        record = Conversation.objects.filter(conversation_id=conversation_id).only("snapshot").first()
+        return record.snapshot if record else None
+
+    def _save_many(self, snapshots: Dict[str, Dict[str, Any]]):
+        from .models import Conversation
+
+        Conversation.objects.bulk_create(
+            [Conversation(conversation_id=key, snapshot=value) for key, value in snapshots.items()],
+            update_conflicts=True,
+            unique_fields=["conversation_id"],
+            update_fields=["snapshot", "updated_at"],
+        )
+
+    def _delete(self, conversation_ids):
+        from .models import Conversation
+
+        Conversation.objects.filter(conversation_id__in=conversation_ids).delete()
+
+
+class BatchedConversationWriter:
+    """
+    Write-behind buffer in front of a ConversationStore.
+
+    Only the latest snapshot per conversation is kept; pending snapshots are
+    written together every `flush_interval` seconds, or immediately once
+    `max_batch` conversations are pending. Snapshots are keyed and stamped by
+    owner, and loads for any other owner come back empty.
+    """
+
+    def __init__(self, store: ConversationStore, flush_interval: float = 2.0, max_batch: int = 100):
+        """
+        Initialize the writer.
+
+        Args:
+            store: Backend to write to
+            flush_interval: Seconds between background flushes
+            max_batch: Number of pending conversations that forces an early flush
+        """
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def schedule(self, owner: str, conversation_id: str, snapshot: Dict[str, Any]):
+        """Queue a snapshot of an owner's conversation for the next batch write."""
+        self._pending[conversation_key(owner, conversation_id)] = {**snapshot, "owner": owner}
+        if len(self._pending) >= self.max_batch:
+            asyncio.ensure_future(self.flush())
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_periodically())
+
+    def pending(self, owner: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot that is queued but not yet written."""
+        return self._pending.get(conversation_key(owner, conversation_id))
+
+    async def load(self, owner: str, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load the most recent snapshot, preferring one still waiting to be written."""
+        snapshot = self.pending(owner, conversation_id)
+        if snapshot is None:
+            snapshot = await self.store.load(conversation_key(owner, conversation_id))
+        if snapshot is not None and snapshot.get("owner") != owner:
+            logger.warning(f"Refused to load conversation {conversation_id} for a different owner")
+            return None
+        return snapshot
+
+    async def discard(self, owner: str, conversation_ids: Iterable[str]):
+        """Drop an owner's pending snapshots and delete their stored ones."""
+        keys = [conversation_key(owner, conversation_id) for conversation_id in conversation_ids]
+        for key in keys:
+            self._pending.pop(key, None)
+        await self.store.delete(keys)
+
+    async def flush(self):
+        """Write every pending snapshot in one batch."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await self.store.save_many(batch)
+                logger.debug(f"Persisted {len(batch)} conversation snapshots")
+            except Exception as e:
+                logger.error(f"Failed to persist conversation snapshots: {e}")
+                # Keep newer snapshots queued meanwhile, retry the failed ones on the next flush
+                self._pending = {**batch, **self._pending}
+
+    async def _flush_periodically(self):
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+_conversation_writer: Optional[BatchedConversationWriter] = None
+
+
+def get_conversation_writer() -> BatchedConversationWriter:
+    """Get the process-wide conversation writer for the backend configured in settings."""
+    global _conversation_writer
+    if _conversation_writer is None:
+        store_class = import_string(getattr(settings, "CONVERSATION_STORE", DEFAULT_CONVERSATION_STORE))
+        _conversation_writer = BatchedConversationWriter(
+            store_class(), flush_interval=getattr(settings, "CONVERSATION_STORE_FLUSH_INTERVAL", 2.0)
+        )
+    return _conversation_writer
@@ -0,0 +1,313 @@
+"""
+Helpers for streaming generated documents to the frontend.
+"""
+
+import asyncio
+from contextlib import aclosing
+from dataclasses import dataclass
+from time import perf_counter
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+# Substantial (non-blank) lines per page before a page break is forced
+LINES_PER_PAGE = 30
+
+# Queued by coalesce_frames after the last delta
+_END_OF_STREAM = object()
+
+
+class DocumentBuffer:
+    """
+    Append-only buffer for a document being streamed chunk by chunk.
+
+    Appends are O(1); the full text is joined once on demand and cached until the
+    next append, so pagination and completion checks share the same text instead
+    of each rebuilding it.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self._text: Optional[str] = None
+
+    def append(self, chunk: str):
+        """Add a streamed chunk to the end of the document."""
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        self._text = None
+
+    def getvalue(self) -> str:
+        """Get the full document text."""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+            # Keep the joined text as the only chunk so later joins start from it
+            self._chunks = [self._text] if self._text else []
+        return self._text
+
+    def tail(self, size: int) -> str:
+        """
+        Get the last characters of the document without joining the whole text.
+
+        Args:
+            size: Maximum number of characters to return
+
+        Returns:
+            Up to `size` characters from the end of the document
+        """
+        if size <= 0:
+            return ""
+        if self._text is not None:
+            return self._text[-size:]
+
+        parts = []
+        remaining = size
+        for chunk in reversed(self._chunks):
+            if len(chunk) >= remaining:
+                parts.append(chunk[-remaining:])
+                break
+            parts.append(chunk)
+            remaining -= len(chunk)
+        return "".join(reversed(parts))
+
+    def clear(self):
+        """Drop all content."""
+        self._chunks = []
+        self._length = 0
+        self._text = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+
+class FrameCoalescer:
+    """
+    Coalesces streamed deltas into fewer WebSocket frames.
+
+    Buffered text is released as one frame once it reaches `max_chars`, or once the
+    oldest buffered delta has waited `max_latency` seconds. `add` only sees the age
+    when the next delta arrives; coalesce_frames also flushes when the stream stalls.
+    With both limits at 0 every delta becomes its own frame.
+    """
+
+    def __init__(self, max_chars: int = 512, max_latency: float = 0.016, clock: Callable[[], float] = perf_counter):
+        """
+        Initialize the coalescer.
+
+        Args:
+            max_chars: Flush once this many characters are buffered
+            max_latency: Flush once the oldest buffered delta is this many seconds old
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_chars = max_chars
+        self.max_latency = max_latency
+        self._clock = clock
+        self._parts: List[str] = []
+        self._size = 0
+        self._first_at = 0.0
+
+    def add(self, chunk: str) -> Optional[str]:
+        """
+        Buffer a delta.
+
+        Returns:
+            The coalesced frame text if the flush policy triggered, otherwise None
+        """
+        if not chunk:
+            return None
+        if not self._parts:
+            self._first_at = self._clock()
+        self._parts.append(chunk)
+        self._size += len(chunk)
+
+        if self._size >= self.max_chars or self._clock() - self._first_at >= self.max_latency:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Release whatever is buffered as a frame (None if empty)."""
+        if not self._parts:
+            return None
+        frame = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        return frame
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the buffered text is due to be flushed (None if nothing is buffered)."""
+        if not self._parts:
+            return None
+        return max(0.0, self._first_at + self.max_latency - self._clock())
+
+
+async def coalesce_frames(
+    chunks: AsyncGenerator[str, None], coalescer: FrameCoalescer, max_pending: int = 64
+) -> AsyncGenerator[str, None]:
+    """
+    Coalesce a stream of deltas into frames, flushing on time even when the stream stalls.
+
+    The stream is read by its own task (LLM streams hold task-bound context managers, so
+    every read has to come from the same task) into a bounded queue. While text is buffered
+    the next delta is awaited for at most the coalescer's remaining latency; if it has not
+    arrived by then the buffer is flushed and the wait continues.
+
+    Args:
+        chunks: Stream of text deltas; it is closed when this generator is
+        coalescer: Flush policy
+        max_pending: Deltas read ahead before the stream waits for frames to be sent
+
+    Yields:
+        Frame texts, ending with whatever was still buffered when the stream ended
+    """
+    queue: asyncio.Queue = asyncio.Queue(max_pending)
+
+    async def pump():
+        try:
+            async with aclosing(chunks) as stream:
+                async for chunk in stream:
+                    await queue.put(chunk)
+        except Exception:
+            await queue.put(_END_OF_STREAM)
+            raise
+        await queue.put(_END_OF_STREAM)
+
+    reader = asyncio.ensure_future(pump())
+    try:
+        while True:
+            try:
+                async with asyncio.timeout(coalescer.remaining()):
+                    chunk = await queue.get()
+            except TimeoutError:
+                frame = coalescer.flush()
+                if frame is not None:
+                    yield frame
+                continue
+            if chunk is _END_OF_STREAM:
+                break
+            frame = coalescer.add(chunk)
+            if frame is not None:
+                yield frame
+
+        # Raises whatever ended the stream early
+        await reader
+        frame = coalescer.flush()
+        if frame is not None:
+            yield frame
+    finally:
+        if not reader.done():
+            reader.cancel()
+            await asyncio.wait({reader})
+
+
+class LineAssembler:
+    """
+    Splits streamed chunks into complete lines.
+
+    The unfinished last line is kept as the pieces it arrived in and only joined once its
+    newline arrives, so work per chunk depends on the chunk alone, however long the line gets.
+    """
+
+    def __init__(self):
+        self._pieces: List[str] = []
+
+    def feed(self, chunk: str) -> List[str]:
+        """Get the lines a chunk completes; the text after its last newline is carried over."""
+        if "\n" not in chunk:
+            if chunk:
+                self._pieces.append(chunk)
+            return []
+        first, *lines = chunk.split("\n")
+        self._pieces.append(first)
+        lines.insert(0, "".join(self._pieces))
+        rest = lines.pop()
+        self._pieces = [rest] if rest else []
+        return lines
+
+    @property
+    def partial_line(self) -> str:
+        """The text after the last newline so far."""
+        if len(self._pieces) > 1:
+            self._pieces = ["".join(self._pieces)]
+        return self._pieces[0] if self._pieces else ""
+
+    def take_partial_line(self) -> str:
+        """Get the text after the last newline and forget it, at the end of the stream."""
+        line = self.partial_line
+        self._pieces = []
+        return line
+
+
+@dataclass(frozen=True)
+class PageBreak:
+    """A page starting at `offset` characters into the document."""
+
+    page: int
+    offset: int
+
+
+class StreamingPaginator:
+    """
+    Incremental paginator fed with streamed chunks.
+
+    Decides page breaks line by line as the text arrives, so pages are known while the
+    document streams instead of in a pass over the finished text. Work per chunk only
+    depends on the chunk (and the lines it completes), never on the document length.
+    A page breaks before:
+    - an H1 heading after 15 lines, or an H2 heading after 20 lines
+    - the line after LINES_PER_PAGE lines
+    - a line mentioning a signature after 10 lines
+    Only substantial (non-blank) lines count.
+    """
+
+    def __init__(self, lines_per_page: int = LINES_PER_PAGE):
+        self.lines_per_page = lines_per_page
+        self.breaks: List[PageBreak] = []
+        self._pending: List[PageBreak] = []
+        self._lines = LineAssembler()
+        self._line_start = 0  # document offset of the partial line
+        self._line_count = 0  # substantial lines on the current page
+
+    def feed(self, chunk: str):
+        """Scan a streamed chunk; only complete lines are paginated, the rest is carried over."""
+        for line in self._lines.feed(chunk):
+            self._paginate(line)
+            self._line_start += len(line) + 1
+
+    def finish(self):
+        """Paginate the last line of a finished document, which has no trailing newline."""
+        line = self._lines.take_partial_line()
+        if line:
+            self._paginate(line)
+            self._line_start += len(line)
+
+    def _paginate(self, line: str):
+        count = self._line_count
+        should_break = (
+            (line.startswith("# ") and count > 15)
+            or (line.startswith("## ") and count > 20)
+            or count >= self.lines_per_page
+            or ("signature" in line.lower() and count > 10)
+        )
+        if should_break:
+            page_break = PageBreak(page=len(self.breaks) + 2, offset=self._line_start)
+            self.breaks.append(page_break)
+            self._pending.append(page_break)
+            self._line_count = 0
+        if line.strip():
+            self._line_count += 1
+
+    def take_breaks(self) -> List[PageBreak]:
+        """Get the page breaks found since the last call."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    @property
+    def page_count(self) -> int:
+        return len(self.breaks) + 1
+
+    def metadata(self) -> Dict:
+        """Page count and the offset where each page after the first starts."""
+        return {"count": self.page_count, "breaks": [page_break.offset for page_break in self.breaks]}
@@ -0,0 +1,198 @@
+"""
+Test admission control for LLM calls: concurrency limits, priorities, queue positions.
+"""
+
+import asyncio
+from typing import List
+
+from pydantic_ai.models.function import FunctionModel
+
+from ..admission import GENERATION, INTERACTIVE, LLM_SCHEDULER, AdmissionScheduler, CallContext
+from ..consumers import DocumentAgentConsumer
+from ..llm import DocumentOrchestrator, RealLLM
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+
+
+class Call:
+    """A call holding a scheduler slot until released."""
+
+    def __init__(self, scheduler: AdmissionScheduler, name: str, user_id: str, priority: int = INTERACTIVE):
+        self.name = name
+        self.positions: List[int] = []
+        self.release = asyncio.Event()
+        self.admitted = asyncio.Event()
+        self.context = CallContext(user_id, priority, self.on_queued)
+        self.task = asyncio.create_task(self.run(scheduler))
+
+    async def on_queued(self, position: int):
+        self.positions.append(position)
+
+    async def run(self, scheduler: AdmissionScheduler):
+        async with scheduler.slot(self.context):
+            self.admitted.set()
+            await self.release.wait()
+
+    async def finish(self):
+        self.release.set()
+        await self.task
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_global_and_per_user_limits():
+    """No more than max_concurrent calls run, and one user cannot take more than max_per_user."""
+    scheduler = AdmissionScheduler(max_concurrent=3, max_per_user=2, interactive_reserved=0)
+    alice = [Call(scheduler, f"a{i}", "alice") for i in range(3)]
+    bob = [Call(scheduler, f"b{i}", "bob") for i in range(2)]
+    await settle()
+
+    assert [call.admitted.is_set() for call in alice] == [True, True, False]
+    assert [call.admitted.is_set() for call in bob] == [True, False]
+    assert scheduler.active == 3 and scheduler.stats()["waiting"] == 2
+
+    # Bob's slot frees up: alice is still at her limit, so bob's second call goes first
+    await bob[0].finish()
+    await settle()
+    assert bob[1].admitted.is_set() and not alice[2].admitted.is_set()
+
+    await alice[0].finish()
+    await settle()
+    assert alice[2].admitted.is_set()
+    for call in alice[1:] + bob[1:]:
+        await call.finish()
+    assert scheduler.active == 0 and scheduler.active_by_user == {}
+    print(f"Limits held: {scheduler.stats()}")
+
+
+async def test_interactive_calls_jump_the_queue():
+    """A waiting interactive call is admitted before generation calls that queued earlier."""
+    scheduler = AdmissionScheduler(max_concurrent=1, max_per_user=5, interactive_reserved=0)
+    running = Call(scheduler, "running", "u1", GENERATION)
+    await settle()
+    generations = [Call(scheduler, f"g{i}", f"u{i + 2}", GENERATION) for i in range(2)]
+    await settle()
+    question = Call(scheduler, "question", "u9", INTERACTIVE)
+    await settle()
+
+    assert question.positions == [1] and generations[1].positions == [2]
+
+    await running.finish()
+    await settle()
+    assert question.admitted.is_set() and not generations[0].admitted.is_set()
+    assert question.positions == [1, 0]
+
+    await question.finish()
+    for call in generations:
+        await settle()
+        await call.finish()
+    stats = scheduler.stats()
+    assert stats["queued_interactive"] == 1 and stats["queued_generation"] == 2
+    print(f"Interactive call admitted first: {stats}")
+
+
+async def test_reserved_slots_are_interactive_only():
+    """Generation calls leave the reserved slots free for questions and field mapping."""
+    scheduler = AdmissionScheduler(max_concurrent=3, max_per_user=5, interactive_reserved=1)
+    generations = [Call(scheduler, f"g{i}", f"u{i}", GENERATION) for i in range(3)]
+    await settle()
+    assert [call.admitted.is_set() for call in generations] == [True, True, False]
+
+    question = Call(scheduler, "question", "u9", INTERACTIVE)
+    await settle()
+    assert question.admitted.is_set() and question.positions == []
+    for call in [question] + generations:
+        call.release.set()
+    await asyncio.gather(*(call.task for call in [question] + generations))
+    print("Reserved slot went to the interactive call")
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    """Cancelling a waiting call removes it from the queue and lets the next one move up."""
+    scheduler = AdmissionScheduler(max_concurrent=1, max_per_user=5, interactive_reserved=0)
+    running = Call(scheduler, "running", "u1")
+    await settle()
+    first, second = Call(scheduler, "first", "u2"), Call(scheduler, "second", "u3")
+    await settle()
+    assert second.positions == [2]
+
+    first.task.cancel()
+    await asyncio.gather(first.task, return_exceptions=True)
+    assert scheduler.stats()["waiting"] == 1
+    await asyncio.sleep(0.6)
+    assert second.positions[-1] == 1, "Position updates are sent as the queue moves"
+
+    await running.finish()
+    await settle()
+    assert second.admitted.is_set()
+    await second.finish()
+    assert scheduler.active == 0 and scheduler.waiting == []
+    print(f"Cancelled waiter removed, positions seen by the next: {second.positions}")
+
+
+async def test_consumer_sends_queue_position():
+    """A generation waiting for a slot tells the client its queue position over the socket."""
+
+    async def stream(messages, agent_info):
+        yield "# LOAN AGREEMENT\n\nAlice lends Bob $500.\n\nEND OF LOAN AGREEMENT\n"
+
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+
+    consumer = DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.user_id = "alice"
+    consumer.orchestrators = {}
+    consumer.generation_tasks = {}
+    consumer.remote_generations = set()
+    consumer.conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    consumer.current_conversation_id = "conv-1"
+    consumer.sent: List[dict] = []
+
+    async def send_json(content, close=False):
+        consumer.sent.append(content)
+
+    consumer.send_json = send_json
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice"}
+    orchestrator.state = "generating"
+    consumer.orchestrators["conv-1"] = orchestrator
+
+    limits = LLM_SCHEDULER.max_concurrent, LLM_SCHEDULER.interactive_reserved
+    LLM_SCHEDULER.max_concurrent, LLM_SCHEDULER.interactive_reserved = 2, 1
+    try:
+        other = Call(LLM_SCHEDULER, "other", "bob", GENERATION)
+        await settle()
+        await consumer.start_generation()
+        task = consumer.generation_tasks["conv-1"]
+        await asyncio.sleep(0.1)
+        queued = [frame for frame in consumer.sent if frame["type"] == "queue_position"]
+        assert queued == [
+            {
+                "type": "queue_position",
+                "conversation_id": "conv-1",
+                "position": 1,
+                "content": "You're in queue, position 1",
+            }
+        ]
+
+        await other.finish()
+        await task
+    finally:
+        LLM_SCHEDULER.max_concurrent, LLM_SCHEDULER.interactive_reserved = limits
+
+    positions = [frame["position"] for frame in consumer.sent if frame["type"] == "queue_position"]
+    assert positions[:2] == [1, 0]
+    assert any(frame["type"] == "generation_complete" for frame in consumer.sent)
+    print(f"Queue frames sent: {positions}")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_global_and_per_user_limits())
+    asyncio.run(test_interactive_calls_jump_the_queue())
+    asyncio.run(test_reserved_slots_are_interactive_only())
+    asyncio.run(test_cancelled_waiter_leaves_the_queue())
+    asyncio.run(test_consumer_sends_queue_position())
+    print("\nAll admission tests completed successfully!")
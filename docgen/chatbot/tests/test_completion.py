@@ -0,0 +1,163 @@
+"""
+Test the local streaming completion detector and when the LLM checker is still consulted.
+"""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+from ..completion import COMPLETE, INCOMPLETE, UNCERTAIN, CompletionDetector
+from ..consumers import DocumentAgentConsumer
+from ..llm import DocumentOrchestrator, RealLLM
+from ..schemas import DocumentContext
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+
+SIGNED = """# LOAN AGREEMENT
+
+1. The Lender lends the Borrower $500.
+
+IN WITNESS WHEREOF, the parties have executed this Agreement as of the date first written above.
+
+LENDER:
+___________________________
+Name: Alice Smith
+Date: ______________
+
+BORROWER:
+___________________________
+Name: Bob Jones
+Date: ______________"""
+
+END_MARKER = "## 9. ENTIRE AGREEMENT\n\nThis Agreement is the entire agreement.\n\nEND OF LOAN AGREEMENT\n"
+CUT_MID_SENTENCE = "## 4. REPAYMENT\n\nThe Borrower shall repay the loan in twelve monthly"
+CUT_AFTER_HEADING = "The Borrower shall repay the loan monthly.\n\n## 5. INTEREST\n"
+GOVERNING_LAW = "This Agreement shall be governed by the laws of the State of California."
+EXECUTION = "## 12. ENTIRE AGREEMENT\n\nThis is the entire agreement.\n\nIN WITNESS WHEREOF, the parties sign below.\n\n"
+
+
+def detect(text: str, chunk_size: int = 7) -> str:
+    """Feed text in small chunks, as a stream would, and return the verdict."""
+    detector = CompletionDetector()
+    for start in range(0, len(text), chunk_size):
+        detector.feed(text[start : start + chunk_size])
+    return detector.verdict()
+
+
+class ScriptedLLM(RealLLM):
+    """LLM stub streaming a fixed document and counting completeness checks."""
+
+    def __init__(self, document: str, verify_error: Exception = None):
+        super().__init__("test")
+        self.document = document
+        self.verify_error = verify_error
+        self.verify_calls = 0
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        for start in range(0, len(self.document), 20):
+            yield self.document[start : start + 20]
+
+    async def verify_doc(self, text: str) -> bool:
+        self.verify_calls += 1
+        if self.verify_error is not None:
+            raise self.verify_error
+        return True
+
+
+async def run_generation(document: str, verify_error: Exception = None) -> tuple:
+    llm = ScriptedLLM(document, verify_error)
+    consumer = DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.orchestrators = {}
+    consumer.generation_tasks = {}
+    consumer.remote_generations = {}
+    consumer.conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    consumer.current_conversation_id = "conv-1"
+    consumer.sent: List[dict] = []
+    verify_calls_at_completion = []
+
+    async def send_json(content, close=False):
+        if content["type"] == "generation_complete":
+            verify_calls_at_completion.append(llm.verify_calls)
+        consumer.sent.append(content)
+
+    consumer.send_json = send_json
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice"}
+    orchestrator.state = "generating"
+    consumer.orchestrators["conv-1"] = orchestrator
+
+    await consumer.stream_document("conv-1")
+    llm.consumer_frames = consumer.sent
+    return llm, verify_calls_at_completion
+
+
+def test_verdicts():
+    """Execution blocks and END OF markers are complete; only structural cut-offs are incomplete."""
+    assert detect(SIGNED) == COMPLETE
+    assert detect(END_MARKER) == COMPLETE
+    assert detect(CUT_AFTER_HEADING) == INCOMPLETE
+    assert detect("```\ncode block left open\n") == INCOMPLETE
+    assert detect(GOVERNING_LAW) == UNCERTAIN
+    assert detect(CUT_MID_SENTENCE) == UNCERTAIN, "A missing full stop is left to the LLM check"
+    print("Verdicts match for signed, marked, cut-off and ambiguous documents")
+
+
+def test_finished_endings_are_not_incomplete():
+    """Common ways a finished document ends are never judged cut off."""
+    endings = {
+        "trailing rule": SIGNED + "\n\n---\n",
+        "page break marker": SIGNED + "\n---PAGE_BREAK---\n",
+        "signed by lines": EXECUTION + "Signed by the Landlord\n\nSigned by the Tenant",
+        "printed names under bold labels": EXECUTION + "**Landlord**\nJohn Smith\n\n**Tenant**\nJane Doe",
+        "blank lines to sign on": EXECUTION + "Landlord: ____\nTenant: ____",
+    }
+    for name, document in endings.items():
+        assert detect(document) == COMPLETE, name
+    assert detect("The Landlord shall maintain the premises.\n\n**Tenant**\nJane Doe") == UNCERTAIN
+    print(f"{len(endings)} finished endings judged complete")
+
+
+def test_chunk_boundaries_do_not_matter():
+    """The verdict is the same however the stream is split, and verdict() does not consume the stream."""
+    for chunk_size in (1, 3, 64, len(SIGNED)):
+        assert detect(SIGNED, chunk_size) == COMPLETE
+
+    detector = CompletionDetector()
+    detector.feed("IN WITNESS WHEREOF, the parties sign.\nName: Alice\nDa")
+    assert detector.verdict() == UNCERTAIN
+    detector.feed("te: ______\n")
+    assert detector.verdict() == COMPLETE
+    print("Chunking-independent verdicts")
+
+
+async def test_completion_sent_without_llm_check():
+    """A clearly complete document is finished without calling verify_doc."""
+    llm, calls_at_completion = await run_generation(SIGNED)
+    assert calls_at_completion == [0] and llm.verify_calls == 0
+    print("Complete document: no LLM completeness check")
+
+
+async def test_uncertain_escalates_before_completion():
+    """Ambiguous endings reach the LLM checker while generating, so its answer can still continue the document."""
+    llm, calls_at_completion = await run_generation(GOVERNING_LAW)
+    assert calls_at_completion == [1] and llm.verify_calls == 1
+    print("Uncertain document: LLM check ran before completion was sent")
+
+
+async def test_failed_llm_check_keeps_the_document():
+    """A failing LLM check is logged; the user is not told generation failed."""
+    llm, calls_at_completion = await run_generation(GOVERNING_LAW, verify_error=RuntimeError("checker down"))
+    assert calls_at_completion == [1] and llm.verify_calls == 1
+    assert not any("failed" in frame.get("content", "") for frame in llm.consumer_frames)
+    print("Failed LLM check: document kept and completion sent")
+
+
+if __name__ == "__main__":
+    test_verdicts()
+    test_finished_endings_are_not_incomplete()
+    test_chunk_boundaries_do_not_matter()
+    asyncio.run(test_completion_sent_without_llm_check())
+    asyncio.run(test_uncertain_escalates_before_completion())
+    asyncio.run(test_failed_llm_check_keeps_the_document())
+    print("\nAll completion detection tests completed successfully!")
@@ -0,0 +1,194 @@
+"""
+Test checkpoint-and-resume document generation: truncated runs are continued, not regenerated.
+"""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+from pydantic_ai.models.function import FunctionModel
+
+from ..continuation import DocumentCheckpoint, OverlapTrimmer
+from ..llm import DocumentOrchestrator, RealLLM
+from ..schemas import DocumentContext
+
+FIRST_PART = (
+    "# LOAN AGREEMENT\n\n## 1. PARTIES\n\nAlice lends Bob $500.\n\n"
+    "## 2. REPAYMENT\n\nBob shall repay the loan in twelve"
+)
+REPEATED = "## 2. REPAYMENT\n\nBob shall repay the loan in twelve"
+REST = (
+    " monthly installments.\n\nIN WITNESS WHEREOF, the parties sign below.\n\n"
+    "LENDER:\nName: Alice\nDate: ______\n\nBORROWER:\nName: Bob\nDate: ______"
+)
+
+
+def chunks(text: str, size: int = 9) -> List[str]:
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+class TruncatingLLM(RealLLM):
+    """LLM stub whose first run hits the output token limit; continuations repeat the tail first."""
+
+    def __init__(self):
+        super().__init__("test")
+        self.checkpoints: List[DocumentCheckpoint] = []
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        if checkpoint is None:
+            text, run.finish_reason, run.output_tokens = FIRST_PART, "length", 100
+        else:
+            self.checkpoints.append(checkpoint)
+            text, run.finish_reason, run.output_tokens = REPEATED + REST, "stop", 40
+        for chunk in chunks(text):
+            yield chunk
+
+
+def make_orchestrator(llm: RealLLM) -> DocumentOrchestrator:
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice", "borrower_name": "Bob"}
+    orchestrator.document_type = "Loan Agreement"
+    orchestrator.state = "generating"
+    return orchestrator
+
+
+def test_overlap_trimmer():
+    """A continuation that restarts the last sentence is trimmed; a clean one passes through unchanged."""
+    trimmer = OverlapTrimmer(FIRST_PART, window=64)
+    streamed = "".join(trimmer.feed(chunk) for chunk in chunks(REPEATED + REST)) + trimmer.flush()
+    assert streamed == REST and trimmer.trimmed == len(REPEATED)
+
+    trimmer = OverlapTrimmer(FIRST_PART, window=64)
+    streamed = "".join(trimmer.feed(chunk) for chunk in chunks(REST)) + trimmer.flush()
+    assert streamed == REST and trimmer.trimmed == 0
+    print("Overlap trimmed only when the continuation repeats the tail")
+
+
+async def test_truncated_run_is_continued():
+    """Hitting max_tokens resumes from the checkpoint and splices the continuation without duplicates."""
+    llm = TruncatingLLM()
+    orchestrator = make_orchestrator(llm)
+
+    streamed = [chunk async for chunk in orchestrator.generate_document()]
+
+    assert "".join(streamed) == FIRST_PART + REST == orchestrator.document.getvalue()
+    checkpoint = llm.checkpoints[0]
+    assert checkpoint.offset == len(FIRST_PART) and checkpoint.tail.endswith("in twelve")
+    assert checkpoint.outline == ["# LOAN AGREEMENT", "## 1. PARTIES", "## 2. REPAYMENT"]
+    assert orchestrator.usage.to_dict() == {"runs": 2, "continuations": 1, "input_tokens": 0, "output_tokens": 140}
+    print(f"Continued after max_tokens, usage {orchestrator.usage.to_dict()}")
+
+
+async def test_stream_error_is_resumed():
+    """A provider stream that breaks mid-document is resumed through the real RealLLM streaming path."""
+    calls = []
+
+    async def stream(messages, agent_info):
+        calls.append(messages)
+        if len(calls) == 1:
+            for chunk in chunks(FIRST_PART):
+                yield chunk
+            raise ConnectionError("stream reset by peer")
+        for chunk in chunks(REST):
+            yield chunk
+
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+    orchestrator = make_orchestrator(llm)
+
+    document = "".join([chunk async for chunk in orchestrator.generate_document()])
+
+    assert document == FIRST_PART + REST
+    assert len(calls) == 2 and "in twelve" in str(calls[1][-1]), "Continuation prompt carries the tail"
+    usage = orchestrator.usage.to_dict()
+    assert usage["runs"] == 2 and usage["continuations"] == 1 and usage["output_tokens"] > 0
+    print(f"Resumed after stream error, usage {usage}")
+
+
+class ScriptedRunsLLM(RealLLM):
+    """LLM stub streaming one scripted text per run, each ending normally."""
+
+    def __init__(self, *texts: str, complete: bool = True):
+        super().__init__("test")
+        self.texts = list(texts)
+        self.complete = complete
+        self.runs = 0
+        self.verify_calls = 0
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        text = self.texts[min(self.runs, len(self.texts) - 1)]
+        self.runs += 1
+        run.finish_reason = "stop"
+        for chunk in chunks(text):
+            yield chunk
+
+    async def verify_doc(self, text: str) -> bool:
+        self.verify_calls += 1
+        return self.complete
+
+
+async def test_only_certain_cut_offs_are_continued():
+    """A finished run with an unpunctuated ending is kept as is; a trailing heading is still continued."""
+    finished = FIRST_PART.replace(" in twelve", " monthly.") + (
+        "\n\nIN WITNESS WHEREOF, the parties sign below.\n\n**Lender**\nAlice Smith\n\n**Borrower**\nBob Jones"
+    )
+    unpunctuated = "# LOAN AGREEMENT\n\nAlice lends Bob $500.\n\nGoverned by the laws of Ohio"
+    for document in (finished, unpunctuated):
+        llm = ScriptedRunsLLM(document)
+        orchestrator = make_orchestrator(llm)
+        streamed = "".join([chunk async for chunk in orchestrator.generate_document()])
+        assert streamed == document and llm.runs == 1
+        assert orchestrator.usage.to_dict()["continuations"] == 0
+
+    heading_only = "# LOAN AGREEMENT\n\n## 1. PARTIES\n\nAlice lends Bob $500.\n\n## 2. REPAYMENT\n"
+    llm = ScriptedRunsLLM(heading_only, "\nBob repays in twelve monthly installments.\n\nEND OF LOAN AGREEMENT\n")
+    orchestrator = make_orchestrator(llm)
+    [chunk async for chunk in orchestrator.generate_document()]
+    assert llm.runs == 2 and orchestrator.usage.to_dict()["continuations"] == 1 and llm.verify_calls == 0
+    print("Continued only the document that ended on a heading")
+
+
+async def test_llm_checker_decides_uncertain_endings():
+    """An ending the detector is unsure of is continued only when the LLM checker judges it incomplete."""
+    unpunctuated = "# LOAN AGREEMENT\n\nAlice lends Bob $500.\n\nGoverned by the laws of Ohio"
+    rest = ".\n\nEND OF LOAN AGREEMENT\n"
+    for complete, runs in ((True, 1), (False, 2)):
+        llm = ScriptedRunsLLM(unpunctuated, rest, complete=complete)
+        orchestrator = make_orchestrator(llm)
+        streamed = "".join([chunk async for chunk in orchestrator.generate_document()])
+        assert llm.runs == runs and llm.verify_calls == 1, complete
+        assert streamed == unpunctuated + (rest if runs == 2 else "")
+    print("Uncertain ending continued only when the LLM checker said so")
+
+
+async def test_recovery_resumes_persisted_document():
+    """Continuing an interrupted conversation only generates what is missing."""
+    interrupted = make_orchestrator(RealLLM("test"))
+    interrupted.document.append(FIRST_PART)
+    snapshot = interrupted.to_snapshot()
+    assert snapshot["checkpoint"]["offset"] == len(FIRST_PART)
+
+    llm = TruncatingLLM()
+    restored = DocumentOrchestrator.from_snapshot(snapshot, llm)
+    assert restored.state == "interrupted"
+    restored.state = "generating"
+
+    streamed = "".join([chunk async for chunk in restored.generate_document(recovery=True)])
+
+    assert streamed == REST, "Only the continuation is streamed"
+    assert restored.document.getvalue() == FIRST_PART + REST
+    assert llm.checkpoints[0].outline[-1] == "## 2. REPAYMENT"
+    print("Recovery resumed from the persisted checkpoint")
+
+
+if __name__ == "__main__":
+    test_overlap_trimmer()
+    asyncio.run(test_truncated_run_is_continued())
+    asyncio.run(test_stream_error_is_resumed())
+    asyncio.run(test_only_certain_cut_offs_are_continued())
+    asyncio.run(test_llm_checker_decides_uncertain_endings())
+    asyncio.run(test_recovery_resumes_persisted_document())
+    print("\nAll continuation tests completed successfully!")
@@ -0,0 +1,138 @@
+"""
+Test conversation persistence: snapshots, batched writes and lazy rehydration.
+"""
+
+import asyncio
+from typing import Dict
+
+from ..consumers import DocumentAgentConsumer
+from ..llm import DocumentOrchestrator, RealLLM
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+
+
+class CountingStore(InMemoryConversationStore):
+    """In-memory store that counts batch writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = 0
+
+    async def save_many(self, snapshots: Dict[str, Dict]):
+        self.batches += 1
+        await super().save_many(snapshots)
+
+
+def make_consumer(writer: BatchedConversationWriter) -> DocumentAgentConsumer:
+    """Build a consumer with a fake socket and the given writer."""
+    consumer = DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.orchestrators = {}
+    consumer.generation_tasks = {}
+    consumer.remote_generations = set()
+    consumer.current_conversation_id = None
+    consumer.conversation_writer = writer
+    consumer.user_id = "user-1"
+    consumer.owner = "user:1"
+    consumer.sent = []
+
+    async def send_json(content, close=False):
+        consumer.sent.append(content)
+
+    consumer.send_json = send_json
+    return consumer
+
+
+def test_snapshot_round_trip():
+    """An orchestrator rebuilt from its snapshot has the same conversation state."""
+    llm = RealLLM("test")
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"tenant_name": "Jane", "monthly_rent": None}
+    orchestrator.state = "generating"
+    orchestrator.document_type = "Rental Agreement"
+    orchestrator.user_goal = "I need a lease"
+    orchestrator.user_greeted = True
+    orchestrator._record_action("User saved tenant_name as 'Jane'")
+    orchestrator.document.append("# RENTAL AGREEMENT\n")
+
+    restored = DocumentOrchestrator.from_snapshot(orchestrator.to_snapshot(), llm)
+
+    assert restored.fields == orchestrator.fields
+    assert restored.document_type == "Rental Agreement" and restored.user_goal == "I need a lease"
+    assert restored.user_greeted and list(restored.recent_actions) == list(orchestrator.recent_actions)
+    assert restored.document.getvalue() == "# RENTAL AGREEMENT\n"
+    assert restored.state == "interrupted", "A running generation cannot resume mid-stream"
+    print("Snapshot round trip preserves conversation state")
+
+
+async def test_writes_are_batched():
+    """Many snapshot updates collapse into one write per flush."""
+    store = CountingStore()
+    writer = BatchedConversationWriter(store, flush_interval=0.05)
+
+    for turn in range(20):
+        for conversation in range(10):
+            writer.schedule("user:1", f"conv-{conversation}", {"turn": turn})
+
+    assert store.batches == 0, "Nothing should be written on the hot path"
+    assert (await writer.load("user:1", "conv-3"))["turn"] == 19, "Pending snapshots are visible before flushing"
+    await asyncio.sleep(0.1)
+
+    assert store.batches == 1
+    assert store.snapshots["user:1/conv-3"] == {"turn": 19, "owner": "user:1"}
+    print(f"20 turns x 10 conversations written in {store.batches} batch")
+
+
+async def test_reconnect_rehydrates_conversation():
+    """A new socket lazily picks up the fields collected on a previous one."""
+    writer = BatchedConversationWriter(InMemoryConversationStore(), flush_interval=60)
+    llm = RealLLM("test")
+
+    first = make_consumer(writer)
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"landlord_name": "Bob", "tenant_name": None}
+    orchestrator.state = "collecting"
+    first.orchestrators["conv-1"] = orchestrator
+    await first.disconnect(1001)
+
+    second = make_consumer(writer)
+    assert "conv-1" not in second.orchestrators
+    restored = await second.load_orchestrator("conv-1")
+    assert restored.fields == {"landlord_name": "Bob", "tenant_name": None}
+    assert restored.state == "collecting"
+
+    await second.conversation_writer.discard(second.owner, ["conv-1"])
+    assert await writer.load("user:1", "conv-1") is None
+    print("Reconnect rehydrates collected fields")
+
+
+async def test_conversations_are_owner_scoped():
+    """A socket that knows another owner's conversation_id can neither load nor delete it."""
+    store = InMemoryConversationStore()
+    writer = BatchedConversationWriter(store, flush_interval=60)
+    owner = make_consumer(writer)
+    orchestrator = DocumentOrchestrator(RealLLM("test"))
+    orchestrator.fields = {"tenant_name": "Jane"}
+    owner.orchestrators["conversation-1700000000000"] = orchestrator
+    await owner.disconnect(1001)
+
+    intruder = make_consumer(writer)
+    intruder.owner = "session:intruder"
+    stolen = await intruder.load_orchestrator("conversation-1700000000000")
+    assert stolen.fields == {}, "Another owner's fields must not load"
+
+    await intruder.receive_json({"type": "reset_all_sessions", "conversation_id": "conversation-1700000000000"})
+    restored = await make_consumer(writer).load_orchestrator("conversation-1700000000000")
+    assert restored.fields == {"tenant_name": "Jane"}, "Another owner's reset must not delete the conversation"
+
+    # A snapshot stored under the right key but stamped with another owner is refused too
+    store.snapshots["session:intruder/forged"] = {"owner": "user:1", "fields": {"tenant_name": "Jane"}}
+    assert await writer.load("session:intruder", "forged") is None
+    print("Conversations load and reset only for their owner")
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    asyncio.run(test_writes_are_batched())
+    asyncio.run(test_reconnect_rehydrates_conversation())
+    asyncio.run(test_conversations_are_owner_scoped())
+    print("\nAll conversation store tests completed successfully!")
@@ -0,0 +1,183 @@
+"""
+Test the generated document cache: canonical keys, size-bounded disk eviction, replay and invalidation.
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+import threading
+from dataclasses import replace
+from time import perf_counter
+
+import django
+from pydantic_ai.models.function import FunctionModel
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docgen.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from .. import cache as cache_module  # noqa: E402
+from ..cache import DiskCacheBackend, DocumentCache, InMemoryCacheBackend, invalidate_documents  # noqa: E402
+from ..llm import DocumentOrchestrator, RealLLM  # noqa: E402
+from ..resilience import CIRCUIT_BREAKERS, RetryPolicy  # noqa: E402
+from ..schemas import DocumentContext  # noqa: E402
+from .test_streaming import LONG_DOCUMENT, judge_complete  # noqa: E402
+
+CONTEXT = DocumentContext(
+    fields={"lender_name": "Alice", "borrower_name": "Bob"}, document_type="Loan Agreement", user_goal="a loan"
+)
+
+
+def make_orchestrator(llm: RealLLM) -> DocumentOrchestrator:
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = dict(CONTEXT.fields)
+    orchestrator.document_type = CONTEXT.document_type
+    orchestrator.user_goal = CONTEXT.user_goal
+    orchestrator.state = "generating"
+    return orchestrator
+
+
+def test_canonical_key():
+    """Field order does not matter; every other part of the request does."""
+    cache = DocumentCache(InMemoryCacheBackend(), namespace="model:v1")
+    reordered = DocumentContext(
+        fields={"borrower_name": "Bob", "lender_name": "Alice"}, document_type="Loan Agreement", user_goal="a loan"
+    )
+    assert cache.key(CONTEXT) == cache.key(reordered)
+    assert cache.key(CONTEXT) != cache.key(replace(CONTEXT, user_goal="a bigger loan"))
+    assert cache.key(CONTEXT) != cache.key(replace(CONTEXT, fields={"lender_name": "Alice"}))
+    assert cache.key(CONTEXT) != DocumentCache(InMemoryCacheBackend(), namespace="model:v2").key(CONTEXT)
+    print(f"Canonical key: {cache.key(CONTEXT)[:16]}...")
+
+
+def test_disk_eviction_and_invalidation():
+    """The disk cache stays under its byte budget and can be invalidated per document type."""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = DiskCacheBackend(directory, max_entries=100, max_bytes=5000)
+        cache = DocumentCache(backend)
+        for index in range(5):
+            context = replace(CONTEXT, user_goal=f"loan {index}")
+            cache.set(context, "x" * 1500)
+            os.utime(backend._path(cache.key(context)), (1000 + index, 1000 + index))
+        assert backend.size() <= 5000 and len(backend) == 3 and backend.evictions == 2
+        assert cache.get(replace(CONTEXT, user_goal="loan 0")) is None, "Oldest evicted"
+        assert cache.get(replace(CONTEXT, user_goal="loan 4")) == "x" * 1500
+
+        cache.set(replace(CONTEXT, document_type="Lease Agreement"), "lease")
+        assert cache.invalidate("Loan Agreement") == 3
+        assert len(backend) == 1 and cache.invalidate() == 1 and len(backend) == 0
+    print("Disk cache: bounded by bytes, invalidated by type")
+
+
+async def test_disk_cache_stays_off_the_event_loop():
+    """Async lookups run in a thread, writes do not rescan the directory, and concurrent removal is tolerated."""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = DiskCacheBackend(directory, max_entries=5)
+        cache = DocumentCache(backend)
+        threads = []
+        get = backend.get
+
+        def recording_get(key):
+            threads.append(threading.get_ident())
+            return get(key)
+
+        backend.get = recording_get
+        listdir = os.listdir
+        listings = []
+        os.listdir = lambda path: listings.append(path) or listdir(path)
+        try:
+            for index in range(20):
+                await cache.aset(replace(CONTEXT, user_goal=f"loan {index}"), "x" * 100)
+            assert await cache.aget(replace(CONTEXT, user_goal="loan 19")) == "x" * 100
+        finally:
+            os.listdir = listdir
+        assert threads and threading.get_ident() not in threads, "Disk reads must not run on the event loop"
+        assert listings == [], "Writes evict from the index instead of listing the directory"
+        files = [os.path.join(directory, name) for name in os.listdir(directory)]
+        assert len(backend) == 5 == len(files) and backend.size() == sum(os.path.getsize(path) for path in files)
+
+        # Another process evicting an entry between the read and the recency bump is not an error
+        path = backend._path(cache.key(replace(CONTEXT, user_goal="loan 19")))
+        os.remove(path)
+        assert backend._touch(path, 0) is False
+        assert await cache.aget(replace(CONTEXT, user_goal="loan 19")) is None
+    print(f"Disk cache: {len(threads)} lookups off the loop, no directory rescans on 20 writes")
+
+
+async def test_replay_through_orchestrator():
+    """An identical request replays the cached document, paced, without calling the model."""
+    calls = []
+
+    async def stream(messages, agent_info):
+        calls.append(1)
+        yield LONG_DOCUMENT
+
+    llm = judge_complete(RealLLM("test"))
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+    llm.document_cache = DocumentCache(InMemoryCacheBackend(), replay_chars=100, replay_interval=0.01)
+
+    first = make_orchestrator(llm)
+    generated = "".join([chunk async for chunk in first.generate_document()])
+    assert generated == LONG_DOCUMENT and calls == [1]
+
+    second = make_orchestrator(llm)
+    started = perf_counter()
+    replayed = [chunk async for chunk in second.generate_document()]
+    elapsed = perf_counter() - started
+    assert "".join(replayed) == LONG_DOCUMENT and calls == [1]
+    assert len(replayed) == -(-len(LONG_DOCUMENT) // 100) and elapsed >= 0.01 * (len(replayed) - 1)
+    assert second.pagination.metadata() == first.pagination.metadata()
+    assert second.document.getvalue() == LONG_DOCUMENT
+
+    changed = make_orchestrator(llm)
+    changed.fields["borrower_name"] = "Carol"
+    [chunk async for chunk in changed.generate_document()]
+    assert calls == [1, 1]
+    assert llm.document_cache.stats()["hits"] == 1 and llm.document_cache.stats()["entries"] == 2
+    print(f"Replayed {len(replayed)} chunks in {elapsed * 1000:.0f} ms, {llm.document_cache.stats()}")
+
+
+async def test_fallback_documents_are_not_cached():
+    """A document from the fallback template is not stored."""
+    CIRCUIT_BREAKERS.clear()
+
+    async def failing(messages, agent_info):
+        raise ConnectionError("provider down")
+        yield ""
+
+    llm = RealLLM("test")
+    llm.retry_policy = RetryPolicy(attempts=1, base_delay=0.001, max_delay=0.002, timeout=1.0)
+    llm.generation_agent.model = FunctionModel(stream_function=failing)
+    llm.document_cache = DocumentCache(InMemoryCacheBackend(), replay_interval=0)
+
+    [chunk async for chunk in make_orchestrator(llm).generate_document()]
+    assert len(llm.document_cache.backend) == 0
+    CIRCUIT_BREAKERS.clear()
+    print("Fallback document not cached")
+
+
+def test_clear_command():
+    """clear_document_cache drops documents of every namespace."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache_module._document_backend = DiskCacheBackend(directory)
+        DocumentCache(cache_module._document_backend, namespace="a").set(CONTEXT, "one")
+        DocumentCache(cache_module._document_backend, namespace="b").set(CONTEXT, "two")
+
+        output = io.StringIO()
+        call_command("clear_document_cache", "--document-type", "Loan Agreement", stdout=output)
+        assert "Dropped 2 cached documents" in output.getvalue()
+        assert invalidate_documents() == 0
+        cache_module._document_backend = None
+    print(output.getvalue().strip())
+
+
+if __name__ == "__main__":
+    test_canonical_key()
+    test_disk_eviction_and_invalidation()
+    asyncio.run(test_disk_cache_stays_off_the_event_loop())
+    asyncio.run(test_replay_through_orchestrator())
+    asyncio.run(test_fallback_documents_are_not_cached())
+    test_clear_command()
+    print("\nAll document cache tests completed successfully!")
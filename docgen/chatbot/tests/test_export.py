@@ -0,0 +1,166 @@
+"""
+Test server-side document export: rendering, ETags, the render cache and the export view.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docgen.settings")
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from .. import store, views  # noqa: E402
+from ..export import DocumentExporter, ExportCache, RenderedExport, export_etag, render_html  # noqa: E402
+from ..metrics import EXPORT_RENDER  # noqa: E402
+from ..store import BatchedConversationWriter, InMemoryConversationStore  # noqa: E402
+from .test_streaming import LONG_DOCUMENT  # noqa: E402
+
+DOCUMENT = "# LOAN AGREEMENT\n\n## 1. Parties\n\nAlice <script>alert(1)</script> lends to Bob.\n"
+
+
+def test_render_html():
+    """Markdown becomes escaped HTML, with a CSS page break wherever the paginator breaks pages."""
+    page = render_html(DOCUMENT, "Loan Agreement")
+    assert "<h1>LOAN AGREEMENT</h1>" in page and "<title>Loan Agreement</title>" in page
+    assert "<script>" not in page and "&lt;script&gt;" in page
+    assert "page-break" not in page.split("<body>")[1]
+
+    long_page = render_html(LONG_DOCUMENT, "Loan Agreement")
+    breaks = long_page.count('class="page-break"')
+    assert breaks >= 1
+    print(f"HTML export: {len(long_page)} bytes, {breaks + 1} pages")
+
+
+def test_etag_and_cache_eviction():
+    """ETags follow the content; the cache stays within its byte budget, dropping the least recently used."""
+    etag = export_etag("html", DOCUMENT, "Loan Agreement")
+    assert etag == export_etag("html", DOCUMENT, "Loan Agreement")
+    assert etag != export_etag("pdf", DOCUMENT, "Loan Agreement")
+    assert etag != export_etag("html", DOCUMENT + "\n", "Loan Agreement")
+
+    cache = ExportCache(max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.set(RenderedExport(b"x" * 100, "text/plain", name, f"{name}.md"))
+    assert cache.get("a") is None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 200 and cache.stats()["entries"] == 2
+    cache.set(RenderedExport(b"x" * 300, "text/plain", "big", "big.md"))
+    assert cache.get("big") is None
+    print(f"Export cache: {cache.stats()}")
+
+
+async def test_exporter_caches_and_shares_renders():
+    """Concurrent requests for the same export share one render; later ones come from the cache."""
+    renders = EXPORT_RENDER["html"].count
+    exporter = DocumentExporter(executor=ThreadPoolExecutor(2), cache=ExportCache())
+
+    results = await asyncio.gather(*(exporter.export("html", LONG_DOCUMENT, "Loan Agreement") for _ in range(5)))
+    assert len({id(result) for result in results}) == 1
+    assert EXPORT_RENDER["html"].count == renders + 1
+
+    again = await exporter.export("html", LONG_DOCUMENT, "Loan Agreement")
+    assert again is results[0] and EXPORT_RENDER["html"].count == renders + 1
+    assert again.filename == "loan_agreement.html" and again.content_type.startswith("text/html")
+    assert exporter.stats()["hits"] == 1 and exporter.stats()["in_flight"] == 0
+
+    try:
+        await exporter.export("odt", DOCUMENT, "Loan Agreement")
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+    print(f"Exporter: 6 requests, 1 render, {exporter.stats()}")
+
+
+def export_request(path: str, data=None, session_key: str = "owner-session", **headers):
+    """GET request from an anonymous browser with the given session."""
+
+    async def auser():
+        return AnonymousUser()
+
+    request = RequestFactory().get(path, data or {}, **headers)
+    request.session = SimpleNamespace(session_key=session_key)
+    request.auser = auser
+    return request
+
+
+async def test_export_view():
+    """The endpoint serves exports with ETags, revalidates with 304 and rejects what it cannot serve."""
+    store._conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    writer = store.get_conversation_writer()
+    owner = "session:owner-session"
+    writer.schedule(owner, "done", {"state": "complete", "document_type": "Loan Agreement", "document": DOCUMENT})
+    writer.schedule(owner, "busy", {"state": "generating", "document_type": "Loan Agreement", "document": DOCUMENT})
+    views.EXPORTER = DocumentExporter(executor=ThreadPoolExecutor(1), cache=ExportCache())
+
+    response = await views.export_document(export_request("/export/done", {"format": "html"}), "done")
+    assert response.status_code == 200 and response["Content-Disposition"].endswith('loan_agreement.html"')
+    etag = response["ETag"]
+    assert etag == export_etag("html", DOCUMENT, "Loan Agreement")
+
+    request = export_request("/export/done", {"format": "html"}, HTTP_IF_NONE_MATCH=etag)
+    response = await views.export_document(request, "done")
+    assert response.status_code == 304 and response["ETag"] == etag
+
+    response = await views.export_document(export_request("/export/done", {"format": "md"}), "done")
+    assert response.status_code == 200 and response.content == DOCUMENT.encode()
+
+    response = await views.export_document(export_request("/export/done", {"format": "pdf"}), "done")
+    if response.status_code == 200:
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        assert body.startswith(b"%PDF") and int(response["Content-Length"]) == len(body)
+    else:
+        assert response.status_code == 503, "Without WeasyPrint's libraries PDF export is unavailable"
+
+    statuses = [
+        (await views.export_document(export_request("/export/done", {"format": "odt"}), "done")).status_code,
+        (await views.export_document(export_request("/export/missing"), "missing")).status_code,
+        (await views.export_document(export_request("/export/busy", {"format": "md"}), "busy")).status_code,
+    ]
+    assert statuses == [400, 404, 409]
+
+    # Someone else's session, or no session at all, cannot tell the conversation exists
+    strangers = [
+        (await views.export_document(export_request("/export/done", {"format": "md"}, "other"), "done")).status_code,
+        (await views.export_document(export_request("/export/done", {"format": "md"}, None), "done")).status_code,
+    ]
+    assert strangers == [404, 404]
+    store._conversation_writer = None
+    print(f"Export view: html/md served, 304 on revalidation, {statuses} for bad requests, 404 for other owners")
+
+
+async def test_session_view():
+    """The session endpoint gives an anonymous browser the session cookie that owns its conversations."""
+    request = RequestFactory().get("/session")
+    request.session = CacheSessionStore()
+
+    response = await views.session(request)
+    assert response.status_code == 204 and request.session.session_key
+    print("Session view starts an anonymous session")
+
+async def test_other_sites_cannot_use_the_session():
+    """Only the frontend may make credentialed requests or open the socket that carries the session cookie."""
+    from docgen.asgi import application
+
+    assert not getattr(settings, "CORS_ALLOW_ALL_ORIGINS", False) and settings.CORS_ALLOWED_ORIGINS
+    communicator = WebsocketCommunicator(application, "/ws/assistant/", headers=[(b"origin", b"https://evil.example")])
+    connected, _ = await communicator.connect()
+    assert not connected
+    print("Cross-site WebSocket handshake refused")
+
+
+if __name__ == "__main__":
+    test_render_html()
+    test_etag_and_cache_eviction()
+    asyncio.run(test_exporter_caches_and_shares_renders())
+    asyncio.run(test_export_view())
+    asyncio.run(test_session_view())
+    asyncio.run(test_other_sites_cannot_use_the_session())
+    print("\nAll export tests completed successfully!")
@@ -0,0 +1,102 @@
+"""
+Test the extraction response cache: prompt normalisation, TTL, LRU eviction and bypass.
+"""
+
+import asyncio
+import tempfile
+
+from ..cache import DiskCacheBackend, InMemoryCacheBackend, ResponseCache, normalize_prompt
+from ..llm import RealLLM
+from ..schemas import FieldExtractionResult
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingLLM(RealLLM):
+    """RealLLM whose extraction agent is replaced by a counter."""
+
+    def __init__(self):
+        super().__init__("test")
+        self.calls = 0
+
+    async def run_completion(self, agent, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        return FieldExtractionResult(fields=["landlord_name", "tenant_name"], document_type="Rental Agreement")
+
+
+def test_normalize_prompt():
+    """Case, punctuation and whitespace differences share a key."""
+    assert normalize_prompt("  I need a Rental Agreement!! ") == "i need a rental agreement"
+    assert normalize_prompt("NDA for an employee.") == normalize_prompt("nda   for an Employee")
+    print("Prompts normalised")
+
+
+def test_ttl_and_lru():
+    """Entries expire after the TTL and the least recently used entry is evicted first."""
+    clock = FakeClock()
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=2, clock=clock), ttl=60)
+
+    cache.set("rental", {"document_type": "Rental Agreement"})
+    cache.set("loan", {"document_type": "Loan Agreement"})
+    assert cache.get("Rental!") is not None  # rental is now most recently used
+    cache.set("nda", {"document_type": "Non-Disclosure Agreement"})
+    assert cache.get("loan") is None, "Least recently used entry is evicted"
+    assert cache.get("rental") is not None
+
+    clock.now += 61
+    assert cache.get("rental") is None, "Entry expired"
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["evictions"] == 1
+    print(f"In-memory cache stats: {stats}")
+
+
+def test_disk_backend():
+    """The disk backend persists across instances and honours TTL and size limits."""
+    clock = FakeClock()
+    with tempfile.TemporaryDirectory() as directory:
+        first = ResponseCache(DiskCacheBackend(directory, max_entries=2, clock=clock), ttl=60)
+        first.set("rental", {"document_type": "Rental Agreement"})
+
+        second = ResponseCache(DiskCacheBackend(directory, max_entries=2, clock=clock), ttl=60)
+        assert second.get("RENTAL") == {"document_type": "Rental Agreement"}
+
+        clock.now += 1
+        second.set("loan", {"document_type": "Loan Agreement"})
+        clock.now += 1
+        second.set("nda", {"document_type": "Non-Disclosure Agreement"})
+        assert len(second.backend) == 2 and second.get("rental") is None
+
+        clock.now += 120
+        assert second.get("nda") is None
+    print("Disk cache shared, bounded and expiring")
+
+
+async def test_extraction_uses_cache():
+    """Near-identical first messages cost one extraction call; bypass forces a fresh one."""
+    llm = CountingLLM()
+
+    first = await llm.extract_requirements_with_type("I need a rental agreement")
+    first.fields.append("mutated_by_caller")
+    second = await llm.extract_requirements_with_type("i need a RENTAL agreement!")
+    assert llm.calls == 1
+    assert second.fields == ["landlord_name", "tenant_name"], "Cached results are copies"
+
+    await llm.extract_requirements_with_type("I need a rental agreement", use_cache=False)
+    assert llm.calls == 2
+    print(f"Extraction cache stats: {llm.extraction_cache.stats()}")
+
+
+if __name__ == "__main__":
+    test_normalize_prompt()
+    test_ttl_and_lru()
+    test_disk_backend()
+    asyncio.run(test_extraction_uses_cache())
+    print("\nAll extraction cache tests completed successfully!")
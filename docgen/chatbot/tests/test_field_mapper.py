@@ -0,0 +1,137 @@
+"""
+Test deterministic pre-mapping of user replies before the field_mapping_agent.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from ..field_mapper import PREMAP_STATS, premap_fields
+from ..llm import DocumentOrchestrator, RealLLM
+
+
+class MappingLLM(RealLLM):
+    """LLM stub that records which fields were sent to the mapping model."""
+
+    def __init__(self):
+        super().__init__("test")
+        self.mapping_calls: List[List[str]] = []
+
+    async def map_user_input_to_fields(self, user_input: str, missing_fields: List[str]) -> Dict[str, str]:
+        self.mapping_calls.append(missing_fields)
+        return {missing_fields[0]: "from model"}
+
+
+def test_key_value_lines():
+    """Lines naming a field are mapped, including partial names that identify one field."""
+    result = premap_fields(
+        "Tenant name: Jane Doe\nmonthly rent = $1,500\n- deposit: $3,000",
+        ["landlord_name", "tenant_name", "monthly_rent", "security_deposit"],
+        ["tenant_name", "monthly_rent"],
+    )
+    assert result.fields == {"tenant_name": "Jane Doe", "monthly_rent": "$1,500", "security_deposit": "$3,000"}
+    assert not result.needs_model
+    print(f"Key/value lines: {result.fields}")
+
+
+def test_suffix_patterns():
+    """Dates, amounts and addresses go to the only requested field of that kind."""
+    fields = ["loan_amount", "due_date"]
+    result = premap_fields("The loan is $25,000 due on March 3rd, 2026", fields, fields)
+    assert result.fields == {"loan_amount": "$25,000", "due_date": "March 3rd, 2026"}
+    assert not result.needs_model
+
+    fields = ["property_address", "rental_period"]
+    result = premap_fields("It's at 42 Baker Street, London NW1 6XE", fields, fields)
+    assert result.fields == {"property_address": "42 Baker Street, London NW1 6XE"}
+    assert result.needs_model, "rental_period is still unresolved"
+
+    fields = ["start_date", "end_date"]
+    result = premap_fields("From 2026-01-01 to 2026-12-31", fields, fields)
+    assert result.fields == {} and result.needs_model, "Two date fields are ambiguous"
+    print("Suffix patterns resolve only unambiguous values")
+
+
+def test_single_field_answer():
+    """A short bare reply answers the single requested field; questions do not."""
+    assert premap_fields("John Smith", ["tenant_name"], ["tenant_name"]).fields == {"tenant_name": "John Smith"}
+    fields = ["tenant_name", "landlord_name"]
+    assert premap_fields("John Smith", fields, fields).needs_model
+    assert premap_fields("I need a lease", ["tenant_name"]).needs_model, "Nothing was asked for yet"
+    assert premap_fields("What do you mean?", ["tenant_name"], ["tenant_name"]).needs_model
+    print("Single-field answers mapped")
+
+
+def test_non_answers_go_to_the_model():
+    """Replies that decline or defer the question are never stored as the field's value."""
+    non_answers = [
+        "I'm not sure",
+        "skip",
+        "no idea",
+        "later",
+        "I don't know",
+        "idk",
+        "N/A",
+        "Not sure yet",
+        "Skip this for now",
+        "I'll tell you later",
+        "rather not say",
+        "Um, no idea, sorry",
+    ]
+    for reply in non_answers:
+        result = premap_fields(reply, ["tenant_name"], ["tenant_name"])
+        assert result.fields == {} and result.needs_model, reply
+    for name in ["Nate Skipper", "Later Holdings LLC", "Nick Pass"]:
+        assert premap_fields(name, ["tenant_name"], ["tenant_name"]).fields == {"tenant_name": name}
+    print(f"{len(non_answers)} non-answers left to the model")
+
+
+def test_only_bare_values_skip_the_model():
+    """Sentences, corrections and replies carrying more than one value are left to the model."""
+    fields = ["tenant_name", "landlord_name", "monthly_rent"]
+    replies = [
+        "Jane Doe, and the rent is $1500 a month",
+        "Actually, change the landlord name to Bob Smith first",
+        "The tenant is Jane Doe",
+        "Jane Doe. Rent is 1500",
+        "Jane Doe but the landlord is Bob",
+    ]
+    for reply in replies:
+        result = premap_fields(reply, fields, ["tenant_name"])
+        assert result.fields == {} and result.needs_model, reply
+    for value in ["Jane Doe", "J. R. R. Tolkien", "O'Brien & Sons Ltd."]:
+        assert premap_fields(value, fields, ["tenant_name"]).fields == {"tenant_name": value}
+    print(f"{len(replies)} sentence replies left to the model")
+
+
+async def test_orchestrator_sends_only_residual():
+    """The orchestrator skips the model when everything resolved, and sends only the residual otherwise."""
+    llm = MappingLLM()
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": None, "loan_amount": None, "due_date": None}
+    orchestrator.state = "collecting"
+    turns_before = PREMAP_STATS.stats()
+
+    orchestrator.requested_fields = ["lender_name", "loan_amount"]
+    await orchestrator.record_user_input("Alice lends $500")
+    assert llm.mapping_calls == [["lender_name", "due_date"]]
+    assert orchestrator.fields["loan_amount"] == "$500" and orchestrator.fields["lender_name"] == "from model"
+
+    orchestrator.requested_fields = ["due_date"]
+    await orchestrator.record_user_input("01/06/2026")
+    assert len(llm.mapping_calls) == 1, "Fully resolved turn skips the model"
+    assert orchestrator.state == "generating"
+
+    stats = PREMAP_STATS.stats()
+    assert stats["turns"] - turns_before["turns"] == 2
+    assert stats["model_skipped"] - turns_before["model_skipped"] == 1
+    print(f"Pre-mapper stats: {stats}")
+
+
+if __name__ == "__main__":
+    test_key_value_lines()
+    test_suffix_patterns()
+    test_single_field_answer()
+    test_non_answers_go_to_the_model()
+    test_only_bare_values_skip_the_model()
+    asyncio.run(test_orchestrator_sends_only_residual())
+    print("\nAll field mapper tests completed successfully!")
@@ -0,0 +1,97 @@
+"""
+Test that stopping generation cancels the running stream and closes the LLM side.
+"""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+from ..consumers import DocumentAgentConsumer
+from ..llm import GENERATION_MAX_TOKENS, DocumentOrchestrator, RealLLM
+from ..schemas import DocumentContext
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+
+
+class SlowStreamLLM(RealLLM):
+    """LLM stub that streams forever until closed and records when its stream is closed."""
+
+    def __init__(self):
+        super().__init__("test")
+        self.chunks_sent = 0
+        self.stream_closed = asyncio.Event()
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        try:
+            while True:
+                await asyncio.sleep(0.005)
+                self.chunks_sent += 1
+                yield "clause text "
+        finally:
+            self.stream_closed.set()
+
+
+def make_consumer(llm: RealLLM) -> DocumentAgentConsumer:
+    """Build a consumer wired to a fake socket that records outgoing frames."""
+    consumer = DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.orchestrators = {}
+    consumer.generation_tasks = {}
+    consumer.remote_generations = set()
+    consumer.conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    consumer.current_conversation_id = "conv-1"
+    consumer.sent: List[dict] = []
+
+    async def send_json(content, close=False):
+        consumer.sent.append(content)
+
+    consumer.send_json = send_json
+
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"party_a": "Alice"}
+    orchestrator.state = "generating"
+    consumer.orchestrators["conv-1"] = orchestrator
+    return consumer
+
+
+async def test_stop_cancels_stream():
+    """Stopping generation cancels the task, closes the stream and reports tokens saved."""
+    llm = SlowStreamLLM()
+    consumer = make_consumer(llm)
+
+    await consumer.start_generation()
+    await asyncio.sleep(0.1)
+    assert "conv-1" in consumer.generation_tasks
+
+    await consumer.handle_stop_generation()
+
+    assert llm.stream_closed.is_set(), "LLM stream should be closed on stop"
+    assert "conv-1" not in consumer.generation_tasks
+    chunks_at_stop = llm.chunks_sent
+    await asyncio.sleep(0.05)
+    assert llm.chunks_sent == chunks_at_stop, "No chunks should be produced after stop"
+
+    stop_message = consumer.sent[-1]
+    print(f"Stop message: {stop_message}")
+    assert 0 < stop_message["tokens_saved"] < GENERATION_MAX_TOKENS
+    assert consumer.orchestrators["conv-1"].state == "idle"
+
+
+async def test_reset_cancels_all_streams():
+    """Resetting all sessions cancels every tracked generation."""
+    llm = SlowStreamLLM()
+    consumer = make_consumer(llm)
+    await consumer.start_generation()
+    await asyncio.sleep(0.02)
+
+    await consumer.handle_reset_all_sessions()
+
+    assert llm.stream_closed.is_set()
+    assert not consumer.generation_tasks and not consumer.orchestrators
+    print(f"Reset message: {consumer.sent[-1]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stop_cancels_stream())
+    asyncio.run(test_reset_cancels_all_streams())
+    print("\nAll generation cancellation tests completed successfully!")
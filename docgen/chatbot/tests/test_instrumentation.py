@@ -0,0 +1,144 @@
+"""
+Test per-agent LLM call instrumentation and the Prometheus metrics endpoint.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+import django
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from pydantic_ai.messages import ModelMessage, ModelResponse
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docgen.settings")
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+
+from .. import metrics  # noqa: E402
+from ..llm import LLM_REGISTRY, DocumentOrchestrator, RealLLM  # noqa: E402
+from ..metrics import AGENT_CALLS  # noqa: E402
+from ..resilience import CIRCUIT_BREAKERS, RetryPolicy  # noqa: E402
+from ..schemas import DocumentContext  # noqa: E402
+from ..views import metrics as metrics_view  # noqa: E402
+
+CONTEXT = DocumentContext(fields={"lender_name": "Alice"}, document_type="Loan Agreement", user_goal="loan")
+
+
+async def test_streaming_call_records_tokens_and_first_token():
+    """A streamed generation run records latency, time to first token and token usage."""
+    AGENT_CALLS.reset()
+
+    async def stream(messages, agent_info):
+        await asyncio.sleep(0.02)
+        yield "# LOAN AGREEMENT\n\n"
+        await asyncio.sleep(0.02)
+        yield "Alice lends Bob $500."
+
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+    document = "".join([chunk async for chunk in llm.generate_document(CONTEXT)])
+
+    stats = AGENT_CALLS.stats()["generation_agent"]
+    assert document.startswith("# LOAN AGREEMENT")
+    assert stats["calls"] == 1 and stats["errors"] == 0
+    assert stats["input_tokens"] > 0 and stats["output_tokens"] > 0
+    assert 0.02 <= stats["first_token_p50"] < stats["latency"]["mean"]
+    print(f"Streaming call: {stats}")
+
+
+async def test_errors_and_fallbacks_are_counted():
+    """Every failed attempt counts as an error, repeats as retries, and the local fallback as a fallback."""
+    AGENT_CALLS.reset()
+    CIRCUIT_BREAKERS.clear()
+
+    def fail(messages: list[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        raise ConnectionError("provider unavailable")
+
+    llm = RealLLM("test")
+    llm.extraction_agent.model = FunctionModel(fail)
+    llm.retry_policy = RetryPolicy(attempts=3, base_delay=0.001)
+    result = await llm.extract_requirements_with_type("I need a loan agreement", use_cache=False)
+
+    stats = AGENT_CALLS.stats()["extraction_agent"]
+    assert result.document_type and stats["calls"] == 3 and stats["errors"] == 3
+    assert stats["retries"] == 2 and stats["fallbacks"] == 1
+    print(f"Failed call with fallback: {stats}")
+
+
+async def test_continuations_are_counted_as_retries():
+    """A generation run cut off by a stream error and continued counts one generation_agent retry."""
+    AGENT_CALLS.reset()
+    calls = []
+
+    async def stream(messages, agent_info):
+        calls.append(messages)
+        if len(calls) == 1:
+            yield "# LOAN AGREEMENT\n\nAlice lends Bob"
+            raise ConnectionError("stream reset by peer")
+        yield " $500.\n\nEND OF LOAN AGREEMENT\n"
+
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice"}
+    orchestrator.state = "generating"
+    [chunk async for chunk in orchestrator.generate_document()]
+
+    stats = AGENT_CALLS.stats()["generation_agent"]
+    assert stats["calls"] == 2 and stats["errors"] == 1 and stats["retries"] == 1
+    print(f"Continuation counted as retry: {stats}")
+
+
+def test_json_call_log():
+    """With LLM_CALL_LOG on, every call is logged as one JSON line."""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("chatbot.metrics")
+    logger.addHandler(handler)
+    metrics.LLM_CALL_LOG = True
+    try:
+        AGENT_CALLS.record_call("toc_agent", "openai:gpt-4.1", 0.5, input_tokens=10, output_tokens=20)
+    finally:
+        metrics.LLM_CALL_LOG = False
+        logger.removeHandler(handler)
+
+    line = json.loads(records[0].getMessage())
+    assert line["event"] == "llm_call" and line["agent"] == "toc_agent" and line["output_tokens"] == 20
+    print(f"JSON log line: {records[0].getMessage()}")
+
+
+def test_metrics_endpoint():
+    """GET /metrics serves Prometheus text with agent counters, histograms and cache gauges."""
+    AGENT_CALLS.reset()
+    AGENT_CALLS.record_call("field_mapping_agent", "test", 0.3, input_tokens=40, output_tokens=5)
+    AGENT_CALLS.record_fallback("field_mapping_agent")
+    LLM_REGISTRY.clear()
+    LLM_REGISTRY.register(RealLLM("test"))
+
+    response = metrics_view(RequestFactory().get("/metrics"))
+    body = response.content.decode()
+
+    assert response.status_code == 200 and response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'docgen_llm_calls_total{agent="field_mapping_agent"} 1' in body
+    assert 'docgen_llm_fallbacks_total{agent="field_mapping_agent"} 1' in body
+    assert 'docgen_llm_input_tokens_total{agent="field_mapping_agent"} 40' in body
+    assert 'docgen_llm_call_seconds_bucket{agent="field_mapping_agent",le="0.5"} 1' in body
+    assert 'docgen_llm_call_seconds_bucket{agent="field_mapping_agent",le="0.25"} 0' in body
+    assert 'docgen_turn_seconds_count{mode="pipelined"}' in body
+    assert "# TYPE docgen_premap_skip_rate gauge" in body and "docgen_llm_registry_instances 1" in body
+    assert 'docgen_extraction_cache_hits{model="test"} 0' in body
+    assert metrics_view(RequestFactory().post("/metrics")).status_code == 405
+    LLM_REGISTRY.clear()
+    print(f"Metrics endpoint served {len(body.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_streaming_call_records_tokens_and_first_token())
+    asyncio.run(test_errors_and_fallbacks_are_counted())
+    asyncio.run(test_continuations_are_counted_as_retries())
+    test_json_call_log()
+    test_metrics_endpoint()
+    print("\nAll instrumentation tests completed successfully!")
@@ -0,0 +1,66 @@
+"""
+Test the precompiled keyword detector used to pick a document type without the LLM.
+"""
+
+from ..constants.fields import (
+    DOCUMENT_KEYWORDS,
+    KeywordDetector,
+    detect_document_type_by_keywords,
+    rank_document_types_by_keywords,
+)
+
+
+def test_whole_words_only():
+    """Keywords inside other words do not count."""
+    for prompt in ("Set up our office network", "Consent form signed by a parent", "A framework for the app"):
+        assert detect_document_type_by_keywords(prompt) == "General Contract", prompt
+    assert rank_document_types_by_keywords("Transparent parenting arrangement") == []
+    print("No false positives for network/parent/framework")
+
+
+def test_inflected_keywords():
+    """Inflected forms of a keyword still match."""
+    cases = {
+        "Hiring a new employee": "Employment Contract",
+        "Borrowing money contract": "Loan Agreement",
+        "We are leasing two properties": "Rental Agreement",
+        "Selling my bike": "Purchase Agreement",
+        "Lease agreement needed": "Rental Agreement",
+        "Need confidentiality agreement": "Non-Disclosure Agreement (NDA)",
+    }
+    for prompt, expected in cases.items():
+        assert detect_document_type_by_keywords(prompt) == expected, prompt
+    print(f"{len(cases)} inflected prompts detected")
+
+
+def test_ranking_scores_every_type():
+    """All matching types are ranked; phrases outweigh single words."""
+    ranking = rank_document_types_by_keywords("I need a service contract for consulting work")
+    assert [doc_type for doc_type, _ in ranking] == ["Service Contract", "Employment Contract"]
+    assert ranking[0][1] == 2
+
+    # "joint venture" counts for two words, beating the single "loan"
+    assert rank_document_types_by_keywords("A joint venture funded by a loan")[0] == ("Partnership Agreement", 2)
+
+    # Ties keep the DOCUMENT_KEYWORDS order
+    tied = rank_document_types_by_keywords("Buy the rental")
+    assert tied == [("Purchase Agreement", 1), ("Rental Agreement", 1)]
+    print(f"Ranking: {ranking}")
+
+
+def test_custom_keywords():
+    """A detector can be built for any keyword table, including an empty one."""
+    detector = KeywordDetector({"Gift Deed": ["gift", "donate"], "General Contract": []})
+    assert detector.rank("Donating a car as a gift") == [("Gift Deed", 2)]
+    assert KeywordDetector({}).rank("anything") == []
+    detector = KeywordDetector(DOCUMENT_KEYWORDS)
+    assert all(keyword in detector.forms for keywords in DOCUMENT_KEYWORDS.values() for keyword in keywords)
+    print("Custom keyword tables compile")
+
+
+if __name__ == "__main__":
+    test_whole_words_only()
+    test_inflected_keywords()
+    test_ranking_scores_every_type()
+    test_custom_keywords()
+    print("\nAll keyword detector tests completed successfully!")
@@ -0,0 +1,67 @@
+"""
+Test the process-wide shared RealLLM registry.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from ..llm import LLM_REGISTRY, DocumentOrchestrator, RealLLM, get_llm
+
+
+def test_registry_reuses_instances():
+    """Orchestrators for the same model share one RealLLM."""
+    LLM_REGISTRY.clear()
+
+    first = DocumentOrchestrator(model_name="test")
+    second = DocumentOrchestrator(model_name="test")
+
+    assert first.llm is second.llm, "Orchestrators should share the same RealLLM"
+    assert first.fields is not second.fields, "Per-conversation state must not be shared"
+
+    stats = LLM_REGISTRY.stats()
+    print(f"Registry stats: {stats}")
+    assert stats == {"instances": 1, "hits": 1, "misses": 1}
+
+
+def test_registry_thread_safety():
+    """Concurrent lookups from many threads build a single instance."""
+    LLM_REGISTRY.clear()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        instances = list(pool.map(lambda _: get_llm("test"), range(200)))
+
+    assert all(llm is instances[0] for llm in instances)
+    stats = LLM_REGISTRY.stats()
+    print(f"Registry stats after threaded lookups: {stats}")
+    assert stats["misses"] == 1 and stats["hits"] == 199
+
+
+async def test_registry_async_safety():
+    """Concurrent orchestrator creation from many tasks reuses the shared instance."""
+    LLM_REGISTRY.clear()
+
+    async def create():
+        await asyncio.sleep(0)
+        return DocumentOrchestrator(model_name="test")
+
+    orchestrators = await asyncio.gather(*(create() for _ in range(500)))
+
+    assert len({id(o.llm) for o in orchestrators}) == 1
+    print(f"Registry stats after async creation: {LLM_REGISTRY.stats()}")
+
+
+def test_registry_register_override():
+    """Pre-built instances can be registered and are then handed out."""
+    LLM_REGISTRY.clear()
+
+    custom = LLM_REGISTRY.register(RealLLM("test"))
+    assert get_llm("test") is custom
+    assert LLM_REGISTRY.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    test_registry_reuses_instances()
+    test_registry_thread_safety()
+    asyncio.run(test_registry_async_safety())
+    test_registry_register_override()
+    print("\nAll registry tests completed successfully!")
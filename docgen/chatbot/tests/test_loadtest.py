@@ -0,0 +1,53 @@
+"""
+Test the WebSocket load-testing harness and its management command.
+"""
+
+import io
+import json
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docgen.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from ..completion import COMPLETE, CompletionDetector  # noqa: E402
+from ..loadtest import percentile, simulated_document  # noqa: E402
+
+
+def test_helpers():
+    """Nearest-rank percentiles, and a simulated document the completion detector accepts."""
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50 and percentile(values, 99) == 99 and percentile(values, 100) == 100
+    assert percentile([], 99) == 0 and percentile([7.0], 1) == 7
+
+    detector = CompletionDetector()
+    detector.feed(simulated_document("Loan Agreement", 200))
+    assert detector.verdict() == COMPLETE
+    print("Percentiles and simulated document OK")
+
+
+def test_loadtest_command():
+    """A small offline run completes every conversation and reports latency, frames, lag and memory."""
+    output = io.StringIO()
+    arguments = ["--clients", "4", "--token-latency", "0", "--document-tokens", "200", "--json"]
+    call_command("loadtest", *arguments, stdout=output)
+    report = json.loads(output.getvalue())
+    assert report["completed"] == 4 and report["errors"] == {}, report
+    assert report["turn_latency_ms"]["p50"] > 0 and report["generation_ms"]["max"] > 0
+    assert report["frames"] > 4 * 5 and report["frames_per_second"] > 0
+    assert report["loop_lag_ms"]["max"] >= 0 and report["peak_sessions"] >= 1
+    assert report["document_chars"] == 4 * len(simulated_document("Loan Agreement", 200))
+
+    output = io.StringIO()
+    call_command("loadtest", "--clients", "2", "--token-latency", "0", "--document-tokens", "100", stdout=output)
+    assert "Completed: 2/2" in output.getvalue() and "per session" in output.getvalue()
+    print(output.getvalue())
+
+
+if __name__ == "__main__":
+    test_helpers()
+    test_loadtest_command()
+    print("\nAll load test tests completed successfully!")
@@ -0,0 +1,199 @@
+"""
+Test the local classifier tier and how extract_requirements_with_type uses it.
+"""
+
+import asyncio
+import io
+import json
+import os
+import tempfile
+from time import perf_counter
+from typing import List
+
+import django
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "docgen.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from ..classifier import (  # noqa: E402
+    LOCAL_CLASSIFIER_STATS,
+    DocumentTypeClassifier,
+    Example,
+    seed_examples,
+    set_local_classifier,
+)
+from ..llm import RealLLM  # noqa: E402
+from ..resilience import CIRCUIT_BREAKERS, RetryPolicy  # noqa: E402
+
+FAST = RetryPolicy(attempts=2, base_delay=0.001, max_delay=0.002, timeout=1.0)
+
+HISTORY = [
+    Example("Draft a lease for my apartment", "Lease Agreement", ["landlord", "tenant", "rent", "term"]),
+    Example("Lease for the flat above my shop", "Lease Agreement", ["landlord", "tenant", "rent", "term"]),
+    Example("Tenancy agreement for a house share", "Lease Agreement", ["landlord", "tenant", "rent", "term"]),
+    Example("Lending money to my brother", "Loan Agreement"),
+    Example("Borrowing 5000 from a friend", "Loan Agreement"),
+]
+
+
+def test_seed_classifier():
+    """Trained on the constants alone, the classifier knows every typed keyword."""
+    classifier = DocumentTypeClassifier.train(seed_examples())
+    cases = {
+        "I want to buy a house": "Purchase Agreement",
+        "Hiring a new employee": "Employment Contract",
+        "Borrowing money contract": "Loan Agreement",
+        "Business joint venture": "Partnership Agreement",
+        "I need a contract for lending money to my brother": "Loan Agreement",
+        "Need confidentiality agreement": "Non-Disclosure Agreement (NDA)",
+    }
+    for prompt, expected in cases.items():
+        prediction = classifier.predict(prompt)
+        assert prediction is not None and prediction.document_type == expected, (prompt, prediction)
+        assert 0 < prediction.confidence <= 1
+    assert classifier.predict("Hiring a new employee").fields[:2] == ["employer_name", "employee_name"]
+    # Nothing but request boilerplate and unknown words
+    assert classifier.predict("I need a generic contract please") is None
+    print(f"Seed classifier: {len(cases)} prompts classified")
+
+
+def test_history_labels_fields_and_persistence():
+    """Past conversations add their own types and field lists; the model survives a save and load."""
+    classifier = DocumentTypeClassifier.train(seed_examples() + HISTORY)
+    prediction = classifier.predict("Lease for a studio flat")
+    assert prediction.document_type == "Lease Agreement"
+    assert prediction.fields == ["landlord", "tenant", "rent", "term"]
+    assert classifier.predict("Lending money to my cousin").fields[0] == "lender_name"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "model.json")
+        classifier.save(path)
+        loaded = DocumentTypeClassifier.load(path)
+        assert loaded.predict("Lease for a studio flat") == prediction
+
+        with open(path) as handle:
+            data = json.load(handle)
+        data["version"] = 0
+        try:
+            DocumentTypeClassifier.from_dict(data)
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+    print(f"History classifier: {prediction}")
+
+
+def extraction_llm(mode: str, model) -> RealLLM:
+    """RealLLM whose extraction_agent runs on `model`, with the local tier in `mode`."""
+    llm = RealLLM("test")
+    llm.retry_policy = FAST
+    llm.extraction_cache = None
+    llm.extraction_agent.model = FunctionModel(model, model_name="extraction-model")
+    llm.local_classifier_mode = mode
+    llm.local_classifier_threshold = 0.5
+    llm.local_classifier_hedge_after = 0.05
+    return llm
+
+
+def model_answer(delay: float = 0.0, calls: List[int] = None):
+    """Extraction model answering "Model Agreement" after `delay` seconds."""
+
+    async def model(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        if calls is not None:
+            calls.append(1)
+        await asyncio.sleep(delay)
+        output = {"fields": ["party"], "document_type": "Model Agreement"}
+        return ModelResponse(parts=[ToolCallPart(agent_info.output_tools[0].name, output)])
+
+    return model
+
+
+async def test_first_pass_skips_the_model():
+    """A confident local answer is used without calling the extraction_agent; unsure prompts still go to it."""
+    set_local_classifier(DocumentTypeClassifier.train(seed_examples() + HISTORY))
+    before = LOCAL_CLASSIFIER_STATS.stats()
+    calls = []
+    llm = extraction_llm("first_pass", model_answer(calls=calls))
+
+    result = await llm.extract_requirements_with_type("Draft a lease for my new apartment")
+    assert result.document_type == "Lease Agreement" and calls == []
+    result = await llm.extract_requirements_with_type("Something for my bakery")
+    assert result.document_type == "Model Agreement" and calls == [1]
+
+    stats = LOCAL_CLASSIFIER_STATS.stats()
+    assert stats["first_pass"] == before["first_pass"] + 1
+    assert stats["predictions"] == before["predictions"] + 2
+    set_local_classifier(None)
+    print(f"First pass: {stats}")
+
+
+async def test_hedge_answers_when_the_model_is_slow():
+    """In hedge mode a slow extraction_agent is abandoned for the local answer; a quick one still wins."""
+    set_local_classifier(DocumentTypeClassifier.train(seed_examples() + HISTORY))
+    wins = LOCAL_CLASSIFIER_STATS.stats()["hedge_wins"]
+
+    slow = extraction_llm("hedge", model_answer(delay=1.0))
+    started = perf_counter()
+    result = await slow.extract_requirements_with_type("Draft a lease for my new apartment")
+    elapsed = perf_counter() - started
+    assert result.document_type == "Lease Agreement" and elapsed < 0.5
+    assert LOCAL_CLASSIFIER_STATS.stats()["hedge_wins"] == wins + 1
+
+    quick = extraction_llm("hedge", model_answer())
+    result = await quick.extract_requirements_with_type("Draft a lease for my new apartment")
+    assert result.document_type == "Model Agreement"
+    set_local_classifier(None)
+    print(f"Hedge: slow model replaced after {elapsed * 1000:.0f} ms")
+
+
+async def test_fallback_after_model_failure():
+    """When the extraction_agent fails, a confident local answer comes before keyword matching."""
+    CIRCUIT_BREAKERS.clear()
+    set_local_classifier(DocumentTypeClassifier.train(seed_examples() + HISTORY))
+
+    def failing(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        raise ConnectionError("provider down")
+
+    llm = extraction_llm("fallback", failing)
+    result = await llm.extract_requirements_with_type("Tenancy for the flat above my garage")
+    assert result.document_type == "Lease Agreement"
+
+    llm.local_classifier_mode = "off"
+    result = await llm.extract_requirements_with_type("Tenancy for the flat above my garage")
+    assert result.document_type == "General Contract", "Keyword matching knows no 'tenancy'"
+    CIRCUIT_BREAKERS.clear()
+    set_local_classifier(None)
+    print("Fallback: local classifier used before keyword matching")
+
+
+def test_train_and_evaluate_commands():
+    """train_classifier writes a model that evaluate_classifier reports on."""
+    with tempfile.TemporaryDirectory() as directory:
+        data = os.path.join(directory, "prompts.jsonl")
+        model = os.path.join(directory, "model.json")
+        with open(data, "w") as handle:
+            for example in HISTORY:
+                handle.write(json.dumps(example.__dict__) + "\n")
+
+        output = io.StringIO()
+        call_command("train_classifier", "--no-history", "--data", data, "--output", model, stdout=output)
+        assert os.path.exists(model) and "Trained on" in output.getvalue()
+
+        output = io.StringIO()
+        call_command("evaluate_classifier", "--data", data, "--model", model, stdout=output)
+        report = output.getvalue()
+        assert "Accuracy: 100.0%" in report and "µs per prediction" in report
+    print(report)
+
+
+if __name__ == "__main__":
+    test_seed_classifier()
+    test_history_labels_fields_and_persistence()
+    asyncio.run(test_first_pass_skips_the_model())
+    asyncio.run(test_hedge_answers_when_the_model_is_slow())
+    asyncio.run(test_fallback_after_model_failure())
+    test_train_and_evaluate_commands()
+    print("\nAll local classifier tests completed successfully!")
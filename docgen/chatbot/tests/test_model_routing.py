@@ -0,0 +1,128 @@
+"""
+Test per-agent model routing and the fallback to a secondary model on timeout.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import List
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from ..llm import RealLLM
+from ..metrics import AGENT_CALLS
+from ..resilience import CIRCUIT_BREAKERS
+from ..model_routing import AGENT_NAMES, SMALL_AGENTS, ModelRoute, resolve_routes
+from ..schemas import DocumentContext
+
+CONTEXT = DocumentContext(fields={"lender_name": "Alice"}, document_type="Loan Agreement", user_goal="loan")
+
+
+def test_profiles_and_overrides():
+    """Profiles pick the model per agent; per-agent variables override them."""
+    single = resolve_routes("openai:gpt-4.1", "single", fallback_model="", env={})
+    assert {route.model for route in single.values()} == {"openai:gpt-4.1"}
+    assert all(route.fallback is None for route in single.values())
+
+    tiered = resolve_routes("anthropic:claude-sonnet-4-5", "tiered", fallback_model="", env={})
+    for agent in AGENT_NAMES:
+        expected = "anthropic:claude-haiku-4-5" if agent in SMALL_AGENTS else "anthropic:claude-sonnet-4-5"
+        assert tiered[agent].model == expected, agent
+    assert resolve_routes("openai:gpt-4.1", "tiered", env={})["field_mapping_agent"].model == "openai:gpt-4.1-mini"
+
+    env = {
+        "LLM_MODEL_COMPLETION_CHECK": "openai:gpt-4.1-nano",
+        "LLM_FALLBACK_MODEL_GENERATION": "anthropic:claude-sonnet-4-5",
+    }
+    routes = resolve_routes("openai:gpt-4.1", "single", fallback_model="openai:gpt-4.1-mini", env=env)
+    assert routes["completion_check_agent"] == ModelRoute("openai:gpt-4.1-nano", "openai:gpt-4.1-mini", 20.0)
+    assert routes["generation_agent"].fallback == "anthropic:claude-sonnet-4-5"
+    assert routes["toc_agent"].fallback == "openai:gpt-4.1-mini"
+
+    # A fallback equal to the primary model would only repeat the slow call
+    assert resolve_routes("test", fallback_model="test", env={})["toc_agent"].fallback is None
+    try:
+        resolve_routes("test", "fastest")
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+    print(f"Tiered routes: { {agent: route.model for agent, route in tiered.items()} }")
+
+
+def fallback_llm(fallback_after: float = 0.05) -> RealLLM:
+    """RealLLM whose agents fall back to the offline test model."""
+    return RealLLM("test", routes={agent: ModelRoute("test", "test", fallback_after) for agent in AGENT_NAMES})
+
+
+async def test_slow_primary_falls_back():
+    """A primary that does not answer within fallback_after is replaced by the fallback model."""
+    AGENT_CALLS.reset()
+    CIRCUIT_BREAKERS.clear()
+
+    async def slow(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(1)
+        return ModelResponse(parts=[TextPart("True")])
+
+    llm = fallback_llm()
+    llm.completion_check_agent.model = FunctionModel(slow, model_name="slow-primary")
+
+    started = perf_counter()
+    result = await llm.run_completion(llm.completion_check_agent, "Is this complete?")
+    elapsed = perf_counter() - started
+
+    stats = AGENT_CALLS.stats()["completion_check_agent"]
+    assert result == "success (no tool calls)", "Answered by the test fallback model"
+    assert elapsed < 0.5 and stats["model_fallbacks"] == 1
+    assert CIRCUIT_BREAKERS.get("slow-primary").failures == 1
+    print(f"Slow primary replaced after {elapsed * 1000:.0f} ms: {stats}")
+
+
+async def test_stream_falls_back_before_first_chunk():
+    """A stream with no first chunk within fallback_after is restarted on the fallback model."""
+    AGENT_CALLS.reset()
+    CIRCUIT_BREAKERS.clear()
+
+    async def stalled(messages, agent_info):
+        await asyncio.sleep(1)
+        yield "never sent"
+
+    llm = fallback_llm()
+    llm.generation_agent.model = FunctionModel(stream_function=stalled, model_name="stalled-primary")
+    document = "".join([chunk async for chunk in llm.generate_document(CONTEXT)])
+
+    assert document and "never sent" not in document
+    assert AGENT_CALLS.stats()["generation_agent"]["model_fallbacks"] == 1
+    print(f"Stream restarted on the fallback model: {document[:40]!r}")
+
+
+async def test_fast_primary_and_open_breaker():
+    """A primary answering in time is used; with its breaker open the fallback is used at once."""
+    AGENT_CALLS.reset()
+    CIRCUIT_BREAKERS.clear()
+    primary_calls = []
+
+    def fast(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        primary_calls.append(1)
+        return ModelResponse(parts=[TextPart("True")])
+
+    llm = fallback_llm(fallback_after=1.0)
+    llm.completion_check_agent.model = FunctionModel(fast, model_name="fast-primary")
+    assert await llm.verify_doc("END OF AGREEMENT") is True
+    assert AGENT_CALLS.stats()["completion_check_agent"]["model_fallbacks"] == 0
+
+    breaker = CIRCUIT_BREAKERS.get("fast-primary")
+    breaker.opened_at = breaker.clock()
+    started = perf_counter()
+    await llm.verify_doc("END OF AGREEMENT")
+    assert perf_counter() - started < 0.1 and len(primary_calls) == 1
+    assert AGENT_CALLS.stats()["completion_check_agent"]["model_fallbacks"] == 1
+    CIRCUIT_BREAKERS.clear()
+    print("Fast primary used; open breaker skipped straight to the fallback")
+
+
+if __name__ == "__main__":
+    test_profiles_and_overrides()
+    asyncio.run(test_slow_primary_falls_back())
+    asyncio.run(test_stream_falls_back_before_first_chunk())
+    asyncio.run(test_fast_primary_and_open_breaker())
+    print("\nAll model routing tests completed successfully!")
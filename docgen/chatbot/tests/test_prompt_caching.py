@@ -0,0 +1,118 @@
+"""
+Test that agent prompts keep a static, cacheable prefix and that cache token usage is recorded.
+"""
+
+import asyncio
+from typing import List
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from pydantic_ai.usage import RequestUsage
+
+from ..continuation import DocumentCheckpoint
+from ..llm import RealLLM
+from ..metrics import AGENT_CALLS
+from ..schemas import DocumentContext
+
+CONTEXT = DocumentContext(
+    fields={"lender_name": "Alice Smith", "borrower_name": "Bob Jones"}, document_type="Loan Agreement", user_goal="loan"
+)
+
+
+class PromptRecorder:
+    """Function model recording the instructions and user prompt of every request."""
+
+    def __init__(self, output=None):
+        self.output = output
+        self.requests: List[tuple] = []
+        self.settings: List[dict] = []
+
+    def _record(self, messages: List[ModelMessage], agent_info: AgentInfo):
+        request = messages[-1]
+        assert isinstance(request, ModelRequest)
+        prompt = "".join(part.content for part in request.parts if isinstance(part, UserPromptPart))
+        self.requests.append((request.instructions, prompt))
+        self.settings.append(dict(agent_info.model_settings or {}))
+
+    def respond(self, messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        self._record(messages, agent_info)
+        if agent_info.output_tools:
+            return ModelResponse(parts=[ToolCallPart(agent_info.output_tools[0].name, self.output)])
+        return ModelResponse(parts=[TextPart("True")])
+
+    async def stream(self, messages: List[ModelMessage], agent_info: AgentInfo):
+        self._record(messages, agent_info)
+        yield "# LOAN AGREEMENT\n\nEND OF LOAN AGREEMENT\n"
+
+
+async def test_field_request_prefix_is_stable():
+    """Different field requests share identical instructions; only the request carries the volatile data."""
+    recorder = PromptRecorder({"acknowledgment": None, "question": "What is the loan amount?", "fields_requested": []})
+    llm = RealLLM("test")
+    llm.field_request_agent.model = FunctionModel(recorder.respond)
+
+    await llm.ask_for_field(["lender_name", "loan_amount", "rate"], ["lender_name"], greet_user=True, user_goal="a loan")
+    await llm.ask_for_field(["rate"], ["rate"], "User saved loan_amount as '500'", greet_user=False, user_goal="a loan")
+
+    (first_instructions, first_prompt), (second_instructions, second_prompt) = recorder.requests
+    assert first_instructions == second_instructions
+    assert "GREET_USER is True" in first_instructions and "NEARLY_DONE" in first_instructions
+    for value in ("loan_amount", "a loan", "'500'"):
+        assert value not in first_instructions
+    assert "GREET_USER: True" in first_prompt and "NEARLY_DONE: False" in first_prompt
+    assert "GREET_USER: False" in second_prompt and "NEARLY_DONE: True" in second_prompt
+    assert "User saved loan_amount as '500'" in second_prompt
+    assert "Your task" not in second_prompt, "Task rules belong to the instructions"
+    print(f"Stable prefix of {len(first_instructions)} chars, requests of {len(first_prompt)}/{len(second_prompt)}")
+
+
+async def test_generation_and_continuation_share_prefix():
+    """A continuation request starts with the same text as the first request of the document."""
+    recorder = PromptRecorder()
+    llm = RealLLM("test")
+    llm.generation_agent.model = FunctionModel(stream_function=recorder.stream)
+
+    [chunk async for chunk in llm.generate_document(CONTEXT)]
+    checkpoint = DocumentCheckpoint(offset=120, tail="2.1 The Lender agrees to", outline=["# LOAN AGREEMENT"])
+    [chunk async for chunk in llm.generate_document(CONTEXT, checkpoint=checkpoint)]
+
+    (instructions, first), (continuation_instructions, continuation) = recorder.requests
+    assert instructions == continuation_instructions and "CONTINUATION REQUESTS" in instructions
+    assert continuation.startswith(first) and "2.1 The Lender agrees to" in continuation
+    assert "Alice Smith" in first and "Alice Smith" not in instructions
+    # The model moves the cache hint out of the settings and into its request parameters
+    assert llm.generation_agent.model_settings["cache"] == {"messages": False}
+    assert recorder.settings[0]["max_tokens"] > 0
+    print(f"Continuation adds {len(continuation) - len(first)} chars after the shared request")
+
+
+async def test_cache_tokens_are_recorded():
+    """Cache reads and writes reported by the provider are counted, with the uncached remainder."""
+    AGENT_CALLS.reset()
+    reads = iter([0, 1800])
+
+    def model(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        cached = next(reads)
+        usage = RequestUsage(input_tokens=2000, cache_read_tokens=cached, cache_write_tokens=1800 - cached, output_tokens=1)
+        return ModelResponse(parts=[TextPart("True")], usage=usage)
+
+    llm = RealLLM("test")
+    llm.completion_check_agent.model = FunctionModel(model)
+    await llm.verify_doc("IN WITNESS WHEREOF")
+    await llm.verify_doc("IN WITNESS WHEREOF")
+
+    stats = AGENT_CALLS.stats()["completion_check_agent"]
+    assert stats["input_tokens"] == 4000
+    assert stats["cache_read_tokens"] == 1800 and stats["cache_write_tokens"] == 1800
+    assert stats["uncached_input_tokens"] == 2200
+    print(
+        f"Cache usage: read {stats['cache_read_tokens']}, written {stats['cache_write_tokens']}, "
+        f"uncached {stats['uncached_input_tokens']}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(test_field_request_prefix_is_stable())
+    asyncio.run(test_generation_and_continuation_share_prefix())
+    asyncio.run(test_cache_tokens_are_recorded())
+    print("\nAll prompt caching tests completed successfully!")
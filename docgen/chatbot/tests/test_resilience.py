@@ -0,0 +1,258 @@
+"""
+Test the async retry policy, retry budget and per-model circuit breaker around LLM calls.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import List
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from ..admission import LLM_SCHEDULER, CallContext
+from ..constants.prompts import format_field_request_prompt
+from ..llm import RealLLM
+from ..resilience import (
+    CIRCUIT_BREAKERS,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    RetryPolicy,
+    call_with_retry,
+    stream_with_retry,
+)
+
+FAST = RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.002, timeout=1.0)
+
+
+class ProviderError(Exception):
+    """Stand-in for a provider HTTP error."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def flaky(failures: List[BaseException], result: str = "ok"):
+    """Attempt factory failing with the given errors first, then returning result."""
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return result
+
+    return attempt, calls
+
+
+def test_backoff_is_jittered_and_capped():
+    """Delays are drawn from [0, min(max_delay, base_delay * 2**retry)]."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    delays = [policy.backoff(retry) for retry in range(6) for _ in range(50)]
+    assert all(0 <= delay <= 2.0 for delay in delays)
+    assert max(policy.backoff(0) for _ in range(200)) <= 0.5
+    assert len(set(delays)) > 100, "Delays are jittered"
+    print("Backoff is jittered and capped")
+
+
+async def test_transient_errors_are_retried():
+    """Connection errors, rate limits and timeouts are retried; a bad request is not."""
+    retried = []
+    attempt, calls = flaky([ConnectionError("reset"), ProviderError(429)])
+    breaker = CircuitBreaker("model-a")
+    assert await call_with_retry(attempt, FAST, breaker, RetryBudget(), on_retry=retried.append) == "ok"
+    assert len(calls) == 3 and len(retried) == 2 and breaker.failures == 0
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    calls_before = []
+
+    async def slow_then_fast():
+        calls_before.append(1)
+        if len(calls_before) == 1:
+            await slow()
+        return "late"
+
+    policy = RetryPolicy(attempts=2, base_delay=0.001, timeout=0.05)
+    assert await call_with_retry(slow_then_fast, policy, CircuitBreaker("model-b"), RetryBudget()) == "late"
+
+    attempt, calls = flaky([ProviderError(400)])
+    try:
+        await call_with_retry(attempt, FAST, CircuitBreaker("model-c"), RetryBudget())
+        raise AssertionError("expected ProviderError")
+    except ProviderError:
+        pass
+    assert len(calls) == 1, "4xx responses are not retried"
+    print("Transient errors and deadlines retried, bad requests not")
+
+
+async def test_retry_budget_limits_retries():
+    """Once the shared budget is spent, failures are raised without retrying."""
+    budget = RetryBudget(ratio=0.0, capacity=1)
+    attempt, calls = flaky([ConnectionError("reset")] * 5)
+    try:
+        await call_with_retry(attempt, RetryPolicy(attempts=5, base_delay=0.001), CircuitBreaker("m"), budget)
+    except ConnectionError:
+        pass
+    assert len(calls) == 2 and budget.stats()["exhausted"] == 1
+    print(f"Retry budget stopped retries after {len(calls)} attempts")
+
+
+async def test_circuit_breaker_opens_and_recovers():
+    """Consecutive failures open the breaker; after the reset time one probe closes it again."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("model-d", failure_threshold=3, reset_seconds=30, clock=clock)
+    single = RetryPolicy(attempts=1)
+    for _ in range(3):
+        attempt, _ = flaky([ConnectionError("down")])
+        try:
+            await call_with_retry(attempt, single, breaker, RetryBudget())
+        except ConnectionError:
+            pass
+    assert breaker.state == "open"
+
+    attempt, calls = flaky([])
+    try:
+        await call_with_retry(attempt, single, breaker, RetryBudget())
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError as e:
+        assert e.retry_in == 30
+    assert calls == [] and breaker.short_circuits == 1
+
+    clock.now = 31
+    assert breaker.state == "half_open"
+    assert await call_with_retry(attempt, single, breaker, RetryBudget()) == "ok"
+    assert breaker.state == "closed" and breaker.failures == 0
+
+    # A failed probe re-opens it straight away
+    for _ in range(3):
+        try:
+            await call_with_retry(flaky([ConnectionError("down")])[0], single, breaker, RetryBudget())
+        except ConnectionError:
+            pass
+    clock.now = 62
+    try:
+        await call_with_retry(flaky([ConnectionError("still down")])[0], single, breaker, RetryBudget())
+    except ConnectionError:
+        pass
+    assert breaker.state == "open"
+    print("Breaker opened, short-circuited, probed and closed")
+
+
+async def test_stream_retried_only_before_first_chunk():
+    """A stream failing before its first chunk is reopened; a failure after it reaches the caller."""
+    opened = []
+
+    async def stream(fail_before: bool, fail_after: bool):
+        if fail_before:
+            raise ConnectionError("connect failed")
+        yield "a"
+        if fail_after:
+            raise ConnectionError("reset mid-stream")
+        yield "b"
+
+    def open_stream():
+        opened.append(1)
+        return stream(fail_before=len(opened) == 1, fail_after=False)
+
+    chunks = [chunk async for chunk in stream_with_retry(open_stream, FAST, CircuitBreaker("s"), RetryBudget())]
+    assert chunks == ["a", "b"] and len(opened) == 2
+
+    opened.clear()
+    received = []
+    try:
+        async for chunk in stream_with_retry(
+            lambda: opened.append(1) or stream(False, True), FAST, CircuitBreaker("t"), RetryBudget()
+        ):
+            received.append(chunk)
+    except ConnectionError:
+        pass
+    assert received == ["a"] and len(opened) == 1
+    print("Streams retried before the first chunk only")
+
+
+async def test_open_breaker_falls_back_instantly():
+    """With the model's breaker open, RealLLM skips the model and uses the local fallbacks at once."""
+    CIRCUIT_BREAKERS.clear()
+    model_calls = []
+
+    def model(messages: List[ModelMessage], agent_info: AgentInfo) -> ModelResponse:
+        model_calls.append(1)
+        raise ConnectionError("provider down")
+
+    llm = RealLLM("test")
+    llm.retry_policy = FAST
+    llm.extraction_agent.model = FunctionModel(model, model_name="flaky-model")
+    llm.field_request_agent.model = FunctionModel(model, model_name="flaky-model")
+    breaker = CIRCUIT_BREAKERS.get("flaky-model")
+    breaker.opened_at = breaker.clock()
+
+    started = perf_counter()
+    result = await llm.extract_requirements_with_type("Borrowing money contract", use_cache=False)
+    question = await llm.ask_for_field(["lender_name"], ["lender_name"])
+    elapsed = perf_counter() - started
+
+    assert model_calls == [] and elapsed < 0.1
+    assert result.document_type == "Loan Agreement"
+    assert question == format_field_request_prompt("document", ["lender_name"])
+    CIRCUIT_BREAKERS.clear()
+    print(f"Open breaker: fallbacks served in {elapsed * 1000:.1f} ms without calling the model")
+
+
+async def test_open_breaker_does_not_queue():
+    """A call to a model whose breaker is open fails before waiting for an admission slot, even when all are taken."""
+    CIRCUIT_BREAKERS.clear()
+    release = asyncio.Event()
+    admitted = []
+
+    async def hold_slot(user_id: str):
+        async with LLM_SCHEDULER.slot(CallContext(user_id)):
+            admitted.append(1)
+            await release.wait()
+
+    holders = [asyncio.create_task(hold_slot(f"busy-{i}")) for i in range(LLM_SCHEDULER.max_concurrent)]
+    while len(admitted) < LLM_SCHEDULER.max_concurrent:
+        await asyncio.sleep(0)
+
+    llm = RealLLM("test")
+    llm.completion_check_agent.model = FunctionModel(lambda messages, agent_info: None, model_name="down-model")
+    breaker = CIRCUIT_BREAKERS.get("down-model")
+    breaker.opened_at = breaker.clock()
+    positions = []
+    try:
+        async with asyncio.timeout(0.5):
+            for stream in (False, True):
+                try:
+                    result = await llm.run_completion(llm.completion_check_agent, "check", stream=stream)
+                    if stream:
+                        [chunk async for chunk in result]
+                    raise AssertionError("The open breaker let the call through")
+                except CircuitOpenError:
+                    positions.append(len(LLM_SCHEDULER.waiting))
+    finally:
+        release.set()
+        await asyncio.gather(*holders)
+        CIRCUIT_BREAKERS.clear()
+    assert positions == [0, 0] and breaker.short_circuits == 2
+    print("Open breaker failed both calls without queueing for a slot")
+
+
+if __name__ == "__main__":
+    test_backoff_is_jittered_and_capped()
+    asyncio.run(test_transient_errors_are_retried())
+    asyncio.run(test_retry_budget_limits_retries())
+    asyncio.run(test_circuit_breaker_opens_and_recovers())
+    asyncio.run(test_stream_retried_only_before_first_chunk())
+    asyncio.run(test_open_breaker_falls_back_instantly())
+    asyncio.run(test_open_breaker_does_not_queue())
+    print("\nAll resilience tests completed successfully!")
@@ -0,0 +1,204 @@
+"""
+Test horizontal scale-out: conversation sharding and generation on a worker.
+
+The InMemoryChannelLayer stands in for Redis here; the socket consumer and the
+generation worker only talk to each other through the layer, as they would across processes.
+"""
+
+import asyncio
+from collections import Counter
+from typing import AsyncGenerator, List
+
+from channels.layers import InMemoryChannelLayer
+
+from .. import consumers, store
+from ..consumers import DocumentAgentConsumer
+from ..llm import LLM_REGISTRY, DocumentOrchestrator, RealLLM
+from ..schemas import DocumentContext
+from ..sharding import generation_channel_for, generation_channels
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+from ..workers import DocumentGenerationWorker
+
+CLAUSES = ["# LOAN AGREEMENT\n", "1. The Lender lends the Borrower $500.\n", "IN WITNESS WHEREOF\n"]
+
+
+class ScriptedLLM(RealLLM):
+    """LLM stub that streams a fixed document and reports it complete."""
+
+    def __init__(self):
+        super().__init__("test")
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        for clause in CLAUSES:
+            await asyncio.sleep(0.001)
+            yield clause
+
+    async def verify_doc(self, document: str) -> bool:
+        return True
+
+
+def test_sharding_is_stable_and_balanced():
+    """Every process picks the same shard, load is spread, and adding a shard moves few conversations."""
+    conversations = [f"conv-{i}" for i in range(3000)]
+    four = generation_channels(4)
+    five = generation_channels(5)
+
+    owners = {cid: generation_channel_for(cid, four) for cid in conversations}
+    assert owners == {cid: generation_channel_for(cid, four) for cid in conversations}
+
+    load = Counter(owners.values())
+    assert set(load) == set(four) and min(load.values()) > 0.2 * len(conversations)
+
+    moved = [cid for cid in conversations if generation_channel_for(cid, five) != owners[cid]]
+    assert all(generation_channel_for(cid, five) == five[-1] for cid in moved), "Only moves onto the new shard"
+    assert len(moved) < 0.3 * len(conversations)
+    print(f"Shard load {dict(load)}, {len(moved)} of {len(conversations)} moved when adding a shard")
+
+
+class SlowLLM(ScriptedLLM):
+    """Scripted LLM that takes long enough per clause to be cancelled mid-document."""
+
+    async def generate_document(
+        self, context: DocumentContext, recovery: bool = False, checkpoint=None, run=None
+    ) -> AsyncGenerator[str, None]:
+        for clause in CLAUSES:
+            await asyncio.sleep(0.05)
+            yield clause
+
+
+async def make_socket(layer: InMemoryChannelLayer) -> DocumentAgentConsumer:
+    """Socket consumer on the layer, about to generate a loan agreement for conv-1."""
+    socket = DocumentAgentConsumer()
+    socket.channel_layer = layer
+    socket.channel_name = await layer.new_channel()
+    socket.orchestrators = {}
+    socket.generation_tasks = {}
+    socket.remote_generations = {}
+    socket.conversation_writer = store.get_conversation_writer()
+    socket.current_conversation_id = "conv-1"
+    socket.sent: List[dict] = []
+
+    async def send_json(content, close=False):
+        socket.sent.append(content)
+
+    socket.send_json = send_json
+
+    orchestrator = DocumentOrchestrator(model_name="test")
+    orchestrator.fields = {"lender_name": "Alice", "borrower_name": "Bob"}
+    orchestrator.document_type = "Loan Agreement"
+    orchestrator.state = "generating"
+    socket.orchestrators["conv-1"] = orchestrator
+    return socket
+
+
+async def test_generation_runs_on_worker():
+    """A worker-mode socket hands generation to its shard and receives every frame back."""
+    layer = InMemoryChannelLayer()
+    store._conversation_writer = BatchedConversationWriter(InMemoryConversationStore(), flush_interval=60)
+    LLM_REGISTRY.clear()
+    LLM_REGISTRY.register(ScriptedLLM())
+    consumers.GENERATION_MODE = "worker"
+
+    try:
+        socket = await make_socket(layer)
+        await socket.start_generation()
+        assert "conv-1" in socket.remote_generations and not socket.generation_tasks
+
+        worker = DocumentGenerationWorker()
+        worker.channel_layer = layer
+        await worker.generation_start(await layer.receive(generation_channel_for("conv-1")))
+
+        while True:
+            event = await asyncio.wait_for(layer.receive(socket.channel_name), timeout=5)
+            if event["type"] == "generation.done":
+                await socket.generation_done(event)
+                break
+            await socket.generation_relay(event)
+    finally:
+        consumers.GENERATION_MODE = "inline"
+        store._conversation_writer = None
+        LLM_REGISTRY.clear()
+
+    streamed = "".join(frame["chunk"] for frame in socket.sent if frame["type"] == "generate_document")
+    assert streamed == "".join(CLAUSES)
+    assert any(frame["type"] == "generation_complete" for frame in socket.sent)
+    assert not socket.remote_generations and not worker.relays
+    assert socket.orchestrators["conv-1"].state == "idle", "Socket picks up the state the worker persisted"
+    print(f"Worker relayed {len(socket.sent)} frames for conv-1")
+
+
+async def test_silent_worker_releases_conversation():
+    """A conversation handed to a worker that never answers is taken back and can be resumed."""
+    layer = InMemoryChannelLayer()
+    store._conversation_writer = BatchedConversationWriter(InMemoryConversationStore(), flush_interval=60)
+    consumers.GENERATION_MODE = "worker"
+    timeout = consumers.GENERATION_WORKER_TIMEOUT
+    consumers.GENERATION_WORKER_TIMEOUT = 0.05
+
+    try:
+        socket = await make_socket(layer)
+        await socket.start_generation()
+        token = socket.remote_generations["conv-1"].token
+        await asyncio.sleep(0.15)
+
+        assert "conv-1" not in socket.remote_generations, "No worker ever answered"
+        assert socket.orchestrators["conv-1"].state == "interrupted"
+        assert "stopped responding" in socket.sent[-1]["content"]
+        cancel = [await layer.receive(generation_channel_for("conv-1")) for _ in range(2)][-1]
+        assert cancel["type"] == "generation.cancel" and cancel["reason"] == "timeout" and cancel["token"] == token
+
+        # The worker turning up late is ignored instead of overwriting the conversation again
+        await socket.generation_relay(
+            {"conversation_id": "conv-1", "token": token, "frame": {"type": "generate_document", "chunk": "late"}}
+        )
+        await socket.generation_done({"conversation_id": "conv-1", "token": token})
+        assert socket.sent[-1]["content"].startswith("Document generation stopped responding")
+        assert socket.orchestrators["conv-1"].state == "interrupted"
+    finally:
+        consumers.GENERATION_MODE = "inline"
+        consumers.GENERATION_WORKER_TIMEOUT = timeout
+        store._conversation_writer = None
+    print("Silent worker: conversation released as interrupted, late frames dropped")
+
+
+async def test_reset_discards_worker_generation():
+    """Resetting while a worker generates cancels it, and the worker does not persist the conversation again."""
+    layer = InMemoryChannelLayer()
+    store._conversation_writer = BatchedConversationWriter(InMemoryConversationStore(), flush_interval=60)
+    LLM_REGISTRY.clear()
+    LLM_REGISTRY.register(SlowLLM())
+    consumers.GENERATION_MODE = "worker"
+
+    try:
+        socket = await make_socket(layer)
+        await socket.start_generation()
+        worker = DocumentGenerationWorker()
+        worker.channel_layer = layer
+        await worker.generation_start(await layer.receive(generation_channel_for("conv-1")))
+        await asyncio.sleep(0.07)
+
+        await socket.handle_reset_all_sessions()
+        assert not socket.remote_generations
+        await worker.generation_cancel(await layer.receive(generation_channel_for("conv-1")))
+        while (await asyncio.wait_for(layer.receive(socket.channel_name), timeout=5))["type"] != "generation.done":
+            pass
+
+        writer = store.get_conversation_writer()
+        await writer.flush()
+        assert await writer.load(socket.owner, "conv-1") is None, "The reset conversation must stay deleted"
+        assert not worker.relays
+    finally:
+        consumers.GENERATION_MODE = "inline"
+        store._conversation_writer = None
+        LLM_REGISTRY.clear()
+    print("Reset during a worker generation: cancelled, nothing persisted")
+
+
+if __name__ == "__main__":
+    test_sharding_is_stable_and_balanced()
+    asyncio.run(test_generation_runs_on_worker())
+    asyncio.run(test_silent_worker_releases_conversation())
+    asyncio.run(test_reset_discards_worker_generation())
+    print("\nAll scale-out tests completed successfully!")
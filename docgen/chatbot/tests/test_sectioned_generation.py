@@ -0,0 +1,195 @@
+"""
+Test section-wise document generation: concurrent sections, ordered streaming and per-section retry.
+"""
+
+import asyncio
+import re
+from typing import AsyncGenerator, List
+
+from pydantic_ai.models.function import FunctionModel
+from pydantic_ai.models.test import TestModel
+
+from ..completion import COMPLETE
+from ..continuation import GenerationRun
+from ..llm import DocumentOrchestrator, RealLLM
+from ..sections import SectionedGeneration
+
+OUTLINE = {
+    "title": "LOAN AGREEMENT",
+    "sections": [
+        {"heading": "1. PARTIES", "brief": "Lender and borrower"},
+        {"heading": "2. LOAN AMOUNT", "brief": "Principal"},
+        {"heading": "3. REPAYMENT", "brief": "Schedule"},
+        {"heading": "4. EXECUTION", "brief": "Signatures"},
+    ],
+}
+SECTION_TEXT = {
+    "1. PARTIES": "## 1. PARTIES\n\nAlice lends money to Bob under this Agreement.",
+    "2. LOAN AMOUNT": "## 2. LOAN AMOUNT\n\nThe principal amount of the loan is $500.",
+    "3. REPAYMENT": "## 3. REPAYMENT\n\nBob shall repay the loan in twelve monthly installments.",
+    "4. EXECUTION": (
+        "## 4. EXECUTION\n\nIN WITNESS WHEREOF, the parties sign below.\n\n"
+        "LENDER:\nName: Alice\nDate: ______\n\nBORROWER:\nName: Bob\nDate: ______"
+    ),
+}
+
+
+def chunks(text: str, size: int = 8) -> List[str]:
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def section_texts(count: int) -> List[str]:
+    return [f"## {index + 1}. SECTION\n\nClause text of section {index + 1} goes here." for index in range(count)]
+
+
+async def test_sections_stream_in_order():
+    """Later sections finish first but are streamed after earlier ones; concurrency stays within the limit."""
+    texts = section_texts(6)
+    finished: List[int] = []
+
+    async def stream_section(index: int, partial: str, run: GenerationRun) -> AsyncGenerator[str, None]:
+        for chunk in chunks(texts[index]):
+            await asyncio.sleep(0.002 * (6 - index))  # later sections are faster
+            yield chunk
+        finished.append(index)
+
+    generation = SectionedGeneration(6, stream_section, concurrency=3)
+    streamed = []
+    first_chunk_finished = None
+    async for chunk in generation.stream():
+        if first_chunk_finished is None:
+            first_chunk_finished = len(finished)
+        streamed.append(chunk)
+
+    assert "".join(streamed) == "\n\n".join(texts)
+    assert generation.peak_active == 3
+    assert first_chunk_finished == 0, "The first section streams live, before any section finished"
+    assert finished[:3] != [0, 1, 2], "Sections completed out of order but were reassembled in order"
+    print(f"Ordered reassembly, completion order {finished}, peak concurrency {generation.peak_active}")
+
+
+async def test_section_retry_continues_partial_text():
+    """A section whose stream breaks is retried from the text it already produced, without duplicates."""
+    texts = section_texts(3)
+    partials = []
+
+    async def stream_section(index: int, partial: str, run: GenerationRun) -> AsyncGenerator[str, None]:
+        if index == 1 and not partial:
+            yield texts[1][:20]
+            raise ConnectionError("stream reset by peer")
+        if index == 1:
+            partials.append(partial)
+            # The model restarts the last words before continuing
+            text = texts[1][5:]
+        elif index == 2 and run.finish_reason is None and not partial:
+            run.finish_reason = "length"
+            text = texts[2][:15]
+        else:
+            text = texts[index][len(partial) :]
+        for chunk in chunks(text):
+            yield chunk
+
+    generation = SectionedGeneration(3, stream_section, concurrency=3, retries=2)
+    document = "".join([chunk async for chunk in generation.stream()])
+
+    assert document == "\n\n".join(texts)
+    assert partials == [texts[1][:20]]
+    assert generation.attempts == [1, 2, 2]
+    print(f"Sections retried from their partial text, attempts {generation.attempts}")
+
+
+def make_orchestrator(llm: RealLLM) -> DocumentOrchestrator:
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice", "borrower_name": "Bob", "loan_amount": "$500"}
+    orchestrator.document_type = "Loan Agreement"
+    orchestrator.state = "generating"
+    orchestrator.generation_strategy = "sections"
+    return orchestrator
+
+
+def requested_section(messages) -> str:
+    """Heading of the section a section-agent prompt asks for."""
+    return re.search(r'Write section "([^"]+)"', str(messages[-1])).group(1)
+
+
+async def test_orchestrator_sectioned_generation():
+    """The TOC agent plans, the section agent drafts every section, and the document is complete."""
+
+    async def stream(messages, agent_info):
+        for chunk in chunks(SECTION_TEXT[requested_section(messages)]):
+            yield chunk
+
+    llm = RealLLM("test")
+    llm.toc_agent.model = TestModel(custom_output_args=OUTLINE)
+    llm.section_agent.model = FunctionModel(stream_function=stream)
+    orchestrator = make_orchestrator(llm)
+
+    document = "".join([chunk async for chunk in orchestrator.generate_document()])
+
+    assert document == "# LOAN AGREEMENT\n\n" + "\n\n".join(SECTION_TEXT.values())
+    assert orchestrator.completion.verdict() == COMPLETE
+    usage = orchestrator.usage.to_dict()
+    assert usage["runs"] == 1 and usage["continuations"] == 0 and usage["output_tokens"] > 0
+    print(f"Sectioned document complete, usage {usage}")
+
+
+async def test_failed_section_continues_single_stream():
+    """A section that keeps failing ends the pass; the rest of the document is continued from the checkpoint."""
+
+    async def section_stream(messages, agent_info):
+        heading = requested_section(messages)
+        if heading == "3. REPAYMENT":
+            raise ConnectionError("provider unavailable")
+        for chunk in chunks(SECTION_TEXT[heading]):
+            yield chunk
+
+    continuation_prompts = []
+
+    async def generation_stream(messages, agent_info):
+        continuation_prompts.append(str(messages[-1]))
+        for chunk in chunks(SECTION_TEXT["3. REPAYMENT"] + "\n\n" + SECTION_TEXT["4. EXECUTION"]):
+            yield chunk
+
+    llm = RealLLM("test")
+    llm.toc_agent.model = TestModel(custom_output_args=OUTLINE)
+    llm.section_agent.model = FunctionModel(stream_function=section_stream)
+    llm.generation_agent.model = FunctionModel(stream_function=generation_stream)
+    orchestrator = make_orchestrator(llm)
+
+    document = "".join([chunk async for chunk in orchestrator.generate_document()])
+
+    assert document.startswith("# LOAN AGREEMENT\n\n## 1. PARTIES")
+    assert document.count("## 3. REPAYMENT") == 1 and "## 4. EXECUTION" in document
+    assert len(continuation_prompts) == 1 and "2. LOAN AMOUNT" in continuation_prompts[0]
+    assert orchestrator.usage.continuations == 1
+    print("Failed section continued from the checkpoint in a single stream")
+
+
+async def test_outline_failure_falls_back_to_single_stream():
+    """Without an outline the document is generated the usual way."""
+
+    async def toc(messages, agent_info):
+        raise ConnectionError("provider unavailable")
+
+    async def generation_stream(messages, agent_info):
+        for chunk in chunks("\n\n".join(SECTION_TEXT.values())):
+            yield chunk
+
+    llm = RealLLM("test")
+    llm.toc_agent.model = FunctionModel(toc)
+    llm.generation_agent.model = FunctionModel(stream_function=generation_stream)
+    orchestrator = make_orchestrator(llm)
+
+    document = "".join([chunk async for chunk in orchestrator.generate_document()])
+
+    assert document == "\n\n".join(SECTION_TEXT.values())
+    print("Outline failure fell back to single-stream generation")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_sections_stream_in_order())
+    asyncio.run(test_section_retry_continues_partial_text())
+    asyncio.run(test_orchestrator_sectioned_generation())
+    asyncio.run(test_failed_section_continues_single_stream())
+    asyncio.run(test_outline_failure_falls_back_to_single_stream())
+    print("\nAll sectioned generation tests completed successfully!")
@@ -0,0 +1,82 @@
+"""
+Concurrency stress test for per-conversation acknowledgment history.
+Drives hundreds of simulated conversations through DocumentOrchestrator at once
+and checks that no conversation sees another conversation's saved fields.
+"""
+
+import asyncio
+import random
+from typing import Dict, List
+
+from ..llm import MAX_RECENT_ACTIONS, DocumentOrchestrator, RealLLM
+from ..schemas import FieldExtractionResult
+
+CONVERSATIONS = 300
+FIELDS = ["landlord_name", "tenant_name", "property_address", "monthly_rent"]
+
+
+class RecordingLLM(RealLLM):
+    """LLM stub that yields to the event loop on every call and records acknowledgment prompts."""
+
+    def __init__(self):
+        super().__init__("test")
+        self.acknowledgments: List[str] = []
+
+    async def extract_requirements_with_type(self, user_prompt: str, use_cache: bool = True) -> FieldExtractionResult:
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return FieldExtractionResult(fields=list(FIELDS), document_type="Rental Agreement")
+
+    async def map_user_input_to_fields(self, user_input: str, missing_fields: List[str]) -> Dict[str, str]:
+        await asyncio.sleep(random.uniform(0, 0.01))
+        # Inputs look like "<conversation>|<value>" and fill the first missing field
+        return {missing_fields[0]: user_input} if "|" in user_input and missing_fields else {}
+
+    async def ask_for_field(self, missing_fields, fields_to_request, user_last_action="", greet_user=False, user_goal=""):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        self.acknowledgments.append(user_last_action)
+        return f"{user_goal}::{user_last_action}"
+
+
+async def run_conversation(llm: RecordingLLM, conversation: int) -> None:
+    """Run one conversation and assert every acknowledgment belongs to it."""
+    tag = f"conv-{conversation}"
+    orchestrator = DocumentOrchestrator(llm)
+    await orchestrator.start(tag)
+
+    while orchestrator._missing_fields():
+        question = await orchestrator.next_question()
+        acknowledged = question.split("::", 1)[1]
+        for action in filter(None, acknowledged.split(", ")):
+            assert f"'{tag}|" in action, f"{tag} received another conversation's action: {action}"
+        await orchestrator.record_user_input(f"{tag}|{random.randint(0, 9999)}")
+
+
+async def test_no_cross_talk_between_conversations():
+    """Hundreds of interleaved conversations keep their acknowledgments separate."""
+    llm = RecordingLLM()
+
+    await asyncio.gather(*(run_conversation(llm, i) for i in range(CONVERSATIONS)))
+
+    acknowledged = [ack for ack in llm.acknowledgments if ack]
+    print(f"Ran {CONVERSATIONS} conversations, {len(acknowledged)} acknowledgments, no cross-talk")
+    assert acknowledged, "Expected acknowledgments to be passed to ask_for_field"
+
+
+async def test_recent_actions_bounded_and_ordered():
+    """The acknowledgment buffer keeps only the most recent actions, oldest first."""
+    orchestrator = DocumentOrchestrator(RecordingLLM())
+
+    for i in range(MAX_RECENT_ACTIONS + 5):
+        orchestrator._record_action(f"action {i}")
+    orchestrator._record_action(f"action {MAX_RECENT_ACTIONS + 4}")  # duplicate is ignored
+
+    actions = list(orchestrator.recent_actions)
+    assert len(actions) == MAX_RECENT_ACTIONS
+    assert actions[0] == "action 5" and actions[-1] == f"action {MAX_RECENT_ACTIONS + 4}"
+    print(f"Recent actions bounded to {len(actions)} entries")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_no_cross_talk_between_conversations())
+    asyncio.run(test_recent_actions_bounded_and_ordered())
+    print("\nAll session isolation tests completed successfully!")
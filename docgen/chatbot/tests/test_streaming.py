@@ -0,0 +1,256 @@
+"""
+Test the streaming helpers used by the document consumer.
+"""
+
+import asyncio
+from contextlib import aclosing
+from time import perf_counter
+from typing import List, Tuple
+
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from ..completion import CompletionDetector
+from ..consumers import DocumentAgentConsumer
+from ..llm import DocumentOrchestrator, RealLLM
+from ..store import BatchedConversationWriter, InMemoryConversationStore
+from ..streaming import (
+    DocumentBuffer,
+    FrameCoalescer,
+    LineAssembler,
+    PageBreak,
+    StreamingPaginator,
+    coalesce_frames,
+)
+
+# Title, 40 clauses, then a signature block: pages break at line 30 and before "## Signatures"
+LONG_DOCUMENT = (
+    "# LOAN AGREEMENT\n\n"
+    + "".join(f"{i}. The Borrower shall comply with clause {i}.\n" for i in range(1, 41))
+    + "\n## Signatures\n\nSignature of Lender: ____\nSignature of Borrower: ____"
+)
+
+
+def test_document_buffer():
+    """The buffer returns the same text as plain concatenation."""
+    chunks = [f"Section {i}. The parties agree to clause {i}.\n" for i in range(500)]
+    expected = "".join(chunks)
+
+    buffer = DocumentBuffer()
+    for chunk in chunks:
+        buffer.append(chunk)
+
+    assert len(buffer) == len(expected)
+    assert buffer.tail(1000) == expected[-1000:]
+    assert buffer.tail(10**9) == expected
+    assert buffer.getvalue() == expected
+    assert buffer.getvalue() is buffer.getvalue(), "Joined text should be cached"
+
+    buffer.append("Signature: ____")
+    assert buffer.tail(15) == "Signature: ____"
+    assert buffer.getvalue() == expected + "Signature: ____"
+
+    buffer.clear()
+    assert not buffer and buffer.getvalue() == "" and buffer.tail(5) == ""
+    print("DocumentBuffer matches string concatenation")
+
+
+def test_frame_coalescer():
+    """Deltas are coalesced by size and by age, and nothing is lost."""
+    now = [0.0]
+    coalescer = FrameCoalescer(max_chars=10, max_latency=0.016, clock=lambda: now[0])
+
+    assert coalescer.add("abc") is None
+    assert coalescer.add("defg") is None
+    assert coalescer.add("hij") == "abcdefghij"  # size limit reached
+
+    assert coalescer.add("k") is None
+    now[0] += 0.02
+    assert coalescer.add("l") == "kl"  # oldest delta waited past the latency limit
+
+    assert coalescer.add("m") is None
+    assert coalescer.flush() == "m"
+    assert coalescer.flush() is None
+
+    passthrough = FrameCoalescer(max_chars=0, max_latency=0)
+    assert [passthrough.add(c) for c in ["a", "b"]] == ["a", "b"]
+    print("FrameCoalescer flushes by size and latency")
+
+
+async def test_stalled_stream_flushes_on_time():
+    """Buffered text goes out once it is due even when the next delta is slow to arrive."""
+    closed = []
+
+    async def stalling():
+        try:
+            yield "Parties: "
+            yield "Alice"
+            await asyncio.sleep(0.2)
+            yield " and Bob"
+        finally:
+            closed.append(True)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    arrivals = []
+    async with aclosing(coalesce_frames(stalling(), FrameCoalescer(max_chars=512, max_latency=0.02))) as frames:
+        async for frame in frames:
+            arrivals.append((frame, loop.time() - started))
+
+    assert [frame for frame, _ in arrivals] == ["Parties: Alice", " and Bob"]
+    assert arrivals[0][1] < 0.1, "The first frame must not wait for the stalled delta"
+    assert closed == [True]
+
+    # Closing early leaves no read running on the stream, so it can be closed right after
+    stream = stalling()
+    async with aclosing(coalesce_frames(stream, FrameCoalescer(max_chars=512, max_latency=0.02))) as frames:
+        async for frame in frames:
+            break
+    await stream.aclose()
+    print(f"Stalled stream flushed after {arrivals[0][1] * 1000:.0f} ms instead of waiting for the next delta")
+
+
+def paginate(document: str, chunk_size: int) -> StreamingPaginator:
+    paginator = StreamingPaginator()
+    for start in range(0, len(document), chunk_size):
+        paginator.feed(document[start : start + chunk_size])
+    paginator.finish()
+    return paginator
+
+
+def test_streaming_paginator():
+    """Page breaks follow the layout rules and do not depend on how the stream is split."""
+    paginator = paginate(LONG_DOCUMENT, 7)
+    offsets = [page_break.offset for page_break in paginator.breaks]
+    assert LONG_DOCUMENT[offsets[0] :].startswith("30. "), "30 lines fill the first page"
+    assert LONG_DOCUMENT[offsets[1] :].startswith("## Signatures")
+    assert paginator.metadata() == {"count": 3, "breaks": offsets}
+    for chunk_size in (1, 64, len(LONG_DOCUMENT)):
+        assert paginate(LONG_DOCUMENT, chunk_size).breaks == paginator.breaks
+
+    # Breaks are handed out once, as soon as the line that starts the page is complete
+    live = StreamingPaginator(lines_per_page=2)
+    live.feed("one\ntwo\nthr")
+    assert live.take_breaks() == []
+    live.feed("ee\n")
+    assert live.take_breaks() == [PageBreak(page=2, offset=8)] and live.take_breaks() == []
+
+    # A signature line ending the stream without a newline still starts a page
+    tail = StreamingPaginator()
+    tail.feed("".join(f"line {i}\n" for i in range(12)) + "Signature: ____")
+    assert tail.breaks == []
+    tail.finish()
+    assert tail.page_count == 2
+    print(f"StreamingPaginator: {paginator.metadata()}")
+
+
+def judge_complete(llm: RealLLM) -> RealLLM:
+    """Have the LLM completeness checker accept any ending the completion detector is unsure of."""
+    def completion_check(messages, agent_info) -> ModelResponse:
+        return ModelResponse(parts=[TextPart("true")])
+
+    llm.completion_check_agent.model = FunctionModel(completion_check)
+    return llm
+
+
+def test_line_assembler():
+    """Lines come out as str.split would give them, and a long open line costs linear time, not quadratic."""
+    text = "first\n\nsecond line\nthird" + "x" * 50 + "\nlast"
+    for chunk_size in (1, 3, len(text)):
+        assembler = LineAssembler()
+        lines = []
+        for start in range(0, len(text), chunk_size):
+            lines.extend(assembler.feed(text[start : start + chunk_size]))
+        assert lines + [assembler.take_partial_line()] == text.split("\n"), chunk_size
+        assert assembler.partial_line == ""
+
+    def feed_one_line(chars: int) -> float:
+        paginator, detector = StreamingPaginator(), CompletionDetector()
+        started = perf_counter()
+        for _ in range(chars // 10):
+            paginator.feed("0123456789")
+            detector.feed("0123456789")
+        paginator.feed("\n")
+        detector.feed("\n")
+        return perf_counter() - started
+
+    short, long = feed_one_line(40_000), feed_one_line(400_000)
+    assert long < short * 30, f"10x the line took {long / short:.0f}x as long"
+    print(f"LineAssembler: 10x longer line took {long / short:.1f}x as long")
+
+
+async def stream_to_consumer(stream) -> Tuple[List[dict], DocumentOrchestrator]:
+    """Generate a document from `stream` through DocumentAgentConsumer.stream_document, collecting the frames sent."""
+    llm = judge_complete(RealLLM("test"))
+    llm.generation_agent.model = FunctionModel(stream_function=stream)
+    consumer = DocumentAgentConsumer()
+    consumer.channel_layer = object()
+    consumer.orchestrators = {}
+    consumer.generation_tasks = {}
+    consumer.remote_generations = {}
+    consumer.conversation_writer = BatchedConversationWriter(InMemoryConversationStore())
+    sent: List[dict] = []
+
+    async def send_json(content, close=False):
+        sent.append(content)
+
+    consumer.send_json = send_json
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"lender_name": "Alice"}
+    orchestrator.state = "generating"
+    consumer.orchestrators["conv-1"] = orchestrator
+    await consumer.stream_document("conv-1")
+    return sent, orchestrator
+
+
+async def test_page_breaks_streamed_live():
+    """The consumer sends page_break frames while streaming; the final frame has page metadata, not the text."""
+
+    async def stream(messages, agent_info):
+        for start in range(0, len(LONG_DOCUMENT), 40):
+            yield LONG_DOCUMENT[start : start + 40]
+
+    sent, orchestrator = await stream_to_consumer(stream)
+
+    types = [frame["type"] for frame in sent]
+    complete = sent[types.index("generation_complete")]
+    breaks = [frame for frame in sent if frame["type"] == "page_break"]
+    assert [frame["page"] for frame in breaks] == [2, 3]
+    assert types.index("page_break") < types.index("generate_document", types.index("page_break")), "Sent mid-stream"
+    assert "full_document" not in complete
+    assert complete["pages"] == {"count": 3, "breaks": [frame["offset"] for frame in breaks]}
+    streamed = "".join(frame["chunk"] for frame in sent if frame["type"] == "generate_document")
+    assert complete["document_length"] == len(streamed) == len(orchestrator.document)
+    print(f"Streamed {len(breaks)} page breaks; final frame: {complete['pages']}")
+
+
+async def test_frames_rebuild_the_document():
+    """Each document frame carries only the new text, so appending the frames in order rebuilds the document."""
+
+    async def stream(messages, agent_info):
+        for start in range(0, len(LONG_DOCUMENT), 300):
+            yield LONG_DOCUMENT[start : start + 300]
+            await asyncio.sleep(0.03)  # Past the flush latency, so every delta goes out as its own frame
+
+    sent, orchestrator = await stream_to_consumer(stream)
+
+    frames = [frame["chunk"] for frame in sent if frame["type"] == "generate_document"]
+    assert len(frames) > 3
+    # What the client does with them: append each frame to the text so far
+    rebuilt = ""
+    for chunk in frames:
+        assert orchestrator.document.getvalue()[len(rebuilt) :].startswith(chunk), "A frame repeats earlier text"
+        rebuilt += chunk
+    assert rebuilt == orchestrator.document.getvalue() == LONG_DOCUMENT
+    print(f"{len(frames)} frames rebuilt the {len(rebuilt)}-char document")
+
+
+if __name__ == "__main__":
+    test_document_buffer()
+    test_frame_coalescer()
+    asyncio.run(test_stalled_stream_flushes_on_time())
+    test_streaming_paginator()
+    test_line_assembler()
+    asyncio.run(test_page_breaks_streamed_live())
+    asyncio.run(test_frames_rebuild_the_document())
+    print("\nAll streaming tests completed successfully!")
@@ -0,0 +1,120 @@
+"""
+Test pipelined collecting turns: the next question is drafted while the reply is mapped.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Dict, List
+
+from ..llm import DocumentOrchestrator, RealLLM
+from ..metrics import DRAFT_OUTCOMES
+
+MODEL_LATENCY = 0.05
+
+
+class SlowLLM(RealLLM):
+    """LLM stub where mapping and question generation each take MODEL_LATENCY."""
+
+    def __init__(self, fill_requested: bool = True):
+        super().__init__("test")
+        self.fill_requested = fill_requested
+
+    async def map_user_input_to_fields(self, user_input: str, missing_fields: List[str]) -> Dict[str, str]:
+        await asyncio.sleep(MODEL_LATENCY)
+        return {name: user_input for name in missing_fields[:2]} if self.fill_requested else {}
+
+    async def ask_for_field(self, missing_fields, fields_to_request, user_last_action="", greet_user=False, user_goal=""):
+        await asyncio.sleep(MODEL_LATENCY)
+        return f"Please provide {', '.join(fields_to_request)}"
+
+
+def make_orchestrator(llm: SlowLLM) -> DocumentOrchestrator:
+    orchestrator = DocumentOrchestrator(llm)
+    orchestrator.fields = {"landlord_name": None, "tenant_name": None, "rental_period": None, "lease_terms": None}
+    orchestrator.state = "collecting"
+    orchestrator.user_greeted = True
+    orchestrator.requested_fields = ["landlord_name", "tenant_name"]
+    return orchestrator
+
+
+async def test_draft_reused_when_prediction_holds():
+    """Mapping and drafting overlap, so the turn costs about one model latency."""
+    llm = SlowLLM()
+    orchestrator = make_orchestrator(llm)
+    reused_before = DRAFT_OUTCOMES["reused"]
+
+    started = perf_counter()
+    question = await orchestrator.answer_and_ask("Bob and Jane")
+    elapsed = perf_counter() - started
+
+    assert question == "Please provide rental_period, lease_terms"
+    assert orchestrator.requested_fields == ["rental_period", "lease_terms"]
+    assert DRAFT_OUTCOMES["reused"] == reused_before + 1
+    assert elapsed < 1.8 * MODEL_LATENCY, f"Turn took {elapsed:.3f}s, expected overlap"
+    print(f"Pipelined turn: {elapsed * 1000:.0f} ms for two {MODEL_LATENCY * 1000:.0f} ms model calls")
+
+
+async def test_draft_regenerated_when_fields_differ():
+    """If the reply did not fill the requested fields, the draft is dropped and the question regenerated."""
+    llm = SlowLLM(fill_requested=False)
+    orchestrator = make_orchestrator(llm)
+    regenerated_before = DRAFT_OUTCOMES["regenerated"]
+
+    question = await orchestrator.answer_and_ask("I'm not sure yet")
+
+    assert question == "Please provide landlord_name, tenant_name"
+    assert DRAFT_OUTCOMES["regenerated"] == regenerated_before + 1
+    print(f"Regenerated question: {question}")
+
+
+async def test_draft_discarded_when_reply_fills_everything():
+    """A reply that fills every remaining field ends the turn without waiting for the draft or regenerating it."""
+    llm = SlowLLM()
+    calls = []
+
+    async def map_everything(user_input: str, missing_fields: List[str]) -> Dict[str, str]:
+        await asyncio.sleep(MODEL_LATENCY)
+        return {name: user_input for name in missing_fields}
+
+    async def ask_for_field(*args, **kwargs):
+        calls.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            calls.append("cancelled")
+            raise
+
+    llm.map_user_input_to_fields = map_everything
+    llm.ask_for_field = ask_for_field
+    orchestrator = make_orchestrator(llm)
+    before = dict(DRAFT_OUTCOMES)
+
+    started = perf_counter()
+    question = await orchestrator.answer_and_ask("Bob, Jane, one year, no pets")
+    await asyncio.sleep(0)
+
+    assert question is None and calls == ["started", "cancelled"]
+    assert perf_counter() - started < 1.8 * MODEL_LATENCY
+    assert DRAFT_OUTCOMES["discarded"] == before["discarded"] + 1
+    assert DRAFT_OUTCOMES["regenerated"] == before["regenerated"]
+    print("Draft discarded once the reply filled every field")
+
+
+async def test_sequential_mode():
+    """Without pipelining the turn pays both model latencies back to back."""
+    orchestrator = make_orchestrator(SlowLLM())
+
+    started = perf_counter()
+    await orchestrator.answer_and_ask("Bob and Jane", pipelined=False)
+    elapsed = perf_counter() - started
+
+    assert elapsed >= 2 * MODEL_LATENCY
+    print(f"Sequential turn: {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_draft_reused_when_prediction_holds())
+    asyncio.run(test_draft_regenerated_when_fields_differ())
+    asyncio.run(test_draft_discarded_when_reply_fills_everything())
+    asyncio.run(test_sequential_mode())
+    print("\nAll turn pipelining tests completed successfully!")
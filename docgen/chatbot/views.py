@@ -1,3 +1,110 @@
-from django.shortcuts import render
+"""
+HTTP views for the chatbot app.
+"""
 
-# Create your views here.
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .admission import LLM_SCHEDULER
+from .classifier import LOCAL_CLASSIFIER_STATS
+from .export import EXPORT_FORMATS, EXPORTER, ExportUnavailable, export_etag
+from .field_mapper import PREMAP_STATS
+from .llm import LLM_REGISTRY
+from .metrics import render_prometheus
+from .resilience import CIRCUIT_BREAKERS, RETRY_BUDGET
+from .store import conversation_owner, get_conversation_writer
+
+# Size of the chunks a PDF export is streamed in
+EXPORT_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+@require_GET
+def metrics(request):
+    """
+    Expose this process's metrics in the Prometheus text format.
+
+    Covers LLM agent calls, turn latency, drafts and completion checks, plus the
+    premapper, local classifier, LLM registry, extraction and document cache, retry budget, circuit
+    breaker, admission queue and export cache counters. Every server process keeps its own numbers, so each
+    one is scraped separately.
+    """
+    gauges = [
+        ("premap", {}, PREMAP_STATS.stats()),
+        ("local_classifier", {}, LOCAL_CLASSIFIER_STATS.stats()),
+        ("llm_registry", {}, LLM_REGISTRY.stats()),
+        ("retry_budget", {}, RETRY_BUDGET.stats()),
+        ("admission", {}, LLM_SCHEDULER.stats()),
+        ("export_cache", {}, EXPORTER.stats()),
+    ]
+    for model, stats in CIRCUIT_BREAKERS.stats().items():
+        gauges.append(("circuit_breaker", {"model": model}, stats))
+    for llm in LLM_REGISTRY.instances():
+        if llm.extraction_cache is not None:
+            gauges.append(("extraction_cache", {"model": llm.model_name}, llm.extraction_cache.stats()))
+        if llm.document_cache is not None:
+            gauges.append(("document_cache", {"model": llm.model_name}, llm.document_cache.stats()))
+    return HttpResponse(render_prometheus(gauges), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@require_GET
+async def session(request):
+    """
+    Start an anonymous session, so conversations outlive the socket and can be exported.
+
+    The frontend calls this before connecting; the session cookie then identifies the
+    owner of its conversations on the socket and on export requests.
+    """
+    if not request.session.session_key:
+        await request.session.acreate()
+    return HttpResponse(status=204)
+
+
+@require_GET
+async def export_document(request, conversation_id: str):
+    """
+    Download a conversation's generated document, rendered on the server.
+
+    `?format=` picks md, html, doc (Word) or pdf (default). Responses carry an ETag
+    derived from the document, so `If-None-Match` revalidation answers 304 without
+    rendering; PDFs are streamed. Only the conversation's owner (the same user or
+    session as the socket that generated it) can export it; anyone else gets a 404.
+    """
+    export_format = request.GET.get("format", "pdf")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse(f"Unknown format, expected one of: {', '.join(EXPORT_FORMATS)}", status=400)
+
+    owner = conversation_owner(await request.auser(), request.session)
+    snapshot = await get_conversation_writer().load(owner, conversation_id) if owner else None
+    if not snapshot or not snapshot.get("document"):
+        return HttpResponse("No generated document for this conversation", status=404)
+    if snapshot.get("state") == "generating":
+        return HttpResponse("The document is still being generated", status=409)
+
+    document = snapshot["document"]
+    title = snapshot.get("document_type") or "Document"
+    etag = export_etag(export_format, document, title)
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    try:
+        rendered = await EXPORTER.export(export_format, document, title)
+    except ExportUnavailable as e:
+        return HttpResponse(str(e), status=503)
+
+    if export_format == "pdf":
+
+        async def chunks():
+            for start in range(0, len(rendered.body), EXPORT_STREAM_CHUNK_BYTES):
+                yield rendered.body[start : start + EXPORT_STREAM_CHUNK_BYTES]
+
+        response = StreamingHttpResponse(chunks(), content_type=rendered.content_type)
+    else:
+        response = HttpResponse(rendered.body, content_type=rendered.content_type)
+    response["Content-Length"] = str(len(rendered.body))
+    response["Content-Disposition"] = f'attachment; filename="{rendered.filename}"'
+    response["ETag"] = rendered.etag
+    # Browsers keep the file but check the ETag before reusing it
+    response["Cache-Control"] = "private, no-cache"
+    return response
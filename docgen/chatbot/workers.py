@@ -0,0 +1,140 @@
+"""
+Background generation workers for multi-process / multi-node deployments.
+
+In "worker" generation mode the socket-serving DocumentAgentConsumer hands document
+generation to a DocumentGenerationWorker over the channel layer. The worker is picked
+by a consistent hash of the conversation_id, runs the same streaming pipeline as the
+inline mode, and relays every frame back to the socket's reply channel.
+
+Workers are routed to by chatbot.sharding. Run them alongside daphne with:
+    python manage.py runworker document-generation-0 document-generation-1 ...
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from channels.consumer import AsyncConsumer
+
+from .consumers import DocumentAgentConsumer
+from .sharding import GENERATION_HEARTBEAT_INTERVAL
+from .store import get_conversation_writer
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationRelay(DocumentAgentConsumer):
+    """
+    DocumentAgentConsumer streaming pipeline run on a worker.
+
+    Not attached to a socket: every frame it would send is relayed over the channel
+    layer to the socket consumer that requested the generation.
+    """
+
+    def __init__(
+        self,
+        channel_layer,
+        reply_channel: str,
+        user_id: str = "anonymous",
+        owner: str = "anonymous",
+        token: Optional[str] = None,
+    ):
+        super().__init__()
+        self.channel_layer = channel_layer
+        self.reply_channel = reply_channel
+        self.user_id = user_id
+        self.owner = owner
+        # Handoff token from the socket, echoed on every event so it can drop a worker it gave up on
+        self.token = token
+        self.orchestrators = {}
+        self.generation_tasks = {}
+        self.current_conversation_id = None
+        self.remote_generations = {}
+        self.conversation_writer = get_conversation_writer()
+        self.stop_reason = None
+
+    def persist(self, conversation_id):
+        # After a reset the conversation is gone, after a timeout the socket persists it itself
+        if self.stop_reason in ("reset", "timeout"):
+            return
+        super().persist(conversation_id)
+
+    async def send_event(self, event_type: str, **event):
+        """Send an event about this generation to the socket that requested it."""
+        await self.channel_layer.send(
+            self.reply_channel,
+            {"type": event_type, "conversation_id": self.current_conversation_id, "token": self.token, **event},
+        )
+
+    async def send_json(self, content, close=False):
+        await self.send_event("generation.relay", frame=content)
+
+
+class DocumentGenerationWorker(AsyncConsumer):
+    """Runs document generations for the conversations routed to this worker's channel."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.relays: Dict[str, GenerationRelay] = {}
+
+    async def generation_start(self, message):
+        """Load the conversation from the store and stream its document to the reply channel."""
+        conversation_id = message["conversation_id"]
+        if conversation_id in self.relays:
+            logger.info(f"Generation already running for conversation {conversation_id}")
+            return
+
+        relay = GenerationRelay(
+            self.channel_layer,
+            message["reply_channel"],
+            message.get("user_id") or message["reply_channel"],
+            owner=message.get("owner") or f"socket:{message['reply_channel']}",
+            token=message.get("token"),
+        )
+        orchestrator = await relay.load_orchestrator(conversation_id)
+        # The snapshot was taken mid-handoff, so it rehydrates as "interrupted"; this worker now owns the run
+        orchestrator.state = "generating"
+        relay.orchestrators[conversation_id] = orchestrator
+        relay.current_conversation_id = conversation_id
+        self.relays[conversation_id] = relay
+
+        relay.start_local_generation(conversation_id, recovery=message.get("recovery", False))
+        asyncio.ensure_future(self._run(conversation_id, relay, relay.generation_tasks[conversation_id]))
+
+    async def generation_cancel(self, message):
+        """Cancel a running generation; _run reports the outcome."""
+        relay = self.relays.get(message["conversation_id"])
+        task = relay.generation_tasks.get(message["conversation_id"]) if relay else None
+        if task is not None and message.get("token") in (None, relay.token):
+            relay.stop_reason = message.get("reason", "stop")
+            task.cancel()
+
+    async def _run(self, conversation_id: str, relay: GenerationRelay, task: asyncio.Task):
+        """Wait for a generation to end, persist its final state and hand the conversation back."""
+        # Heartbeats tell the socket this worker is alive through long silent LLM calls
+        while not (await asyncio.wait([task], timeout=GENERATION_HEARTBEAT_INTERVAL))[0]:
+            await relay.send_event("generation.heartbeat")
+        orchestrator = relay.orchestrators[conversation_id]
+
+        if task.cancelled():
+            tokens_saved = orchestrator.estimated_tokens_saved()
+            logger.info(f"Cancelled generation for conversation {conversation_id}, ~{tokens_saved} tokens saved")
+            if relay.stop_reason == "reset":
+                # The user discarded the conversation; drop the snapshots this generation queued as well
+                await relay.conversation_writer.discard(relay.owner, [conversation_id])
+            if relay.stop_reason == "disconnect":
+                # Keep the partial document so the user can resume after reconnecting
+                orchestrator.state = "interrupted"
+            relay.persist(conversation_id)
+            if relay.stop_reason == "stop":
+                await relay.send_json(
+                    {
+                        "type": "system_message",
+                        "content": "🛑 Document generation stopped by user.",
+                        "tokens_saved": tokens_saved,
+                    }
+                )
+
+        del self.relays[conversation_id]
+        await relay.conversation_writer.flush()
+        await relay.send_event("generation.done")
@@ -9,9 +9,11 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-from chatbot.routing import websocket_urlpatterns
+from channels.security.websocket import OriginValidator
+from django.conf import settings
+from chatbot.routing import channel_routes, websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docgen.settings')
 
@@ -19,6 +21,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'docgen.settings')
 application = ProtocolTypeRouter(
     {
         "http": get_asgi_application(),
-        "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+        # The handshake carries the session cookie, so only the frontend's pages may open a socket
+        "websocket": OriginValidator(
+            AuthMiddlewareStack(URLRouter(websocket_urlpatterns)), settings.WEBSOCKET_ALLOWED_ORIGINS
+        ),
+        "channel": ChannelNameRouter(channel_routes),
     }
 )
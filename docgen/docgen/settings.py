@@ -39,11 +39,21 @@ FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 CORS_ALLOWED_ORIGINS = [
     FRONTEND_URL,
 ]
+# Lets the frontend read the file name and ETag of server-side exports
+CORS_EXPOSE_HEADERS = ['Content-Disposition', 'ETag']
+# The session cookie identifies who owns a conversation (read by chatbot.store), so it is sent cross-origin.
+# Only CORS_ALLOWED_ORIGINS may make credentialed requests; never combine this with CORS_ALLOW_ALL_ORIGINS.
+CORS_ALLOW_CREDENTIALS = True
+
+# Origins allowed to open the WebSocket (read by docgen.asgi), which carries the same session cookie.
+# In development any port on the allowed hosts will do; in production only the frontend.
+WEBSOCKET_ALLOWED_ORIGINS = [*CORS_ALLOWED_ORIGINS, *(ALLOWED_HOSTS if DEBUG else [])]
 
-# In production, add your Vercel domain
 if not DEBUG:
-    CORS_ALLOW_ALL_ORIGINS = True  # For deployment
-    CORS_ALLOW_CREDENTIALS = True
+    # The frontend is served from another site (set FRONTEND_URL to it), which only gets the session
+    # cookie with SameSite=None; the CORS and WebSocket origin allow-lists keep other sites from using it
+    SESSION_COOKIE_SAMESITE = 'None'
+    SESSION_COOKIE_SECURE = True
 
 
 # Application definition
@@ -95,42 +105,89 @@ WSGI_APPLICATION = 'docgen.wsgi.application'
 # Channels configuration
 ASGI_APPLICATION = "docgen.asgi.application"
 
-# Use a more robust channel layer configuration
-# For development, we'll still use InMemory but with no layer for production
-CHANNEL_LAYERS = {
-    "default": (
-        {
-            "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Channel layer: with REDIS_URL set, use Redis so several daphne processes and generation
+# workers (see chatbot.workers) can talk to each other; otherwise stay in-process.
+# CHANNEL_LAYER_BACKEND can point at any other layer implementation.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": os.getenv('CHANNEL_LAYER_BACKEND', "channels_redis.core.RedisChannelLayer"),
             "CONFIG": {
-                "capacity": 10000,  # Much higher capacity
+                "hosts": [REDIS_URL],
+                "capacity": 1000,  # frames queued per channel while a socket catches up
                 "expiry": 300,  # 5 minutes expiry
             },
-        }
-        if DEBUG
-        else {
-            # For production, use no channel layer (direct WebSocket handling)
-            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": os.getenv('CHANNEL_LAYER_BACKEND', "channels.layers.InMemoryChannelLayer"),
             "CONFIG": {
-                "capacity": 10000,
-                "expiry": 300,
+                "capacity": 10000,  # Much higher capacity
+                "expiry": 300,  # 5 minutes expiry
             },
-        }
-    ),
-}
+        },
+    }
 
 # WebSocket configuration for better connection handling
 WEBSOCKET_ACCEPT_ALL = True
 WEBSOCKET_CLOSE_TIMEOUT = 300  # 5 minutes timeout
 
-# For production with Redis, use this instead:
-# CHANNEL_LAYERS = {
-#     "default": {
-#         "BACKEND": "channels_redis.core.RedisChannelLayer",
-#         "CONFIG": {
-#             "hosts": [("127.0.0.1", 6379)],
-#         },
-#     },
-# }
+# Document generation scale-out (read by chatbot.sharding):
+#   GENERATION_MODE=worker hands generation to `python manage.py runworker document-generation-0 ...`
+#   processes, picked by a consistent hash of the conversation_id, instead of streaming from the
+#   socket's own process. Needs REDIS_URL and a shared CONVERSATION_STORE.
+#   GENERATION_WORKER_SHARDS sets how many document-generation-N channels exist.
+#   Workers send a heartbeat every GENERATION_HEARTBEAT_INTERVAL seconds (default 10); a socket that
+#   hears nothing for GENERATION_WORKER_TIMEOUT seconds (default 45) takes the conversation back.
+
+# Document generation strategy (read by chatbot.sections):
+#   GENERATION_STRATEGY=sections plans a table of contents with the TOC agent, then drafts the sections
+#   concurrently, SECTION_CONCURRENCY at a time, retrying a failed section SECTION_RETRIES times.
+#   GENERATION_STRATEGY=hybrid renders the document types with a clause template (chatbot.constants.clauses)
+#   locally from the fields and has the section agent draft only their bespoke clauses; other types stream in full.
+
+# Instrumentation (read by chatbot.metrics): GET /metrics serves Prometheus text for this process;
+#   LLM_CALL_LOG=true also logs one JSON line per LLM agent call on the chatbot.metrics logger.
+
+# LLM call resilience (read by chatbot.resilience): LLM_RETRY_ATTEMPTS, LLM_RETRY_BASE_DELAY and
+#   LLM_RETRY_MAX_DELAY shape the jittered backoff, LLM_CALL_TIMEOUT is the per-attempt deadline,
+#   LLM_RETRY_BUDGET_RATIO/CAPACITY cap retries process-wide, and BREAKER_FAILURE_THRESHOLD /
+#   BREAKER_RESET_SECONDS control the per-model circuit breaker.
+
+# LLM admission control (read by chatbot.admission): LLM_MAX_CONCURRENT and LLM_MAX_CONCURRENT_PER_USER
+#   bound concurrent LLM calls per process and per user, and LLM_INTERACTIVE_RESERVED global slots are
+#   kept for interactive turns so document generation cannot starve them. Queued clients get
+#   "queue_position" frames.
+
+# Model routing (read by chatbot.model_routing): LLM_ROUTING_PROFILE is "single" (every agent on
+#   LLM_MODEL_NAME) or "tiered" (extraction, field request/mapping and completion checks on
+#   LLM_FAST_MODEL_NAME, by default the fast model of the main model's provider). LLM_MODEL_<AGENT>
+#   overrides one agent, e.g. LLM_MODEL_COMPLETION_CHECK. LLM_FALLBACK_MODEL_NAME (or
+#   LLM_FALLBACK_MODEL_<AGENT>) takes over calls whose primary model has not answered within
+#   LLM_FALLBACK_AFTER seconds or whose circuit breaker is open.
+
+# Prompt caching (read by chatbot.llm): LLM_PROMPT_CACHE=true (default) asks providers to cache the static agent
+#   instructions; /metrics reports cache read/write and uncached input tokens per agent.
+
+# Local classifier tier (read by chatbot.classifier): LOCAL_CLASSIFIER_MODE is "fallback" (default; a confident
+#   local answer replaces keyword matching when the extraction agent fails), "first_pass" (a confident local
+#   answer skips the extraction agent), "hedge" (used when the agent has not answered within
+#   LOCAL_CLASSIFIER_HEDGE_AFTER seconds) or "off". LOCAL_CLASSIFIER_THRESHOLD is the confidence needed and
+#   LOCAL_CLASSIFIER_PATH the model written by `python manage.py train_classifier`.
+
+# Document export (read by chatbot.export): GET /export/<conversation_id>?format=md|html|doc|pdf renders the
+#   generated document in a pool of EXPORT_MAX_WORKERS processes and keeps up to EXPORT_CACHE_MAX_BYTES of
+#   rendered outputs, keyed by content hash (also sent as the ETag). PDF needs WeasyPrint's system libraries.
+
+# Document cache (read by chatbot.cache): DOCUMENT_CACHE_BACKEND=disk (or memory) reuses a finished document when
+#   the same document type, fields and goal are generated again with the same models and prompts, replaying it
+#   in DOCUMENT_CACHE_REPLAY_CHARS chunks every DOCUMENT_CACHE_REPLAY_INTERVAL seconds. Off ("none") by default.
+#   The disk cache in DOCUMENT_CACHE_DIR keeps at most DOCUMENT_CACHE_MAX_ENTRIES files and DOCUMENT_CACHE_MAX_BYTES,
+#   evicting the least recently used; invalidate with `python manage.py clear_document_cache` or the
+#   Conversation admin action.
 
 
 # Database configuration
@@ -154,6 +211,12 @@ if not DEBUG and 'DATABASE_URL' in os.environ:
         pass  # Fallback to SQLite if dj_database_url not available
 
 
+# Conversation persistence: orchestrator state is written behind the request path through this
+# backend (any ConversationStore import path) and rehydrated lazily on reconnect
+CONVERSATION_STORE = os.getenv('CONVERSATION_STORE', 'chatbot.store.DatabaseConversationStore')
+CONVERSATION_STORE_FLUSH_INTERVAL = float(os.getenv('CONVERSATION_STORE_FLUSH_INTERVAL', '2.0'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
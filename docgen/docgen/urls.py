@@ -17,6 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from chatbot import views as chatbot_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', chatbot_views.metrics, name='metrics'),
+    path('session', chatbot_views.session, name='session'),
+    path('export/<str:conversation_id>', chatbot_views.export_document, name='export'),
 ]
@@ -1,4 +1,4 @@
-import { useState, useEffect, lazy, Suspense } from 'react';
+import { useState, useEffect, useRef, lazy, Suspense } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useWebSocket, Message, WebSocketMessage } from '@/hooks/useWebSocket';
 import { useConversationManager } from '@/hooks/useConversationManager';
@@ -6,7 +6,7 @@ import { ChatWindow } from './ChatWindow';
 import { ConversationHistorySidebar } from './ConversationHistorySidebar';
 import { SidebarProvider } from '@/components/ui/sidebar';
 import { Button } from '@/components/ui/button';
-import { Wifi, WifiOff, Trash2 } from 'lucide-react';
+import { Wifi, WifiOff, Trash2, Clock, FileText } from 'lucide-react';
 import { toast } from '@/hooks/use-toast';
 
 // Lazy load the heavy PreviewPane component
@@ -35,6 +35,11 @@ export const AssistantPage = ({
   const [isGenerationComplete, setIsGenerationComplete] = useState(false);
   const [isChatEnded, setIsChatEnded] = useState(false);
   const [streamingMessage, setStreamingMessage] = useState<Message | null>(null);
+  // Frames can arrive faster than renders, so the streaming message is also kept in a ref
+  const streamingMessageRef = useRef<Message | null>(null);
+  const [queuePosition, setQueuePosition] = useState(0);
+  // Pages of the streamed document, reported by the backend as it paginates
+  const [pageCount, setPageCount] = useState(0);
   
   // Use the new conversation manager
   const {
@@ -46,7 +51,8 @@ export const AssistantPage = ({
     switchToConversation,
     deleteConversation,
     addMessage,
-    updateDocumentContent,
+    appendDocumentContent,
+    getDocumentContent,
     clearCurrentSession,
     getCurrentConversationTitle
   } = useConversationManager(userId);
@@ -67,7 +73,9 @@ export const AssistantPage = ({
     setIsGenerationStarting(false);
     setIsGenerationComplete(false); // Reset completion status for new conversation
     setIsChatEnded(false); // Reset chat ended status for new conversation
+    streamingMessageRef.current = null;
     setStreamingMessage(null);
+    setPageCount(0);
     setActiveTab('chat');
     
     toast({
@@ -92,7 +100,9 @@ export const AssistantPage = ({
     setIsGenerationStarting(false);
     setIsGenerationComplete(false);
     setIsChatEnded(false); // Reset chat ended status when clearing session
+    streamingMessageRef.current = null;
     setStreamingMessage(null);
+    setPageCount(0);
     setActiveTab('chat');
     
     // Clear ALL backend orchestrator objects
@@ -113,6 +123,7 @@ export const AssistantPage = ({
         break;
 
       case 'assistant_message':
+        setQueuePosition(0);
         if (data.content) {
           addMessage({ role: 'assistant', content: data.content });
           
@@ -136,26 +147,21 @@ export const AssistantPage = ({
         break;
 
       case 'generate_document': {
+        setQueuePosition(0);
         setIsGenerating(true);
         setIsGenerationComplete(false); // Reset completion status when starting new generation
+        setPageCount(prev => Math.max(prev, 1));
         if (data.chunk) {
-          const newContent = documentContent + data.chunk;
-          updateDocumentContent(newContent);
-          
+          // Each frame carries only the text since the previous one
+          appendDocumentContent(data.chunk);
+
           // Create or update streaming message for typewriter effect
-          if (!streamingMessage) {
-            const newStreamingMessage: Message = {
-              role: 'assistant',
-              content: data.chunk,
-              timestamp: Date.now()
-            };
-            setStreamingMessage(newStreamingMessage);
-          } else {
-            setStreamingMessage(prev => prev ? {
-              ...prev,
-              content: prev.content + data.chunk
-            } : null);
-          }
+          const previous = streamingMessageRef.current;
+          const next: Message = previous
+            ? { ...previous, content: previous.content + data.chunk }
+            : { role: 'assistant', content: data.chunk, timestamp: Date.now() };
+          streamingMessageRef.current = next;
+          setStreamingMessage(next);
         }
         break;
       }
@@ -165,18 +171,19 @@ export const AssistantPage = ({
         setIsGenerationComplete(true);
         
         // Add the complete document as a final message
-        if (streamingMessage) {
-          addMessage(streamingMessage);
+        if (streamingMessageRef.current) {
+          addMessage(streamingMessageRef.current);
+          streamingMessageRef.current = null;
           setStreamingMessage(null);
         }
         
-        // Update with final document if provided
-        if (data.full_document) {
-          updateDocumentContent(data.full_document);
+        // The text already arrived in the streamed chunks; only the page layout comes with this frame
+        if (data.pages) {
+          setPageCount(data.pages.count);
         }
         
         // Check if document seems incomplete for user feedback
-        const finalContent = data.full_document || documentContent;
+        const finalContent = getDocumentContent();
         const isIncomplete = finalContent.length < 5000 || // Less than ~5 pages
                             !finalContent.toLowerCase().includes('signature') ||
                             finalContent.trim().endsWith('...');
@@ -194,12 +201,22 @@ export const AssistantPage = ({
           });
         }
         
-        if (documentContent) {
-          onDocumentGenerated?.(documentContent);
+        if (finalContent) {
+          onDocumentGenerated?.(finalContent);
         }
         break;
       }
       
+      case 'page_break':
+        // A new page started while the document streams
+        setPageCount(data.page ?? 0);
+        break;
+
+      case 'queue_position':
+        // The backend is waiting for a free LLM slot; 0 means our call has started
+        setQueuePosition(data.position ?? 0);
+        break;
+
       case 'all_sessions_reset': {
         // Backend has confirmed all sessions have been cleared
         toast({
@@ -296,6 +313,7 @@ export const AssistantPage = ({
     // Reset frontend state
     setIsGenerating(false);
     setIsGenerationStarting(false);
+    streamingMessageRef.current = null;
     setStreamingMessage(null);
   };
 
@@ -333,6 +351,7 @@ export const AssistantPage = ({
             setIsGenerationStarting(false);
             setIsGenerationComplete(false);
             setIsChatEnded(false); // Reset chat ended status when switching conversations
+            streamingMessageRef.current = null;
             setStreamingMessage(null);
             
             // Notify backend about conversation switch
@@ -384,6 +403,20 @@ export const AssistantPage = ({
 
                 {/* Connection Status and Clear Button */}
                 <div className="flex items-center gap-2 sm:gap-4 flex-shrink-0">
+                  {queuePosition > 0 && (
+                    <div className="flex items-center gap-1 sm:gap-2 text-muted-foreground">
+                      <Clock className="w-4 h-4 sm:w-5 sm:h-5" />
+                      <span className="text-xs sm:text-sm font-medium">In queue · position {queuePosition}</span>
+                    </div>
+                  )}
+                  {pageCount > 0 && (isGenerating || isGenerationComplete) && (
+                    <div className="flex items-center gap-1 sm:gap-2 text-muted-foreground">
+                      <FileText className="w-4 h-4 sm:w-5 sm:h-5" />
+                      <span className="text-xs sm:text-sm font-medium">
+                        {pageCount} {pageCount === 1 ? 'page' : 'pages'}
+                      </span>
+                    </div>
+                  )}
                   {isConnected ? (
                     <div className="flex items-center gap-1 sm:gap-2 text-accent">
                       <Wifi className="w-4 h-4 sm:w-5 sm:h-5" />
@@ -485,6 +518,7 @@ export const AssistantPage = ({
                       isGenerating={isGenerating}
                       isGenerationStarting={isGenerationStarting}
                       onBackToChat={() => setActiveTab('chat')}
+                      conversationId={currentConversationId}
                     />
                   </Suspense>
                 </motion.div>
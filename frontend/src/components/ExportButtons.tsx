@@ -6,13 +6,36 @@ import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
 import { toast } from '@/hooks/use-toast';
 
+const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
 interface ExportButtonsProps {
   content: string;
   isGenerating: boolean;
   onBackToChat: () => void;
+  conversationId?: string;
 }
 
-export const ExportButtons = ({ content, isGenerating, onBackToChat }: ExportButtonsProps) => {
+export const ExportButtons = ({ content, isGenerating, onBackToChat, conversationId }: ExportButtonsProps) => {
+  // Download the PDF rendered by the backend; false if it cannot serve one (e.g. no PDF renderer installed)
+  const downloadServerPDF = async (): Promise<boolean> => {
+    if (!conversationId) return false;
+
+    try {
+      // The session cookie proves this browser owns the conversation
+      const response = await fetch(`${API_BASE}/export/${encodeURIComponent(conversationId)}?format=pdf`, {
+        credentials: 'include',
+      });
+      if (!response.ok) return false;
+
+      const disposition = response.headers.get('Content-Disposition') || '';
+      const filename = disposition.match(/filename="([^"]+)"/)?.[1] || `document_${Date.now()}.pdf`;
+      saveAs(await response.blob(), filename);
+      return true;
+    } catch {
+      return false;
+    }
+  };
+
   const handleExportMarkdown = () => {
     if (!content) return;
 
@@ -149,6 +172,14 @@ export const ExportButtons = ({ content, isGenerating, onBackToChat }: ExportBut
         description: 'Please wait while we prepare your document...',
       });
 
+      if (await downloadServerPDF()) {
+        toast({
+          title: 'PDF Exported',
+          description: 'Your document has been downloaded as a PDF.',
+        });
+        return;
+      }
+
       const pdf = new jsPDF({
         orientation: 'portrait',
         unit: 'mm',
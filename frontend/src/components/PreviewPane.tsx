@@ -11,9 +11,16 @@ interface PreviewPaneProps {
   isGenerating: boolean;
   isGenerationStarting?: boolean;
   onBackToChat: () => void;
+  conversationId?: string;
 }
 
-export const PreviewPane = ({ content, isGenerating, isGenerationStarting = false, onBackToChat }: PreviewPaneProps) => {
+export const PreviewPane = ({
+  content,
+  isGenerating,
+  isGenerationStarting = false,
+  onBackToChat,
+  conversationId,
+}: PreviewPaneProps) => {
   return (
     <div className="flex flex-col h-full">
       {/* Header */}
@@ -35,7 +42,12 @@ export const PreviewPane = ({ content, isGenerating, isGenerationStarting = fals
               <span className="text-xs sm:text-sm text-muted-foreground">Loading...</span>
             </div>
           }>
-            <ExportButtons content={content} isGenerating={isGenerating} onBackToChat={onBackToChat} />
+            <ExportButtons
+              content={content}
+              isGenerating={isGenerating}
+              onBackToChat={onBackToChat}
+              conversationId={conversationId}
+            />
           </Suspense>
         </div>
       </div>
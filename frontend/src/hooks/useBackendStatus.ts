@@ -13,7 +13,8 @@ export const useBackendStatus = () => {
   
   const checkBackendStatus = async () => {
     try {
-      const response = await fetch(API_BASE);
+      // Also starts the session whose cookie owns this browser's conversations on the socket and exports
+      const response = await fetch(`${API_BASE}/session`, { credentials: 'include' });
       // keep a light log for diagnostics
       console.log('Backend status response:', response.status);
       if (response.ok) {
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Message } from './useWebSocket';
 
 export interface ConversationData {
@@ -18,6 +18,8 @@ export const useConversationManager = (userId: string) => {
   const [currentConversationId, setCurrentConversationId] = useState<string>('');
   const [currentMessages, setCurrentMessages] = useState<Message[]>([]);
   const [currentDocumentContent, setCurrentDocumentContent] = useState<string>('');
+  // Latest document text; streamed frames can arrive faster than renders, so appends go through this
+  const documentRef = useRef('');
   const [isContentChanged, setIsContentChanged] = useState(false); // Track if content actually changed
 
   // Load conversations on mount (but don't auto-load current conversation)
@@ -102,6 +104,7 @@ export const useConversationManager = (userId: string) => {
     const newId = `conversation-${Date.now()}`;
     setCurrentConversationId(newId);
     setCurrentMessages([]);
+    documentRef.current = '';
     setCurrentDocumentContent('');
     setIsContentChanged(false); // Reset flag for new conversation
   };
@@ -116,6 +119,7 @@ export const useConversationManager = (userId: string) => {
     if (conversation) {
       setCurrentConversationId(id);
       setCurrentMessages(conversation.messages);
+      documentRef.current = conversation.documentContent;
       setCurrentDocumentContent(conversation.documentContent);
       setIsContentChanged(false); // Reset flag when switching - this is not new content
       return {
@@ -133,10 +137,17 @@ export const useConversationManager = (userId: string) => {
   };
 
   const updateDocumentContent = (content: string) => {
+    documentRef.current = content;
     setCurrentDocumentContent(content);
     setIsContentChanged(true); // Mark that content actually changed
   };
 
+  const appendDocumentContent = (chunk: string) => {
+    documentRef.current += chunk;
+    setCurrentDocumentContent(documentRef.current);
+    setIsContentChanged(true);
+  };
+
   const deleteConversation = (id: string) => {
     setConversations(prev => prev.filter(c => c.id !== id));
     
@@ -149,6 +160,7 @@ export const useConversationManager = (userId: string) => {
   const clearCurrentSession = () => {
     // Clear everything - current session and all conversation history
     setCurrentMessages([]);
+    documentRef.current = '';
     setCurrentDocumentContent('');
     setConversations([]); // Clear all conversation history
     // Start fresh with a new conversation ID
@@ -177,6 +189,8 @@ export const useConversationManager = (userId: string) => {
     // Content management
     addMessage,
     updateDocumentContent,
+    appendDocumentContent,
+    getDocumentContent: () => documentRef.current,
     clearCurrentSession,
     
     // Utils
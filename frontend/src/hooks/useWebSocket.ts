@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 
-export type MessageType = 'user_message' | 'assistant_message' | 'system_message' | 'generate_document' | 'generation_complete' | 'switch_conversation' | 'conversation_switched' | 'stop_generation' | 'reset_all_sessions' | 'all_sessions_reset' | 'chat_ended';
+export type MessageType = 'user_message' | 'assistant_message' | 'system_message' | 'generate_document' | 'generation_complete' | 'switch_conversation' | 'conversation_switched' | 'stop_generation' | 'reset_all_sessions' | 'all_sessions_reset' | 'chat_ended' | 'queue_position' | 'page_break';
 
 export interface Message {
   role: 'user' | 'assistant' | 'system';
@@ -13,8 +13,12 @@ export interface WebSocketMessage {
   content?: string;
   chunk?: string;
   chunk_index?: number;
-  full_document?: string;
   conversation_id?: string;
+  position?: number;
+  page?: number;
+  offset?: number;
+  pages?: { count: number; breaks: number[] };
+  document_length?: number;
 }
 
 interface UseWebSocketProps {
@@ -33,6 +37,15 @@ export const useWebSocket = ({ url, onMessage, onOpen, onClose, onError }: UseWe
   const reconnectAttempts = useRef(0);
   const maxReconnectDelay = 30000; // 30 seconds
   const maxReconnectAttempts = 10; // Limit reconnection attempts
+  // connect() runs once per url, so the socket handlers read the latest callbacks through refs
+  const onMessageRef = useRef(onMessage);
+  const onOpenRef = useRef(onOpen);
+  const onCloseRef = useRef(onClose);
+  const onErrorRef = useRef(onError);
+  onMessageRef.current = onMessage;
+  onOpenRef.current = onOpen;
+  onCloseRef.current = onClose;
+  onErrorRef.current = onError;
 
   const connect = () => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
@@ -63,13 +76,13 @@ export const useWebSocket = ({ url, onMessage, onOpen, onClose, onError }: UseWe
       setIsConnected(true);
       setIsReconnecting(false);
       reconnectAttempts.current = 0;
-      onOpen?.();
+      onOpenRef.current?.();
     };
 
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data) as WebSocketMessage;
-        onMessage(data);
+        onMessageRef.current(data);
       } catch (error) {
         console.error('Failed to parse WebSocket message:', error);
       }
@@ -79,7 +92,7 @@ export const useWebSocket = ({ url, onMessage, onOpen, onClose, onError }: UseWe
       console.log('WebSocket disconnected. Code:', event.code, 'Reason:', event.reason);
       clearTimeout(connectionTimeout);
       setIsConnected(false);
-      onClose?.();
+      onCloseRef.current?.();
       
       // Only reconnect if it wasn't a normal closure and we haven't exceeded attempts
       if (event.code !== 1000 && reconnectAttempts.current < maxReconnectAttempts) {
@@ -99,7 +112,7 @@ export const useWebSocket = ({ url, onMessage, onOpen, onClose, onError }: UseWe
     ws.onerror = (error) => {
       console.error('WebSocket error:', error);
       clearTimeout(connectionTimeout);
-      onError?.(error);
+      onErrorRef.current?.(error);
     };
 
     wsRef.current = ws;